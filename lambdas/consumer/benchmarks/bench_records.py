@@ -0,0 +1,105 @@
+# Python Standard Library imports
+import argparse
+import timeit
+
+# local imports
+from consumer.lambda_function import verify_sqs_record
+from consumer.lambda_function import verify_sqs_source
+from consumer.records import parse_sqs_event
+
+QUEUE_ARN = "arn:aws:sqs:us-west-2:123456789012:sqs-simple-example"
+
+
+def make_event(batch_size):
+    """
+    Build a synthetic SQS event.
+
+    :param batch_size (int): The number of records in the event.
+    :return (dict): The SQS event.
+    """
+
+    return {
+        "Records": [
+            {
+                "messageId": f"059f36b4-87a3-44ab-83d2-{i:012d}",
+                "receiptHandle": "AQEBwJnKyrHigUMZj6rYigCgxlaS3SLy0a...",
+                "body": '{"text": "Cogito ergo sum"}',
+                "attributes": {
+                    "ApproximateReceiveCount": "1",
+                    "SentTimestamp": "1545082649183",
+                    "SenderId": "AIDAIENQZJOLO23YVJ4VO",
+                    "ApproximateFirstReceiveTimestamp": "1545082649185",
+                },
+                "messageAttributes": {},
+                "md5OfBody": "e4e68fb7bd0e697a0ae8f1bb342846b3",
+                "eventSource": "aws:sqs",
+                "eventSourceARN": QUEUE_ARN,
+                "awsRegion": "us-west-2",
+            }
+            for i in range(batch_size)
+        ]
+    }
+
+
+def validate_dicts(event):
+    """
+    Validate records the way the handler did before records were parsed once.
+
+    :param event (dict): The SQS event.
+    :return (None): Default 'None' returned.
+    """
+
+    for record in event["Records"]:
+        verify_sqs_record(record)
+        verify_sqs_source(record, QUEUE_ARN)
+        record["messageId"], record["body"], record["messageId"]
+
+
+def validate_records(event):
+    """
+    Validate records by parsing them once into SqsRecord objects.
+
+    :param event (dict): The SQS event.
+    :return (None): Default 'None' returned.
+    """
+
+    for record in parse_sqs_event(event, QUEUE_ARN):
+        record.message_id, record.body, record.message_id
+
+
+def main():
+    """
+    Main function to benchmark per-record validation cost.
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark SQS record validation.")
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100, 1000, 10000],
+        help="The SQS batch sizes to benchmark",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="The number of timing repetitions"
+    )
+    args = parser.parse_args()
+
+    print(f"{'batch size':>10} {'dict (us/rec)':>14} {'parsed (us/rec)':>16}")
+
+    for batch_size in args.batch_sizes:
+        event = make_event(batch_size)
+        number = max(1, 10000 // batch_size)
+        results = []
+
+        for func in (validate_dicts, validate_records):
+            best = min(
+                timeit.repeat(lambda: func(event), number=number, repeat=args.repeat)
+            )
+            results.append(best / number / batch_size * 1e6)
+
+        print(f"{batch_size:>10} {results[0]:>14.3f} {results[1]:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
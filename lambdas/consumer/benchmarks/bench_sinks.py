@@ -0,0 +1,123 @@
+# Python Standard Library imports
+import argparse
+import os
+import tempfile
+import time
+
+# 3rd party imports
+import boto3
+
+from moto import mock_aws
+
+# local imports
+from consumer.lambda_function import build_pipeline
+from consumer.sinks import LocalSink
+from consumer.sinks import NullSink
+from consumer.sinks import S3Sink
+from consumer.sinks import StdoutSink
+
+QUEUE_ARN = "arn:aws:sqs:us-west-2:123456789012:sqs-simple-example"
+
+
+def make_records(count, size):
+    """
+    Build synthetic SQS records.
+
+    :param count (int): The number of records.
+    :param size (int): The length of each message's text.
+    :return (list): The SQS records.
+    """
+
+    text = ("Cogito ergo sum " * (size // 16 + 1))[:size]
+
+    return [
+        {
+            "messageId": f"059f36b4-87a3-44ab-83d2-{i:012d}",
+            "body": f'{{"text": "{text}"}}',
+            "attributes": {"SentTimestamp": "1545082649183"},
+            "messageAttributes": {},
+            "eventSource": "aws:sqs",
+            "eventSourceARN": QUEUE_ARN,
+        }
+        for i in range(count)
+    ]
+
+
+def run(sink, count, size):
+    """
+    Run records through the consumer's pipeline into a sink and time it.
+
+    :param sink (object): The sink.
+    :param count (int): The number of records.
+    :param size (int): The length of each message's text.
+    :return (float): The seconds taken.
+    """
+
+    records = make_records(count, size)
+    pipeline = build_pipeline(frozenset((QUEUE_ARN,)), sink)
+
+    start = time.perf_counter()
+    try:
+        for _ in pipeline.run(records):
+            pass
+    finally:
+        sink.close()
+
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Main function to benchmark the consumer's pipeline against each sink.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the consumer's pipeline with each output sink."
+    )
+    parser.add_argument(
+        "--records", type=int, default=5000, help="The number of records"
+    )
+    parser.add_argument(
+        "--size", type=int, default=1024, help="The length of each message's text"
+    )
+    args = parser.parse_args()
+
+    # moto stands in for S3, so the s3 row shows the cost of the S3 client and
+    # its threads rather than of the network
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")  # nosec
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")  # nosec
+
+    with (
+        tempfile.TemporaryDirectory() as directory,
+        open(os.devnull, "w") as devnull,
+        mock_aws(),
+    ):
+        s3 = boto3.client("s3")
+        s3.create_bucket(
+            Bucket="bench-output",
+            CreateBucketConfiguration={"LocationConstraint": "us-west-2"},
+        )
+
+        sinks = {
+            "null": NullSink,
+            "stdout": lambda: StdoutSink(devnull),
+            "local": lambda: LocalSink(directory),
+            "s3 (moto)": lambda: S3Sink("bench-output", client=s3),
+        }
+
+        print(f"{args.records} records of {args.size} characters")
+        print(f"{'sink':>10} {'rec/s':>10} {'us/rec':>8} {'I/O us/rec':>11}")
+
+        # the null sink does no I/O, so its time is the cost of processing alone
+        baseline = None
+
+        for name, make_sink in sinks.items():
+            us = run(make_sink(), args.records, args.size) / args.records * 1e6
+            baseline = us if baseline is None else baseline
+
+            print(f"{name:>10} {1e6 / us:>10.1f} {us:>8.1f} {us - baseline:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# Python Standard Library imports
+import argparse
+import time
+
+from functools import partial
+
+# local imports
+from consumer.pipeline import Pipeline
+from consumer.pipeline import Stage
+from consumer.transforms import ProcessPool
+from consumer.transforms import apply_transform
+from consumer.transforms import available_cpus
+from consumer.transforms import get_transform
+from consumer.transforms import register_transform
+
+
+@register_transform("word-frequencies", cpu_bound=True)
+def word_frequencies(payload):
+    """
+    A pure Python transform that holds the GIL: count the words of a message.
+
+    :param payload (dict): The decoded body of an SQS message.
+    :return (str): The ten most frequent words and their counts.
+    """
+
+    counts = {}
+
+    for word in payload["text"].split():
+        word = word.strip(".,;:!?").lower()
+        counts[word] = counts.get(word, 0) + 1
+
+    top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:10]
+
+    return " ".join(f"{word}={count}" for word, count in top)
+
+
+def make_payloads(count, words):
+    """
+    Build synthetic decoded messages.
+
+    :param count (int): The number of messages.
+    :param words (int): The number of words in each message.
+    :return (list): The decoded messages.
+    """
+
+    text = " ".join(f"word{i % 997}" for i in range(words))
+
+    return [{"text": text} for _ in range(count)]
+
+
+def run(payloads, transform, pool, concurrency):
+    """
+    Run the payloads through a transform stage and time it.
+
+    :param payloads (list): The decoded messages.
+    :param transform (Transform): The transform.
+    :param pool (ProcessPool): The process pool, or None to transform in this process.
+    :param concurrency (int): The number of threads in the transform stage.
+    :return (float): The seconds taken.
+    """
+
+    pipeline = Pipeline(
+        [
+            Stage(
+                "transform",
+                partial(apply_transform, transform, pool=pool),
+                concurrency=concurrency,
+            )
+        ]
+    )
+
+    start = time.perf_counter()
+    for _ in pipeline.run(payloads):
+        pass
+
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Main function to benchmark how CPU-bound transforms scale with vCPUs.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark CPU-bound transforms in threads and in a process pool."
+    )
+    parser.add_argument(
+        "--messages", type=int, default=2000, help="The number of messages"
+    )
+    parser.add_argument(
+        "--words", type=int, default=2000, help="The number of words per message"
+    )
+    parser.add_argument(
+        "--transform",
+        default="word-frequencies",
+        help="The registered transform to benchmark",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        nargs="+",
+        help="The pool sizes to benchmark; defaults to 1, 2, 4, ... up to the vCPUs",
+    )
+    args = parser.parse_args()
+
+    cpus = available_cpus()
+    sizes = args.processes or sorted(
+        {2**i for i in range(cpus.bit_length()) if 2**i <= cpus} | {cpus}
+    )
+    payloads = make_payloads(args.messages, args.words)
+    transform = get_transform(args.transform)
+
+    print(f"{cpus} vCPUs, {args.messages} messages of {args.words} words")
+    print(f"{'mode':>8} {'workers':>8} {'msg/s':>10} {'speedup':>8}")
+
+    # threads in this process are the baseline: the GIL lets one run at a time
+    baseline = args.messages / run(payloads, transform, None, 1)
+    print(f"{'inline':>8} {1:>8} {baseline:>10.1f} {1:>8.2f}")
+
+    for size in sizes:
+        rate = args.messages / run(payloads, transform, None, size)
+        print(f"{'threads':>8} {size:>8} {rate:>10.1f} {rate / baseline:>8.2f}")
+
+    for size in sizes:
+        pool = ProcessPool(size)
+
+        try:
+            rate = args.messages / run(payloads, transform, pool, size)
+        finally:
+            pool.close()
+
+        print(f"{'pool':>8} {size:>8} {rate:>10.1f} {rate / baseline:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# Python Standard Library imports
+import argparse
+import json
+import time
+
+# local imports
+from consumer.lambda_function import build_pipeline
+from consumer.sinks import NullSink
+
+QUEUE_ARN = "arn:aws:sqs:us-west-2:123456789012:sqs-simple-example"
+
+
+def make_record(i, body, message_attributes=None):
+    """
+    Build a synthetic SQS record.
+
+    :param i (int): The record's number, used in its messageId.
+    :param body (str): The message body.
+    :param message_attributes (dict, optional): The message attributes. Defaults to none.
+    :return (dict): The SQS record.
+    """
+
+    return {
+        "messageId": f"059f36b4-87a3-44ab-83d2-{i:012d}",
+        "body": body,
+        "attributes": {"SentTimestamp": "1545082649183"},
+        "messageAttributes": message_attributes or {},
+        "eventSource": "aws:sqs",
+        "eventSourceARN": QUEUE_ARN,
+    }
+
+
+def make_records(count, size, per_message):
+    """
+    Build synthetic SQS records carrying 'count' documents, one or many to a message.
+
+    :param count (int): The number of documents.
+    :param size (int): The length of each document's text.
+    :param per_message (int): The number of documents packed into each message; 1 sends each on its own.
+    :return (list): The SQS records.
+    """
+
+    text = ("Cogito ergo sum " * (size // 16 + 1))[:size]
+    documents = [{"id": i, "text": text} for i in range(count)]
+
+    if per_message == 1:
+        return [
+            make_record(i, json.dumps(document)) for i, document in enumerate(documents)
+        ]
+
+    records = []
+
+    for start in range(0, count, per_message):
+        packed = documents[start : start + per_message]
+        body = json.dumps(
+            {
+                "documents": [
+                    {
+                        "correlation_id": str(document["id"]),
+                        "ingest_timestamp": 1545082649000,
+                        "document": document,
+                    }
+                    for document in packed
+                ]
+            }
+        )
+        attributes = {
+            "PackedDocuments": {"stringValue": str(len(packed)), "dataType": "Number"}
+        }
+        records.append(make_record(len(records), body, attributes))
+
+    return records
+
+
+def run(records):
+    """
+    Run SQS records through the consumer's pipeline into the null sink and time it.
+
+    :param records (list): The SQS records.
+    :return (tuple): The seconds taken and the number of documents written.
+    """
+
+    pipeline = build_pipeline(frozenset((QUEUE_ARN,)), NullSink())
+
+    start = time.perf_counter()
+    written = sum(1 for _ in pipeline.run(records))
+
+    return time.perf_counter() - start, written
+
+
+def main():
+    """
+    Main function to benchmark processing small documents with and without packing.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the consumer's pipeline on packed and unpacked messages."
+    )
+    parser.add_argument(
+        "--documents", type=int, default=20000, help="The number of documents"
+    )
+    parser.add_argument(
+        "--size", type=int, default=256, help="The length of each document's text"
+    )
+    parser.add_argument(
+        "--per-message",
+        type=int,
+        default=200,
+        help="The number of documents in each packed message",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10,
+        help="The number of records in each invocation's event",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{args.documents} documents of {args.size} characters, "
+        f"{args.per_message} to a packed message"
+    )
+    print(f"{'mode':>8} {'docs/s':>10} {'us/doc':>8} {'recs/1k':>8} {'invs/1k':>8}")
+
+    for mode, per_message in (("unpacked", 1), ("packed", args.per_message)):
+        records = make_records(args.documents, args.size, per_message)
+        count = len(records)
+
+        seconds, written = run(records)
+
+        us = seconds / written * 1e6
+        per_1k = 1000 / written
+        print(
+            f"{mode:>8} {1e6 / us:>10.1f} {us:>8.1f} "
+            f"{count * per_1k:>8.1f} {-(-count // args.batch_size) * per_1k:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
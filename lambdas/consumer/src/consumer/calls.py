@@ -0,0 +1,290 @@
+# Python Standard Library imports
+import threading
+import time
+
+from functools import wraps
+
+# third-party library imports
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.metrics import EphemeralMetrics
+from aws_lambda_powertools.metrics import MetricUnit
+from botocore.utils import determine_content_length
+
+# local imports
+from consumer.config import config
+
+logger = Logger(child=True)
+
+# the key a call's accountant, operation and start time are kept under in its
+# request context, between its 'before-call' and 'after-call' events
+CONTEXT_KEY = "call_accounting"
+
+# the totals kept for each operation and the metric each is published as
+CALL_METRICS = {
+    "calls": ("AwsCalls", MetricUnit.Count),
+    "errors": ("AwsCallErrors", MetricUnit.Count),
+    "bytes_sent": ("AwsBytesSent", MetricUnit.Bytes),
+    "bytes_received": ("AwsBytesReceived", MetricUnit.Bytes),
+    "milliseconds": ("AwsCallLatency", MetricUnit.Milliseconds),
+}
+
+# the totals of each operation since they were last published, keyed by
+# (service, operation); clients are shared by worker threads, so the totals
+# are updated under a lock
+_totals = {}
+_totals_lock = threading.Lock()
+
+
+def request_size(request_dict):
+    """
+    Get the size of the body of a request about to be sent.
+
+    :param request_dict (dict): The request, as botocore passes it to 'before-call' handlers.
+    :return (int): The size in bytes, or 0 if it cannot be told without reading the body.
+    """
+
+    body = request_dict.get("body")
+
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+
+    return determine_content_length(body) or 0
+
+
+def response_size(http_response, model):
+    """
+    Get the size of the body of a response.
+
+    A streamed body, such as that of GetObject, is not read here, so its size
+    is taken from its Content-Length header alone.
+
+    :param http_response (AWSResponse): The HTTP response.
+    :param model (OperationModel): The operation called.
+    :return (int): The size in bytes, or 0 if it is not known.
+    """
+
+    length = http_response.headers.get("content-length")
+
+    if length is not None:
+        return int(length)
+
+    if model.has_streaming_output or http_response.raw is None:
+        return 0
+
+    return len(http_response.content)
+
+
+def _add(service, operation, **amounts):
+    with _totals_lock:
+        totals = _totals.setdefault(
+            (service, operation), dict.fromkeys(CALL_METRICS, 0)
+        )
+
+        for name, amount in amounts.items():
+            totals[name] += amount
+
+
+def record_call_error(context):
+    """
+    Count a call as failed without a response, if it is being accounted for.
+
+    botocore emits neither 'after-call' nor 'after-call-error' for a call that
+    a 'before-call' handler fails, such as an injected timeout, so the handler
+    records the failure with this before it raises.
+
+    :param context (dict): The request context.
+    :return (None): Default 'None' returned.
+    """
+
+    if CONTEXT_KEY not in context:
+        return
+
+    accountant, operation, start = context.pop(CONTEXT_KEY)
+    accountant.finish(operation, start, errors=1)
+
+
+class CallAccountant:
+    """
+    Counts the calls a boto3 client makes, with the bytes they send and receive and the time they take.
+
+    The accountant hooks the client's 'before-call', 'after-call' and
+    'after-call-error' events, so it sees each call the code makes, whether
+    it goes to AWS, to moto, or is answered by the fault injector.  A call
+    retried by the Retrier is counted once per attempt.  A call is an error
+    if its response has an error status or it got no response at all.
+    """
+
+    def __init__(self, service):
+        self.service = service
+
+    def install(self, client):
+        """
+        Hook the accountant into a client's calls.
+
+        :param client (botocore.client.BaseClient): The client.
+        :return (botocore.client.BaseClient): The client.
+        """
+
+        client.meta.events.register("before-call", self.before_call)
+        client.meta.events.register("after-call", self.after_call)
+        client.meta.events.register("after-call-error", self.after_call_error)
+
+        return client
+
+    def before_call(self, model, params, context, **kwargs):
+        """
+        Handle a client's 'before-call' event.
+
+        :param model (OperationModel): The operation being called.
+        :param params (dict): The request about to be sent.
+        :param context (dict): The request context, shared with the call's later events.
+        :return (None): Default 'None' returned, so the call is made.
+        """
+
+        context[CONTEXT_KEY] = (self, model.name, time.perf_counter())
+        _add(self.service, model.name, calls=1, bytes_sent=request_size(params))
+
+    def finish(self, operation, start, **amounts):
+        """
+        Count the outcome of a call once it has a response or has failed.
+
+        :param operation (str): The name of the operation called.
+        :param start (float): The perf_counter() time the call started at.
+        :return (None): Default 'None' returned.
+        """
+
+        _add(
+            self.service,
+            operation,
+            milliseconds=(time.perf_counter() - start) * 1000,
+            **amounts,
+        )
+
+    def after_call(self, http_response, model, context, **kwargs):
+        """
+        Handle a client's 'after-call' event.
+
+        :param http_response (AWSResponse): The HTTP response.
+        :param model (OperationModel): The operation called.
+        :param context (dict): The request context.
+        :return (None): Default 'None' returned.
+        """
+
+        if CONTEXT_KEY not in context:
+            return
+
+        _, operation, start = context.pop(CONTEXT_KEY)
+        self.finish(
+            operation,
+            start,
+            errors=int(http_response.status_code >= 300),
+            bytes_received=response_size(http_response, model),
+        )
+
+    def after_call_error(self, context, **kwargs):
+        """
+        Handle a client's 'after-call-error' event, fired when a call gets no response.
+
+        :param context (dict): The request context.
+        :return (None): Default 'None' returned.
+        """
+
+        record_call_error(context)
+
+
+def install_call_accounting(client, service):
+    """
+    Hook a call accountant into a client.
+
+    :param client (botocore.client.BaseClient): The client.
+    :param service (str): The name of the service, e.g. 's3'.
+    :return (botocore.client.BaseClient): The client.
+    """
+
+    return CallAccountant(service).install(client)
+
+
+def get_call_totals(reset=False):
+    """
+    Get the totals of each operation called since they were last reset.
+
+    :param reset (bool, optional): Whether to start counting afresh. Defaults to False.
+    :return (dict): The calls, errors, bytes sent and received, and milliseconds spent, keyed by service and then operation.
+    """
+
+    totals = {}
+
+    with _totals_lock:
+        for (service, operation), operation_totals in _totals.items():
+            totals.setdefault(service, {})[operation] = {
+                **operation_totals,
+                "milliseconds": round(operation_totals["milliseconds"], 3),
+            }
+
+        if reset:
+            _totals.clear()
+
+    return totals
+
+
+def reset_call_totals():
+    """
+    Forget the totals counted so far.
+
+    :return (None): Default 'None' returned.
+    """
+
+    with _totals_lock:
+        _totals.clear()
+
+
+def publish_call_totals():
+    """
+    Log the totals of each operation called at debug level, publish them as metrics, and start counting afresh.
+
+    Each operation's totals are published as a separate set of metrics with
+    'Service' and 'Operation' dimensions.
+
+    :return (dict): The totals published, as get_call_totals() returns them.
+    """
+
+    totals = get_call_totals(reset=True)
+
+    logger.debug("AWS calls.", extra={"aws_calls": totals})
+
+    if not config["call_accounting"]["publish"]:
+        return totals
+
+    for service, operations in totals.items():
+        for operation, operation_totals in operations.items():
+            metrics = EphemeralMetrics(namespace=config["metrics_namespace"])
+            metrics.add_dimension(name="Service", value=service)
+            metrics.add_dimension(name="Operation", value=operation)
+
+            for name, (metric, unit) in CALL_METRICS.items():
+                metrics.add_metric(name=metric, unit=unit, value=operation_totals[name])
+
+            metrics.flush_metrics()
+
+    return totals
+
+
+def account_calls(handler):
+    """
+    Decorator that publishes the AWS call totals of each invocation of a Lambda handler, even one that fails.
+
+    The calls made while the container started, such as loading settings, are
+    counted with its first invocation.
+
+    :param handler (callable): The Lambda handler.
+    :return (callable): The decorated handler.
+    """
+
+    @wraps(handler)
+    def wrapper(event, context):
+        try:
+            return handler(event, context)
+        finally:
+            publish_call_totals()
+
+    return wrapper
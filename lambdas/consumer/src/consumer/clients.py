@@ -0,0 +1,24 @@
+# third-party library imports
+import boto3
+
+# local imports
+from consumer.calls import install_call_accounting
+from consumer.faults import install_faults
+
+
+def make_client(service, **kwargs):
+    """
+    Create a boto3 client.
+
+    Every AWS client is made here, so hooks on their calls, such as call
+    accounting and fault injection, are installed in one place.  Calls are
+    accounted for before faults are injected, so injected latency and errors
+    are counted as if AWS had returned them.
+
+    :param service (str): The name of the service, e.g. 's3'.
+    :return (botocore.client.BaseClient): The client.
+    """
+
+    client = install_call_accounting(boto3.client(service, **kwargs), service)
+
+    return install_faults(client, service)
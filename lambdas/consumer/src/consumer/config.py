@@ -2,5 +2,150 @@
 config = {
     "special_error_string": "Sed error inciderunt.",
     "ssm_param_path": "/sqs-simple-example",
+    # where runtime settings come from: 'ssm', 'env', 'snapshot' or 'extension';
+    # the CONFIG_PROVIDER environment variable takes precedence
+    "config_provider": "ssm",
     "required_ssm_params": ["output-bucket-name", "queue-arn"],
+    "optional_ssm_params": ["capture-bucket-name", "dlq-url"],
+    # capture a sample of events, with message bodies redacted, to the
+    # 'capture-bucket-name' bucket for replay with scripts/replay-events.py;
+    # sample_rate is between 0 (off) and 1, and CAPTURE_SAMPLE_RATE overrides it
+    "capture": {
+        "sample_rate": 0.0,
+        "prefix": "captures",
+        "redact": True,
+    },
+    "metrics_namespace": "sqs-simple-example",
+    # inject latency, throttling errors and timeouts into AWS calls for
+    # performance testing against moto; off unless enabled here or by the
+    # FAULT_INJECTION environment variable ('1', or a JSON object that replaces
+    # 'services').  Latency is drawn per call from a 'fixed' (ms), 'uniform'
+    # (min_ms, max_ms) or 'lognormal' (median_ms, sigma) distribution, and
+    # throttle_rate and timeout_rate are the fractions of calls that fail
+    "faults": {
+        "enabled": False,
+        "seed": None,
+        "services": {
+            "s3": {
+                "latency": {"distribution": "lognormal", "median_ms": 20, "sigma": 0.5},
+                "throttle_rate": 0.01,
+                "timeout_rate": 0.001,
+            },
+            "sqs": {
+                "latency": {"distribution": "lognormal", "median_ms": 10, "sigma": 0.5},
+                "throttle_rate": 0.01,
+                "timeout_rate": 0.001,
+            },
+            "ssm": {
+                "latency": {"distribution": "uniform", "min_ms": 20, "max_ms": 80},
+                "throttle_rate": 0.05,
+                "timeout_rate": 0.0,
+            },
+        },
+    },
+    # count the AWS calls each invocation makes, per operation, with the bytes
+    # they send and receive and the time they take; the totals are logged at
+    # debug level at the end of each invocation and, with publish, emitted as
+    # metrics with 'Service' and 'Operation' dimensions
+    "call_accounting": {
+        "publish": True,
+    },
+    # retries of throttled or unavailable AWS calls; the budget is the number of
+    # retries allowed per invocation across all calls, and no backoff sleeps into
+    # the last min_remaining_ms of the invocation
+    "retry": {
+        "max_attempts": 5,
+        "base_delay": 0.05,  # seconds
+        "max_delay": 2.0,  # seconds
+        "budget": 50,
+        "min_remaining_ms": 2000,
+    },
+    # stop taking on new records when less than stop_ms of the invocation is
+    # left, and stop waiting for records in flight when less than abandon_ms
+    # is left; records not written by then are reported as batch item
+    # failures, so only they are redelivered.  Each margin is capped at half
+    # the invocation's time
+    "deadline": {
+        "stop_ms": 5000,
+        "abandon_ms": 2000,
+    },
+    # a service's circuit opens when at least failure_rate of its last window
+    # calls (and at least min_calls) failed, and stays open for reset_timeout
+    "circuit_breaker": {
+        "window": 20,
+        "min_calls": 10,
+        "failure_rate": 0.5,
+        "reset_timeout": 30,  # seconds
+    },
+    # layout of output keys: 'flat' ({messageId}.txt), 'hash' (a shard prefix
+    # from the hash of the messageId), 'time' (yyyy/mm/dd/hh from the time the
+    # message was sent) or 'hash+time'
+    "output_key_layout": "flat",
+    "output_key_hash_chars": 4,
+    # 'message' writes one object per message; 'content' writes one object per
+    # distinct output, keyed by its SHA-256, and skips writes of content that
+    # already exists (checked with a 'conditional' PUT or a 'head' request,
+    # behind a cache of the last content_cache_size hashes).  content_refs
+    # also writes refs/{messageId}.json pointing each message at its content
+    "output_mode": "message",
+    "content_existence_check": "conditional",
+    "content_cache_size": 1024,
+    "content_refs": True,
+    # the transform that turns each message into its output: one registered in
+    # consumer/transforms.py or by a 'plugins' module.  CPU-bound transforms run
+    # in a pool of 'processes' worker processes (None for one per vCPU; 0 or 1
+    # runs them in the handler's process) kept for the life of the container
+    "transform": {
+        "name": "text",
+        "plugins": [],
+        "processes": None,
+    },
+    # report traced peak and per-record memory with tracemalloc; this slows
+    # processing down, so it is only for sizing lambda_memory
+    # (MEMORY_PROFILING=1 turns it on without a redeploy)
+    "memory_profiling": False,
+    # where outputs are written: 's3' (the output bucket), 'local' (files under
+    # 'directory', e.g. /tmp or a mounted EFS volume, with the same keys as in
+    # S3), 'stdout' (JSON lines) or 'null' (discarded, to measure processing
+    # without I/O).  The OUTPUT_SINK and OUTPUT_DIRECTORY environment variables
+    # take precedence.  The s3 sink writes each batch with 'concurrency' threads
+    "sink": {
+        "type": "s3",
+        "directory": "/tmp/output",  # nosec B108
+        "concurrency": 8,
+    },
+    # outputs at least this large, and streamed outputs, are written to S3 as a
+    # multipart upload; memory use is bounded by part size * part concurrency
+    "multipart_threshold": 8388608,  # 8 MB
+    "multipart_part_size": 8388608,  # 8 MB, S3 requires at least 5 MB
+    "multipart_concurrency": 4,
+    # messages that fail the same way on every delivery (invalid JSON, no
+    # 'text' field, the special error string) are quarantined on their first
+    # failure instead of being redelivered until SQS moves them to the DLQ:
+    # 'dlq' sends them, with the reason as a message attribute, to the
+    # dead-letter queue of the queue they came from (the 'dlq-url' setting,
+    # listed in the order of 'queue-arn'), 's3' writes them as JSON under
+    # 'prefix' in the output bucket, and None retries them like other failures
+    "quarantine": {
+        "destination": "dlq",
+        "prefix": "quarantine",
+    },
+    # per-stage pipeline settings; a stage that is not listed runs one record at
+    # a time and stops the invocation on its first error.  A record that fails
+    # in a 'skip' stage is quarantined if its failure is permanent and retried
+    # on its own otherwise, so it does not fail the rest of the batch; a record
+    # whose output still cannot be written after its retries is retried this
+    # way too.  The sink stage hands the sink batch_size records at a time, and
+    # with a concurrency of 2 fills the next batch while the last one is
+    # written.  The unpack stage passes on a record for each document of a
+    # message the producer packed; the message is deleted once each document
+    # is written or quarantined, and retried as a whole otherwise, and a
+    # document's output is keyed by the messageId and its position, e.g.
+    # '{messageId}-3.txt'
+    "stages": {
+        "decode": {"on_error": "skip"},
+        "unpack": {"on_error": "skip"},
+        "transform": {"on_error": "skip"},
+        "sink": {"batch_size": 16, "concurrency": 2, "on_error": "skip"},
+    },
 }
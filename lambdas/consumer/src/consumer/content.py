@@ -0,0 +1,164 @@
+# Python Standard Library imports
+import hashlib
+import threading
+
+from collections import OrderedDict
+
+# third-party library imports
+from botocore.exceptions import ClientError
+
+# local imports
+from consumer.clients import make_client
+from consumer.config import config
+
+# output modes: one object per message, or one object per distinct output
+MESSAGE_OUTPUT = "message"
+CONTENT_OUTPUT = "content"
+
+# ways to check whether content-addressed output already exists
+CONDITIONAL = "conditional"  # PUT with If-None-Match: *
+HEAD = "head"  # HEAD the object, then PUT if it is missing
+
+EXISTENCE_CHECKS = frozenset((CONDITIONAL, HEAD))
+
+
+def content_digest(content):
+    """
+    Get the SHA-256 hex digest of some output.
+
+    :param content (str | bytes): The output.
+    :return (str): The hex digest.
+    """
+
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    return hashlib.sha256(content).hexdigest()
+
+
+class RecentHashCache:
+    """
+    A bounded, least-recently-used set of digests known to exist in S3.
+
+    Re-sends of the same content usually arrive close together, so a small
+    cache in front of S3 skips most existence checks.  The cache only ever
+    says an object exists; a miss falls through to S3.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, digest):
+        with self._lock:
+            if digest not in self._digests:
+                return False
+
+            self._digests.move_to_end(digest)
+            return True
+
+    def __len__(self):
+        return len(self._digests)
+
+    def add(self, digest):
+        """
+        Remember a digest, evicting the least recently used one if the cache is full.
+
+        :param digest (str): The hex digest.
+        :return (None): Default 'None' returned.
+        """
+
+        with self._lock:
+            self._digests[digest] = None
+            self._digests.move_to_end(digest)
+
+            if len(self._digests) > self.max_size:
+                self._digests.popitem(last=False)
+
+
+# the cache is kept for the life of the container so re-sends are recognised
+# across warm invocations
+_content_cache = None
+_content_cache_lock = threading.Lock()
+
+
+def get_content_cache():
+    """
+    Get the recent-hash cache, creating it from the config if needed.
+
+    :return (RecentHashCache): The cache.
+    """
+
+    global _content_cache
+
+    with _content_cache_lock:
+        if _content_cache is None:
+            _content_cache = RecentHashCache(config["content_cache_size"])
+
+        return _content_cache
+
+
+def object_exists(bucket_name, key, client=None):
+    """
+    Check whether an object exists with a HEAD request.
+
+    :param bucket_name (str): The name of the S3 bucket.
+    :param key (str): The object key.
+    :param client (S3.Client, optional): The S3 client to use. Defaults to a new client.
+    :return (bool): True if the object exists, False otherwise.
+    """
+
+    client = client or make_client("s3")
+
+    try:
+        client.head_object(Bucket=bucket_name, Key=key)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+    return True
+
+
+def put_if_absent(bucket_name, key, content, client=None, metadata=None):
+    """
+    Write an object only if no object exists under its key, using a conditional PUT.
+
+    :param bucket_name (str): The name of the S3 bucket.
+    :param key (str): The object key.
+    :param content (str | bytes): The content to write.
+    :param client (S3.Client, optional): The S3 client to use. Defaults to a new client.
+    :param metadata (dict, optional): User-defined metadata to store with the object.
+    :return (bool): True if the object was written, False if it already existed.
+    """
+
+    client = client or make_client("s3")
+
+    try:
+        client.put_object(
+            Bucket=bucket_name,
+            Key=key,
+            Body=content,
+            Metadata=metadata or {},
+            IfNoneMatch="*",
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "PreconditionFailed":
+            return False
+        raise
+
+    return True
+
+
+def clear_content_cache():
+    """
+    Forget the recent-hash cache so the next get_content_cache() call creates it again.
+
+    :return (None): Default 'None' returned.
+    """
+
+    global _content_cache
+
+    with _content_cache_lock:
+        _content_cache = None
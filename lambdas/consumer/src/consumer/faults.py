@@ -0,0 +1,209 @@
+# Python Standard Library imports
+import json
+import math
+import os
+import random
+import time
+
+# third-party library imports
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ReadTimeoutError
+
+# local imports
+from consumer.calls import record_call_error
+from consumer.config import config
+
+metrics = Metrics(namespace=config["metrics_namespace"])
+
+# latency distributions
+FIXED = "fixed"  # always 'ms'
+UNIFORM = "uniform"  # between 'min_ms' and 'max_ms'
+LOGNORMAL = "lognormal"  # around 'median_ms', with a long tail set by 'sigma'
+
+LATENCY_DISTRIBUTIONS = frozenset((FIXED, UNIFORM, LOGNORMAL))
+
+# the error each service returns when it throttles a call, and its HTTP status
+THROTTLE_ERRORS = {
+    "s3": ("SlowDown", 503),
+    "sqs": ("ThrottlingException", 400),
+    "ssm": ("ThrottlingException", 400),
+}
+
+
+def validate_latency(latency):
+    """
+    Check that a latency distribution is one that can be sampled.
+
+    :param latency (dict): The distribution, or None for no added latency.
+    :return (None): Default 'None' returned if the distribution is valid.
+    """
+
+    if latency is None:
+        return
+
+    if latency.get("distribution") not in LATENCY_DISTRIBUTIONS:
+        raise ValueError(
+            f"Unknown latency distribution '{latency.get('distribution')}'."
+        )
+
+
+def sample_latency(latency, rng):
+    """
+    Draw a latency from a distribution.
+
+    :param latency (dict): The distribution, or None for no added latency.
+    :param rng (random.Random): The random number generator.
+    :return (float): The latency in seconds.
+    """
+
+    if latency is None:
+        return 0.0
+
+    distribution = latency["distribution"]
+
+    if distribution == FIXED:
+        ms = latency["ms"]
+    elif distribution == UNIFORM:
+        ms = rng.uniform(latency["min_ms"], latency["max_ms"])
+    else:
+        ms = rng.lognormvariate(math.log(latency["median_ms"]), latency["sigma"])
+
+    return ms / 1000
+
+
+def is_fault_injection_enabled():
+    """
+    Check if fault injection is turned on by the FAULT_INJECTION environment variable or the config.
+
+    :return (bool): True if fault injection is enabled, False otherwise.
+    """
+
+    env = os.environ.get("FAULT_INJECTION")
+
+    if env is not None:
+        return env.strip().lower() not in ("", "0", "false", "no", "off")
+
+    return bool(config["faults"]["enabled"])
+
+
+def get_fault_profiles():
+    """
+    Get the fault settings of each service.
+
+    FAULT_INJECTION may hold a JSON object of service settings, which then
+    replaces the ones in the config.
+
+    :return (dict): The fault settings keyed by service name.
+    """
+
+    env = os.environ.get("FAULT_INJECTION", "").strip()
+
+    if env.startswith("{"):
+        return json.loads(env)
+
+    return config["faults"]["services"]
+
+
+class FaultInjector:
+    """
+    Adds latency, throttling errors and timeouts to the calls of a boto3 client.
+
+    The injector hooks the client's 'before-call' event, which fires before
+    the request is sent, so it works the same against AWS and moto.  A
+    throttled call gets the error response the service would have sent, and
+    a timed-out call raises botocore's ReadTimeoutError after 'timeout_ms'.
+    """
+
+    def __init__(
+        self,
+        service,
+        latency=None,
+        throttle_rate=0.0,
+        timeout_rate=0.0,
+        timeout_ms=1000,
+        rng=None,
+    ):
+        validate_latency(latency)
+
+        if throttle_rate + timeout_rate > 1:
+            raise ValueError("Fault rates must add up to at most 1.")
+
+        self.service = service
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_ms = timeout_ms
+        self.rng = rng or random.Random()  # nosec B311
+
+    def install(self, client):
+        """
+        Hook the injector into a client's calls.
+
+        :param client (botocore.client.BaseClient): The client.
+        :return (botocore.client.BaseClient): The client.
+        """
+
+        client.meta.events.register("before-call", self.before_call)
+
+        return client
+
+    def before_call(self, model, context, **kwargs):
+        """
+        Handle a client's 'before-call' event.
+
+        :param model (OperationModel): The operation being called.
+        :param context (dict): The request context.
+        :return (tuple): An (HTTP response, parsed response) tuple for a throttled call, or None to make the call.
+        """
+
+        delay = sample_latency(self.latency, self.rng)
+        if delay:
+            time.sleep(delay)
+
+        roll = self.rng.random()
+
+        if roll < self.timeout_rate:
+            metrics.add_metric(name="InjectedTimeouts", unit=MetricUnit.Count, value=1)
+            time.sleep(self.timeout_ms / 1000)
+            # botocore sends no later event for a call failed here, so the
+            # timeout is counted as AWS's would be before it is raised
+            record_call_error(context)
+            raise ReadTimeoutError(endpoint_url=f"https://{self.service}.amazonaws.com")
+
+        if roll < self.timeout_rate + self.throttle_rate:
+            metrics.add_metric(name="InjectedThrottles", unit=MetricUnit.Count, value=1)
+            code, status = THROTTLE_ERRORS.get(self.service, ("Throttling", 400))
+
+            return (
+                AWSResponse(None, status, {}, None),
+                {
+                    "Error": {"Code": code, "Message": "Injected fault."},
+                    "ResponseMetadata": {"HTTPStatusCode": status},
+                },
+            )
+
+        return None
+
+
+def install_faults(client, service):
+    """
+    Hook a fault injector into a client if fault injection is enabled for its service.
+
+    :param client (botocore.client.BaseClient): The client.
+    :param service (str): The name of the service, e.g. 's3'.
+    :return (botocore.client.BaseClient): The client.
+    """
+
+    if not is_fault_injection_enabled():
+        return client
+
+    profile = get_fault_profiles().get(service)
+    if not profile:
+        return client
+
+    seed = config["faults"]["seed"]
+    rng = random.Random(seed) if seed is not None else None  # nosec B311
+
+    return FaultInjector(service, rng=rng, **profile).install(client)
@@ -0,0 +1,99 @@
+# Python Standard Library imports
+import hashlib
+
+from datetime import datetime
+from datetime import timezone
+
+# output key layouts
+FLAT = "flat"  # {messageId}.txt
+HASH = "hash"  # {hash}/{messageId}.txt
+TIME = "time"  # yyyy/mm/dd/hh/{messageId}.txt
+HASH_TIME = "hash+time"  # {hash}/yyyy/mm/dd/hh/{messageId}.txt
+
+KEY_LAYOUTS = frozenset((FLAT, HASH, TIME, HASH_TIME))
+
+
+def hash_prefix(message_id, hash_chars):
+    """
+    Get a shard prefix from the hash of a message ID.
+
+    The prefix spreads keys evenly over 16 ** hash_chars prefixes, each of
+    which S3 can scale to its own request rate.
+
+    :param message_id (str): The SQS message ID.
+    :param hash_chars (int): The number of hex characters in the prefix.
+    :return (str): The shard prefix.
+    """
+
+    return hashlib.sha256(message_id.encode("utf-8")).hexdigest()[:hash_chars]
+
+
+def time_prefix(sent_timestamp):
+    """
+    Get an hourly time partition from an SQS 'SentTimestamp' attribute.
+
+    :param sent_timestamp (str | int): The time the message was sent, in milliseconds since the epoch.
+    :return (str): The time partition in the form 'yyyy/mm/dd/hh'.
+    """
+
+    sent = datetime.fromtimestamp(int(sent_timestamp) / 1000, tz=timezone.utc)
+
+    return sent.strftime("%Y/%m/%d/%H")
+
+
+def build_output_key(
+    message_id, sent_timestamp=None, layout=FLAT, hash_chars=4, suffix=".txt"
+):
+    """
+    Build the S3 key a message is written to.
+
+    The key only depends on the message, so it can be rebuilt later (e.g. by
+    readers or deduplication) without a lookup.
+
+    :param message_id (str): The SQS message ID.
+    :param sent_timestamp (str | int, optional): The SQS 'SentTimestamp' attribute, required by time layouts.
+    :param layout (str, optional): One of 'flat', 'hash', 'time' or 'hash+time'. Defaults to 'flat'.
+    :param hash_chars (int, optional): The number of hex characters in a hash prefix. Defaults to 4.
+    :param suffix (str, optional): The suffix of the key. Defaults to '.txt'.
+    :return (str): The S3 object key.
+    """
+
+    if layout not in KEY_LAYOUTS:
+        raise ValueError(f"Unknown output key layout '{layout}'.")
+
+    parts = []
+
+    if layout in (HASH, HASH_TIME):
+        parts.append(hash_prefix(message_id, hash_chars))
+
+    if layout in (TIME, HASH_TIME):
+        if sent_timestamp is None:
+            raise ValueError(f"Output key layout '{layout}' requires a SentTimestamp.")
+
+        parts.append(time_prefix(sent_timestamp))
+
+    parts.append(f"{message_id}{suffix}")
+
+    return "/".join(parts)
+
+
+def build_content_key(digest, layout=FLAT, hash_chars=4):
+    """
+    Build the S3 key content-addressed output is written to.
+
+    Identical content sent at different times shares one object, so time
+    layouts are ignored; hash layouts shard by the digest itself.
+
+    :param digest (str): The SHA-256 hex digest of the output.
+    :param layout (str, optional): One of 'flat', 'hash', 'time' or 'hash+time'. Defaults to 'flat'.
+    :param hash_chars (int, optional): The number of hex characters in a hash prefix. Defaults to 4.
+    :return (str): The S3 object key.
+    """
+
+    if layout not in KEY_LAYOUTS:
+        raise ValueError(f"Unknown output key layout '{layout}'.")
+
+    if layout in (HASH, HASH_TIME):
+        return f"content/{digest[:hash_chars]}/{digest}.txt"
+
+    return f"content/{digest}.txt"
@@ -1,75 +1,63 @@
 # Python Standard Library imports
 import json
+import os
 
-# third-party library imports
-import boto3
+from functools import partial
 
+# third-party library imports
 from botocore.exceptions import ClientError
 from aws_lambda_powertools import Logger
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
 
 # local imports
+from consumer.calls import account_calls
+from consumer.capture import capture_event
+from consumer.capture import get_capture_rate
+from consumer.capture import is_sampled
 from consumer.config import config
-
-
-def get_ssm_params(path, region_name="us-west-2", recursive=True, with_decryption=True):
-    """
-    Retrieves all parameters under a given path from AWS SSM Parameter Store.
-
-
-    :param path (str): The hierarchy for the parameter. Hierarchies start with a forward slash (/).
-    :param region_name (str, optional): The AWS region to connect to. Defaults to 'us-west-2'.
-    :param recursive (bool, optional): Whether to retrieve parameters recursively under the path. Defaults to True.
-    :param with_decryption (bool, optional): Whether to decrypt SecureString parameters. Defaults to True.
-    :return (dict): A dictionary where keys are parameter names (relative to the path) and values are parameter values.
-    """
-    ssm_client = boto3.client("ssm", region_name=region_name)
-    parameters = {}
-    next_token = None
-
-    while True:
-        # Build the request arguments
-        kwargs = {
-            "Path": path,
-            "Recursive": recursive,
-            "WithDecryption": with_decryption,
-            "MaxResults": 10,  # Can adjust MaxResults as needed, but AWS imposes a limit
-        }
-        if next_token:
-            kwargs["NextToken"] = next_token
-
-        response = ssm_client.get_parameters_by_path(**kwargs)
-
-        # Process the retrieved parameters
-        for parameter in response.get("Parameters", []):
-            name = parameter["Name"]
-            value = parameter["Value"]
-            # Remove the path prefix for cleaner parameter names in the result
-            if name.startswith(path):
-                relative_name = name[len(path) :].lstrip("/")
-                parameters[relative_name] = value
-
-        next_token = response.get("NextToken")
-        if not next_token:
-            break
-
-    if not parameters:
-        raise ValueError(f"No parameters found under path '{path}'.")
-    else:
-        return parameters
-
-
-def verify_ssm_parameters(params, reqd_params):
-    """
-    Verify required parameters were retrieved from SSM Parameter Store.
-
-    :param params (dict) The parameters retrieved from SSM Parameter Store.
-    :param reqd_params (list) The parameters that are needed for this script to execute.
-    :return (None): Default 'None' returned if all required parameters exist.
-    """
-
-    for param in reqd_params:
-        if param not in params.keys():
-            raise ValueError(f"Parameter '{param}' not found.")
+from consumer.memory import MemoryProfiler
+from consumer.memory import drain
+from consumer.memory import is_memory_profiling_enabled
+from consumer.memory import preview
+from consumer.packing import PackedMessages
+from consumer.packing import is_packed
+from consumer.packing import unpack
+from consumer.pipeline import DeadlineExceeded
+from consumer.pipeline import Pipeline
+from consumer.pipeline import Stage
+from consumer.pipeline import until_deadline
+from consumer.quarantine import build_quarantine
+from consumer.quarantine import quarantine_failures
+from consumer.records import is_sqs_record
+from consumer.records import is_valid_sqs_source
+from consumer.records import parse_sqs_record
+from consumer.resilience import Deadline
+from consumer.resilience import Retrier
+from consumer.resilience import publish_circuit_states
+from consumer.settings import get_settings
+from consumer.settings import parse_list_param
+from consumer.sinks import build_sink
+from consumer.tracing import LatencyRecorder
+from consumer.transforms import apply_transform
+from consumer.transforms import get_process_pool
+from consumer.transforms import get_transform
+from consumer.transforms import load_plugins
+from consumer.transforms import message_text
+
+logger = Logger()
+metrics = Metrics(namespace=config["metrics_namespace"])
+
+# plugins register their transforms on import
+load_plugins(config["transform"]["plugins"])
+
+# load settings during the Lambda init phase so invocations do not wait on them;
+# a failure here is left for the handler to log and raise
+if "AWS_LAMBDA_FUNCTION_NAME" in os.environ:
+    try:
+        get_settings()
+    except Exception:
+        logger.warning("Could not load settings during init.", exc_info=True)
 
 
 def verify_event(event):
@@ -96,13 +84,7 @@ def verify_sqs_record(record):
     :return (None): Default 'None' returned if SQS record has required keys.
     """
 
-    if not (
-        isinstance(record, dict)
-        and "messageId" in record
-        and "body" in record
-        and "eventSource" in record
-        and "eventSourceARN" in record
-    ):
+    if not is_sqs_record(record):
         raise ValueError("Malformed record.")
 
 
@@ -111,13 +93,11 @@ def verify_sqs_source(record, queue_arn):
     Verify the record was generated by the expected SQS queue.
 
     :param record (dict): The dictionary containing the SQS record.
-    :param queue_arn (str): The ARN of the expected SQS queue.
+    :param queue_arn (frozenset | str): The ARNs of the expected SQS queues, or the ARN of a single queue.
     :return (None): Default 'None' returned if SQS source is valid.
     """
 
-    if not (
-        record["eventSource"] == "aws:sqs" and record["eventSourceARN"] == queue_arn
-    ):
+    if not is_valid_sqs_source(record, queue_arn):
         raise ValueError("Invalid SQS source.")
 
 
@@ -132,20 +112,29 @@ def is_valid_json(json_string):
     json.loads(json_string)
 
 
-def process_message(msg):
+def process_message(msg, transform=None):
     """
     Processes an SQS message.
 
     :param msg (str): The body of an SQS message.
-    :return (str): The 'text' field of the JSON message.
+    :param transform (str, optional): The name of the transform to apply. Defaults to the configured transform.
+    :return (str | bytes): The output of the transform; the 'text' field of the JSON message by default.
     """
 
-    json_obj = json.loads(msg)
+    transform = get_transform(transform or config["transform"]["name"])
 
-    if "text" not in json_obj.keys():
-        raise KeyError("No text found.")
-    else:
-        return json_obj["text"]
+    return apply_transform(transform, json.loads(msg))
+
+
+def get_message_text(json_obj):
+    """
+    Get the text from a decoded SQS message.
+
+    :param json_obj (dict): The decoded body of an SQS message.
+    :return (str): The 'text' field of the JSON message.
+    """
+
+    return message_text(json_obj)
 
 
 def check_for_err_str(text):
@@ -160,22 +149,207 @@ def check_for_err_str(text):
         raise ValueError("Found special error string.")
 
 
-def write_obj_to_s3(bucket_name, file_name, content):
+def validate_record(raw_record, queue_arns):
+    """
+    Pipeline stage that verifies an SQS record and its source and parses it.
+
+    :param raw_record (dict): The dictionary containing the SQS record.
+    :param queue_arns (frozenset): The ARNs of the expected SQS queues.
+    :return (SqsRecord): The parsed SQS record.
+    """
+
+    try:
+        return parse_sqs_record(raw_record, queue_arns)
+    except ValueError as e:
+        logger.exception(f"Invalid SQS record ({e}): {preview(raw_record)}")
+        raise
+    except Exception:
+        logger.exception("Error verifying SQS record.")
+        raise
+
+
+def decode_record(record):
+    """
+    Pipeline stage that decodes the JSON body of an SQS record.
+
+    :param record (SqsRecord): The SQS record.
+    :return (SqsRecord): The SQS record with its decoded payload.
+    """
+
+    try:
+        record.payload = json.loads(record.body)
+    except ValueError:
+        logger.exception(
+            f"Invalid JSON in record with messageId '{record.message_id}'."
+        )
+        raise
+    except Exception:
+        logger.exception("Error validating SQS message body JSON")
+        raise
+
+    # every message is a JSON object; any other JSON value fails the same way
+    # on every delivery, so it is rejected here, where it is quarantined
+    if not isinstance(record.payload, dict):
+        logger.error(
+            f"Message with messageId '{record.message_id}' is not a JSON object."
+        )
+        raise ValueError("SQS message body is not a JSON object")
+
+    return record
+
+
+def unpack_record(record):
     """
-    Writes content to a file in an S3 bucket.
+    Pipeline stage that splits a packed SQS record into a record for each of its documents.
+
+    :param record (SqsRecord): The SQS record, with its decoded payload.
+    :return (list): The record itself, or the records of the documents of a packed message.
+    """
+
+    if not is_packed(record):
+        return [record]
+
+    try:
+        documents = unpack(record)
+    except ValueError:
+        logger.exception(
+            f"Malformed packed message with messageId '{record.message_id}'."
+        )
+        raise
+
+    logger.debug(
+        "Unpacked %d document(s) from message '%s'.", len(documents), record.message_id
+    )
 
-    :param bucket_name (str): The name of the S3 bucket.
-    :param file_name (str): The name of the file (object) to create in the bucket.
-    :param content (str): The content to write to the file.
-    :return (dict): The response data from the S3 API call.
+    return documents
+
+
+def transform_record(record, transform=None, pool=None):
     """
+    Pipeline stage that processes the decoded message of an SQS record.
 
-    client = boto3.client("s3")
-    resp = client.put_object(Bucket=bucket_name, Key=file_name, Body=content)
+    :param record (SqsRecord): The SQS record.
+    :param transform (Transform, optional): The transform to apply. Defaults to the configured transform.
+    :param pool (ProcessPool, optional): Runs CPU-bound transforms. Defaults to running them in this process.
+    :return (SqsRecord): The SQS record with its processed output.
+    """
 
-    return resp
+    transform = transform or get_transform(config["transform"]["name"])
 
+    try:
+        # per-record messages are logged at debug level and formatted lazily
+        logger.debug("Processing record with messageId '%s'.", record.message_id)
+        record.output = apply_transform(transform, record.payload, pool)
+    except KeyError:
+        logger.exception(
+            f"Message received from SQS did not contain JSON with 'text' field: {preview(record.body)}"
+        )
+        raise
+    except Exception:
+        logger.exception("Error processing record.")
+        raise
 
+    try:
+        check_for_err_str(record.output)
+    except ValueError:
+        logger.exception(
+            f"Found special string that generates an error: {preview(record.output)}"
+        )
+        raise
+
+    return record
+
+
+def sink_records(records, sink, recorder=None):
+    """
+    Pipeline stage that writes the processed outputs of a batch of SQS records with a sink.
+
+    :param records (list): The SQS records.
+    :param sink (object): The sink, e.g. an S3Sink.
+    :param recorder (LatencyRecorder, optional): Records the latency of each message once it is written.
+    :return (list): For each record, the record if its output was written, or the exception it failed with.
+    """
+
+    results = []
+
+    for record, error in zip(records, sink.write(records)):
+        if error is not None:
+            results.append(error)
+            continue
+
+        if recorder is not None:
+            recorder.add(record)
+
+        # the message has been written, so its body and output can be freed
+        record.body = record.payload = record.output = None
+        results.append(record)
+
+    return results
+
+
+def get_message_id(item):
+    """
+    Get the messageId of an SQS record, parsed or not.
+
+    :param item (SqsRecord | dict): The SQS record, or the record of a document of a packed message.
+    :return (str): The messageId, that of the packed message for a document, or None if the record has none.
+    """
+
+    if isinstance(item, dict):
+        return item.get("messageId")
+
+    return getattr(item, "packed_message_id", None) or getattr(item, "message_id", None)
+
+
+def build_pipeline(queue_arns, sink, recorder=None, deadline=None):
+    """
+    Build the pipeline that processes SQS records.
+
+    Stage concurrency, batch sizes and error policies are taken from the
+    'stages' config.  The sink stage always passes its records to the sink in
+    batches, one record at a time unless a batch size is configured.  The
+    unpack stage passes on a record for each document of a packed message,
+    and the records of other messages as they are.  When the
+    transform runs in the process pool, the transform stage defaults to one
+    thread per worker process so every worker is kept busy.
+
+    :param queue_arns (frozenset): The ARNs of the expected SQS queues.
+    :param sink (object): Writes the processed outputs, e.g. an S3Sink.
+    :param recorder (LatencyRecorder, optional): Records the latency of each message written.
+    :param deadline (Deadline, optional): When to stop waiting for records in flight. Defaults to no deadline.
+    :return (Pipeline): The pipeline.
+    """
+
+    transform = get_transform(config["transform"]["name"])
+    pool = get_process_pool() if transform.cpu_bound else None
+
+    stage_options = {name: dict(options) for name, options in config["stages"].items()}
+    stage_options.setdefault("sink", {}).setdefault("batch_size", 1)
+    stage_options.setdefault("unpack", {})["expand"] = True
+    if pool is not None:
+        stage_options.setdefault("transform", {}).setdefault(
+            "concurrency", pool.processes
+        )
+
+    stage_funcs = {
+        "validate": partial(validate_record, queue_arns=queue_arns),
+        "decode": decode_record,
+        "unpack": unpack_record,
+        "transform": partial(transform_record, transform=transform, pool=pool),
+        "sink": partial(sink_records, sink=sink, recorder=recorder),
+    }
+
+    return Pipeline(
+        (
+            Stage(name, func, **stage_options.get(name, {}))
+            for name, func in stage_funcs.items()
+        ),
+        deadline=deadline,
+    )
+
+
+@metrics.log_metrics
+@account_calls
 def lambda_handler(event, context):
     """
     AWS Lambda handler function to send a message to SQS.
@@ -185,18 +359,25 @@ def lambda_handler(event, context):
     :return (dict): The status code and status message.
     """
 
-    # define some variables
-    logger = Logger()
-    processed_records = 0
-    ssm_param_path = config["ssm_param_path"]
+    # throttled AWS calls are retried within a budget shared by the invocation
+    retrier = Retrier.from_config(context)
 
-    # retrieve SSM Parameter Store parameters under project path
+    # get the runtime settings; they are loaded and validated once per container
     try:
-        ssm_params = get_ssm_params(ssm_param_path)
+        settings = get_settings(retrier=retrier)
+        bucket_name = settings["output-bucket-name"]
+        # 'queue-arn' lists every queue shard the consumer reads, as a
+        # comma-separated list; a set makes each record's check O(1)
+        queue_arn_list = parse_list_param(settings["queue-arn"])
+        queue_arns = frozenset(queue_arn_list)
+        # 'dlq-url' lists the dead-letter queue of each queue, in the same order
+        dlq_urls = dict(
+            zip(queue_arn_list, parse_list_param(settings.get("dlq-url") or ""))
+        )
     except ClientError as e:
         if e.response["Error"]["Code"] == "AccessDeniedException":
             logger.exception(
-                f"Lambda function not authorized to get SSM Parameter Store parameters from path '{ssm_param_path}'."
+                f"Lambda function not authorized to get SSM Parameter Store parameters from path '{config['ssm_param_path']}'."
             )
             raise
         else:
@@ -204,130 +385,152 @@ def lambda_handler(event, context):
             logger.exception("Error reading parameters from SSM Parameter Store.")
             raise
     except ValueError:
-        logger.exception(
-            f"No parameters found in SSM Parameter Store under path '{ssm_param_path}'."
-        )
+        logger.exception("Required parameters not found by the config provider.")
         raise
     except Exception:
-        logger.exception("Error reading parameters from SSM Parameter Store.")
+        logger.exception("Error occurred while loading settings.")
         raise
 
-    # verify required SSM Parameter Store parameters were retrieved
+    # capture a sample of events for replay; a failed capture is only logged
     try:
-        verify_ssm_parameters(ssm_params, config["required_ssm_params"])
-        bucket_name = ssm_params["output-bucket-name"]
-        queue_arn = ssm_params["queue-arn"]
-    except ValueError:
-        logger.exception(
-            f"Required SSM Parameter Store parameter not found under path '{ssm_param_path}'."
-        )
-        raise
+        capture_bucket_name = settings.get("capture-bucket-name")
+        if capture_bucket_name and is_sampled(get_capture_rate()):
+            capture_event(event, context, capture_bucket_name, "consumer")
     except Exception:
-        logger.exception(
-            "Error occurred while verifying parameters retrieved from SSM Parameter Store."
-        )
-        raise
+        logger.warning("Could not capture event.", exc_info=True)
 
     # verify event dict has required keys
     try:
         verify_event(event)
     except ValueError:
-        logger.exception(f"SQS event does not contain a list of records: {event}")
+        logger.exception(
+            f"SQS event does not contain a list of records: {preview(event)}"
+        )
         raise
     except Exception:
         logger.exception("Error occurred while verifying the SQS event.")
         raise
 
-    for record in event.get("Records", []):
-        logger.info(
-            f"Processing {len(event.get('Records', []))} record(s) from the SQS event."
-        )
-
-        # verify the SQS record
-        try:
-            verify_sqs_record(record)
-        except ValueError:
-            logger.exception(
-                f"SQS record does not have required keys to process it: {record}"
-            )
-            raise
-        except Exception:
-            logger.exception("Error verifying SQS record.")
-            raise
+    logger.info(f"Processing {len(event['Records'])} record(s) from the SQS event.")
 
-        # verify the event source is the expected SQS queue
-        try:
-            verify_sqs_source(record, queue_arn)
-        except ValueError:
-            logger.exception(f"Event not generated from valid SQS source: {record}")
-            raise
-        except Exception:
-            logger.exception("Error occurred while verifying SQS source.")
-            raise
-
-        # make sure the body of the SQS record is valid JSON
-        try:
-            is_valid_json(record["body"])
-        except ValueError:
-            logger.exception(
-                f"Invalid JSON in record with messageId '{record['messageId']}'."
-            )
-            raise
-        except KeyError:
-            logger.exception("The SQS record does not contain a 'body' key")
-            raise
-        except Exception:
-            logger.exception("Error validating SQS message body JSON")
-            raise
+    # outputs go to the output S3 bucket unless another sink is configured
+    try:
+        sink = build_sink(bucket_name=bucket_name, retrier=retrier)
+    except ValueError:
+        logger.exception("Invalid output sink.")
+        raise
 
-        # process the record
-        try:
-            logger.info(f"Processing record with messageId '{record['messageId']}'.")
-            message = process_message(record["body"])
-        except KeyError:
-            logger.exception(
-                f"Message received from SQS did not contain JSON with 'text' field: {record['body']}"
-            )
-            raise
-        except Exception:
-            logger.exception("Error processing record.")
-            raise
+    # messages that fail permanently are quarantined instead of retried
+    try:
+        quarantine = build_quarantine(
+            bucket_name=bucket_name, dlq_urls=dlq_urls, retrier=retrier
+        )
+    except ValueError:
+        logger.exception("Invalid quarantine destination.")
+        raise
 
-        try:
-            check_for_err_str(message)
-        except ValueError:
-            logger.exception(
-                f"Found special string that generates an error: '{message}'"
-            )
-            raise
+    recorder = LatencyRecorder()
+    pipeline = build_pipeline(
+        queue_arns,
+        sink,
+        recorder,
+        deadline=Deadline(context, config["deadline"]["abandon_ms"]),
+    )
+
+    # records not written before the deadline are reported as batch item
+    # failures, so only they are redelivered instead of the whole batch
+    message_ids = [get_message_id(record) for record in event["Records"]]
+    processed_ids = set()
+    # a packed message is processed once every one of its documents is
+    packed = PackedMessages()
+
+    # records are drained from the event as they are processed, so each one can
+    # be freed once it has been written
+    profiler = MemoryProfiler(is_memory_profiling_enabled())
+    records = until_deadline(
+        drain(event["Records"]), Deadline(context, config["deadline"]["stop_ms"])
+    )
+
+    abandoned = False
 
-        try:
-            logger.info(f"Writing message to S3 bucket '{bucket_name}'.")
-            write_obj_to_s3(
-                bucket_name,
-                f"{record['messageId']}.txt",
-                message,
+    try:
+        with profiler:
+            for record in pipeline.run(records):
+                message_id = packed.done(record)
+                if message_id is not None:
+                    processed_ids.add(message_id)
+    except DeadlineExceeded:
+        abandoned = True
+        logger.warning("Deadline reached with records still being written.")
+    finally:
+        # writes abandoned at the deadline are not waited for
+        sink.close(wait=not abandoned)
+
+        logger.info("Pipeline stage statistics.", extra={"stages": pipeline.stats()})
+        publish_circuit_states()
+
+        logger.info("Message latencies.", extra={"latencies": recorder.summary()})
+        recorder.publish(config["metrics_namespace"])
+
+        memory = profiler.report(len(processed_ids))
+        logger.info("Memory usage.", extra={"memory": memory})
+        metrics.add_metric(
+            name="MaxRssBytes", unit=MetricUnit.Bytes, value=memory["max_rss_bytes"]
+        )
+        if profiler.enabled:
+            metrics.add_metric(
+                name="PeakBytesPerRecord",
+                unit=MetricUnit.Bytes,
+                value=memory["peak_bytes_per_record"],
             )
-        except ClientError as e:
-            if e.response["Error"]["Code"] == "AccessDeniedException":
-                logger.exception(
-                    f"Lambda function not authorized to write to S3 bucket '{bucket_name}'."
-                )
-                raise
-            else:
-                # Handle other ClientErrors
-                logger.exception(f"Error writing to S3 bucket '{bucket_name}'.")
-                raise
-        except Exception:
-            logger.exception(f"Error writing to S3 bucket '{bucket_name}'.")
-            raise
 
-        processed_records += 1
+    # records that failed permanently in a stage with the 'skip' error policy
+    # are quarantined and deleted with the batch; those that failed otherwise
+    # are retried, along with those not processed before the deadline
+    failed_ids = {get_message_id(failure.item) for failure in pipeline.failures}
+    quarantined_ids = quarantine_failures(pipeline.failures, quarantine)
+
+    # a packed message whose documents were each written or quarantined is
+    # done; one with a document left to retry is retried as a whole
+    for failure in pipeline.failures:
+        if (
+            getattr(failure.item, "packed_message_id", None) is not None
+            and failure.item.message_id in quarantined_ids
+        ):
+            message_id = packed.done(failure.item)
+            if message_id is not None:
+                quarantined_ids.add(message_id)
+
+    unprocessed_ids = [
+        message_id
+        for message_id in message_ids
+        if message_id not in processed_ids and message_id not in quarantined_ids
+    ]
+    deadline_ids = [
+        message_id for message_id in unprocessed_ids if message_id not in failed_ids
+    ]
+
+    if len(unprocessed_ids) > len(deadline_ids):
+        logger.warning(
+            f"{len(unprocessed_ids) - len(deadline_ids)} record(s) failed; reporting them as batch item failures."
+        )
+    if deadline_ids:
+        logger.warning(
+            f"{len(deadline_ids)} record(s) not processed before the deadline; reporting them as batch item failures."
+        )
+    metrics.add_metric(
+        name="DeadlineUnprocessedRecords",
+        unit=MetricUnit.Count,
+        value=len(deadline_ids),
+    )
 
-    logger.info(f"{processed_records} record(s) processed.")
+    logger.info(f"{len(processed_ids)} record(s) processed.")
     logger.info("Done.")
 
     return {
         "statusCode": 200,
         "body": json.dumps("Successfully processed SQS record(s).)"),
+        "batchItemFailures": [
+            {"itemIdentifier": message_id} for message_id in unprocessed_ids
+        ],
     }
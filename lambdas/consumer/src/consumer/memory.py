@@ -0,0 +1,125 @@
+# Python Standard Library imports
+import os
+import reprlib
+import resource
+import tracemalloc
+
+# local imports
+from consumer.config import config
+
+# builds bounded representations of events and records for log messages, so
+# an error in a large batch does not format the whole batch into a string
+_preview = reprlib.Repr()
+_preview.maxstring = 200
+_preview.maxother = 200
+_preview.maxlist = 3
+_preview.maxdict = 10
+_preview.maxlevel = 4
+
+
+def preview(obj):
+    """
+    Get a size-bounded representation of an object for a log message.
+
+    :param obj (object): The object, e.g. an SQS event or record.
+    :return (str): The representation, with long strings and containers elided.
+    """
+
+    return _preview.repr(obj)
+
+
+def drain(items):
+    """
+    Yield items from a list, removing each one from the list as it is yielded.
+
+    Once an item has been processed and dropped by the caller it can be freed,
+    which keeps peak memory bounded for large batches.
+
+    :param items (list): The list to drain; it is empty afterwards.
+    :return (generator): The items, in their original order.
+    """
+
+    items.reverse()
+
+    while items:
+        yield items.pop()
+
+
+def is_memory_profiling_enabled():
+    """
+    Check if memory profiling is turned on by the MEMORY_PROFILING environment variable or the config.
+
+    :return (bool): True if memory profiling is enabled, False otherwise.
+    """
+
+    env = os.environ.get("MEMORY_PROFILING")
+
+    if env is not None:
+        return env.lower() in ("1", "true", "yes")
+
+    return config["memory_profiling"]
+
+
+class MemoryProfiler:
+    """
+    Measures the memory allocated while processing a batch with tracemalloc.
+
+    tracemalloc slows allocation down noticeably, so the profiler does nothing
+    unless it is enabled.  The process's peak resident set size is reported
+    either way, since it is free to read.
+    """
+
+    def __init__(self, enabled=False, top=5):
+        self.enabled = enabled
+        self.top = top
+        self._baseline = 0
+        self._current = 0
+        self._peak = 0
+        self._top_stats = []
+
+    def __enter__(self):
+        if self.enabled:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._baseline = tracemalloc.get_traced_memory()[0]
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.enabled:
+            self._current, self._peak = tracemalloc.get_traced_memory()
+            self._top_stats = tracemalloc.take_snapshot().statistics("lineno")[
+                : self.top
+            ]
+            tracemalloc.stop()
+
+        return False
+
+    def report(self, records):
+        """
+        Summarise the memory used while processing a batch.
+
+        :param records (int): The number of records processed.
+        :return (dict): The peak RSS and, when enabled, the traced peak, per-record and top allocations in bytes.
+        """
+
+        # ru_maxrss is reported in kilobytes on Linux
+        report = {
+            "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        }
+
+        if self.enabled:
+            peak = self._peak - self._baseline
+            report.update(
+                {
+                    "traced_peak_bytes": peak,
+                    "traced_retained_bytes": self._current - self._baseline,
+                    "peak_bytes_per_record": peak // records if records else 0,
+                    "top_allocations": [
+                        f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size} bytes"
+                        for stat in self._top_stats
+                    ],
+                }
+            )
+
+        return report
@@ -0,0 +1,121 @@
+# Python Standard Library imports
+from collections import Counter
+
+# local imports
+from consumer.records import SqsRecord
+from consumer.tracing import CORRELATION_ID_ATTRIBUTE
+from consumer.tracing import INGEST_TIMESTAMP_ATTRIBUTE
+from consumer.tracing import get_message_attribute
+
+# SQS message attribute the producer marks a packed message with, holding how
+# many documents it carries.  The body of a packed message is
+# {"documents": [...]}, with a {"correlation_id": ..., "ingest_timestamp": ...,
+# "document": ...} entry for each document
+PACKED_ATTRIBUTE = "PackedDocuments"
+
+
+def is_packed(record):
+    """
+    Check whether an SQS record is a packed message.
+
+    :param record (SqsRecord): The SQS record.
+    :return (bool): True if the message carries many documents, False otherwise.
+    """
+
+    return get_message_attribute(record, PACKED_ATTRIBUTE) is not None
+
+
+def unpack(record):
+    """
+    Split a packed message into a record for each document it carries.
+
+    Each document's record has the messageId of the packed message followed
+    by the document's position, e.g. '059f36b4-...-3', so its output key is
+    the same on every delivery.  It shares the packed message's attributes,
+    and has the correlation ID and ingest time of its document.  Its payload
+    is the decoded document and it has no body of its own.
+
+    :param record (SqsRecord): The SQS record of the packed message, with its decoded payload.
+    :return (list): The records of the documents.
+    """
+
+    envelope = record.payload
+    documents = envelope.get("documents") if isinstance(envelope, dict) else None
+
+    if not (isinstance(documents, list) and documents):
+        raise ValueError("Packed message does not hold a list of documents.")
+
+    expected = get_message_attribute(record, PACKED_ATTRIBUTE)
+    if expected != str(len(documents)):
+        raise ValueError(
+            f"Packed message holds {len(documents)} document(s), not {expected}."
+        )
+
+    shared_attributes = {
+        name: attribute
+        for name, attribute in record.message_attributes.items()
+        if name != PACKED_ATTRIBUTE
+    }
+    records = []
+
+    for position, entry in enumerate(documents):
+        if not (isinstance(entry, dict) and "document" in entry):
+            raise ValueError(f"Packed document {position} is malformed.")
+
+        message_attributes = dict(shared_attributes)
+        for name, key, data_type in (
+            (CORRELATION_ID_ATTRIBUTE, "correlation_id", "String"),
+            (INGEST_TIMESTAMP_ATTRIBUTE, "ingest_timestamp", "Number"),
+        ):
+            if entry.get(key) is not None:
+                message_attributes[name] = {
+                    "stringValue": str(entry[key]),
+                    "dataType": data_type,
+                }
+
+        document = SqsRecord(
+            f"{record.message_id}-{position}",
+            None,
+            record.event_source_arn,
+            record.receipt_handle,
+            record.attributes,
+            message_attributes,
+        )
+        document.payload = entry["document"]
+        document.packed_message_id = record.message_id
+        document.packed_documents = len(documents)
+        records.append(document)
+
+    return records
+
+
+class PackedMessages:
+    """
+    Tells when each SQS message is done, counting the documents of packed messages.
+
+    A packed message is deleted from its queue, or reported as a batch item
+    failure, as a whole, so it is only done once every one of its documents
+    has been written or quarantined.  A message that is not packed is done
+    as soon as it is.
+    """
+
+    def __init__(self):
+        self._done = Counter()
+
+    def done(self, record):
+        """
+        Count a record as written or quarantined.
+
+        :param record (SqsRecord): The record of a message, or of a document of a packed message.
+        :return (str): The messageId of the SQS message if it is now done, or None if documents of its packed message are still outstanding.
+        """
+
+        if record.packed_message_id is None:
+            return record.message_id
+
+        self._done[record.packed_message_id] += 1
+
+        if self._done[record.packed_message_id] < record.packed_documents:
+            return None
+
+        return record.packed_message_id
@@ -0,0 +1,287 @@
+# Python Standard Library imports
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# stage error policies
+RAISE = "raise"  # stop processing and re-raise the exception
+SKIP = "skip"  # record the failure, drop the item and carry on with the rest
+
+ERROR_POLICIES = frozenset((RAISE, SKIP))
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when items are still in a concurrent stage as the pipeline's deadline passes.
+    """
+
+
+class Stage:
+    """
+    A named step in a pipeline.
+
+    The stage function takes one item and returns the item to pass to the next
+    stage.  Stages with a concurrency greater than one run their function in a
+    thread pool, which suits stages that wait on network calls.
+
+    A stage with a batch size is passed lists of up to that many consecutive
+    items instead, and returns a list holding, for each item,
+    the item to pass on or the exception it failed with, so a batch can fail
+    in part.  An exception raised by the function fails the whole batch.
+
+    An expanding stage returns, for each item, an iterable of the items to
+    pass on, so one item can become none or many.
+    """
+
+    __slots__ = ("name", "func", "concurrency", "on_error", "batch_size", "expand")
+
+    def __init__(
+        self,
+        name,
+        func,
+        concurrency=1,
+        on_error=RAISE,
+        batch_size=None,
+        expand=False,
+    ):
+        if on_error not in ERROR_POLICIES:
+            raise ValueError(f"Unknown error policy '{on_error}'.")
+
+        if concurrency < 1:
+            raise ValueError("Stage concurrency must be at least 1.")
+
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("Stage batch size must be at least 1.")
+
+        self.name = name
+        self.func = func
+        self.concurrency = concurrency
+        self.on_error = on_error
+        self.batch_size = batch_size
+        self.expand = expand
+
+
+class Failure:
+    """
+    An item that failed in a stage with the SKIP error policy.
+    """
+
+    __slots__ = ("stage", "item", "error")
+
+    def __init__(self, stage, item, error):
+        self.stage = stage
+        self.item = item
+        self.error = error
+
+
+def until_deadline(items, deadline):
+    """
+    Yield items until a deadline passes, leaving the rest unconsumed.
+
+    The deadline is checked before each item is taken, so an item is never
+    taken from the source and then dropped.
+
+    :param items (iterable): The items.
+    :param deadline (Deadline): The deadline.
+    :return (generator): The items taken before the deadline.
+    """
+
+    items = iter(items)
+
+    while not deadline.expired():
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+
+        yield item
+
+
+def batches(items, size):
+    """
+    Group items into lists of up to 'size' consecutive items.
+
+    :param items (iterable): The items.
+    :param size (int): The largest number of items in a list.
+    :return (generator): The lists of items.
+    """
+
+    batch = []
+
+    for item in items:
+        batch.append(item)
+
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _timed_call(func, item):
+    """
+    Call a stage function, capturing its result or exception and elapsed time.
+
+    :param func (callable): The stage function.
+    :param item (object): The item to pass to the stage function.
+    :return (tuple): A (succeeded, result or exception, seconds) tuple.
+    """
+
+    start = time.perf_counter()
+
+    try:
+        result = func(item)
+    except Exception as e:
+        return False, e, time.perf_counter() - start
+
+    return True, result, time.perf_counter() - start
+
+
+class Pipeline:
+    """
+    Runs items through a sequence of stages as a stream of generators.
+
+    Each item moves on to the next stage as soon as it leaves the previous one,
+    so only a stage's in-flight items are held in memory.  The time spent in
+    each stage is recorded and available from stats().
+
+    With a deadline, concurrent stages stop waiting for their in-flight items
+    when it passes and raise DeadlineExceeded; those items are left to finish
+    in the background.
+    """
+
+    def __init__(self, stages, deadline=None):
+        self.stages = list(stages)
+        self.deadline = deadline
+        self.failures = []
+        self._stats = {
+            stage.name: {"processed": 0, "failed": 0, "seconds": 0.0}
+            for stage in self.stages
+        }
+
+    def run(self, items):
+        """
+        Run items through every stage.
+
+        :param items (iterable): The items to process.
+        :return (generator): The items returned by the last stage.
+        """
+
+        stream = iter(items)
+
+        for stage in self.stages:
+            if stage.batch_size is not None:
+                stream = batches(stream, stage.batch_size)
+
+            if stage.concurrency > 1:
+                stream = self._run_concurrent(stage, stream)
+            else:
+                stream = self._run_sequential(stage, stream)
+
+        return stream
+
+    def stats(self):
+        """
+        Get the number of items processed and failed, and the time spent, per stage.
+
+        :return (dict): The statistics keyed by stage name.
+        """
+
+        return {
+            name: {**stats, "seconds": round(stats["seconds"], 6)}
+            for name, stats in self._stats.items()
+        }
+
+    def _run_sequential(self, stage, stream):
+        for item in stream:
+            yield from self._collect(stage, item, *_timed_call(stage.func, item))
+
+    def _run_concurrent(self, stage, stream):
+        # results are collected in submission order and at most 'concurrency'
+        # items are in flight at once
+        executor = ThreadPoolExecutor(max_workers=stage.concurrency)
+        pending = deque()
+        abandoned = False
+
+        try:
+            for item in stream:
+                pending.append((item, executor.submit(_timed_call, stage.func, item)))
+
+                if len(pending) >= stage.concurrency:
+                    item, future = pending.popleft()
+                    yield from self._collect(
+                        stage, item, *self._result(stage, item, future, pending)
+                    )
+
+            while pending:
+                item, future = pending.popleft()
+                yield from self._collect(
+                    stage, item, *self._result(stage, item, future, pending)
+                )
+        except DeadlineExceeded:
+            abandoned = True
+            raise
+        finally:
+            # abandoned items keep running, but nothing waits for them
+            executor.shutdown(wait=not abandoned, cancel_futures=abandoned)
+
+    def _result(self, stage, item, future, pending):
+        remaining = self.deadline.remaining() if self.deadline is not None else None
+
+        try:
+            return future.result(
+                timeout=None if remaining is None else max(0.0, remaining)
+            )
+        except TimeoutError:
+            in_flight = [item, *(pending_item for pending_item, _ in pending)]
+            if stage.batch_size is not None:
+                in_flight = [batch_item for batch in in_flight for batch_item in batch]
+
+            self._stats[stage.name]["failed"] += len(in_flight)
+            raise DeadlineExceeded(
+                f"{len(in_flight)} item(s) still in stage '{stage.name}' at the deadline."
+            ) from None
+
+    def _collect(self, stage, item, succeeded, result, seconds):
+        if stage.batch_size is None:
+            yield from self._collect_item(stage, item, succeeded, result, seconds)
+            return
+
+        # a batch's time is counted once, and its items are collected one by one
+        self._stats[stage.name]["seconds"] += seconds
+        results = result if succeeded else [result] * len(item)
+
+        if len(results) != len(item):
+            raise ValueError(
+                f"Stage '{stage.name}' returned {len(results)} result(s) for a batch of {len(item)}."
+            )
+
+        for batch_item, batch_result in zip(item, results):
+            yield from self._collect_item(
+                stage,
+                batch_item,
+                not isinstance(batch_result, Exception),
+                batch_result,
+                0.0,
+            )
+
+    def _collect_item(self, stage, item, succeeded, result, seconds):
+        stats = self._stats[stage.name]
+        stats["seconds"] += seconds
+
+        if succeeded:
+            stats["processed"] += 1
+            if stage.expand:
+                yield from result
+            else:
+                yield result
+            return
+
+        stats["failed"] += 1
+
+        if stage.on_error == RAISE:
+            raise result
+
+        self.failures.append(Failure(stage.name, item, result))
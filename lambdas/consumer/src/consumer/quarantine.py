@@ -0,0 +1,366 @@
+# Python Standard Library imports
+import json
+
+from collections import defaultdict
+
+# third-party library imports
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from botocore.exceptions import ClientError
+
+# local imports
+from consumer.clients import make_client
+from consumer.config import config
+from consumer.pipeline import batches
+from consumer.resilience import Retrier
+from consumer.resilience import client_config
+from consumer.sinks import get_s3_client
+from consumer.sinks import write_obj_to_s3
+
+logger = Logger(child=True)
+metrics = Metrics(namespace=config["metrics_namespace"])
+
+# quarantine destinations
+DLQ = "dlq"  # the dead-letter queue of the queue the message came from
+S3 = "s3"  # a JSON object under a prefix in the output S3 bucket
+
+QUARANTINE_DESTINATIONS = frozenset((DLQ, S3))
+
+# the exceptions each stage raises for a message that fails the same way on
+# every delivery; any other failure, such as a throttled or timed-out write, is
+# transient and the message is retried
+PERMANENT_ERRORS = {
+    # invalid JSON, or a body that is not UTF-8
+    "decode": (ValueError,),
+    # a packed message that does not hold the documents it says it does
+    "unpack": (ValueError,),
+    # a message without a 'text' field, the special error string, or a
+    # document the transform cannot handle
+    "transform": (KeyError, TypeError, ValueError),
+}
+
+# SendMessageBatch takes at most 10 entries, and a message at most 10 attributes
+MAX_BATCH_ENTRIES = 10
+MAX_MESSAGE_ATTRIBUTES = 10
+MAX_REASON_LENGTH = 1024
+
+
+def is_permanent(failure):
+    """
+    Check whether a message's failure would recur on every delivery.
+
+    :param failure (Failure): The pipeline failure.
+    :return (bool): True if the failure is permanent, False if a retry could succeed.
+    """
+
+    return isinstance(failure.error, PERMANENT_ERRORS.get(failure.stage, ()))
+
+
+def failure_reason(failure):
+    """
+    Describe why a message failed.
+
+    :param failure (Failure): The pipeline failure.
+    :return (str): The stage, exception type and message, e.g. "decode: JSONDecodeError: Expecting value".
+    """
+
+    reason = f"{failure.stage}: {type(failure.error).__name__}: {failure.error}"
+
+    return reason[:MAX_REASON_LENGTH]
+
+
+def message_body(record):
+    """
+    Get the body to quarantine a message with.
+
+    A document of a packed message has no body of its own, so its decoded
+    document is encoded again.
+
+    :param record (SqsRecord): The SQS record.
+    :return (str): The message body.
+    """
+
+    if record.body is not None:
+        return record.body
+
+    return json.dumps(record.payload)
+
+
+def to_send_attributes(message_attributes):
+    """
+    Convert the message attributes of a received SQS record to those of a message to send.
+
+    :param message_attributes (dict): The attributes as Lambda passes them, e.g. {"Name": {"stringValue": "x", "dataType": "String"}}.
+    :return (dict): The attributes as SendMessage takes them, e.g. {"Name": {"StringValue": "x", "DataType": "String"}}.
+    """
+
+    attributes = {}
+
+    for name, attribute in message_attributes.items():
+        data_type = attribute.get("dataType", "")
+
+        if data_type.startswith("Binary"):
+            value = {"BinaryValue": attribute["binaryValue"]}
+        else:
+            value = {"StringValue": attribute["stringValue"]}
+
+        attributes[name] = {"DataType": data_type, **value}
+
+    return attributes
+
+
+def dlq_entry(entry_id, failure):
+    """
+    Build the SendMessageBatch entry that quarantines a failed message.
+
+    The message keeps its body and attributes, and gains attributes with the
+    reason it failed and the queue it came from.
+
+    :param entry_id (str): The ID of the entry within its batch.
+    :param failure (Failure): The pipeline failure.
+    :return (dict): The entry.
+    """
+
+    record = failure.item
+    attributes = {
+        "QuarantineReason": {
+            "DataType": "String",
+            "StringValue": failure_reason(failure),
+        },
+        "QuarantineStage": {"DataType": "String", "StringValue": failure.stage},
+        "SourceQueueArn": {
+            "DataType": "String",
+            "StringValue": record.event_source_arn,
+        },
+    }
+
+    # the original attributes, such as the correlation ID, go first, as many
+    # as fit alongside the quarantine attributes
+    original = to_send_attributes(record.message_attributes)
+    kept = list(original)[: MAX_MESSAGE_ATTRIBUTES - len(attributes)]
+
+    return {
+        "Id": entry_id,
+        "MessageBody": message_body(record),
+        "MessageAttributes": {
+            **{name: original[name] for name in kept},
+            **attributes,
+        },
+    }
+
+
+# Every quarantine has send(failures), which is given the pipeline failures of
+# messages that failed permanently and returns, for each one, None if the
+# message was quarantined or the exception quarantining it failed with.  A
+# message that could not be quarantined is retried instead.
+
+
+class DlqQuarantine:
+    """
+    Sends each message to the dead-letter queue of the queue it came from.
+    """
+
+    def __init__(self, dlq_urls, retrier=None, client=None):
+        self.dlq_urls = dlq_urls
+        self.retrier = retrier or Retrier.from_config()
+        self.client = client or make_client("sqs", config=client_config)
+
+    def send(self, failures):
+        """
+        Send failed messages to their dead-letter queues, in batches of up to 10 per queue.
+
+        :param failures (list): The pipeline failures.
+        :return (list): For each failure, None if its message was quarantined, or the exception it failed with.
+        """
+
+        errors = [None] * len(failures)
+        by_queue = defaultdict(list)
+
+        for index, failure in enumerate(failures):
+            dlq_url = self.dlq_urls.get(failure.item.event_source_arn)
+
+            if dlq_url is None:
+                errors[index] = ValueError(
+                    f"No dead-letter queue for '{failure.item.event_source_arn}'."
+                )
+            else:
+                by_queue[dlq_url].append(index)
+
+        for dlq_url, indexes in by_queue.items():
+            for batch in batches(indexes, MAX_BATCH_ENTRIES):
+                for index, error in self.send_batch(
+                    dlq_url, [(index, failures[index]) for index in batch]
+                ).items():
+                    errors[index] = error
+
+        return errors
+
+    def send_batch(self, dlq_url, batch):
+        """
+        Send one batch of failed messages to a dead-letter queue, retrying if SQS throttles the call.
+
+        :param dlq_url (str): The URL of the dead-letter queue.
+        :param batch (list): The (index, failure) pairs to send.
+        :return (dict): The exception of each index that failed.
+        """
+
+        entries = [dlq_entry(str(index), failure) for index, failure in batch]
+
+        try:
+            response = self.retrier.call(
+                "sqs",
+                self.client.send_message_batch,
+                QueueUrl=dlq_url,
+                Entries=entries,
+            )
+        except Exception as e:
+            return {index: e for index, _ in batch}
+
+        return {
+            int(failed["Id"]): ClientError(
+                {"Error": {"Code": failed["Code"], "Message": failed.get("Message")}},
+                "SendMessageBatch",
+            )
+            for failed in response.get("Failed", [])
+        }
+
+
+class S3Quarantine:
+    """
+    Writes each message, with the reason it failed, as a JSON object under a prefix in an S3 bucket.
+    """
+
+    def __init__(self, bucket_name, prefix="quarantine", retrier=None, client=None):
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.retrier = retrier or Retrier.from_config()
+        self.client = client or get_s3_client()
+
+    def send(self, failures):
+        """
+        Write failed messages to the S3 bucket.
+
+        :param failures (list): The pipeline failures.
+        :return (list): For each failure, None if its message was quarantined, or the exception it failed with.
+        """
+
+        errors = []
+
+        for failure in failures:
+            try:
+                self.write(failure)
+            except Exception as e:
+                errors.append(e)
+            else:
+                errors.append(None)
+
+        return errors
+
+    def write(self, failure):
+        """
+        Write one failed message to the S3 bucket, retrying if S3 throttles the write.
+
+        :param failure (Failure): The pipeline failure.
+        :return (None): Default 'None' returned.
+        """
+
+        record = failure.item
+        content = json.dumps(
+            {
+                "messageId": record.message_id,
+                "eventSourceARN": record.event_source_arn,
+                "stage": failure.stage,
+                "reason": failure_reason(failure),
+                "attributes": record.attributes,
+                "messageAttributes": record.message_attributes,
+                "body": message_body(record),
+            }
+        )
+
+        self.retrier.call(
+            "s3",
+            write_obj_to_s3,
+            self.bucket_name,
+            f"{self.prefix}/{record.message_id}.json",
+            content,
+            client=self.client,
+        )
+
+
+def build_quarantine(
+    destination=None, bucket_name=None, dlq_urls=None, retrier=None, client=None
+):
+    """
+    Build a quarantine by destination.
+
+    :param destination (str, optional): 'dlq', 's3' or None. Defaults to the 'quarantine' config.
+    :param bucket_name (str, optional): The name of the output S3 bucket, for the 's3' destination.
+    :param dlq_urls (dict, optional): The dead-letter queue URL of each source queue ARN, for the 'dlq' destination.
+    :param retrier (Retrier, optional): Retries throttled AWS calls.
+    :param client (botocore.client.BaseClient, optional): The SQS or S3 client. Defaults to a new client.
+    :return (object): The quarantine, or None if quarantining is off.
+    """
+
+    destination = destination or config["quarantine"]["destination"]
+
+    if destination is None:
+        return None
+
+    quarantines = {
+        DLQ: lambda: DlqQuarantine(dlq_urls or {}, retrier, client),
+        S3: lambda: S3Quarantine(
+            bucket_name, config["quarantine"]["prefix"], retrier, client
+        ),
+    }
+
+    if destination not in quarantines:
+        raise ValueError(f"Unknown quarantine destination '{destination}'.")
+
+    return quarantines[destination]()
+
+
+def quarantine_failures(failures, quarantine):
+    """
+    Quarantine the messages among the pipeline failures that failed permanently.
+
+    :param failures (list): The pipeline failures.
+    :param quarantine (object): The quarantine, or None if quarantining is off.
+    :return (set): The messageIds of the messages quarantined.
+    """
+
+    if quarantine is None:
+        return set()
+
+    permanent = [failure for failure in failures if is_permanent(failure)]
+
+    if not permanent:
+        return set()
+
+    quarantined = set()
+
+    for failure, error in zip(permanent, quarantine.send(permanent)):
+        message_id = failure.item.message_id
+
+        if error is None:
+            quarantined.add(message_id)
+            logger.warning(
+                f"Quarantined message with messageId '{message_id}': {failure_reason(failure)}"
+            )
+        else:
+            logger.error(
+                f"Could not quarantine message with messageId '{message_id}'; it will be retried.",
+                exc_info=error,
+            )
+
+    metrics.add_metric(
+        name="QuarantinedRecords", unit=MetricUnit.Count, value=len(quarantined)
+    )
+    if len(quarantined) < len(permanent):
+        metrics.add_metric(
+            name="QuarantineFailures",
+            unit=MetricUnit.Count,
+            value=len(permanent) - len(quarantined),
+        )
+
+    return quarantined
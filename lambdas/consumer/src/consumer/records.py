@@ -0,0 +1,126 @@
+# keys an SQS record must have before it can be processed; kept as a frozenset
+# so the check is a single subset comparison against the record's keys
+REQUIRED_RECORD_KEYS = frozenset(("messageId", "body", "eventSource", "eventSourceARN"))
+
+SQS_EVENT_SOURCE = "aws:sqs"
+
+
+class SqsRecord:
+    """
+    A validated SQS record holding only the fields the consumer uses.
+
+    Records are parsed once, up front, so later stages can use attribute access
+    instead of probing the raw record dictionary again and again.
+    """
+
+    __slots__ = (
+        "message_id",
+        "receipt_handle",
+        "body",
+        "event_source_arn",
+        "attributes",
+        "message_attributes",
+        "payload",
+        "output",
+        "packed_message_id",
+        "packed_documents",
+    )
+
+    def __init__(
+        self,
+        message_id,
+        body,
+        event_source_arn,
+        receipt_handle=None,
+        attributes=None,
+        message_attributes=None,
+    ):
+        self.message_id = message_id
+        self.body = body
+        self.event_source_arn = event_source_arn
+        self.receipt_handle = receipt_handle
+        self.attributes = attributes or {}
+        self.message_attributes = message_attributes or {}
+        self.payload = None  # the decoded message body
+        self.output = None  # the processed message to write
+        # the messageId of the packed message a document came in, and how
+        # many documents that message carries
+        self.packed_message_id = None
+        self.packed_documents = None
+
+    def __repr__(self):
+        return f"SqsRecord(message_id={self.message_id!r})"
+
+
+def is_sqs_record(record):
+    """
+    Check a raw SQS record has the keys required to process it.
+
+    :param record (dict): The dictionary containing the SQS record.
+    :return (bool): True if the record has the required keys, False otherwise.
+    """
+
+    return isinstance(record, dict) and REQUIRED_RECORD_KEYS <= record.keys()
+
+
+def is_valid_sqs_source(record, queue_arns):
+    """
+    Check a raw SQS record was generated by one of the expected SQS queues.
+
+    :param record (dict): The dictionary containing the SQS record.
+    :param queue_arns (frozenset | str): The ARNs of the expected SQS queues, or the ARN of a single queue.
+    :return (bool): True if the SQS source is valid, False otherwise.
+    """
+
+    if record["eventSource"] != SQS_EVENT_SOURCE:
+        return False
+
+    # a str would match substrings with 'in', so a single ARN is compared
+    if isinstance(queue_arns, str):
+        return record["eventSourceARN"] == queue_arns
+
+    return record["eventSourceARN"] in queue_arns
+
+
+def parse_sqs_record(record, queue_arns):
+    """
+    Validate a raw SQS record and convert it to an SqsRecord.
+
+    :param record (dict): The dictionary containing the SQS record.
+    :param queue_arns (frozenset | str): The ARNs of the expected SQS queues, or the ARN of a single queue.
+    :return (SqsRecord): The parsed SQS record.
+    """
+
+    if not is_sqs_record(record):
+        raise ValueError("Malformed record.")
+
+    if not is_valid_sqs_source(record, queue_arns):
+        raise ValueError("Invalid SQS source.")
+
+    return SqsRecord(
+        record["messageId"],
+        record["body"],
+        record["eventSourceARN"],
+        record.get("receiptHandle"),
+        record.get("attributes"),
+        record.get("messageAttributes"),
+    )
+
+
+def parse_sqs_event(event, queue_arns):
+    """
+    Validate an SQS event and yield its records as SqsRecord objects.
+
+    The event itself is checked immediately, but records are parsed lazily so
+    callers can stop at the first invalid record without parsing the rest of
+    the batch.
+
+    :param event (dict): A dictionary containing the SQS event.
+    :param queue_arns (frozenset | str): The ARNs of the expected SQS queues, or the ARN of a single queue.
+    :return (generator): The parsed SQS records.
+    """
+
+    if not (isinstance(event, dict) and isinstance(event.get("Records"), list)):
+        raise ValueError("Malformed event.")
+
+    return (parse_sqs_record(record, queue_arns) for record in event["Records"])
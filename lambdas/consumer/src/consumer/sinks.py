@@ -0,0 +1,650 @@
+# Python Standard Library imports
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# third-party library imports
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+# local imports
+from consumer.clients import make_client
+from consumer.config import config
+from consumer.content import CONDITIONAL
+from consumer.content import CONTENT_OUTPUT
+from consumer.content import content_digest
+from consumer.content import get_content_cache
+from consumer.content import object_exists
+from consumer.content import put_if_absent
+from consumer.keys import build_content_key
+from consumer.keys import build_output_key
+from consumer.resilience import Retrier
+from consumer.resilience import client_config
+from consumer.streams import to_stream
+from consumer.tracing import get_correlation_id
+
+logger = Logger(child=True)
+metrics = Metrics(namespace=config["metrics_namespace"])
+
+# sink types
+S3_SINK = "s3"  # objects in the output S3 bucket
+LOCAL_SINK = "local"  # files under a local directory
+STDOUT_SINK = "stdout"  # JSON lines on standard output
+NULL_SINK = "null"  # discarded
+
+SINK_TYPES = frozenset((S3_SINK, LOCAL_SINK, STDOUT_SINK, NULL_SINK))
+
+# the S3 client outputs are written with is kept for the life of the container,
+# so warm invocations reuse its connections; clients are thread-safe, so the
+# threads of every sink share it
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    Get the S3 client outputs are written with, creating it if needed.
+
+    :return (S3.Client): The client.
+    """
+
+    global _s3_client
+
+    with _s3_client_lock:
+        if _s3_client is None:
+            _s3_client = make_client("s3", config=client_config)
+
+        return _s3_client
+
+
+def clear_s3_client():
+    """
+    Forget the S3 client so the next get_s3_client() call creates it again.
+
+    :return (None): Default 'None' returned.
+    """
+
+    global _s3_client
+
+    with _s3_client_lock:
+        _s3_client = None
+
+
+def get_transfer_config():
+    """
+    Build the S3 transfer settings for large outputs from the config.
+
+    :return (TransferConfig): The S3 transfer settings.
+    """
+
+    return TransferConfig(
+        multipart_threshold=config["multipart_threshold"],
+        multipart_chunksize=config["multipart_part_size"],
+        max_concurrency=config["multipart_concurrency"],
+    )
+
+
+def content_size(content):
+    """
+    Get the size of an output in bytes, if it is held in memory.
+
+    :param content (str | bytes | file | iterable): The output, a readable file object, or an iterable of str or bytes chunks.
+    :return (int): The size in bytes, UTF-8 encoded for str, or None for a file object or iterable.
+    """
+
+    if isinstance(content, str):
+        return len(content.encode("utf-8"))
+
+    if isinstance(content, bytes):
+        return len(content)
+
+    return None
+
+
+def write_obj_to_s3(
+    bucket_name,
+    file_name,
+    content,
+    client=None,
+    transfer_config=None,
+    metadata=None,
+    size=None,
+):
+    """
+    Writes content to a file in an S3 bucket.
+
+    Content smaller than the multipart threshold is written with a single PUT.
+    Anything larger, and any streamed content, is uploaded in parts so memory
+    use stays bounded by the part size and part concurrency.
+
+    :param bucket_name (str): The name of the S3 bucket.
+    :param file_name (str): The name of the file (object) to create in the bucket.
+    :param content (str | bytes | file | iterable): The content to write to the file, a readable file object, or an iterable of str or bytes chunks.
+    :param client (S3.Client, optional): The S3 client to use. Defaults to a new client.
+    :param transfer_config (TransferConfig, optional): The multipart upload settings. Defaults to the settings in the config.
+    :param metadata (dict, optional): User-defined metadata to store with the object.
+    :param size (int, optional): The size of the content in bytes, if already known. Defaults to the size content_size() gives.
+    :return (dict): The response data from the S3 API call, or the bucket and key of a multipart upload.
+    """
+
+    client = client or make_client("s3")
+    transfer_config = transfer_config or get_transfer_config()
+
+    if size is None:
+        size = content_size(content)
+
+    if size is not None and size < transfer_config.multipart_threshold:
+        return client.put_object(
+            Bucket=bucket_name, Key=file_name, Body=content, Metadata=metadata or {}
+        )
+
+    try:
+        client.upload_fileobj(
+            to_stream(content, transfer_config.multipart_chunksize),
+            bucket_name,
+            file_name,
+            ExtraArgs={"Metadata": metadata or {}},
+            Config=transfer_config,
+        )
+    except ClientError as e:
+        # content held in memory can be uploaded again, so its error is left
+        # for a Retrier to judge, but a stream that has been read cannot be
+        if size is None:
+            raise S3UploadFailedError(
+                f"Failed to upload stream to {bucket_name}/{file_name}: {e}"
+            ) from e
+        raise
+
+    return {"Bucket": bucket_name, "Key": file_name}
+
+
+def output_key(record):
+    """
+    Build the key a record's output is written to when each message gets its own object.
+
+    :param record (SqsRecord): The SQS record.
+    :return (str): The key.
+    """
+
+    return build_output_key(
+        record.message_id,
+        record.attributes.get("SentTimestamp"),
+        config["output_key_layout"],
+        config["output_key_hash_chars"],
+    )
+
+
+def content_ref(record, key, digest, correlation_id):
+    """
+    Build the reference that records which content a message produced, and its key.
+
+    :param record (SqsRecord): The SQS record.
+    :param key (str): The key of the content.
+    :param digest (str): The SHA-256 hex digest of the content.
+    :param correlation_id (str): The correlation ID of the message.
+    :return (tuple): The key of the reference and the reference as JSON.
+    """
+
+    ref_key = "refs/" + build_output_key(
+        record.message_id,
+        record.attributes.get("SentTimestamp"),
+        config["output_key_layout"],
+        config["output_key_hash_chars"],
+        suffix=".json",
+    )
+    ref = {
+        "messageId": record.message_id,
+        "sha256": digest,
+        "key": key,
+        "correlationId": correlation_id,
+    }
+
+    return ref_key, json.dumps(ref)
+
+
+def output_bytes(content):
+    """
+    Read a record's output into bytes.
+
+    :param content (str | bytes | file | iterable): The output, a readable file object, or an iterable of str or bytes chunks.
+    :return (bytes): The output.
+    """
+
+    if isinstance(content, str):
+        return content.encode("utf-8")
+
+    if isinstance(content, bytes):
+        return content
+
+    return to_stream(content).read()
+
+
+def write_content_output(record, bucket_name, retrier, client=None, metadata=None):
+    """
+    Write the output of an SQS record under a key derived from its hash, unless it already exists.
+
+    A recent-hash cache is checked first, then S3 itself, with a conditional
+    PUT or, for outputs too large for a single PUT or if configured, a HEAD
+    request.  If enabled, a small reference object records which content each
+    message produced.
+
+    :param record (SqsRecord): The SQS record.
+    :param bucket_name (str): The name of the output S3 bucket.
+    :param retrier (Retrier): Retries the S3 calls if S3 throttles them.
+    :param client (S3.Client, optional): The S3 client to use. Defaults to a new client.
+    :param metadata (dict, optional): User-defined metadata to store with the content object.
+    :return (bool): True if the content was written, False if it already existed.
+    """
+
+    digest = content_digest(record.output)
+    key = build_content_key(
+        digest, config["output_key_layout"], config["output_key_hash_chars"]
+    )
+    cache = get_content_cache()
+    size = content_size(record.output)
+
+    if digest in cache:
+        metrics.add_metric(name="ContentCacheHits", unit=MetricUnit.Count, value=1)
+        written = False
+    elif (
+        config["content_existence_check"] == CONDITIONAL
+        and size is not None
+        and size < config["multipart_threshold"]
+    ):
+        written = retrier.call(
+            "s3",
+            put_if_absent,
+            bucket_name,
+            key,
+            record.output,
+            client=client,
+            metadata=metadata,
+        )
+    elif retrier.call("s3", object_exists, bucket_name, key, client=client):
+        written = False
+    else:
+        retrier.call(
+            "s3",
+            write_obj_to_s3,
+            bucket_name,
+            key,
+            record.output,
+            client=client,
+            metadata=metadata,
+            size=size,
+        )
+        written = True
+
+    cache.add(digest)
+
+    if not written:
+        metrics.add_metric(
+            name="DuplicateWritesSkipped", unit=MetricUnit.Count, value=1
+        )
+
+    logger.debug("Message '%s' has content '%s'.", record.message_id, key)
+
+    if config["content_refs"]:
+        ref_key, ref = content_ref(
+            record, key, digest, (metadata or {}).get("correlation-id")
+        )
+        retrier.call("s3", write_obj_to_s3, bucket_name, ref_key, ref, client=client)
+
+    return written
+
+
+def _write_or_error(write, record):
+    """
+    Write one record, returning the exception instead of raising it.
+
+    :param write (callable): Writes the record's output.
+    :param record (SqsRecord): The SQS record.
+    :return (Exception): The exception the write failed with, or None if it succeeded.
+    """
+
+    try:
+        write(record)
+    except Exception as e:
+        return e
+
+    return None
+
+
+# Every sink has write(records), which is given a batch of processed SQS
+# records and returns, for each one, None if its output was written or the
+# exception it failed with, and close(wait=True), which releases whatever the
+# sink holds.  How a batch is written (one call per record, concurrently, or
+# aggregated into one write) is up to the sink.
+
+
+class S3Sink:
+    """
+    Writes each output to the output S3 bucket, with the records of a batch written concurrently.
+
+    Outputs are written one object per message, or in 'content' output mode
+    one object per distinct output.  Each object is tagged with the
+    correlation ID of its message.
+    """
+
+    def __init__(self, bucket_name, retrier=None, client=None, concurrency=8):
+        if concurrency < 1:
+            raise ValueError("Sink concurrency must be at least 1.")
+
+        self.bucket_name = bucket_name
+        self.retrier = retrier or Retrier.from_config()
+        self.client = client or get_s3_client()
+        self.concurrency = concurrency
+        # the threads are the invocation's own, so close() can stop waiting for
+        # writes it abandons at the deadline without holding up the next one
+        self._executor = (
+            ThreadPoolExecutor(max_workers=concurrency) if concurrency > 1 else None
+        )
+
+    def write(self, records):
+        """
+        Write the outputs of a batch of records.
+
+        :param records (list): The processed SQS records.
+        :return (list): For each record, None if its output was written, or the exception it failed with.
+        """
+
+        write = partial(_write_or_error, self.write_record)
+
+        if self._executor is None or len(records) == 1:
+            return [write(record) for record in records]
+
+        return list(self._executor.map(write, records))
+
+    def write_record(self, record):
+        """
+        Write the output of a record, retrying if S3 throttles the write.
+
+        :param record (SqsRecord): The processed SQS record.
+        :return (None): Default 'None' returned.
+        """
+
+        # the correlation ID is stored with the output so it can be traced back
+        # to the S3 object the producer read
+        correlation_id = get_correlation_id(record)
+
+        try:
+            logger.debug(
+                "Writing message with correlation ID '%s' to S3 bucket '%s'.",
+                correlation_id,
+                self.bucket_name,
+            )
+            metadata = {"correlation-id": correlation_id}
+
+            if config["output_mode"] == CONTENT_OUTPUT:
+                write_content_output(
+                    record, self.bucket_name, self.retrier, self.client, metadata
+                )
+            else:
+                self.retrier.call(
+                    "s3",
+                    write_obj_to_s3,
+                    self.bucket_name,
+                    output_key(record),
+                    record.output,
+                    client=self.client,
+                    metadata=metadata,
+                )
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "AccessDeniedException":
+                logger.exception(
+                    f"Lambda function not authorized to write to S3 bucket '{self.bucket_name}'."
+                )
+                raise
+            else:
+                # Handle other ClientErrors
+                logger.exception(f"Error writing to S3 bucket '{self.bucket_name}'.")
+                raise
+        except Exception:
+            logger.exception(
+                f"Error writing message with correlation ID '{correlation_id}' to S3 bucket '{self.bucket_name}'."
+            )
+            raise
+
+    def close(self, wait=True):
+        """
+        Shut down the sink's threads.
+
+        :param wait (bool, optional): Whether to wait for writes in flight. Defaults to True.
+        :return (None): Default 'None' returned.
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+class LocalSink:
+    """
+    Writes each output to a file under a local directory, such as /tmp or an EFS mount.
+
+    Files get the same keys as S3 objects, so the two can be compared.  Each
+    file is written to a temporary name and then renamed, so readers never
+    see a partial file.  Local files have no metadata, so correlation IDs are
+    only kept in the references of 'content' output mode.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def write(self, records):
+        """
+        Write the outputs of a batch of records.
+
+        :param records (list): The processed SQS records.
+        :return (list): For each record, None if its output was written, or the exception it failed with.
+        """
+
+        return [_write_or_error(self.write_record, record) for record in records]
+
+    def write_record(self, record):
+        """
+        Write the output of a record.
+
+        :param record (SqsRecord): The processed SQS record.
+        :return (None): Default 'None' returned.
+        """
+
+        if config["output_mode"] != CONTENT_OUTPUT:
+            self.write_file(output_key(record), record.output)
+            return
+
+        digest = content_digest(record.output)
+        key = build_content_key(
+            digest, config["output_key_layout"], config["output_key_hash_chars"]
+        )
+
+        if not self.write_file(key, record.output, exclusive=True):
+            metrics.add_metric(
+                name="DuplicateWritesSkipped", unit=MetricUnit.Count, value=1
+            )
+
+        if config["content_refs"]:
+            self.write_file(
+                *content_ref(record, key, digest, get_correlation_id(record))
+            )
+
+    def write_file(self, key, content, exclusive=False):
+        """
+        Write content to the file for a key.
+
+        :param key (str): The key, a path relative to the directory.
+        :param content (str | bytes | file | iterable): The content, a readable file object, or an iterable of str or bytes chunks.
+        :param exclusive (bool, optional): Whether to leave an existing file alone. Defaults to False.
+        :return (bool): True if the file was written, False if it already existed.
+        """
+
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(path), prefix=".tmp-", delete=False
+        ) as f:
+            shutil.copyfileobj(to_stream(content), f)
+
+        try:
+            if not exclusive:
+                os.replace(f.name, path)
+                return True
+
+            # a hard link is only made if nothing exists at the path yet
+            try:
+                os.link(f.name, path)
+            except FileExistsError:
+                return False
+
+            return True
+        finally:
+            if os.path.exists(f.name):
+                os.unlink(f.name)
+
+    def close(self, wait=True):
+        """
+        Nothing to release; local writes are done by the time write() returns.
+
+        :param wait (bool, optional): Unused. Defaults to True.
+        :return (None): Default 'None' returned.
+        """
+
+
+class StdoutSink:
+    """
+    Writes the outputs of a batch to standard output as JSON lines, in one write.
+
+    Each line holds the messageId, the correlation ID and the output, with
+    bytes decoded as UTF-8.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def write(self, records):
+        """
+        Write the outputs of a batch of records.
+
+        :param records (list): The processed SQS records.
+        :return (list): For each record, None if its output was written, or the exception it failed with.
+        """
+
+        lines = []
+        errors = []
+
+        for record in records:
+            try:
+                output = output_bytes(record.output).decode("utf-8", "replace")
+                lines.append(
+                    json.dumps(
+                        {
+                            "messageId": record.message_id,
+                            "correlationId": get_correlation_id(record),
+                            "output": output,
+                        }
+                    )
+                    + "\n"
+                )
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+
+        # sys.stdout is looked up on each write, so redirecting it works
+        stream = self.stream or sys.stdout
+        stream.write("".join(lines))
+        stream.flush()
+
+        return errors
+
+    def close(self, wait=True):
+        """
+        Nothing to release; the stream is left open.
+
+        :param wait (bool, optional): Unused. Defaults to True.
+        :return (None): Default 'None' returned.
+        """
+
+
+class NullSink:
+    """
+    Discards every output, counting the records and bytes it was given.
+
+    Streamed outputs are still read, so a run against this sink measures the
+    cost of processing without the cost of I/O.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.bytes = 0
+
+    def write(self, records):
+        """
+        Discard the outputs of a batch of records.
+
+        :param records (list): The processed SQS records.
+        :return (list): None for each record.
+        """
+
+        for record in records:
+            self.bytes += len(output_bytes(record.output))
+
+        self.records += len(records)
+
+        return [None] * len(records)
+
+    def close(self, wait=True):
+        """
+        Nothing to release.
+
+        :param wait (bool, optional): Unused. Defaults to True.
+        :return (None): Default 'None' returned.
+        """
+
+
+def get_sink_type():
+    """
+    Get the type of sink to write outputs with, from the OUTPUT_SINK environment variable or the config.
+
+    :return (str): One of 's3', 'local', 'stdout' or 'null'.
+    """
+
+    return os.environ.get("OUTPUT_SINK") or config["sink"]["type"]
+
+
+def build_sink(sink_type=None, bucket_name=None, retrier=None, client=None):
+    """
+    Build a sink by type.
+
+    :param sink_type (str, optional): One of 's3', 'local', 'stdout' or 'null'. Defaults to get_sink_type().
+    :param bucket_name (str, optional): The name of the output S3 bucket, for the 's3' sink.
+    :param retrier (Retrier, optional): Retries throttled S3 writes, for the 's3' sink.
+    :param client (S3.Client, optional): The S3 client, for the 's3' sink. Defaults to the client kept by get_s3_client().
+    :return (object): The sink.
+    """
+
+    sink_type = sink_type or get_sink_type()
+    sinks = {
+        S3_SINK: lambda: S3Sink(
+            bucket_name, retrier, client, config["sink"]["concurrency"]
+        ),
+        LOCAL_SINK: lambda: LocalSink(
+            os.environ.get("OUTPUT_DIRECTORY") or config["sink"]["directory"]
+        ),
+        STDOUT_SINK: StdoutSink,
+        NULL_SINK: NullSink,
+    }
+
+    if sink_type not in sinks:
+        raise ValueError(f"Unknown sink '{sink_type}'.")
+
+    return sinks[sink_type]()
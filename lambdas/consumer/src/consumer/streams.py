@@ -0,0 +1,68 @@
+# Python Standard Library imports
+import io
+
+
+class IterStream(io.RawIOBase):
+    """
+    A read-only, non-seekable file object over an iterable of bytes chunks.
+
+    Chunks are pulled from the iterable only as the stream is read, so the
+    whole content never has to be held in memory at once.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+
+            if chunk is None:
+                return 0
+
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+
+            # slicing a memoryview does not copy the chunk
+            self._buffer = memoryview(chunk)
+
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+
+        return size
+
+
+def iter_chunks(content, chunk_size):
+    """
+    Split str or bytes content into chunks.
+
+    :param content (str | bytes): The content to split.
+    :param chunk_size (int): The maximum length of each chunk.
+    :return (generator): The chunks of content.
+    """
+
+    for start in range(0, len(content), chunk_size):
+        yield content[start : start + chunk_size]
+
+
+def to_stream(content, chunk_size=1048576):
+    """
+    Wrap content in a file object that can be streamed to S3.
+
+    :param content (str | bytes | file | iterable): The content, a readable file object, or an iterable of str or bytes chunks.
+    :param chunk_size (int, optional): The chunk size used to encode str and bytes content. Defaults to 1 MB.
+    :return (file): A readable file object.
+    """
+
+    if hasattr(content, "read"):
+        return content
+
+    if isinstance(content, (str, bytes)):
+        content = iter_chunks(content, chunk_size)
+
+    return io.BufferedReader(IterStream(content), buffer_size=chunk_size)
@@ -0,0 +1,205 @@
+# Python Standard Library imports
+import threading
+import time
+
+# third-party library imports
+from aws_lambda_powertools.metrics import EphemeralMetrics
+from aws_lambda_powertools.metrics import MetricUnit
+
+# SQS message attributes stamped on every message by the producer
+CORRELATION_ID_ATTRIBUTE = "CorrelationId"
+INGEST_TIMESTAMP_ATTRIBUTE = "IngestTimestamp"
+LANE_ATTRIBUTE = "Lane"
+
+# the lane of messages sent without one
+DEFAULT_LANE = "bulk"
+
+# the legs of a message's trip through the pipeline and the metric each is
+# published as
+LATENCY_METRICS = {
+    "upload_to_enqueue": "UploadToEnqueueLatency",
+    "enqueue_to_receive": "EnqueueToReceiveLatency",
+    "receive_to_written": "ReceiveToWrittenLatency",
+    "end_to_end": "EndToEndLatency",
+}
+
+
+def get_message_attribute(record, name):
+    """
+    Get the string value of an SQS message attribute.
+
+    :param record (SqsRecord): The SQS record.
+    :param name (str): The name of the message attribute.
+    :return (str): The value of the message attribute, or None if the record does not have it.
+    """
+
+    return record.message_attributes.get(name, {}).get("stringValue")
+
+
+def get_correlation_id(record):
+    """
+    Get the correlation ID stamped on an SQS message by the producer.
+
+    :param record (SqsRecord): The SQS record.
+    :return (str): The correlation ID, or the message ID for messages sent without one.
+    """
+
+    return get_message_attribute(record, CORRELATION_ID_ATTRIBUTE) or record.message_id
+
+
+def get_lane(record):
+    """
+    Get the lane the producer sent an SQS message down.
+
+    :param record (SqsRecord): The SQS record.
+    :return (str): The lane, or the bulk lane for messages sent without one.
+    """
+
+    return get_message_attribute(record, LANE_ATTRIBUTE) or DEFAULT_LANE
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def message_latencies(record, written_ms):
+    """
+    Get the latency of each leg of a message's trip through the pipeline.
+
+    Upload is when S3 received the source object, enqueue is when SQS received
+    the message, and receive is when SQS first handed the message to a
+    consumer.  Legs whose timestamps are missing are left out, and legs made
+    negative by clock skew are reported as 0.
+
+    :param record (SqsRecord): The SQS record.
+    :param written_ms (int): When the output was written, in milliseconds since the epoch.
+    :return (dict): The latency of each leg in milliseconds, keyed by leg.
+    """
+
+    uploaded = _to_int(get_message_attribute(record, INGEST_TIMESTAMP_ATTRIBUTE))
+    enqueued = _to_int(record.attributes.get("SentTimestamp"))
+    received = _to_int(record.attributes.get("ApproximateFirstReceiveTimestamp"))
+
+    legs = {
+        "upload_to_enqueue": (uploaded, enqueued),
+        "enqueue_to_receive": (enqueued, received),
+        "receive_to_written": (received, written_ms),
+        "end_to_end": (uploaded, written_ms),
+    }
+
+    return {
+        leg: max(0, end - start)
+        for leg, (start, end) in legs.items()
+        if start is not None and end is not None
+    }
+
+
+def percentile(values, pct):
+    """
+    Get a percentile of some values using the nearest-rank method.
+
+    :param values (list): The values, sorted in ascending order.
+    :param pct (float): The percentile, between 0 and 100.
+    :return (float): The percentile value, or None if there are no values.
+    """
+
+    if not values:
+        return None
+
+    rank = max(1, -(-len(values) * pct // 100))  # ceiling division
+
+    return values[int(rank) - 1]
+
+
+class LatencyRecorder:
+    """
+    Collects message latencies during an invocation and publishes them as metrics.
+
+    Sink workers add latencies concurrently, so samples are collected under a
+    lock and published from the handler once the batch is done.  Every sample
+    is published, so CloudWatch keeps the full distribution of each leg and
+    can report percentiles across invocations.  Latencies are kept and
+    published per lane, with a 'Lane' dimension.
+    """
+
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, record, written_ms=None):
+        """
+        Record the latencies of a message that has been written.
+
+        :param record (SqsRecord): The SQS record.
+        :param written_ms (int, optional): When the output was written, in milliseconds since the epoch. Defaults to now.
+        :return (None): Default 'None' returned.
+        """
+
+        if written_ms is None:
+            written_ms = int(time.time() * 1000)
+
+        latencies = message_latencies(record, written_ms)
+
+        if not latencies:
+            return
+
+        with self._lock:
+            samples = self._samples.setdefault(
+                get_lane(record), {leg: [] for leg in LATENCY_METRICS}
+            )
+            for leg, latency in latencies.items():
+                samples[leg].append(latency)
+
+    def summary(self):
+        """
+        Summarise the latencies recorded so far.
+
+        :return (dict): The count, p50, p90, p99 and max latency in milliseconds, keyed by lane and leg.
+        """
+
+        summary = {}
+
+        with self._lock:
+            for lane, legs in self._samples.items():
+                summary[lane] = {}
+
+                for leg, samples in legs.items():
+                    values = sorted(samples)
+                    summary[lane][leg] = {
+                        "count": len(values),
+                        "p50": percentile(values, 50),
+                        "p90": percentile(values, 90),
+                        "p99": percentile(values, 99),
+                        "max": values[-1] if values else None,
+                    }
+
+        return summary
+
+    def publish(self, namespace):
+        """
+        Publish every recorded latency, one value per message, with a 'Lane' dimension.
+
+        The function's other metrics have no lane, so each lane's latencies are
+        published as a separate set of metrics.
+
+        :param namespace (str): The CloudWatch metrics namespace.
+        :return (None): Default 'None' returned.
+        """
+
+        with self._lock:
+            for lane, legs in self._samples.items():
+                metrics = EphemeralMetrics(namespace=namespace)
+                metrics.add_dimension(name="Lane", value=lane)
+
+                for leg, samples in legs.items():
+                    for latency in samples:
+                        metrics.add_metric(
+                            name=LATENCY_METRICS[leg],
+                            unit=MetricUnit.Milliseconds,
+                            value=latency,
+                        )
+
+                metrics.flush_metrics()
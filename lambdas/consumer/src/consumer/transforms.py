@@ -0,0 +1,331 @@
+# Python Standard Library imports
+import atexit
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import queue
+import threading
+
+# local imports
+from consumer.config import config
+
+
+class Transform:
+    """
+    A named function that turns a decoded message into the output written to S3.
+
+    The function takes the decoded message and returns a str or bytes.
+    CPU-bound transforms run in the process pool when there is one, so they
+    are not serialized on the GIL; their function, argument and result must
+    be picklable, which rules out lambdas and nested functions.
+    """
+
+    __slots__ = ("name", "func", "cpu_bound")
+
+    def __init__(self, name, func, cpu_bound=False):
+        self.name = name
+        self.func = func
+        self.cpu_bound = cpu_bound
+
+
+_transforms = {}
+
+
+def register_transform(name, cpu_bound=False):
+    """
+    Decorator that registers a function as a transform.
+
+    Registering a name again replaces the earlier transform, so a plugin can
+    override a built-in.
+
+    :param name (str): The name the transform is selected by in the config.
+    :param cpu_bound (bool, optional): Whether to run the transform in the process pool. Defaults to False.
+    :return (callable): The decorator, which returns the function unchanged.
+    """
+
+    def decorator(func):
+        _transforms[name] = Transform(name, func, cpu_bound)
+        return func
+
+    return decorator
+
+
+def get_transform(name):
+    """
+    Get a registered transform.
+
+    :param name (str): The name of the transform.
+    :return (Transform): The transform.
+    """
+
+    try:
+        return _transforms[name]
+    except KeyError:
+        raise ValueError(f"Unknown transform '{name}'.") from None
+
+
+def load_plugins(modules):
+    """
+    Import plugin modules, which register their transforms when imported.
+
+    :param modules (list): The dotted names of the modules.
+    :return (None): Default 'None' returned.
+    """
+
+    for module in modules:
+        importlib.import_module(module)
+
+
+@register_transform("text")
+def message_text(payload):
+    """
+    Get the text from a decoded SQS message.
+
+    :param payload (dict): The decoded body of an SQS message.
+    :return (str): The 'text' field of the JSON message.
+    """
+
+    # the document of a packed message may be any JSON value
+    if not isinstance(payload, dict) or "text" not in payload.keys():
+        raise KeyError("No text found.")
+    else:
+        return payload["text"]
+
+
+@register_transform("sha256", cpu_bound=True)
+def text_digest(payload):
+    """
+    Get the SHA-256 hex digest of the text of a decoded SQS message.
+
+    :param payload (dict): The decoded body of an SQS message.
+    :return (str): The hex digest of the 'text' field.
+    """
+
+    return hashlib.sha256(message_text(payload).encode("utf-8")).hexdigest()
+
+
+@register_transform("canonical", cpu_bound=True)
+def canonical_json(payload):
+    """
+    Re-encode a decoded SQS message as canonical JSON (sorted keys, no whitespace).
+
+    :param payload (dict): The decoded body of an SQS message.
+    :return (str): The canonical JSON.
+    """
+
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+def apply_transform(transform, payload, pool=None):
+    """
+    Apply a transform, in the process pool if it is CPU-bound and there is one.
+
+    :param transform (Transform): The transform.
+    :param payload (dict): The decoded body of an SQS message.
+    :param pool (ProcessPool, optional): The process pool. Defaults to running in this process.
+    :return (str | bytes): The output of the transform.
+    """
+
+    if pool is not None and transform.cpu_bound:
+        return pool.apply(transform.func, payload)
+
+    return transform.func(payload)
+
+
+def available_cpus():
+    """
+    Get the number of vCPUs this process may run on.
+
+    :return (int): The number of vCPUs.
+    """
+
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _worker(conn):
+    """
+    Run tasks sent over a pipe until the pipe is closed or None is sent.
+
+    :param conn (Connection): The worker's end of the pipe.
+    :return (None): Default 'None' returned.
+    """
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+
+        if task is None:
+            return
+
+        func, arg = task
+
+        try:
+            result = (True, func(arg))
+        except Exception as e:
+            result = (False, e)
+
+        try:
+            conn.send(result)
+        except Exception as e:
+            # the result or exception could not be pickled
+            conn.send((False, RuntimeError(f"Transform result not sent: {e!r}")))
+
+
+class ProcessPool:
+    """
+    A fixed set of worker processes, each fed tasks over its own pipe.
+
+    multiprocessing.Pool and multiprocessing.Queue need /dev/shm, which Lambda
+    does not have, so each worker is a Process with a Pipe.  The handler's
+    threads may hold locks when a worker is started, so workers are not
+    forked from this process but from a fork server, a single-threaded
+    process started once per container with the transforms module loaded;
+    a worker imports the module of each transform it is given.  The pool is
+    thread-safe: each call to apply() takes an idle worker and blocks
+    until it is done, so running apply() from as many threads as there are
+    processes keeps every worker busy.
+    """
+
+    def __init__(self, processes):
+        if processes < 1:
+            raise ValueError("A process pool needs at least 1 process.")
+
+        self.processes = processes
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload([__name__])
+        self._idle = queue.SimpleQueue()
+        self._workers = set()
+        self._lock = threading.Lock()
+
+        for _ in range(processes):
+            self._idle.put(self._start_worker())
+
+    def _start_worker(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+
+        worker = (process, parent_conn)
+
+        with self._lock:
+            self._workers.add(worker)
+
+        return worker
+
+    def _replace_worker(self, worker):
+        process, conn = worker
+
+        with self._lock:
+            self._workers.discard(worker)
+
+        conn.close()
+        process.kill()
+        process.join()
+
+        return self._start_worker()
+
+    def apply(self, func, arg):
+        """
+        Call a function in a worker process and wait for its result.
+
+        :param func (callable): The function, which must be picklable.
+        :param arg (object): The argument to call the function with, which must be picklable.
+        :return (object): The function's result; its exception is re-raised here.
+        """
+
+        worker = self._idle.get()
+
+        try:
+            worker[1].send((func, arg))
+            succeeded, result = worker[1].recv()
+        except (EOFError, OSError):
+            # the worker died mid-task; start another in its place
+            worker = self._replace_worker(worker)
+            raise RuntimeError("A transform worker process exited.")
+        finally:
+            self._idle.put(worker)
+
+        if not succeeded:
+            raise result
+
+        return result
+
+    def close(self):
+        """
+        Stop the worker processes.
+
+        :return (None): Default 'None' returned.
+        """
+
+        with self._lock:
+            workers, self._workers = self._workers, set()
+
+        for process, conn in workers:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+
+            process.join(timeout=1)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+            conn.close()
+
+
+# the pool is kept for the life of the container so warm invocations do not
+# pay for starting workers
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """
+    Get the process pool, creating it from the 'transform' config if needed.
+
+    :return (ProcessPool): The pool, or None if CPU-bound transforms run in this process.
+    """
+
+    global _pool
+
+    processes = config["transform"]["processes"]
+    if processes is None:
+        processes = available_cpus()
+
+    with _pool_lock:
+        if _pool is not None and _pool.processes != processes:
+            _pool.close()
+            _pool = None
+
+        # with a single vCPU, workers would only add the cost of pickling
+        if _pool is None and processes > 1:
+            _pool = ProcessPool(processes)
+
+        return _pool
+
+
+def shutdown_process_pool():
+    """
+    Stop the process pool so the next invocation creates a new one.
+
+    :return (None): Default 'None' returned.
+    """
+
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+atexit.register(shutdown_process_pool)
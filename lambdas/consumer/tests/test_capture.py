@@ -0,0 +1,99 @@
+# Python Standard Library imports
+import gzip
+import json
+
+# 3rd party imports
+import boto3
+from moto import mock_aws
+
+# local imports
+from src.consumer.capture import capture_event
+from src.consumer.capture import encode_capture
+from src.consumer.capture import get_capture_rate
+from src.consumer.capture import is_sampled
+from src.consumer.capture import redact_body
+from src.consumer.capture import redact_event
+from src.consumer.capture import redact_value
+from tests.events import events
+
+
+def test_get_capture_rate(monkeypatch):
+    """Test the project get_capture_rate() function."""
+
+    monkeypatch.delenv("CAPTURE_SAMPLE_RATE", raising=False)
+    assert get_capture_rate() == 0.0
+
+    monkeypatch.setenv("CAPTURE_SAMPLE_RATE", "0.25")
+    assert get_capture_rate() == 0.25
+
+
+def test_is_sampled():
+    """Test the project is_sampled() function."""
+
+    assert not any(is_sampled(0) for _ in range(100))
+    assert all(is_sampled(1) for _ in range(100))
+
+
+def test_redact_value():
+    """Test the project redact_value() function."""
+
+    value = {"text": "veni", "count": 3, "ok": True, "none": None, "tags": ["ab"]}
+
+    assert redact_value(value) == {
+        "text": "****",
+        "count": 0,
+        "ok": True,
+        "none": None,
+        "tags": ["**"],
+    }
+
+
+def test_redact_body():
+    """Test the project redact_body() function."""
+
+    assert json.loads(redact_body('{"text": "Cogito ergo sum"}')) == {"text": "*" * 15}
+    assert redact_body("not JSON") == "********"
+
+
+def test_redact_event():
+    """Test the project redact_event() function."""
+
+    event = events["valid_sqs_msg"]
+    redacted = redact_event(event)
+
+    assert json.loads(redacted["Records"][0]["body"]) == {"text": "*" * 15}
+    assert redacted["Records"][0]["messageId"] == event["Records"][0]["messageId"]
+
+    # the original event is left as it is
+    assert "Cogito" in event["Records"][0]["body"]
+    assert redact_event(events["invalid_event"]) == events["invalid_event"]
+
+
+def test_encode_capture():
+    """Test the project encode_capture() function."""
+
+    # captures are gzip members, which can be concatenated into one corpus
+    corpus = encode_capture(events["valid_sqs_msg"], "consumer") * 2
+    lines = gzip.decompress(corpus).decode("utf-8").splitlines()
+
+    assert len(lines) == 2
+    line = json.loads(lines[0])
+    assert line["source"] == "consumer"
+    assert "Cogito" not in json.dumps(line["event"])
+
+
+@mock_aws
+def test_capture_event():
+    """Test the project capture_event() function."""
+
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="my-capture-bucket")
+
+    key = capture_event(events["valid_sqs_msg"], None, "my-capture-bucket", "consumer")
+    assert key.startswith("captures/consumer/") and key.endswith(".jsonl.gz")
+
+    obj = s3.get_object(Bucket="my-capture-bucket", Key=key)
+    line = json.loads(gzip.decompress(obj["Body"].read()))
+    assert line["event"]["Records"][0]["messageId"] == (
+        events["valid_sqs_msg"]["Records"][0]["messageId"]
+    )
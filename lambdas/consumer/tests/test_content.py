@@ -0,0 +1,56 @@
+# Python Standard Library imports
+import hashlib
+
+# 3rd party imports
+import boto3
+from moto import mock_aws
+
+# local imports
+from src.consumer.content import RecentHashCache
+from src.consumer.content import content_digest
+from src.consumer.content import object_exists
+from src.consumer.content import put_if_absent
+
+
+def test_content_digest():
+    """Test the project content_digest() function."""
+
+    digest = hashlib.sha256(b"Cogito ergo sum").hexdigest()
+
+    assert content_digest("Cogito ergo sum") == digest
+    assert content_digest(b"Cogito ergo sum") == digest
+
+
+def test_recent_hash_cache():
+    """Test the project RecentHashCache class."""
+
+    cache = RecentHashCache(max_size=2)
+    cache.add("a")
+    cache.add("b")
+
+    # a lookup marks the digest as recently used, so 'b' is evicted
+    assert "a" in cache
+    cache.add("c")
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert len(cache) == 2
+
+
+@mock_aws
+def test_put_if_absent():
+    """Test the project object_exists() and put_if_absent() functions."""
+
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="my-bucket")
+
+    assert object_exists("my-bucket", "my-key", client=s3) is False
+    assert put_if_absent("my-bucket", "my-key", "first", client=s3) is True
+    assert object_exists("my-bucket", "my-key", client=s3) is True
+
+    # an existing object is left as it is
+    assert put_if_absent("my-bucket", "my-key", "second", client=s3) is False
+
+    obj = s3.get_object(Bucket="my-bucket", Key="my-key")
+    assert obj["Body"].read() == b"first"
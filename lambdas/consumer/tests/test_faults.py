@@ -0,0 +1,136 @@
+# Python Standard Library imports
+import json
+import os
+import pytest
+import random
+import time
+
+from unittest.mock import patch
+
+# 3rd party imports
+import boto3
+
+from botocore.exceptions import ClientError
+from botocore.exceptions import ReadTimeoutError
+from moto import mock_aws
+
+# local imports
+from src.consumer.clients import make_client
+from src.consumer.faults import FaultInjector
+from src.consumer.faults import is_fault_injection_enabled
+from src.consumer.faults import sample_latency
+from src.consumer.resilience import Retrier
+from src.consumer.resilience import is_retryable
+
+
+class ScriptedRandom(random.Random):
+    """A random number generator whose random() returns the given rolls, then 0.99."""
+
+    def __init__(self, *rolls):
+        super().__init__(0)
+        self.rolls = list(rolls)
+
+    def random(self):
+        return self.rolls.pop(0) if self.rolls else 0.99
+
+
+@pytest.fixture
+def s3():
+    """Mocked S3 client."""
+
+    with mock_aws():
+        yield boto3.client("s3", region_name="us-west-2")
+
+
+def test_sample_latency():
+    """Test the project sample_latency() function."""
+
+    rng = random.Random(1)  # nosec B311
+
+    assert sample_latency(None, rng) == 0.0
+    assert sample_latency({"distribution": "fixed", "ms": 20}, rng) == 0.02
+
+    uniform = {"distribution": "uniform", "min_ms": 10, "max_ms": 30}
+    assert all(0.01 <= sample_latency(uniform, rng) <= 0.03 for _ in range(100))
+
+    # half of a lognormal distribution's samples are below its median
+    lognormal = {"distribution": "lognormal", "median_ms": 20, "sigma": 0.5}
+    samples = sorted(sample_latency(lognormal, rng) for _ in range(1001))
+    assert 0.015 < samples[500] < 0.025
+
+    with pytest.raises(ValueError):
+        FaultInjector("s3", latency={"distribution": "pareto"})
+
+    with pytest.raises(ValueError):
+        FaultInjector("s3", throttle_rate=0.6, timeout_rate=0.6)
+
+
+def test_fault_injector_throttle(s3):
+    """Test the project FaultInjector class throttles calls."""
+
+    FaultInjector("s3", throttle_rate=1.0).install(s3)
+
+    with pytest.raises(ClientError) as e:
+        s3.list_buckets()
+
+    # the error is the one S3 sends, so it is retried like a real one
+    assert e.value.response["Error"]["Code"] == "SlowDown"
+    assert is_retryable(e.value)
+
+
+def test_fault_injector_timeout(s3):
+    """Test the project FaultInjector class times calls out."""
+
+    FaultInjector("s3", timeout_rate=1.0, timeout_ms=0).install(s3)
+
+    with pytest.raises(ReadTimeoutError) as e:
+        s3.list_buckets()
+
+    assert is_retryable(e.value)
+
+
+def test_fault_injector_latency(s3):
+    """Test the project FaultInjector class adds latency to calls."""
+
+    FaultInjector("s3", latency={"distribution": "fixed", "ms": 50}).install(s3)
+
+    start = time.perf_counter()
+    s3.list_buckets()
+
+    assert time.perf_counter() - start >= 0.05
+
+
+def test_fault_injector_retried(s3, monkeypatch):
+    """Test the project Retrier recovers from injected throttling."""
+
+    monkeypatch.setattr("src.consumer.resilience.time.sleep", lambda seconds: None)
+
+    # the first two attempts are throttled
+    FaultInjector("s3", throttle_rate=0.5, rng=ScriptedRandom(0.1, 0.1)).install(s3)
+
+    retrier = Retrier(max_attempts=3)
+    assert "Buckets" in retrier.call("test-faults", s3.list_buckets)
+    assert retrier.budget == 48
+
+
+def test_make_client():
+    """Test the project make_client() function."""
+
+    profiles = {"s3": {"throttle_rate": 1.0}}
+
+    with mock_aws():
+        # fault injection is off by default
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("FAULT_INJECTION", None)
+            assert not is_fault_injection_enabled()
+            make_client("s3", region_name="us-west-2").list_buckets()
+
+        # FAULT_INJECTION turns it on, and can replace the services' settings
+        with patch.dict(os.environ, {"FAULT_INJECTION": json.dumps(profiles)}):
+            assert is_fault_injection_enabled()
+
+            with pytest.raises(ClientError):
+                make_client("s3", region_name="us-west-2").list_buckets()
+
+            # services without settings are left alone
+            make_client("sqs", region_name="us-west-2").list_queues()
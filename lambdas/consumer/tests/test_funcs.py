@@ -1,28 +1,54 @@
 # Python Standard Library imports
+import copy
+import hashlib
+import json
 import pytest
 import os
+import tempfile
 
 from unittest import TestCase
+from unittest.mock import patch
 
 # 3rd party imports
 import boto3
 
 from moto import mock_aws
 
+from consumer import calls
+from consumer.calls import get_call_totals
+from consumer.calls import reset_call_totals
+from consumer.content import clear_content_cache
+from consumer.settings import clear_settings
+from consumer.sinks import clear_s3_client
+from consumer.transforms import shutdown_process_pool
+
 # local imports
-from src.consumer.lambda_function import get_ssm_params
-from src.consumer.lambda_function import verify_ssm_parameters
+from src.consumer.settings import get_ssm_params
+from src.consumer.settings import verify_ssm_parameters
 from src.consumer.lambda_function import verify_event
 from src.consumer.lambda_function import verify_sqs_record
 from src.consumer.lambda_function import verify_sqs_source
 from src.consumer.lambda_function import is_valid_json
 from src.consumer.lambda_function import process_message
 from src.consumer.lambda_function import check_for_err_str
-from src.consumer.lambda_function import write_obj_to_s3
+from src.consumer.lambda_function import lambda_handler
+from src.consumer import lambda_function
 from src.consumer.config import config
 from tests.events import events
 
 
+class FakeContext:
+    """A Lambda context whose remaining time the test controls."""
+
+    aws_request_id = "c6af9ac6-7b61-11e6-9a41-93e812345678"
+
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
 @pytest.fixture(scope="function")
 def aws_credentials():
     """Mocked AWS Credentials for moto."""
@@ -157,6 +183,9 @@ def test_process_message():
 
     assert process_message(good_json_str) is not None
 
+    # the transform can be chosen per call
+    assert len(process_message(good_json_str, transform="sha256")) == 64
+
     # An SQS message JSON that does not contain a 'text' key should raise an exception
     with pytest.raises(Exception):
         process_message(bad_json_str)
@@ -174,24 +203,376 @@ def test_check_for_err_str():
 
 @mock_aws
 @pytest.mark.usefixtures("aws_credentials")
-class TestWriteObjToS3(TestCase):
-    """Test the project write_obj_to_s3() function."""
+class TestLambdaHandler(TestCase):
+    """Test the project lambda_handler() function."""
 
     def setUp(self):
-        """Set up to test the project write_obj_to_s3() function."""
+        """Set up to test the project lambda_handler() function."""
+
+        # the handler imports the installed 'consumer' package, so its
+        # settings, content cache and S3 client are the ones to clear
+        clear_settings()
+        clear_content_cache()
+        clear_s3_client()
+
+        self.bucket_name = "my-output-bucket"
+        self.event = events["valid_sqs_msg"]
+        queue_arn = self.event["Records"][0]["eventSourceARN"]
+
+        # create the SSM parameters and output S3 bucket
+        ssm = boto3.client("ssm", region_name="us-west-2")
+        for name, value in (
+            ("output-bucket-name", self.bucket_name),
+            # the consumer reads every queue shard listed
+            ("queue-arn", f"{queue_arn}-shard-1,{queue_arn}"),
+        ):
+            ssm.put_parameter(
+                Name=f"{config['ssm_param_path']}/{name}", Value=value, Type="String"
+            )
+
+        self.s3 = boto3.client("s3")
+        self.s3.create_bucket(Bucket=self.bucket_name)
+
+    def test_lambda_handler(self):
+        """Test the project lambda_handler() function."""
+
+        # the handler drains records from the event, so give it a copy
+        resp = lambda_handler(copy.deepcopy(self.event), None)
+        assert resp["statusCode"] == 200
+
+        # the text of each message is written to the output bucket
+        record = self.event["Records"][0]
+        obj = self.s3.get_object(
+            Bucket=self.bucket_name, Key=f"{record['messageId']}.txt"
+        )
+        assert obj["Body"].read().decode("utf-8") == "Cogito ergo sum"
 
-        self.bucket_name = "my-test-bucket"
-        # create S3 bucket and object
-        s3 = boto3.client("s3")
-        s3.create_bucket(Bucket=self.bucket_name)
+        # the output is tagged with the correlation ID of the message
+        assert obj["Metadata"]["correlation-id"] == record["messageId"]
 
-    def test_write_obj_to_s3(self):
-        """Test the project write_obj_to_s3() function."""
+        # records from an unexpected queue fail the invocation
+        with pytest.raises(Exception):
+            lambda_handler(copy.deepcopy(events["invalid_sqs_msg_values"]), None)
 
-        # test a valid response
-        resp = write_obj_to_s3(self.bucket_name, "blah", "whatever")
-        assert isinstance(resp, dict)
+    def test_lambda_handler_content_output(self):
+        """Test the project lambda_handler() function with content-addressed output."""
 
-        # test writing to a non-existent S3 bucket
-        with pytest.raises(Exception):
-            write_obj_to_s3("non-existent-bucket", "blah", "whatever")
+        # two messages with the same content
+        event = copy.deepcopy(self.event)
+        duplicate = copy.deepcopy(event["Records"][0])
+        duplicate["messageId"] = "2e1424d4-f796-459a-8184-9c92662be6da"
+        event["Records"].append(duplicate)
+
+        with patch.dict(lambda_function.config, {"output_mode": "content"}):
+            lambda_handler(copy.deepcopy(event), None)
+
+            # a cold cache falls back to the conditional PUT, which also skips
+            clear_content_cache()
+            lambda_handler(copy.deepcopy(event), None)
+
+        contents = self.s3.list_objects_v2(Bucket=self.bucket_name, Prefix="content/")
+        assert contents["KeyCount"] == 1
+
+        obj = self.s3.get_object(
+            Bucket=self.bucket_name, Key=contents["Contents"][0]["Key"]
+        )
+        assert obj["Body"].read().decode("utf-8") == "Cogito ergo sum"
+
+        # each message has a reference to the content it produced
+        for record in event["Records"]:
+            ref = self.s3.get_object(
+                Bucket=self.bucket_name, Key=f"refs/{record['messageId']}.json"
+            )
+            ref = json.loads(ref["Body"].read())
+            assert ref["key"] == contents["Contents"][0]["Key"]
+
+    def test_lambda_handler_process_pool(self):
+        """Test the project lambda_handler() function with a CPU-bound transform."""
+
+        transform = {"name": "sha256", "plugins": [], "processes": 2}
+
+        try:
+            with patch.dict(lambda_function.config, {"transform": transform}):
+                lambda_handler(copy.deepcopy(self.event), None)
+        finally:
+            shutdown_process_pool()
+
+        message_id = self.event["Records"][0]["messageId"]
+        obj = self.s3.get_object(Bucket=self.bucket_name, Key=f"{message_id}.txt")
+        assert obj["Body"].read().decode("utf-8") == (
+            hashlib.sha256(b"Cogito ergo sum").hexdigest()
+        )
+
+    def test_lambda_handler_deadline(self):
+        """Test the project lambda_handler() function stops at the deadline."""
+
+        event = copy.deepcopy(self.event)
+        for i in range(1, 3):
+            record = copy.deepcopy(event["Records"][0])
+            record["messageId"] = f"059f36b4-87a3-44ab-83d2-66197580010{i}"
+            event["Records"].append(record)
+        message_ids = [record["messageId"] for record in event["Records"]]
+
+        # the invocation runs short of time once the first record is written
+        context = FakeContext(60000)
+        sink_records = lambda_function.sink_records
+
+        def slow_sink_records(records, *args, **kwargs):
+            results = sink_records(records, *args, **kwargs)
+            context.remaining_ms = 4000
+            return results
+
+        # without stage settings, the sink is given one record at a time
+        with (
+            patch.dict(lambda_function.config, {"stages": {}}),
+            patch.object(lambda_function, "sink_records", slow_sink_records),
+        ):
+            resp = lambda_handler(copy.deepcopy(event), context)
+
+        # only the records that were not written are retried
+        assert resp["batchItemFailures"] == [
+            {"itemIdentifier": message_id} for message_id in message_ids[1:]
+        ]
+
+        contents = self.s3.list_objects_v2(Bucket=self.bucket_name)
+        assert [obj["Key"] for obj in contents["Contents"]] == [f"{message_ids[0]}.txt"]
+
+        # with time to spare, every record is processed
+        resp = lambda_handler(copy.deepcopy(event), FakeContext(60000))
+        assert resp["batchItemFailures"] == []
+
+    def test_lambda_handler_sink_failure(self):
+        """Test the project lambda_handler() function retries only the records it could not write."""
+
+        event = copy.deepcopy(self.event)
+        for i in range(1, 3):
+            record = copy.deepcopy(event["Records"][0])
+            record["messageId"] = f"059f36b4-87a3-44ab-83d2-66197580010{i}"
+            event["Records"].append(record)
+        message_ids = [record["messageId"] for record in event["Records"]]
+
+        # the write of the second record fails after its retries
+        sink_records = lambda_function.sink_records
+
+        def failing_sink_records(records, *args, **kwargs):
+            results = sink_records(records, *args, **kwargs)
+            return [
+                (
+                    ConnectionError("write failed")
+                    if record.message_id == message_ids[1]
+                    else result
+                )
+                for record, result in zip(records, results)
+            ]
+
+        with patch.object(lambda_function, "sink_records", failing_sink_records):
+            resp = lambda_handler(copy.deepcopy(event), None)
+
+        assert resp["batchItemFailures"] == [{"itemIdentifier": message_ids[1]}]
+
+    def test_lambda_handler_quarantine(self):
+        """Test the project lambda_handler() function quarantines poison messages."""
+
+        queue_arn = self.event["Records"][0]["eventSourceARN"]
+        sqs = boto3.client("sqs")
+        dlq_url = sqs.create_queue(QueueName="my-queue-dlq")["QueueUrl"]
+        ssm = boto3.client("ssm", region_name="us-west-2")
+        ssm.put_parameter(
+            Name=f"{config['ssm_param_path']}/dlq-url",
+            Value=f"{dlq_url}-shard-1,{dlq_url}",
+            Type="String",
+        )
+
+        # invalid JSON, JSON that is not an object, a message without 'text'
+        # and the special error string
+        event = copy.deepcopy(self.event)
+        bodies = [
+            "{",
+            "[1, 2]",
+            '{"key": "value"}',
+            json.dumps({"text": config["special_error_string"]}),
+        ]
+        for i, body in enumerate(bodies, 1):
+            record = copy.deepcopy(event["Records"][0])
+            record["messageId"] = f"poison-{i}"
+            record["body"] = body
+            event["Records"].append(record)
+
+        resp = lambda_handler(copy.deepcopy(event), None)
+
+        # poison messages are quarantined at once and deleted with the batch
+        assert resp["batchItemFailures"] == []
+
+        messages = sqs.receive_message(
+            QueueUrl=dlq_url, MaxNumberOfMessages=10, MessageAttributeNames=["All"]
+        )["Messages"]
+        reasons = {
+            message["Body"]: message["MessageAttributes"]["QuarantineReason"][
+                "StringValue"
+            ]
+            for message in messages
+        }
+        assert sorted(reasons) == sorted(bodies)
+        assert reasons["{"].startswith("decode: JSONDecodeError")
+        assert reasons["[1, 2]"].startswith("decode: ValueError")
+        assert reasons['{"key": "value"}'].startswith("transform: KeyError")
+        assert all(
+            message["MessageAttributes"]["SourceQueueArn"]["StringValue"] == queue_arn
+            for message in messages
+        )
+
+        # the valid message is still written
+        message_id = self.event["Records"][0]["messageId"]
+        self.s3.head_object(Bucket=self.bucket_name, Key=f"{message_id}.txt")
+
+        # with quarantining off, poison messages are retried on their own
+        with patch.dict(lambda_function.config, {"quarantine": {"destination": None}}):
+            resp = lambda_handler(copy.deepcopy(event), None)
+
+        assert resp["batchItemFailures"] == [
+            {"itemIdentifier": f"poison-{i}"} for i in range(1, 5)
+        ]
+
+    def test_lambda_handler_transient_failure(self):
+        """Test the project lambda_handler() function retries transient failures."""
+
+        def flaky_transform_record(record, *args, **kwargs):
+            raise ConnectionError("worker lost")
+
+        with patch.object(lambda_function, "transform_record", flaky_transform_record):
+            resp = lambda_handler(copy.deepcopy(self.event), None)
+
+        assert resp["batchItemFailures"] == [
+            {"itemIdentifier": self.event["Records"][0]["messageId"]}
+        ]
+
+    def test_lambda_handler_call_budget(self):
+        """Test the project lambda_handler() function stays within its AWS call budget."""
+
+        event = copy.deepcopy(self.event)
+        for i in range(1, 5):
+            record = copy.deepcopy(self.event["Records"][0])
+            record["messageId"] = f"059f36b4-87a3-44ab-83d2-66120000000{i}"
+            event["Records"].append(record)
+
+        published = []
+        reset_call_totals()
+
+        def publish_call_totals():
+            published.append(get_call_totals(reset=True))
+
+        with patch.object(calls, "publish_call_totals", publish_call_totals):
+            lambda_handler(copy.deepcopy(event), None)
+            lambda_handler(copy.deepcopy(event), None)
+
+        cold, warm = published
+
+        # the settings are loaded with one call, on the first invocation only
+        assert cold["ssm"]["GetParametersByPath"]["calls"] == 1
+        assert "ssm" not in warm
+
+        # each record is written with at most one call
+        for totals in published:
+            assert totals["s3"]["PutObject"]["calls"] <= len(event["Records"])
+            assert totals["s3"]["PutObject"]["errors"] == 0
+
+    def test_lambda_handler_packed(self):
+        """Test the project lambda_handler() function unpacks packed messages."""
+
+        sqs = boto3.client("sqs")
+        dlq_url = sqs.create_queue(QueueName="my-queue-dlq")["QueueUrl"]
+        ssm = boto3.client("ssm", region_name="us-west-2")
+        ssm.put_parameter(
+            Name=f"{config['ssm_param_path']}/dlq-url",
+            Value=f"{dlq_url}-shard-1,{dlq_url}",
+            Type="String",
+        )
+
+        # three documents, the second of which has no 'text' field
+        event = copy.deepcopy(self.event)
+        record = event["Records"][0]
+        record["messageId"] = "packed"
+        record["body"] = json.dumps(
+            {
+                "documents": [
+                    {
+                        "correlation_id": "first",
+                        "ingest_timestamp": 1545082649000,
+                        "document": {"text": "Primum"},
+                    },
+                    {"correlation_id": "second", "document": {"key": "value"}},
+                    {"document": {"text": "Tertium"}},
+                ]
+            }
+        )
+        record["messageAttributes"]["PackedDocuments"] = {
+            "stringValue": "3",
+            "dataType": "Number",
+        }
+
+        resp = lambda_handler(copy.deepcopy(event), None)
+
+        # each document is written, or quarantined, on its own
+        assert resp["batchItemFailures"] == []
+
+        for position, text in ((0, "Primum"), (2, "Tertium")):
+            obj = self.s3.get_object(
+                Bucket=self.bucket_name, Key=f"packed-{position}.txt"
+            )
+            assert obj["Body"].read().decode("utf-8") == text
+
+        messages = sqs.receive_message(
+            QueueUrl=dlq_url, MaxNumberOfMessages=10, MessageAttributeNames=["All"]
+        )["Messages"]
+        assert [message["Body"] for message in messages] == ['{"key": "value"}']
+        assert (
+            messages[0]["MessageAttributes"]["CorrelationId"]["StringValue"] == "second"
+        )
+
+        # a document left to retry retries the whole packed message
+        with patch.dict(lambda_function.config, {"quarantine": {"destination": None}}):
+            resp = lambda_handler(copy.deepcopy(event), None)
+
+        assert resp["batchItemFailures"] == [{"itemIdentifier": "packed"}]
+
+        # a packed message without the documents it says it holds is quarantined
+        record["messageAttributes"]["PackedDocuments"]["stringValue"] = "4"
+        resp = lambda_handler(copy.deepcopy(event), None)
+
+        assert resp["batchItemFailures"] == []
+
+    def test_lambda_handler_local_sink(self):
+        """Test the project lambda_handler() function writing to a local directory."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            env = {"OUTPUT_SINK": "local", "OUTPUT_DIRECTORY": directory}
+            with patch.dict(os.environ, env):
+                resp = lambda_handler(copy.deepcopy(self.event), None)
+
+            assert resp["batchItemFailures"] == []
+
+            message_id = self.event["Records"][0]["messageId"]
+            with open(os.path.join(directory, f"{message_id}.txt")) as f:
+                assert f.read() == "Cogito ergo sum"
+
+        # nothing is written to the output bucket
+        contents = self.s3.list_objects_v2(Bucket=self.bucket_name)
+        assert contents["KeyCount"] == 0
+
+    def test_lambda_handler_capture(self):
+        """Test the project lambda_handler() function captures sampled events."""
+
+        self.s3.create_bucket(Bucket="my-capture-bucket")
+        ssm = boto3.client("ssm", region_name="us-west-2")
+        ssm.put_parameter(
+            Name=f"{config['ssm_param_path']}/capture-bucket-name",
+            Value="my-capture-bucket",
+            Type="String",
+        )
+
+        with patch.dict(os.environ, {"CAPTURE_SAMPLE_RATE": "1"}):
+            lambda_handler(copy.deepcopy(self.event), None)
+
+        captures = self.s3.list_objects_v2(Bucket="my-capture-bucket")
+        assert captures["KeyCount"] == 1
+        assert captures["Contents"][0]["Key"].startswith("captures/consumer/")
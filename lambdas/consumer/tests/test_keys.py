@@ -0,0 +1,69 @@
+# Python Standard Library imports
+import pytest
+
+# local imports
+from src.consumer.keys import build_content_key
+from src.consumer.keys import build_output_key
+from src.consumer.keys import hash_prefix
+from src.consumer.keys import time_prefix
+
+MESSAGE_ID = "059f36b4-87a3-44ab-83d2-661975830a7d"
+SENT_TIMESTAMP = "1545082649183"  # 2018-12-17T21:37:29.183Z
+
+
+def test_hash_prefix():
+    """Test the project hash_prefix() function."""
+
+    prefix = hash_prefix(MESSAGE_ID, 4)
+
+    assert len(prefix) == 4
+    assert prefix == hash_prefix(MESSAGE_ID, 4)  # deterministic
+    assert prefix != hash_prefix("2e1424d4-f796-459a-8184-9c92662be6da", 4)
+
+
+def test_time_prefix():
+    """Test the project time_prefix() function."""
+
+    assert time_prefix(SENT_TIMESTAMP) == "2018/12/17/21"
+
+
+def test_build_output_key():
+    """Test the project build_output_key() function."""
+
+    prefix = hash_prefix(MESSAGE_ID, 2)
+
+    assert build_output_key(MESSAGE_ID) == f"{MESSAGE_ID}.txt"
+    assert (
+        build_output_key(MESSAGE_ID, layout="hash", hash_chars=2)
+        == f"{prefix}/{MESSAGE_ID}.txt"
+    )
+    assert (
+        build_output_key(MESSAGE_ID, SENT_TIMESTAMP, layout="time")
+        == f"2018/12/17/21/{MESSAGE_ID}.txt"
+    )
+    assert (
+        build_output_key(MESSAGE_ID, SENT_TIMESTAMP, layout="hash+time", hash_chars=2)
+        == f"{prefix}/2018/12/17/21/{MESSAGE_ID}.txt"
+    )
+
+    with pytest.raises(ValueError):
+        build_output_key(MESSAGE_ID, layout="random")
+
+    # time layouts need the time the message was sent
+    with pytest.raises(ValueError):
+        build_output_key(MESSAGE_ID, layout="time")
+
+
+def test_build_content_key():
+    """Test the project build_content_key() function."""
+
+    digest = "ab12" + "0" * 60
+
+    assert build_content_key(digest) == f"content/{digest}.txt"
+    assert build_content_key(digest, "hash", 2) == f"content/ab/{digest}.txt"
+
+    # identical content shares one key whenever it was sent
+    assert build_content_key(digest, "time") == f"content/{digest}.txt"
+
+    with pytest.raises(ValueError):
+        build_content_key(digest, "unknown")
@@ -0,0 +1,62 @@
+# Python Standard Library imports
+import pytest
+
+# local imports
+from src.consumer.memory import MemoryProfiler
+from src.consumer.memory import drain
+from src.consumer.memory import is_memory_profiling_enabled
+from src.consumer.memory import preview
+
+
+def test_preview():
+    """Test the project preview() function."""
+
+    event = {"Records": [{"body": "x" * 10000} for _ in range(1000)]}
+
+    assert len(preview(event)) < 1000
+    assert preview("short") == "'short'"
+
+
+def test_drain():
+    """Test the project drain() function."""
+
+    items = [1, 2, 3]
+
+    assert list(drain(items)) == [1, 2, 3]
+    assert items == []
+
+
+@pytest.mark.parametrize(
+    "value, expected", [("1", True), ("true", True), ("0", False), ("no", False)]
+)
+def test_is_memory_profiling_enabled(monkeypatch, value, expected):
+    """Test the project is_memory_profiling_enabled() function."""
+
+    monkeypatch.setenv("MEMORY_PROFILING", value)
+
+    assert is_memory_profiling_enabled() is expected
+
+
+def test_memory_profiler_disabled():
+    """Test the project MemoryProfiler class when profiling is disabled."""
+
+    with MemoryProfiler() as profiler:
+        pass
+
+    report = profiler.report(10)
+
+    assert report["max_rss_bytes"] > 0
+    assert "traced_peak_bytes" not in report
+
+
+def test_memory_profiler_enabled():
+    """Test the project MemoryProfiler class when profiling is enabled."""
+
+    with MemoryProfiler(enabled=True) as profiler:
+        data = [bytes(1024) for _ in range(100)]
+
+    report = profiler.report(len(data))
+
+    assert report["traced_peak_bytes"] >= 100 * 1024
+    assert report["peak_bytes_per_record"] >= 1024
+    assert report["top_allocations"]
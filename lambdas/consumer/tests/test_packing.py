@@ -0,0 +1,88 @@
+# Python Standard Library imports
+import pytest
+
+# local imports
+from src.consumer.packing import PackedMessages
+from src.consumer.packing import is_packed
+from src.consumer.packing import unpack
+from src.consumer.records import SqsRecord
+
+
+def make_packed(documents, count=None):
+    record = SqsRecord(
+        "059f36b4",
+        None,
+        "arn:aws:sqs:us-west-2:123456789012:my-queue",
+        attributes={"SentTimestamp": "1545082649183"},
+        message_attributes={
+            "Lane": {"stringValue": "priority", "dataType": "String"},
+            "PackedDocuments": {
+                "stringValue": str(len(documents) if count is None else count),
+                "dataType": "Number",
+            },
+        },
+    )
+    record.payload = {"documents": documents}
+
+    return record
+
+
+def test_unpack():
+    """Test the project unpack() function."""
+
+    record = make_packed(
+        [
+            {
+                "correlation_id": "first",
+                "ingest_timestamp": 1545082649000,
+                "document": {"text": "Primum"},
+            },
+            {"document": "Secundum"},
+        ]
+    )
+    assert is_packed(record)
+
+    first, second = unpack(record)
+
+    assert first.message_id == "059f36b4-0"
+    assert second.message_id == "059f36b4-1"
+    assert first.payload == {"text": "Primum"}
+    assert second.payload == "Secundum"
+    assert first.body is None
+    assert first.attributes == {"SentTimestamp": "1545082649183"}
+    assert (first.packed_message_id, first.packed_documents) == ("059f36b4", 2)
+
+    # each document keeps its own correlation ID and ingest time, and shares
+    # the other attributes of the packed message
+    assert first.message_attributes == {
+        "Lane": {"stringValue": "priority", "dataType": "String"},
+        "CorrelationId": {"stringValue": "first", "dataType": "String"},
+        "IngestTimestamp": {"stringValue": "1545082649000", "dataType": "Number"},
+    }
+    assert second.message_attributes == {
+        "Lane": {"stringValue": "priority", "dataType": "String"}
+    }
+
+    assert not is_packed(SqsRecord("059f36b4", "{}", "arn"))
+
+    for malformed in (
+        make_packed([]),
+        make_packed([{"document": 1}], count=2),
+        make_packed([{"text": "no document"}]),
+    ):
+        with pytest.raises(ValueError):
+            unpack(malformed)
+
+
+def test_packed_messages():
+    """Test the project PackedMessages class."""
+
+    packed = PackedMessages()
+    documents = unpack(make_packed([{"document": i} for i in range(3)]))
+
+    assert packed.done(SqsRecord("plain", "{}", "arn")) == "plain"
+
+    # a packed message is done with its last document, in any order
+    assert packed.done(documents[2]) is None
+    assert packed.done(documents[0]) is None
+    assert packed.done(documents[1]) == "059f36b4"
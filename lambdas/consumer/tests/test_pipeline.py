@@ -0,0 +1,207 @@
+# Python Standard Library imports
+import pytest
+import threading
+
+# local imports
+from src.consumer.pipeline import DeadlineExceeded
+from src.consumer.pipeline import Pipeline
+from src.consumer.pipeline import Stage
+from src.consumer.pipeline import batches
+from src.consumer.pipeline import until_deadline
+
+
+def double(item):
+    """Stage function that doubles an item."""
+
+    return item * 2
+
+
+def reject_odd(item):
+    """Stage function that raises an exception for odd items."""
+
+    if item % 2:
+        raise ValueError(f"{item} is odd.")
+
+    return item
+
+
+def reject_odd_in_batch(items):
+    """Batch stage function that fails the odd items of a batch."""
+
+    return [ValueError(f"{item} is odd.") if item % 2 else item for item in items]
+
+
+class FakeDeadline:
+    """A deadline that passes when told to."""
+
+    def __init__(self, seconds=60.0):
+        self.seconds = seconds
+
+    def remaining(self):
+        return self.seconds
+
+    def expired(self):
+        return self.seconds <= 0
+
+
+def test_stage():
+    """Test the project Stage class."""
+
+    stage = Stage("double", double, concurrency=4, on_error="skip")
+
+    assert stage.name == "double"
+    assert stage.concurrency == 4
+
+    with pytest.raises(ValueError):
+        Stage("double", double, on_error="ignore")
+
+    with pytest.raises(ValueError):
+        Stage("double", double, concurrency=0)
+
+
+def test_pipeline_run():
+    """Test the project Pipeline.run() method."""
+
+    pipeline = Pipeline([Stage("double", double), Stage("again", double)])
+
+    assert list(pipeline.run(range(5))) == [0, 4, 8, 12, 16]
+
+    stats = pipeline.stats()
+    assert stats["double"]["processed"] == 5
+    assert stats["again"]["processed"] == 5
+    assert stats["double"]["seconds"] >= 0
+
+
+def test_pipeline_run_concurrent():
+    """Test the project Pipeline.run() method with a concurrent stage."""
+
+    pipeline = Pipeline([Stage("double", double, concurrency=3)])
+
+    # results keep the order the items were submitted in
+    assert list(pipeline.run(range(10))) == [i * 2 for i in range(10)]
+
+
+def test_pipeline_error_policies():
+    """Test the project Pipeline error policies."""
+
+    # with the 'skip' policy, failed items are recorded and dropped
+    pipeline = Pipeline([Stage("reject", reject_odd, on_error="skip")])
+
+    assert list(pipeline.run(range(5))) == [0, 2, 4]
+    assert [failure.item for failure in pipeline.failures] == [1, 3]
+    assert pipeline.stats()["reject"]["failed"] == 2
+
+    # with the 'raise' policy, the first failure stops the pipeline
+    pipeline = Pipeline([Stage("reject", reject_odd, concurrency=2)])
+
+    with pytest.raises(ValueError):
+        list(pipeline.run(range(5)))
+
+
+def test_batches():
+    """Test the project batches() function."""
+
+    assert list(batches(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batches([], 3)) == []
+
+
+def test_pipeline_batches():
+    """Test the project Pipeline.run() method with a batch stage."""
+
+    calls = []
+
+    def double_batch(items):
+        calls.append(len(items))
+        return [item * 2 for item in items]
+
+    pipeline = Pipeline([Stage("double", double_batch, batch_size=4, concurrency=2)])
+
+    # batched results are passed on one item at a time, in order
+    assert list(pipeline.run(range(10))) == [i * 2 for i in range(10)]
+    assert calls == [4, 4, 2]
+    assert pipeline.stats()["double"]["processed"] == 10
+
+    # a batch can fail in part
+    pipeline = Pipeline(
+        [Stage("reject", reject_odd_in_batch, batch_size=3, on_error="skip")]
+    )
+
+    assert list(pipeline.run(range(5))) == [0, 2, 4]
+    assert [failure.item for failure in pipeline.failures] == [1, 3]
+
+    # an exception fails every item of the batch
+    def fail(items):
+        raise ValueError("Batch failed.")
+
+    pipeline = Pipeline([Stage("fail", fail, batch_size=3, on_error="skip")])
+
+    assert list(pipeline.run(range(5))) == []
+    assert pipeline.stats()["fail"]["failed"] == 5
+
+    with pytest.raises(ValueError):
+        Stage("double", double_batch, batch_size=0)
+
+
+def test_pipeline_expand():
+    """Test the project Pipeline.run() method with an expanding stage."""
+
+    def repeat(item):
+        if item == 3:
+            raise ValueError("3 cannot be repeated.")
+        return [item] * item
+
+    pipeline = Pipeline(
+        [Stage("repeat", repeat, expand=True, on_error="skip"), Stage("double", double)]
+    )
+
+    # each item becomes as many items as its function returns, none included
+    assert list(pipeline.run(range(5))) == [2, 4, 4, 8, 8, 8, 8]
+    assert [failure.item for failure in pipeline.failures] == [3]
+    assert pipeline.stats()["repeat"]["processed"] == 4
+    assert pipeline.stats()["double"]["processed"] == 7
+
+
+def test_until_deadline():
+    """Test the project until_deadline() function."""
+
+    deadline = FakeDeadline()
+    items = iter(range(5))
+    taken = []
+
+    for item in until_deadline(items, deadline):
+        taken.append(item)
+        if item == 1:
+            deadline.seconds = 0
+
+    # items after the deadline are left in the source
+    assert taken == [0, 1]
+    assert list(items) == [2, 3, 4]
+
+
+def test_pipeline_deadline():
+    """Test the project Pipeline deadline with a concurrent stage."""
+
+    release = threading.Event()
+    deadline = FakeDeadline()
+
+    def stall(item):
+        # item 1 is stuck until the test releases it
+        if item == 1:
+            release.wait(timeout=10)
+
+        return item
+
+    pipeline = Pipeline([Stage("stall", stall, concurrency=2)], deadline=deadline)
+    results = []
+
+    try:
+        with pytest.raises(DeadlineExceeded):
+            for item in pipeline.run(range(4)):
+                results.append(item)
+                deadline.seconds = 0
+    finally:
+        release.set()
+
+    # the pipeline stopped waiting instead of hanging on item 1
+    assert results == [0]
+    assert pipeline.stats()["stall"]["failed"] >= 1
@@ -0,0 +1,189 @@
+# Python Standard Library imports
+import json
+import os
+import pytest
+
+from json import JSONDecodeError
+from unittest.mock import patch
+
+# 3rd party imports
+import boto3
+
+from moto import mock_aws
+
+# local imports
+from src.consumer import quarantine
+from src.consumer.pipeline import Failure
+from src.consumer.quarantine import DlqQuarantine
+from src.consumer.quarantine import S3Quarantine
+from src.consumer.quarantine import build_quarantine
+from src.consumer.quarantine import failure_reason
+from src.consumer.quarantine import is_permanent
+from src.consumer.quarantine import quarantine_failures
+from src.consumer.quarantine import to_send_attributes
+from src.consumer.records import SqsRecord
+
+QUEUE_ARN = "arn:aws:sqs:us-east-1:123456789012:my-queue"
+
+
+def make_failure(message_id, stage="decode", error=None):
+    record = SqsRecord(
+        message_id,
+        "not json",
+        QUEUE_ARN,
+        message_attributes={
+            "CorrelationId": {"stringValue": "abc", "dataType": "String"}
+        },
+    )
+
+    return Failure(stage, record, error or JSONDecodeError("Expecting value", "", 0))
+
+
+@pytest.fixture(scope="function")
+def aws_credentials():
+    """Mocked AWS Credentials for moto."""
+
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"  # nosec
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"  # nosec
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"  # nosec
+    os.environ["AWS_SESSION_TOKEN"] = "testing"  # nosec
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+
+
+def test_is_permanent():
+    """Test the project is_permanent() function."""
+
+    assert is_permanent(make_failure("a"))
+    assert is_permanent(make_failure("a", "transform", KeyError("text")))
+    assert is_permanent(make_failure("a", "transform", ValueError("special")))
+
+    # errors that a retry could fix are transient
+    assert not is_permanent(make_failure("a", "transform", RuntimeError("pool")))
+    assert not is_permanent(make_failure("a", "sink", ValueError("write")))
+
+
+def test_failure_reason():
+    """Test the project failure_reason() function."""
+
+    assert failure_reason(make_failure("a", "transform", KeyError("text"))) == (
+        "transform: KeyError: 'text'"
+    )
+
+    # long messages are cut short
+    long_error = ValueError("x" * 5000)
+    assert len(failure_reason(make_failure("a", "transform", long_error))) == 1024
+
+
+def test_to_send_attributes():
+    """Test the project to_send_attributes() function."""
+
+    attributes = {
+        "CorrelationId": {"stringValue": "abc", "dataType": "String"},
+        "IngestTimestamp": {"stringValue": "123", "dataType": "Number"},
+        "Blob": {"binaryValue": b"\x00", "dataType": "Binary"},
+    }
+
+    assert to_send_attributes(attributes) == {
+        "CorrelationId": {"DataType": "String", "StringValue": "abc"},
+        "IngestTimestamp": {"DataType": "Number", "StringValue": "123"},
+        "Blob": {"DataType": "Binary", "BinaryValue": b"\x00"},
+    }
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_dlq_quarantine():
+    """Test the project DlqQuarantine class."""
+
+    with mock_aws():
+        sqs = boto3.client("sqs")
+        dlq_url = sqs.create_queue(QueueName="my-queue-dlq")["QueueUrl"]
+
+        # 12 messages are sent in two batches
+        failures = [make_failure(f"message-{i}") for i in range(12)]
+        failures.append(Failure("decode", SqsRecord("orphan", "{", "other-arn"), None))
+
+        errors = DlqQuarantine({QUEUE_ARN: dlq_url}, client=sqs).send(failures)
+
+        assert errors[:12] == [None] * 12
+        # a message from a queue without a dead-letter queue is not quarantined
+        assert isinstance(errors[12], ValueError)
+
+        messages = sqs.receive_message(
+            QueueUrl=dlq_url, MaxNumberOfMessages=10, MessageAttributeNames=["All"]
+        )["Messages"]
+        attributes = messages[0]["MessageAttributes"]
+
+        assert messages[0]["Body"] == "not json"
+        assert attributes["CorrelationId"]["StringValue"] == "abc"
+        assert attributes["QuarantineStage"]["StringValue"] == "decode"
+        assert attributes["QuarantineReason"]["StringValue"].startswith(
+            "decode: JSONDecodeError"
+        )
+        assert attributes["SourceQueueArn"]["StringValue"] == QUEUE_ARN
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_s3_quarantine():
+    """Test the project S3Quarantine class."""
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="my-output-bucket")
+
+        errors = S3Quarantine("my-output-bucket", client=s3).send(
+            [make_failure("message-0", "transform", KeyError("text"))]
+        )
+        assert errors == [None]
+
+        obj = s3.get_object(Bucket="my-output-bucket", Key="quarantine/message-0.json")
+        quarantined = json.loads(obj["Body"].read())
+
+        assert quarantined["body"] == "not json"
+        assert quarantined["reason"] == "transform: KeyError: 'text'"
+
+        # a failed write fails only its message
+        errors = S3Quarantine("non-existent-bucket", client=s3).send(
+            [make_failure("message-0")]
+        )
+        assert isinstance(errors[0], Exception)
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_build_quarantine():
+    """Test the project build_quarantine() function."""
+
+    with mock_aws():
+        assert isinstance(build_quarantine("dlq"), DlqQuarantine)
+        assert isinstance(build_quarantine("s3", "my-output-bucket"), S3Quarantine)
+
+        with patch.dict(quarantine.config, {"quarantine": {"destination": None}}):
+            assert build_quarantine() is None
+
+        with pytest.raises(ValueError):
+            build_quarantine("ftp")
+
+
+def test_quarantine_failures():
+    """Test the project quarantine_failures() function."""
+
+    class FakeQuarantine:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, failures):
+            self.sent.extend(failures)
+            return [None if i % 2 == 0 else OSError() for i in range(len(failures))]
+
+    failures = [
+        make_failure("a"),
+        make_failure("b", "sink", OSError()),
+        make_failure("c", "transform", KeyError("text")),
+        make_failure("d", "transform", ValueError("special")),
+    ]
+    fake = FakeQuarantine()
+
+    # transient failures are not quarantined, nor are messages it fails to send
+    assert quarantine_failures(failures, fake) == {"a", "d"}
+    assert [failure.item.message_id for failure in fake.sent] == ["a", "c", "d"]
+
+    assert quarantine_failures(failures, None) == set()
@@ -0,0 +1,73 @@
+# Python Standard Library imports
+import pytest
+
+# local imports
+from src.consumer.records import is_sqs_record
+from src.consumer.records import is_valid_sqs_source
+from src.consumer.records import parse_sqs_record
+from src.consumer.records import parse_sqs_event
+from tests.events import events
+
+QUEUE_ARN = "arn:aws:sqs:us-east-2:123456789012:my-queue"
+
+
+def test_is_sqs_record():
+    """Test the project is_sqs_record() function."""
+
+    for record in events["valid_sqs_msg"]["Records"]:
+        assert is_sqs_record(record)
+
+    assert not is_sqs_record({"messageId": "blah"})
+    assert not is_sqs_record("blah, blah, blah")
+
+
+def test_is_valid_sqs_source():
+    """Test the project is_valid_sqs_source() function."""
+
+    good_record = events["valid_sqs_msg"]["Records"][0]
+
+    assert is_valid_sqs_source(good_record, QUEUE_ARN)
+
+    # a record from the wrong queue or from a non-SQS source is not valid
+    for record in events["invalid_sqs_msg_values"]["Records"]:
+        assert not is_valid_sqs_source(record, QUEUE_ARN)
+
+    # records from any of a set of queue shards are valid
+    shard_arns = frozenset((QUEUE_ARN, f"{QUEUE_ARN}-1"))
+    assert is_valid_sqs_source(good_record, shard_arns)
+    assert not is_valid_sqs_source(good_record, frozenset((f"{QUEUE_ARN}-1",)))
+
+    # a single ARN is matched exactly, not as a substring
+    assert not is_valid_sqs_source(good_record, f"{QUEUE_ARN}-1")
+
+
+def test_parse_sqs_record():
+    """Test the project parse_sqs_record() function."""
+
+    raw_record = events["valid_sqs_msg"]["Records"][0]
+    record = parse_sqs_record(raw_record, QUEUE_ARN)
+
+    assert record.message_id == raw_record["messageId"]
+    assert record.body == raw_record["body"]
+    assert record.attributes["SentTimestamp"] == "1545082649183"
+
+    # records use slots, so no per-instance dictionary is allocated
+    assert not hasattr(record, "__dict__")
+
+    with pytest.raises(ValueError, match="Malformed record"):
+        parse_sqs_record({"messageId": "blah"}, QUEUE_ARN)
+
+    with pytest.raises(ValueError, match="Invalid SQS source"):
+        parse_sqs_record(events["invalid_sqs_msg_values"]["Records"][0], QUEUE_ARN)
+
+
+def test_parse_sqs_event():
+    """Test the project parse_sqs_event() function."""
+
+    records = list(parse_sqs_event(events["valid_sqs_msg"], QUEUE_ARN))
+
+    assert len(records) == 1
+
+    # a malformed event is rejected before any record is parsed
+    with pytest.raises(ValueError, match="Malformed event"):
+        parse_sqs_event(events["invalid_event"], QUEUE_ARN)
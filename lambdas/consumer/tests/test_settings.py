@@ -0,0 +1,121 @@
+# Python Standard Library imports
+import json
+import pytest
+import threading
+
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+
+# local imports
+from src.consumer.settings import EnvProvider
+from src.consumer.settings import ExtensionProvider
+from src.consumer.settings import SnapshotProvider
+from src.consumer.settings import build_provider
+from src.consumer.settings import clear_settings
+from src.consumer.settings import env_var_name
+from src.consumer.settings import get_settings
+from src.consumer.settings import parse_list_param
+from src.consumer.config import config
+
+SETTINGS = {
+    "output-bucket-name": "my-output-bucket",
+    "queue-arn": "arn:aws:sqs:us-east-2:123456789012:my-queue",
+}
+
+
+@pytest.fixture
+def settings_env(monkeypatch):
+    """Set the required parameters as environment variables."""
+
+    for param, value in SETTINGS.items():
+        monkeypatch.setenv(env_var_name(param), value)
+
+    clear_settings()
+    yield
+    clear_settings()
+
+
+@pytest.fixture
+def extension():
+    """A stand-in for the Parameters and Secrets Lambda extension."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            name = self.path.split("name=")[1].replace("%2F", "/")
+            value = SETTINGS[name.rsplit("/", 1)[1]]
+            body = json.dumps({"Parameter": {"Name": name, "Value": value}})
+
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(body.encode("utf-8"))
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("localhost", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+
+
+def test_env_var_name():
+    """Test the project env_var_name() function."""
+
+    assert env_var_name("output-bucket-name") == "OUTPUT_BUCKET_NAME"
+
+
+def test_parse_list_param():
+    """Test the project parse_list_param() function."""
+
+    assert parse_list_param("a") == ["a"]
+    assert parse_list_param("a,b, c") == ["a", "b", "c"]
+    assert parse_list_param("a,,b,") == ["a", "b"]
+
+
+def test_env_provider(settings_env):
+    """Test the project EnvProvider class."""
+
+    assert EnvProvider().load(list(SETTINGS) + ["missing"]) == SETTINGS
+
+
+def test_snapshot_provider(tmp_path):
+    """Test the project SnapshotProvider class."""
+
+    snapshot = tmp_path / "config_snapshot.json"
+    snapshot.write_text(json.dumps(SETTINGS))
+
+    assert SnapshotProvider(str(snapshot)).load(list(SETTINGS)) == SETTINGS
+
+
+def test_extension_provider(extension):
+    """Test the project ExtensionProvider class."""
+
+    provider = ExtensionProvider(config["ssm_param_path"], port=extension)
+
+    assert provider.load(list(SETTINGS)) == SETTINGS
+
+
+def test_build_provider():
+    """Test the project build_provider() function."""
+
+    assert isinstance(build_provider("env"), EnvProvider)
+
+    with pytest.raises(ValueError):
+        build_provider("blah")
+
+
+def test_get_settings(settings_env, monkeypatch):
+    """Test the project get_settings() function."""
+
+    settings = get_settings("env")
+    assert settings == SETTINGS
+
+    # settings are loaded once and then reused
+    monkeypatch.delenv("QUEUE_ARN")
+    assert get_settings("env") is settings
+
+    # missing required parameters are reported when the settings are loaded
+    clear_settings()
+    with pytest.raises(ValueError):
+        get_settings("env")
@@ -0,0 +1,291 @@
+# Python Standard Library imports
+import io
+import json
+import os
+import pytest
+import random
+
+from unittest import TestCase
+from unittest.mock import patch
+
+# 3rd party imports
+import boto3
+
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from moto import mock_aws
+
+from consumer.content import clear_content_cache
+
+# local imports
+from src.consumer import sinks
+from src.consumer.faults import FaultInjector
+from src.consumer.records import SqsRecord
+from src.consumer.resilience import Retrier
+from src.consumer.resilience import client_config
+from src.consumer.sinks import LocalSink
+from src.consumer.sinks import NullSink
+from src.consumer.sinks import S3Sink
+from src.consumer.sinks import StdoutSink
+from src.consumer.sinks import build_sink
+from src.consumer.sinks import write_obj_to_s3
+
+QUEUE_ARN = "arn:aws:sqs:us-west-2:123456789012:my-queue"
+
+
+class ScriptedRandom(random.Random):
+    """A random number generator whose random() returns the given rolls, then 0.99."""
+
+    def __init__(self, *rolls):
+        super().__init__(0)
+        self.rolls = list(rolls)
+
+    def random(self):
+        return self.rolls.pop(0) if self.rolls else 0.99
+
+
+def make_records(*outputs):
+    records = []
+
+    for i, output in enumerate(outputs):
+        record = SqsRecord(f"message-{i}", "{}", QUEUE_ARN)
+        record.output = output
+        records.append(record)
+
+    return records
+
+
+@pytest.fixture(scope="function")
+def aws_credentials():
+    """Mocked AWS Credentials for moto."""
+
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"  # nosec
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"  # nosec
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"  # nosec
+    os.environ["AWS_SESSION_TOKEN"] = "testing"  # nosec
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+
+
+@pytest.fixture(autouse=True)
+def content_cache():
+    """Clear the content cache the sinks share."""
+
+    clear_content_cache()
+    yield
+    clear_content_cache()
+
+
+@mock_aws
+@pytest.mark.usefixtures("aws_credentials")
+class TestWriteObjToS3(TestCase):
+    """Test the project write_obj_to_s3() function."""
+
+    def setUp(self):
+        """Set up to test the project write_obj_to_s3() function."""
+
+        self.bucket_name = "my-test-bucket"
+        # create S3 bucket and object
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=self.bucket_name)
+
+    def test_write_obj_to_s3(self):
+        """Test the project write_obj_to_s3() function."""
+
+        # test a valid response
+        resp = write_obj_to_s3(self.bucket_name, "blah", "whatever")
+        assert isinstance(resp, dict)
+
+        # test writing to a non-existent S3 bucket
+        with pytest.raises(Exception):
+            write_obj_to_s3("non-existent-bucket", "blah", "whatever")
+
+    def test_write_obj_to_s3_multipart(self):
+        """Test the project write_obj_to_s3() function with a multipart upload."""
+
+        # S3 parts must be at least 5 MB, so stream just over one part
+        part_size = 5 * 1024 * 1024
+        chunks = (b"x" * 1024 * 1024 for _ in range(6))
+        transfer_config = TransferConfig(
+            multipart_threshold=part_size, multipart_chunksize=part_size
+        )
+
+        resp = write_obj_to_s3(
+            self.bucket_name, "large", chunks, transfer_config=transfer_config
+        )
+        assert resp == {"Bucket": self.bucket_name, "Key": "large"}
+
+        s3 = boto3.client("s3")
+        head = s3.head_object(Bucket=self.bucket_name, Key="large")
+        assert head["ContentLength"] == 6 * 1024 * 1024
+        assert head["ETag"].endswith('-2"')  # the object was uploaded in 2 parts
+
+        # the threshold is in bytes, so text with fewer characters than the
+        # threshold but more UTF-8 bytes is uploaded in parts too
+        text = "é" * (3 * 1024 * 1024)
+        write_obj_to_s3(
+            self.bucket_name, "large-text", text, transfer_config=transfer_config
+        )
+
+        head = s3.head_object(Bucket=self.bucket_name, Key="large-text")
+        assert head["ContentLength"] == 6 * 1024 * 1024
+        assert head["ETag"].endswith('-2"')
+
+    def test_write_obj_to_s3_multipart_throttled(self):
+        """Test the project write_obj_to_s3() function retries a throttled multipart upload."""
+
+        part_size = 5 * 1024 * 1024
+        transfer_config = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=1,
+        )
+        retrier = Retrier(max_attempts=3, base_delay=0)
+
+        # the first part of the first attempt is throttled, and the client
+        # leaves retrying to the Retrier, as the sink's does
+        s3 = boto3.client("s3", config=client_config)
+        rng = ScriptedRandom(0.99, 0.1)
+        FaultInjector("s3", throttle_rate=0.5, rng=rng).install(s3)
+
+        content = b"x" * (6 * 1024 * 1024)
+        resp = retrier.call(
+            "s3",
+            write_obj_to_s3,
+            self.bucket_name,
+            "large",
+            content,
+            client=s3,
+            transfer_config=transfer_config,
+        )
+        assert resp == {"Bucket": self.bucket_name, "Key": "large"}
+        assert retrier.budget == 49
+
+        head = s3.head_object(Bucket=self.bucket_name, Key="large")
+        assert head["ContentLength"] == len(content)
+
+        # a throttled stream cannot be read again, so it is not retried
+        rng.rolls = [0.99, 0.1]
+        chunks = (b"x" * 1024 * 1024 for _ in range(6))
+        with pytest.raises(S3UploadFailedError):
+            retrier.call(
+                "s3",
+                write_obj_to_s3,
+                self.bucket_name,
+                "streamed",
+                chunks,
+                client=s3,
+                transfer_config=transfer_config,
+            )
+        assert retrier.budget == 49
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_s3_sink():
+    """Test the project S3Sink class."""
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="my-output-bucket")
+
+        sink = S3Sink("my-output-bucket", client=s3, concurrency=4)
+        try:
+            assert sink.write(make_records("a", b"b", ["c", "d"])) == [None] * 3
+        finally:
+            sink.close()
+
+        obj = s3.get_object(Bucket="my-output-bucket", Key="message-2.txt")
+        assert obj["Body"].read() == b"cd"
+        assert obj["Metadata"]["correlation-id"] == "message-2"
+
+        # each record of a batch fails on its own
+        sink = S3Sink("non-existent-bucket", client=s3, concurrency=1)
+        errors = sink.write(make_records("a", "b"))
+        assert all(isinstance(error, Exception) for error in errors)
+
+
+def test_local_sink(tmp_path):
+    """Test the project LocalSink class."""
+
+    sink = LocalSink(str(tmp_path))
+    records = make_records("a", b"b", (chunk for chunk in ("c", "d")))
+
+    assert sink.write(records) == [None] * 3
+    assert (tmp_path / "message-0.txt").read_text() == "a"
+    assert (tmp_path / "message-2.txt").read_text() == "cd"
+
+    # files are overwritten, and no temporary files are left behind
+    sink.write(make_records("e"))
+    assert (tmp_path / "message-0.txt").read_text() == "e"
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "message-0.txt",
+        "message-1.txt",
+        "message-2.txt",
+    ]
+
+
+def test_local_sink_content_output(tmp_path):
+    """Test the project LocalSink class with content-addressed output."""
+
+    sink = LocalSink(str(tmp_path))
+
+    with patch.dict(sinks.config, {"output_mode": "content"}):
+        assert sink.write(make_records("same", "same")) == [None, None]
+
+    # identical outputs share one file, and each message has a reference to it
+    contents = list((tmp_path / "content").iterdir())
+    assert len(contents) == 1
+    assert contents[0].read_text() == "same"
+
+    for message_id in ("message-0", "message-1"):
+        ref = json.loads((tmp_path / "refs" / f"{message_id}.json").read_text())
+        assert ref["key"] == f"content/{contents[0].name}"
+
+
+def test_stdout_sink():
+    """Test the project StdoutSink class."""
+
+    stream = io.StringIO()
+    sink = StdoutSink(stream)
+
+    assert sink.write(make_records("a", b"b")) == [None, None]
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert lines == [
+        {"messageId": "message-0", "correlationId": "message-0", "output": "a"},
+        {"messageId": "message-1", "correlationId": "message-1", "output": "b"},
+    ]
+
+
+def test_null_sink():
+    """Test the project NullSink class."""
+
+    sink = NullSink()
+
+    assert sink.write(make_records("ab", (b"c" for _ in range(3)))) == [None, None]
+    assert sink.records == 2
+    assert sink.bytes == 5
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_build_sink(tmp_path):
+    """Test the project build_sink() function."""
+
+    assert isinstance(build_sink("null"), NullSink)
+
+    # S3 sinks share one client, kept across invocations
+    sinks.clear_s3_client()
+    first, second = build_sink("s3", "my-output-bucket"), build_sink("s3", "other")
+    assert first.client is second.client is sinks.get_s3_client()
+    first.close()
+    second.close()
+
+    # OUTPUT_SINK and OUTPUT_DIRECTORY take precedence over the config
+    env = {"OUTPUT_SINK": "local", "OUTPUT_DIRECTORY": str(tmp_path)}
+    with patch.dict(os.environ, env):
+        sink = build_sink()
+
+    assert isinstance(sink, LocalSink)
+    assert sink.directory == str(tmp_path)
+
+    with pytest.raises(ValueError):
+        build_sink("ftp")
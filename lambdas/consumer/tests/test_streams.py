@@ -0,0 +1,35 @@
+# Python Standard Library imports
+from io import BytesIO
+
+# local imports
+from src.consumer.streams import IterStream
+from src.consumer.streams import iter_chunks
+from src.consumer.streams import to_stream
+
+
+def test_iter_stream():
+    """Test the project IterStream class."""
+
+    stream = IterStream(iter([b"veni ", "vidi ", b"", b"vici"]))
+
+    assert stream.read(3) == b"ven"
+    assert stream.read() == b"i vidi vici"
+    assert stream.read() == b""
+
+
+def test_iter_chunks():
+    """Test the project iter_chunks() function."""
+
+    assert list(iter_chunks("veni vidi vici", 5)) == ["veni ", "vidi ", "vici"]
+    assert list(iter_chunks(b"", 5)) == []
+
+
+def test_to_stream():
+    """Test the project to_stream() function."""
+
+    assert to_stream("veni vidi vici", chunk_size=4).read() == b"veni vidi vici"
+    assert to_stream(iter(["veni ", b"vidi"])).read() == b"veni vidi"
+
+    # file objects are passed through untouched
+    file_obj = BytesIO(b"veni vidi vici")
+    assert to_stream(file_obj) is file_obj
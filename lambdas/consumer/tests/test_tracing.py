@@ -0,0 +1,121 @@
+# Python Standard Library imports
+import json
+
+# local imports
+from src.consumer.records import SqsRecord
+from src.consumer.tracing import LatencyRecorder
+from src.consumer.tracing import get_correlation_id
+from src.consumer.tracing import get_lane
+from src.consumer.tracing import message_latencies
+from src.consumer.tracing import percentile
+
+QUEUE_ARN = "arn:aws:sqs:us-west-2:123456789012:my-queue"
+
+
+def make_record(message_attributes=None):
+    return SqsRecord(
+        "my-message-id",
+        "{}",
+        QUEUE_ARN,
+        attributes={
+            "SentTimestamp": "1000",
+            "ApproximateFirstReceiveTimestamp": "1500",
+        },
+        message_attributes=message_attributes,
+    )
+
+
+def test_get_correlation_id():
+    """Test the project get_correlation_id() function."""
+
+    record = make_record(
+        {"CorrelationId": {"stringValue": "my-correlation-id", "dataType": "String"}}
+    )
+
+    assert get_correlation_id(record) == "my-correlation-id"
+
+    # messages sent without one fall back to the message ID
+    assert get_correlation_id(make_record()) == "my-message-id"
+
+
+def test_message_latencies():
+    """Test the project message_latencies() function."""
+
+    record = make_record(
+        {"IngestTimestamp": {"stringValue": "900", "dataType": "Number"}}
+    )
+
+    assert message_latencies(record, 1750) == {
+        "upload_to_enqueue": 100,
+        "enqueue_to_receive": 500,
+        "receive_to_written": 250,
+        "end_to_end": 850,
+    }
+
+    # without an ingest time only the SQS and consumer legs are known, and
+    # clock skew never produces a negative latency
+    assert message_latencies(make_record(), 1400) == {
+        "enqueue_to_receive": 500,
+        "receive_to_written": 0,
+    }
+
+
+def test_percentile():
+    """Test the project percentile() function."""
+
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([7], 90) == 7
+    assert percentile([], 50) is None
+
+
+def test_get_lane():
+    """Test the project get_lane() function."""
+
+    record = make_record({"Lane": {"stringValue": "priority", "dataType": "String"}})
+
+    assert get_lane(record) == "priority"
+
+    # messages sent without a lane are in the bulk lane
+    assert get_lane(make_record()) == "bulk"
+
+
+def test_latency_recorder(capsys):
+    """Test the project LatencyRecorder class."""
+
+    priority = {"Lane": {"stringValue": "priority", "dataType": "String"}}
+
+    recorder = LatencyRecorder()
+    for written_ms in (1600, 1700, 1800):
+        recorder.add(make_record(), written_ms)
+    recorder.add(make_record(priority), 1550)
+
+    summary = recorder.summary()
+    assert summary["bulk"]["receive_to_written"] == {
+        "count": 3,
+        "p50": 200,
+        "p90": 300,
+        "p99": 300,
+        "max": 300,
+    }
+    assert summary["bulk"]["upload_to_enqueue"]["count"] == 0
+    assert summary["priority"]["receive_to_written"]["max"] == 50
+
+    # every sample is published as a value of its leg's metric, per lane
+    recorder.publish("my-namespace")
+
+    published = {}
+    for line in capsys.readouterr().out.splitlines():
+        emf = json.loads(line)
+        published[emf["Lane"]] = emf
+
+    assert sorted(published["bulk"]["ReceiveToWrittenLatency"]) == [
+        100.0,
+        200.0,
+        300.0,
+    ]
+    assert published["priority"]["ReceiveToWrittenLatency"] == [50.0]
+    assert "UploadToEnqueueLatency" not in published["bulk"]
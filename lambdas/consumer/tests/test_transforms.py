@@ -0,0 +1,155 @@
+# Python Standard Library imports
+import hashlib
+import os
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+# local imports
+from src.consumer.transforms import ProcessPool
+from src.consumer.transforms import apply_transform
+from src.consumer.transforms import get_process_pool
+from src.consumer.transforms import get_transform
+from src.consumer.transforms import load_plugins
+from src.consumer.transforms import register_transform
+from src.consumer.transforms import shutdown_process_pool
+from src.consumer import transforms
+
+
+def shout(payload):
+    """A transform that upper-cases the text of a message."""
+
+    return payload["text"].upper()
+
+
+def worker_pid(payload):
+    """A transform that returns the ID of the process it runs in."""
+
+    return str(os.getpid())
+
+
+def worker_parent_pid(payload):
+    """A transform that returns the ID of the parent of the process it runs in."""
+
+    return str(os.getppid())
+
+
+def crash(payload):
+    """A transform that kills the process it runs in."""
+
+    os._exit(1)
+
+
+def test_builtin_transforms():
+    """Test the project built-in transforms."""
+
+    payload = {"text": "Cogito ergo sum", "author": "Descartes"}
+
+    assert get_transform("text").func(payload) == "Cogito ergo sum"
+    assert (
+        get_transform("sha256").func(payload)
+        == hashlib.sha256(b"Cogito ergo sum").hexdigest()
+    )
+    assert (
+        get_transform("canonical").func(payload)
+        == '{"author":"Descartes","text":"Cogito ergo sum"}'
+    )
+
+    # a message without text is an error
+    with pytest.raises(KeyError):
+        get_transform("text").func({"words": "Cogito ergo sum"})
+
+
+def test_register_transform():
+    """Test the project register_transform() and get_transform() functions."""
+
+    register_transform("shout", cpu_bound=True)(shout)
+
+    transform = get_transform("shout")
+    assert transform.func is shout
+    assert transform.cpu_bound
+
+    with pytest.raises(ValueError):
+        get_transform("does-not-exist")
+
+
+def test_load_plugins():
+    """Test the project load_plugins() function."""
+
+    # a plugin module registers its transforms when it is imported
+    load_plugins(["src.consumer.transforms"])
+    assert get_transform("text")
+
+    with pytest.raises(ImportError):
+        load_plugins(["does.not.exist"])
+
+
+def test_process_pool():
+    """Test the project ProcessPool class."""
+
+    pool = ProcessPool(2)
+
+    try:
+        assert pool.apply(shout, {"text": "Cogito ergo sum"}) == "COGITO ERGO SUM"
+
+        # the work happens in a worker process, which is not forked from this
+        # one, so locks held by this process's threads are not inherited
+        assert pool.apply(worker_pid, {}) != str(os.getpid())
+        assert pool.apply(worker_parent_pid, {}) != str(os.getpid())
+
+        # exceptions are re-raised in the calling process
+        with pytest.raises(KeyError):
+            pool.apply(shout, {})
+
+        # a worker that dies is replaced, also while other threads are running
+        with pytest.raises(RuntimeError):
+            pool.apply(crash, {})
+        assert pool.apply(shout, {"text": "still working"}) == "STILL WORKING"
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            crashed = executor.submit(pool.apply, crash, {})
+            with pytest.raises(RuntimeError):
+                crashed.result(timeout=30)
+            assert executor.submit(pool.apply, shout, {"text": "a"}).result(30) == "A"
+    finally:
+        pool.close()
+
+
+def test_apply_transform():
+    """Test the project apply_transform() function."""
+
+    register_transform("shout", cpu_bound=True)(shout)
+    register_transform("pid")(worker_pid)
+
+    pool = ProcessPool(1)
+
+    try:
+        # only CPU-bound transforms run in the pool
+        assert apply_transform(get_transform("pid"), {}, pool) == str(os.getpid())
+        assert apply_transform(get_transform("shout"), {"text": "a"}, pool) == "A"
+        assert apply_transform(get_transform("shout"), {"text": "a"}) == "A"
+    finally:
+        pool.close()
+
+
+def test_get_process_pool():
+    """Test the project get_process_pool() function."""
+
+    shutdown_process_pool()
+
+    try:
+        # the pool is kept between calls and recreated if its size changes
+        with patch.dict(transforms.config, {"transform": {"processes": 2}}):
+            pool = get_process_pool()
+            assert pool.processes == 2
+            assert get_process_pool() is pool
+
+        with patch.dict(transforms.config, {"transform": {"processes": 3}}):
+            assert get_process_pool().processes == 3
+
+        # a single process runs transforms in this process
+        with patch.dict(transforms.config, {"transform": {"processes": 1}}):
+            assert get_process_pool() is None
+    finally:
+        shutdown_process_pool()
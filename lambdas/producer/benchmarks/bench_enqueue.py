@@ -0,0 +1,125 @@
+# Python Standard Library imports
+import argparse
+import io
+import os
+import time
+
+from unittest.mock import patch
+
+# 3rd party imports
+import boto3
+
+from moto import mock_aws
+
+# local imports
+from producer.config import config
+from producer.faults import FaultInjector
+from producer.lambda_function import build_pipeline
+from producer.lambda_function import logger
+from producer.sources import JsonLinesSource
+
+
+def make_lines(count, size):
+    """
+    Build synthetic JSON lines.
+
+    :param count (int): The number of lines.
+    :param size (int): The length of each document's text.
+    :return (str): The lines.
+    """
+
+    text = ("Cogito ergo sum " * (size // 16 + 1))[:size]
+
+    return "".join(f'{{"id": {i}, "text": "{text}"}}\n' for i in range(count))
+
+
+def run(sqs, queue_url, lines, batch_size):
+    """
+    Send JSON lines through the producer's pipeline and time it.
+
+    :param sqs (SQS.Client): The SQS client.
+    :param queue_url (str): The URL of the SQS queue.
+    :param lines (str): The JSON lines.
+    :param batch_size (int): The number of messages per SendMessageBatch call.
+    :return (tuple): The seconds taken and the number of messages sent.
+    """
+
+    source = JsonLinesSource(io.StringIO(lines))
+    sink_options = dict(config["stages"]["sink"], batch_size=batch_size)
+
+    with patch.dict(config["stages"], {"sink": sink_options}):
+        pipeline = build_pipeline(source, [queue_url], sqs)
+
+    start = time.perf_counter()
+    sent = sum(1 for _ in pipeline.run(source))
+
+    return time.perf_counter() - start, sent
+
+
+def main():
+    """
+    Main function to benchmark the producer's enqueue path at different batch sizes.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark sending JSON lines to SQS through the producer's pipeline."
+    )
+    parser.add_argument(
+        "--messages", type=int, default=1000, help="The number of messages"
+    )
+    parser.add_argument(
+        "--size", type=int, default=256, help="The length of each document's text"
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 10],
+        help="The numbers of messages per SendMessageBatch call",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0,
+        help="A fixed latency to add to each SQS call, as if SQS were over a network",
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")  # nosec
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")  # nosec
+    # the per-message logs would cost more than the sends
+    logger.setLevel("WARNING")
+
+    lines = make_lines(args.messages, args.size)
+
+    with mock_aws():
+        sqs = boto3.client("sqs")
+        calls = []
+        sqs.meta.events.register(
+            "before-call.sqs.SendMessageBatch", lambda **kwargs: calls.append(1)
+        )
+
+        if args.latency_ms:
+            FaultInjector(
+                "sqs", latency={"distribution": "fixed", "ms": args.latency_ms}
+            ).install(sqs)
+
+        print(f"{args.messages} messages of {args.size} characters")
+        print(f"{'batch':>6} {'msg/s':>10} {'us/msg':>8} {'calls':>7}")
+
+        for batch_size in args.batch_sizes:
+            # moto scans the whole queue on each send, so each run gets a new one
+            queue_url = sqs.create_queue(QueueName=f"bench-queue-{batch_size}")[
+                "QueueUrl"
+            ]
+
+            calls.clear()
+            seconds, sent = run(sqs, queue_url, lines, batch_size)
+
+            us = seconds / sent * 1e6
+            print(f"{batch_size:>6} {1e6 / us:>10.1f} {us:>8.1f} {len(calls):>7}")
+
+
+if __name__ == "__main__":
+    main()
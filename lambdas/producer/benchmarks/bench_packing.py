@@ -0,0 +1,137 @@
+# Python Standard Library imports
+import argparse
+import io
+import os
+import time
+
+from unittest.mock import patch
+
+# 3rd party imports
+import boto3
+
+from moto import mock_aws
+
+# local imports
+from producer.config import config
+from producer.faults import FaultInjector
+from producer.lambda_function import build_pipeline
+from producer.lambda_function import logger
+from producer.sources import JsonLinesSource
+
+
+def make_lines(count, size):
+    """
+    Build synthetic JSON lines.
+
+    :param count (int): The number of lines.
+    :param size (int): The length of each document's text.
+    :return (str): The lines.
+    """
+
+    text = ("Cogito ergo sum " * (size // 16 + 1))[:size]
+
+    return "".join(f'{{"id": {i}, "text": "{text}"}}\n' for i in range(count))
+
+
+def run(sqs, queue_url, lines, packed, target_size):
+    """
+    Send JSON lines through the producer's pipeline, packed or not, and time it.
+
+    :param sqs (SQS.Client): The SQS client.
+    :param queue_url (str): The URL of the SQS queue.
+    :param lines (str): The JSON lines.
+    :param packed (bool): Whether to pack the documents into fewer messages.
+    :param target_size (int): The largest size of a packed message in bytes.
+    :return (tuple): The seconds taken and the number of documents sent.
+    """
+
+    source = JsonLinesSource(io.StringIO(lines))
+    packing = dict(config["packing"], enabled=packed, target_size=target_size)
+
+    with patch.dict(config, {"packing": packing}):
+        pipeline = build_pipeline(source, [queue_url], sqs)
+
+        start = time.perf_counter()
+        sent = sum(1 for _ in pipeline.run(source))
+
+    return time.perf_counter() - start, sent
+
+
+def main():
+    """
+    Main function to benchmark sending small documents with and without packing.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark sending JSON lines to SQS packed and unpacked."
+    )
+    parser.add_argument(
+        "--documents", type=int, default=1000, help="The number of documents"
+    )
+    parser.add_argument(
+        "--size", type=int, default=256, help="The length of each document's text"
+    )
+    parser.add_argument(
+        "--target-size",
+        type=int,
+        default=config["packing"]["target_size"],
+        help="The largest size of a packed message in bytes",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0,
+        help="A fixed latency to add to each SQS call, as if SQS were over a network",
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")  # nosec
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")  # nosec
+    # the per-message logs would cost more than the sends
+    logger.setLevel("WARNING")
+
+    lines = make_lines(args.documents, args.size)
+
+    with mock_aws():
+        sqs = boto3.client("sqs")
+        calls = []
+
+        # each SendMessageBatch call is counted with the messages it sends;
+        # a consumer receives, and is invoked, per message rather than per
+        # document
+        def count_call(params, **kwargs):
+            calls.append(len(params["Entries"]))
+
+        sqs.meta.events.register(
+            "provide-client-params.sqs.SendMessageBatch", count_call
+        )
+
+        if args.latency_ms:
+            FaultInjector(
+                "sqs", latency={"distribution": "fixed", "ms": args.latency_ms}
+            ).install(sqs)
+
+        print(f"{args.documents} documents of {args.size} characters")
+        print(
+            f"{'mode':>8} {'docs/s':>10} {'us/doc':>8} {'calls/1k':>9} {'msgs/1k':>8}"
+        )
+
+        for packed in (False, True):
+            mode = "packed" if packed else "unpacked"
+            # moto scans the whole queue on each send, so each run gets a new one
+            queue_url = sqs.create_queue(QueueName=f"bench-queue-{mode}")["QueueUrl"]
+
+            calls.clear()
+            seconds, sent = run(sqs, queue_url, lines, packed, args.target_size)
+
+            us = seconds / sent * 1e6
+            per_1k = 1000 / sent
+            print(
+                f"{mode:>8} {1e6 / us:>10.1f} {us:>8.1f} "
+                f"{len(calls) * per_1k:>9.1f} {sum(calls) * per_1k:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# Python Standard Library imports
+import threading
+import time
+
+# local imports
+from producer.clients import make_client
+from producer.config import config
+
+# what the producer does when a queue is deeper than the backpressure threshold
+DELAY = "delay"  # wait before sending, slowing the producer down
+SHED = "shed"  # send priority lane messages to the bulk lane instead
+FAIL = "fail"  # fail the invocation so S3's retries send the message later
+
+BACKPRESSURE_ACTIONS = frozenset((DELAY, SHED, FAIL))
+
+
+class BackpressureError(Exception):
+    """
+    Raised instead of sending a message while the producer is shedding load.
+    """
+
+
+class TokenBucket:
+    """
+    Limits the rate messages are sent at, allowing short bursts.
+
+    The bucket holds up to 'burst' tokens and refills at 'rate' tokens per
+    second; each message takes one.  The limit applies per container, so the
+    rate across the function is up to 'rate' times its concurrency.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait=None):
+        """
+        Take a token, waiting for one if the bucket is empty.
+
+        :param max_wait (float, optional): The longest to wait, in seconds. Defaults to waiting as long as needed.
+        :return (float): The seconds waited, or None if no token was available within max_wait.
+        """
+
+        with self._lock:
+            self._refill()
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+
+            if max_wait is not None and wait > max_wait:
+                return None
+
+            # the token is taken now, so concurrent callers queue up behind it
+            self._tokens -= 1
+
+        if wait:
+            time.sleep(wait)
+
+        return wait
+
+
+class QueueDepthSampler:
+    """
+    Samples the approximate number of messages in SQS queues.
+
+    GetQueueAttributes is only called once per queue every 'ttl' seconds, and
+    samples are shared by every message and invocation in the container.
+    """
+
+    def __init__(self, ttl=10):
+        self.ttl = ttl
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def depth(self, queue_url, client=None, retrier=None):
+        """
+        Get the approximate number of visible messages in a queue.
+
+        :param queue_url (str): The URL of the SQS queue.
+        :param client (SQS.Client, optional): The SQS client to use. Defaults to a new client.
+        :param retrier (Retrier, optional): Retries the call if SQS throttles it.
+        :return (tuple): The number of messages and True if it was sampled by this call, False if it was cached.
+        """
+
+        with self._lock:
+            sample = self._samples.get(queue_url)
+
+            if sample is not None and time.monotonic() - sample[1] < self.ttl:
+                return sample[0], False
+
+        if retrier is None:
+            depth = get_queue_depth(queue_url, client)
+        else:
+            depth = retrier.call("sqs", get_queue_depth, queue_url, client)
+
+        with self._lock:
+            self._samples[queue_url] = (depth, time.monotonic())
+
+        return depth, True
+
+
+def get_queue_depth(queue_url, client=None):
+    """
+    Get the approximate number of visible messages in a queue with GetQueueAttributes.
+
+    :param queue_url (str): The URL of the SQS queue.
+    :param client (SQS.Client, optional): The SQS client to use. Defaults to a new client.
+    :return (int): The approximate number of visible messages.
+    """
+
+    sqs = client or make_client("sqs")
+    response = sqs.get_queue_attributes(
+        QueueUrl=queue_url, AttributeNames=["ApproximateNumberOfMessages"]
+    )
+
+    return int(response["Attributes"]["ApproximateNumberOfMessages"])
+
+
+# the rate limiter and queue depth samples are kept for the life of the
+# container, so limits and samples carry over between warm invocations
+_rate_limiter = None
+_depth_sampler = None
+_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Get the rate limiter, creating it from the 'rate_limit' config if needed.
+
+    :return (TokenBucket): The rate limiter, or None if rate limiting is disabled.
+    """
+
+    global _rate_limiter
+
+    if config["rate_limit"]["rate"] is None:
+        return None
+
+    with _lock:
+        if _rate_limiter is None:
+            _rate_limiter = TokenBucket(
+                config["rate_limit"]["rate"], config["rate_limit"]["burst"]
+            )
+
+        return _rate_limiter
+
+
+def get_depth_sampler():
+    """
+    Get the queue depth sampler, creating it from the 'backpressure' config if needed.
+
+    :return (QueueDepthSampler): The queue depth sampler.
+    """
+
+    global _depth_sampler
+
+    with _lock:
+        if _depth_sampler is None:
+            _depth_sampler = QueueDepthSampler(config["backpressure"]["sample_ttl"])
+
+        return _depth_sampler
+
+
+def reset_flow_control():
+    """
+    Forget the rate limiter and queue depth samples so they are created again from the config.
+
+    :return (None): Default 'None' returned.
+    """
+
+    global _rate_limiter, _depth_sampler
+
+    with _lock:
+        _rate_limiter = None
+        _depth_sampler = None
@@ -0,0 +1,160 @@
+# Python Standard Library imports
+import gzip
+import json
+import os
+import random
+import time
+import uuid
+
+from datetime import datetime
+from datetime import timezone
+
+# local imports
+from producer.clients import make_client
+from producer.config import config
+
+
+def get_capture_rate():
+    """
+    Get the fraction of events to capture, from the CAPTURE_SAMPLE_RATE environment variable or the config.
+
+    :return (float): The sample rate, between 0 (capture nothing) and 1 (capture every event).
+    """
+
+    rate = os.environ.get("CAPTURE_SAMPLE_RATE")
+
+    if rate is not None:
+        return float(rate)
+
+    return config["capture"]["sample_rate"]
+
+
+def is_sampled(rate):
+    """
+    Decide whether to capture an event.
+
+    :param rate (float): The sample rate, between 0 and 1.
+    :return (bool): True if the event should be captured, False otherwise.
+    """
+
+    # sampling does not need a cryptographically secure generator
+    return rate > 0 and random.random() < rate  # nosec B311
+
+
+def redact_value(value):
+    """
+    Replace the content of a decoded JSON value while keeping its shape.
+
+    Strings become the same number of '*' characters, numbers become 0, and
+    containers are redacted item by item, so replayed messages have the same
+    keys, types and sizes as the originals but none of their content.
+
+    :param value (object): The decoded JSON value.
+    :return (object): The redacted value.
+    """
+
+    if isinstance(value, dict):
+        return {key: redact_value(item) for key, item in value.items()}
+
+    if isinstance(value, list):
+        return [redact_value(item) for item in value]
+
+    if isinstance(value, str):
+        return "*" * len(value)
+
+    if isinstance(value, bool) or value is None:
+        return value
+
+    return 0
+
+
+def redact_body(body):
+    """
+    Redact a message body, keeping its JSON structure if it has one.
+
+    :param body (str): The message body.
+    :return (str): The redacted message body.
+    """
+
+    try:
+        return json.dumps(redact_value(json.loads(body)))
+    except (TypeError, ValueError):
+        return "*" * len(body or "")
+
+
+def redact_event(event):
+    """
+    Redact the message bodies of an event's records.
+
+    :param event (dict): The Lambda event.
+    :return (dict): A copy of the event with each record's 'body' redacted.
+    """
+
+    records = event.get("Records") if isinstance(event, dict) else None
+
+    if not isinstance(records, list):
+        return event
+
+    redacted = []
+
+    for record in records:
+        if isinstance(record, dict) and "body" in record:
+            record = {**record, "body": redact_body(record["body"])}
+        redacted.append(record)
+
+    return {**event, "Records": redacted}
+
+
+def encode_capture(event, source, redact=True):
+    """
+    Encode an event as a gzip-compressed JSON line.
+
+    Gzip members can be concatenated, so captures can be joined into a single
+    corpus file without recompressing them.
+
+    :param event (dict): The Lambda event.
+    :param source (str): The handler the event was sent to, 'producer' or 'consumer'.
+    :param redact (bool, optional): Whether to redact message bodies. Defaults to True.
+    :return (bytes): The compressed JSON line.
+    """
+
+    line = {
+        "source": source,
+        "captured_at": time.time(),
+        "event": redact_event(event) if redact else event,
+    }
+
+    return gzip.compress((json.dumps(line) + "\n").encode("utf-8"))
+
+
+def capture_event(event, context, bucket_name, source, client=None):
+    """
+    Write an event to the capture bucket.
+
+    :param event (dict): The Lambda event.
+    :param context (LambdaContext): The runtime information of the Lambda function.
+    :param bucket_name (str): The name of the capture S3 bucket.
+    :param source (str): The handler the event was sent to, 'producer' or 'consumer'.
+    :param client (S3.Client, optional): The S3 client to use. Defaults to a new client.
+    :return (str): The key of the capture object.
+    """
+
+    client = client or make_client("s3")
+    request_id = getattr(context, "aws_request_id", None) or str(uuid.uuid4())
+    key = "/".join(
+        (
+            config["capture"]["prefix"],
+            source,
+            datetime.now(timezone.utc).strftime("%Y/%m/%d"),
+            f"{request_id}.jsonl.gz",
+        )
+    )
+
+    client.put_object(
+        Bucket=bucket_name,
+        Key=key,
+        Body=encode_capture(event, source, config["capture"]["redact"]),
+        ContentEncoding="gzip",
+    )
+
+    return key
@@ -0,0 +1,153 @@
+# third-party library imports
+from aws_lambda_powertools import Logger
+
+# local imports
+from producer.clients import make_client
+from producer.config import config
+from producer.resilience import Retrier
+from producer.resilience import client_config
+
+logger = Logger(child=True)
+
+# S3 allows at most 10 tags on an object
+MAX_OBJECT_TAGS = 10
+
+
+class Checkpoints:
+    """
+    Tracks how many documents of each multi-document S3 object have been sent, in a tag on the object.
+
+    The count covers only an unbroken run of documents from the start of the
+    object, so a retried invocation skips that many: a document sent after
+    one that failed, or that is still in flight, is not counted until the
+    documents before it are.  The count is saved every 'every' documents and
+    by flush(); a document sent after the last save, or after a failed one,
+    may be sent again.  The tag belongs to the object, so an object written
+    again under the same key starts over.
+    """
+
+    def __init__(self, retrier=None, client=None, tag=None, every=None):
+        self.retrier = retrier or Retrier.from_config()
+        self.client = client or make_client("s3", config=client_config)
+        self.tag = tag or config["fan_out"]["checkpoint_tag"]
+        self.every = every or config["fan_out"]["checkpoint_every"]
+        # the tags, documents sent and saved, and positions sent beyond the
+        # unbroken run of each object, keyed by bucket name and key
+        self._objects = {}
+
+    def load(self, s3_object):
+        """
+        Read how many of an object's documents have already been sent.
+
+        :param s3_object (S3ObjectRecord): The S3 notification record.
+        :return (int): The number of documents sent by earlier invocations.
+        """
+
+        response = self.retrier.call(
+            "s3",
+            self.client.get_object_tagging,
+            Bucket=s3_object.bucket_name,
+            Key=s3_object.key,
+        )
+        tags = {tag["Key"]: tag["Value"] for tag in response.get("TagSet", [])}
+
+        try:
+            sent = max(int(tags.get(self.tag, 0)), 0)
+        except ValueError:
+            logger.warning(
+                f"Ignoring invalid checkpoint '{tags[self.tag]}' on S3 object '{s3_object.key}'."
+            )
+            sent = 0
+
+        self._objects[(s3_object.bucket_name, s3_object.key)] = {
+            "tags": tags,
+            "sent": sent,
+            "saved": sent,
+            "ahead": set(),
+        }
+
+        return sent
+
+    def advance(self, s3_object):
+        """
+        Count a document as sent, saving the checkpoint every 'every' documents.
+
+        :param s3_object (S3ObjectRecord): The record of the document that was sent.
+        :return (None): Default 'None' returned.
+        """
+
+        if s3_object.position is None:
+            return
+
+        state = self._objects.get((s3_object.bucket_name, s3_object.key))
+
+        if state is None:
+            return
+
+        if s3_object.position < state["sent"]:
+            return
+
+        # extend the unbroken run of sent documents as far as it now reaches
+        state["ahead"].add(s3_object.position)
+
+        while state["sent"] in state["ahead"]:
+            state["ahead"].remove(state["sent"])
+            state["sent"] += 1
+
+        if state["sent"] - state["saved"] >= self.every:
+            self.save(s3_object.bucket_name, s3_object.key)
+
+    def save(self, bucket_name, key):
+        """
+        Save the number of an object's documents sent in its tag, keeping its other tags.
+
+        :param bucket_name (str): The name of the S3 bucket.
+        :param key (str): The object key.
+        :return (None): Default 'None' returned.
+        """
+
+        state = self._objects[(bucket_name, key)]
+
+        if state["sent"] == state["saved"]:
+            return
+
+        tags = {**state["tags"], self.tag: str(state["sent"])}
+
+        if len(tags) > MAX_OBJECT_TAGS:
+            logger.warning(
+                f"S3 object '{key}' has too many tags to add a checkpoint; a retry will send its documents again."
+            )
+            state["saved"] = state["sent"]
+            return
+
+        self.retrier.call(
+            "s3",
+            self.client.put_object_tagging,
+            Bucket=bucket_name,
+            Key=key,
+            Tagging={
+                "TagSet": [
+                    {"Key": name, "Value": value} for name, value in tags.items()
+                ]
+            },
+        )
+        state["saved"] = state["sent"]
+
+    def flush(self):
+        """
+        Save the checkpoints of every object with documents sent since they were last saved.
+
+        A checkpoint that cannot be saved is only logged, so flush() can be
+        called while the invocation is failing.
+
+        :return (None): Default 'None' returned.
+        """
+
+        for bucket_name, key in self._objects:
+            try:
+                self.save(bucket_name, key)
+            except Exception:
+                logger.warning(
+                    f"Could not save the checkpoint of S3 object '{key}'.",
+                    exc_info=True,
+                )
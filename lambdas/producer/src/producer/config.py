@@ -1,5 +1,148 @@
 config = {
     "max_obj_size": 262144,  # 256 KB, max size for SQS message
+    # top-level fields of the JSON document to forward to SQS; None forwards the
+    # whole document, as does a document that has none of the fields
+    "projection_fields": None,
+    # max size of an S3 object that will be read when projection_fields is set,
+    # since the projected message may fit under max_obj_size
+    "max_source_obj_size": 4194304,  # 4 MB
+    # objects are sent only if they match an 'include' rule (when there are
+    # any) and no 'exclude' rule; the others are dropped before they are read.
+    # A rule matches if all its conditions do: 'prefix' and 'suffix' (a string
+    # or a list of strings), 'glob' (on the whole key), 'regex' (searched for
+    # in the key), and 'min_size' and 'max_size' (bytes)
+    "object_filters": {
+        "include": [],
+        "exclude": [{"suffix": [".tmp", ".part", ".crdownload"]}],
+    },
     "ssm_param_path": "/sqs-simple-example",
+    # where runtime settings come from: 'ssm', 'env', 'snapshot' or 'extension';
+    # the CONFIG_PROVIDER environment variable takes precedence
+    "config_provider": "ssm",
     "required_ssm_params": ["input-bucket-name", "queue-url"],
+    # settings used when present, e.g. the priority lane queue
+    "optional_ssm_params": ["priority-queue-url", "capture-bucket-name"],
+    # how messages are spread when 'queue-url' lists several queues: 'hash'
+    # (the same key always goes to the same queue) or 'round_robin'; with
+    # hash routing, queue_routing_key_depth hashes only that many leading
+    # path segments of the key (e.g. 1 keeps each tenant prefix on one queue)
+    "queue_routing": "hash",
+    "queue_routing_key_depth": None,
+    # messages for objects matching any of these rules go down the priority
+    # lane, if 'priority-queue-url' is set, and all others down the bulk lane;
+    # a rule matches if all its conditions do, e.g. {"max_size": 16384},
+    # {"key_prefix": "urgent/"} or {"metadata": {"priority": "high"}}
+    "priority_rules": [],
+    # limit the rate messages are sent at, per container; rate is messages per
+    # second (None turns the limit off), burst is how many may be sent at once,
+    # and a message that would wait longer than max_wait seconds fails instead
+    "rate_limit": {
+        "rate": None,
+        "burst": 10,
+        "max_wait": 5.0,  # seconds
+    },
+    # when a queue holds at least threshold messages (sampled with
+    # GetQueueAttributes at most every sample_ttl seconds), 'delay' waits
+    # delay seconds before sending, 'shed' sends priority lane messages to the
+    # bulk lane, and 'fail' fails the invocation so S3 retries it later
+    "backpressure": {
+        "enabled": False,
+        "threshold": 10000,
+        "action": "delay",
+        "delay": 1.0,  # seconds
+        "sample_ttl": 10,  # seconds
+    },
+    # capture a sample of events, with message bodies redacted, to the
+    # 'capture-bucket-name' bucket for replay with scripts/replay-events.py;
+    # sample_rate is between 0 (off) and 1, and CAPTURE_SAMPLE_RATE overrides it
+    "capture": {
+        "sample_rate": 0.0,
+        "prefix": "captures",
+        "redact": True,
+    },
+    "metrics_namespace": "sqs-simple-example",
+    # inject latency, throttling errors and timeouts into AWS calls for
+    # performance testing against moto; off unless enabled here or by the
+    # FAULT_INJECTION environment variable ('1', or a JSON object that replaces
+    # 'services').  Latency is drawn per call from a 'fixed' (ms), 'uniform'
+    # (min_ms, max_ms) or 'lognormal' (median_ms, sigma) distribution, and
+    # throttle_rate and timeout_rate are the fractions of calls that fail
+    "faults": {
+        "enabled": False,
+        "seed": None,
+        "services": {
+            "s3": {
+                "latency": {"distribution": "lognormal", "median_ms": 20, "sigma": 0.5},
+                "throttle_rate": 0.01,
+                "timeout_rate": 0.001,
+            },
+            "sqs": {
+                "latency": {"distribution": "lognormal", "median_ms": 10, "sigma": 0.5},
+                "throttle_rate": 0.01,
+                "timeout_rate": 0.001,
+            },
+            "ssm": {
+                "latency": {"distribution": "uniform", "min_ms": 20, "max_ms": 80},
+                "throttle_rate": 0.05,
+                "timeout_rate": 0.0,
+            },
+        },
+    },
+    # count the AWS calls each invocation makes, per operation, with the bytes
+    # they send and receive and the time they take; the totals are logged at
+    # debug level at the end of each invocation and, with publish, emitted as
+    # metrics with 'Service' and 'Operation' dimensions
+    "call_accounting": {
+        "publish": True,
+    },
+    # retries of throttled or unavailable AWS calls; the budget is the number of
+    # retries allowed per invocation across all calls, and no backoff sleeps into
+    # the last min_remaining_ms of the invocation
+    "retry": {
+        "max_attempts": 5,
+        "base_delay": 0.05,  # seconds
+        "max_delay": 2.0,  # seconds
+        "budget": 20,
+        "min_remaining_ms": 2000,
+    },
+    # a service's circuit opens when at least failure_rate of its last window
+    # calls (and at least min_calls) failed, and stays open for reset_timeout
+    "circuit_breaker": {
+        "window": 20,
+        "min_calls": 10,
+        "failure_rate": 0.5,
+        "reset_timeout": 30,  # seconds
+    },
+    # objects whose keys end in one of jsonl_suffixes hold one JSON document
+    # per line, and those whose keys end in one of array_suffixes hold a JSON
+    # array of documents; each document is sent as its own message.  Such an
+    # object is read chunk_size bytes at a time, so it may be of any size, but
+    # each document must fit in a message.  Every checkpoint_every documents,
+    # and when the invocation ends, the number sent is saved in the object's
+    # checkpoint_tag tag, so a retried invocation does not send them again
+    "fan_out": {
+        "jsonl_suffixes": [".jsonl", ".ndjson"],
+        "array_suffixes": [".array.json"],
+        "chunk_size": 65536,  # 64 KB
+        "checkpoint_every": 1000,
+        "checkpoint_tag": "producer-sent-documents",
+    },
+    # pack the documents the sink stage is handed, batch_size at a time, into
+    # messages of up to target_size bytes for the same queue and lane, so that
+    # small documents take fewer SQS requests and consumer records.  The
+    # consumer unpacks them and handles each document on its own; a document
+    # that does not fit with another is sent as a message of its own
+    "packing": {
+        "enabled": False,
+        "target_size": 65536,  # 64 KB, what SQS bills as one request
+        "batch_size": 250,
+    },
+    # per-stage pipeline settings; a stage that is not listed runs one object at
+    # a time and stops the invocation on its first error.  The sink stage sends
+    # batch_size messages at a time with SendMessageBatch, which takes up to 10
+    # messages for one queue
+    "stages": {
+        "fetch": {"concurrency": 4, "on_error": "raise"},
+        "sink": {"batch_size": 10, "concurrency": 4, "on_error": "raise"},
+    },
 }
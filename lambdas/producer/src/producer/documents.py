@@ -0,0 +1,185 @@
+# Python Standard Library imports
+import codecs
+import json
+
+# local imports
+from producer.config import config
+
+# formats of objects that hold many JSON documents
+JSON_LINES = "jsonl"  # one document per line
+JSON_ARRAY = "array"  # a JSON array of documents
+
+WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+
+
+def get_document_format(key):
+    """
+    Get the format of an object that holds many JSON documents, from its key.
+
+    :param key (str): The object key or file path.
+    :return (str): 'jsonl', 'array', or None if the object is a single document.
+    """
+
+    fan_out = config["fan_out"]
+
+    if key.endswith(tuple(fan_out["jsonl_suffixes"])):
+        return JSON_LINES
+
+    if key.endswith(tuple(fan_out["array_suffixes"])):
+        return JSON_ARRAY
+
+    return None
+
+
+def iter_json_lines(chunks, max_size=None):
+    """
+    Split a stream of JSON lines into its documents.
+
+    Only the line being read is held in memory, so the stream can be of any size.
+
+    :param chunks (iterable): The content, as bytes chunks of any size.
+    :param max_size (int, optional): The longest line allowed, in bytes. Defaults to no limit.
+    :return (generator): The text of each non-blank line, with its position among them, as (int, str) tuples.
+    """
+
+    position = 0
+    pending = b""
+
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+
+        if max_size is not None and len(pending) > max_size:
+            raise ValueError(f"Line {position} is longer than {max_size} bytes.")
+
+        for line in lines:
+            line = line.strip()
+
+            if line:
+                yield position, line.decode("utf-8")
+                position += 1
+
+    pending = pending.strip()
+    if pending:
+        yield position, pending.decode("utf-8")
+
+
+def _skip_whitespace(text, index):
+    while index < len(text) and text[index] in WHITESPACE:
+        index += 1
+
+    return index
+
+
+def iter_json_array(chunks, max_size=None):
+    """
+    Split a stream holding a JSON array into the documents it contains.
+
+    Each document is parsed as soon as it has been read, and only it and the
+    chunk being read are held in memory, so the array can be of any size.
+
+    :param chunks (iterable): The content, as bytes chunks of any size.
+    :param max_size (int, optional): The longest document allowed, in characters. Defaults to no limit.
+    :return (generator): Each document's text and decoded value, with its position in the array, as (int, str, object) tuples.
+    """
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    text = ""
+    index = 0
+    position = 0
+    eof = False
+    # what the array expects next: '[', a document, or ',' or ']' after one
+    expecting = "["
+
+    def read():
+        # append the next chunk, dropping the text already parsed
+        nonlocal text, index, eof
+        chunk = next(chunks, None)
+        eof = chunk is None
+        text = text[index:] + decoder.decode(chunk or b"", final=eof)
+        index = 0
+
+    while True:
+        index = _skip_whitespace(text, index)
+
+        if index == len(text):
+            if eof:
+                raise ValueError("JSON array ends before its closing ']'.")
+            read()
+            continue
+
+        if expecting == "[":
+            if text[index] != "[":
+                raise ValueError("Content is not a JSON array.")
+            index += 1
+            expecting = "document"
+        elif expecting == "separator":
+            if text[index] == "]":
+                break
+            if text[index] != ",":
+                raise ValueError(f"Expected ',' or ']' at position {position}.")
+            index += 1
+            expecting = "document"
+        elif position == 0 and text[index] == "]":
+            break
+        else:
+            try:
+                document, end = _decoder.raw_decode(text, index)
+                # a number at the end of the text may continue in the next chunk
+                complete = end < len(text) or eof
+            except json.JSONDecodeError:
+                # the document may only be cut short by the end of the chunk
+                if eof:
+                    raise
+                complete = False
+
+            if not complete:
+                # a document that never ends would otherwise be read whole
+                if max_size is not None and len(text) - index > max_size:
+                    raise ValueError(
+                        f"Document {position} is longer than {max_size} characters or is not valid JSON."
+                    )
+                read()
+                continue
+
+            yield position, text[index:end], document
+            position += 1
+            index = end
+            expecting = "separator"
+
+    # only whitespace may follow the closing ']'
+    index += 1
+
+    while True:
+        index = _skip_whitespace(text, index)
+
+        if index < len(text):
+            raise ValueError("Content follows the end of the JSON array.")
+        if eof:
+            return
+        read()
+
+
+def iter_documents(chunks, document_format, max_size=None):
+    """
+    Split a stream of many JSON documents into its documents.
+
+    :param chunks (iterable): The content, as bytes chunks of any size.
+    :param document_format (str): 'jsonl' or 'array'.
+    :param max_size (int, optional): The longest document allowed. Defaults to no limit.
+    :return (generator): (position, text, decoded document or None) tuples; JSON lines are decoded later.
+    """
+
+    if document_format == JSON_LINES:
+        return (
+            (position, line, None)
+            for position, line in iter_json_lines(chunks, max_size)
+        )
+
+    if document_format == JSON_ARRAY:
+        return iter_json_array(chunks, max_size)
+
+    raise ValueError(f"Unknown document format '{document_format}'.")
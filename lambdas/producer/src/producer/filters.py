@@ -0,0 +1,141 @@
+# Python Standard Library imports
+import fnmatch
+import re
+import threading
+
+# local imports
+from producer.config import config
+
+# the conditions a filter rule can have; a rule matches an object only if every
+# condition it has matches
+FILTER_CONDITIONS = frozenset(
+    ("prefix", "suffix", "glob", "regex", "min_size", "max_size")
+)
+
+# why an object was filtered out
+EXCLUDED = "excluded"  # it matched an exclude rule
+NOT_INCLUDED = "not_included"  # there are include rules and it matched none
+
+
+def _as_tuple(value):
+    return (value,) if isinstance(value, str) else tuple(value)
+
+
+class FilterRule:
+    """
+    A filter rule compiled for fast matching against object keys and sizes.
+
+    'prefix' and 'suffix' may each be a string or a list of strings, any of
+    which matches.  'glob' is an fnmatch-style pattern matched against the
+    whole key ('*' also matches '/'), and 'regex' is searched for anywhere in
+    the key.  Conditions are checked cheapest first.
+    """
+
+    __slots__ = ("prefixes", "suffixes", "patterns", "min_size", "max_size")
+
+    def __init__(self, rule):
+        if not rule:
+            raise ValueError("A filter rule must have at least one condition.")
+
+        unknown = rule.keys() - FILTER_CONDITIONS
+        if unknown:
+            raise ValueError(f"Unknown filter rule condition(s): {sorted(unknown)}.")
+
+        self.prefixes = _as_tuple(rule["prefix"]) if "prefix" in rule else None
+        self.suffixes = _as_tuple(rule["suffix"]) if "suffix" in rule else None
+        self.min_size = rule.get("min_size")
+        self.max_size = rule.get("max_size")
+        self.patterns = []
+
+        if "glob" in rule:
+            self.patterns.append(re.compile(fnmatch.translate(rule["glob"])).match)
+        if "regex" in rule:
+            self.patterns.append(re.compile(rule["regex"]).search)
+
+    def matches(self, key, size):
+        """
+        Check an object matches every condition of the rule.
+
+        :param key (str): The object key.
+        :param size (int): The object size in bytes.
+        :return (bool): True if the object matches the rule, False otherwise.
+        """
+
+        if self.min_size is not None and size < self.min_size:
+            return False
+
+        if self.max_size is not None and size > self.max_size:
+            return False
+
+        if self.prefixes is not None and not key.startswith(self.prefixes):
+            return False
+
+        if self.suffixes is not None and not key.endswith(self.suffixes):
+            return False
+
+        return all(pattern(key) for pattern in self.patterns)
+
+
+class ObjectFilter:
+    """
+    Decides which S3 objects are sent, using include and exclude rules.
+
+    An object is sent if it matches at least one include rule (or there are
+    no include rules) and no exclude rule.  Only the key and the size from
+    the S3 notification are used, so filtering needs no S3 or SQS calls.
+    """
+
+    def __init__(self, include=(), exclude=()):
+        self.include = [FilterRule(rule) for rule in include]
+        self.exclude = [FilterRule(rule) for rule in exclude]
+
+    def reason(self, key, size):
+        """
+        Get why an object is filtered out.
+
+        :param key (str): The object key.
+        :param size (int): The object size in bytes.
+        :return (str): EXCLUDED or NOT_INCLUDED, or None if the object is sent.
+        """
+
+        if self.include and not any(rule.matches(key, size) for rule in self.include):
+            return NOT_INCLUDED
+
+        if any(rule.matches(key, size) for rule in self.exclude):
+            return EXCLUDED
+
+        return None
+
+
+# the filter is compiled once and kept for the life of the container
+_object_filter = None
+_object_filter_lock = threading.Lock()
+
+
+def get_object_filter():
+    """
+    Get the object filter, compiling it from the 'object_filters' config if needed.
+
+    :return (ObjectFilter): The filter.
+    """
+
+    global _object_filter
+
+    with _object_filter_lock:
+        if _object_filter is None:
+            _object_filter = ObjectFilter(**config["object_filters"])
+
+        return _object_filter
+
+
+def clear_object_filter():
+    """
+    Clear the compiled object filter so the next call recompiles it.
+
+    :return (None): Default 'None' returned.
+    """
+
+    global _object_filter
+
+    with _object_filter_lock:
+        _object_filter = None
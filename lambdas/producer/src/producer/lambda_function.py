@@ -1,77 +1,63 @@
 # Python Standard Library imports
 import json
+import os
+import time
 
-from urllib.parse import unquote_plus
+from functools import partial
 
 # Third-party library imports
-import boto3
-
 from botocore.exceptions import ClientError
 from aws_lambda_powertools import Logger
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
 
 # local imports
+from producer.calls import account_calls
+from producer.capture import capture_event
+from producer.capture import get_capture_rate
+from producer.capture import is_sampled
+from producer.checkpoints import Checkpoints
+from producer.clients import make_client
 from producer.config import config
-
-
-def get_ssm_params(path, region_name="us-west-2", recursive=True, with_decryption=True):
-    """
-    Retrieves all parameters under a given path from AWS SSM Parameter Store.
-
-
-    :param path (str): The hierarchy for the parameter. Hierarchies start with a forward slash (/).
-    :param region_name (str, optional): The AWS region to connect to. Defaults to 'us-west-2'.
-    :param recursive (bool, optional): Whether to retrieve parameters recursively under the path. Defaults to True.
-    :param with_decryption (bool, optional): Whether to decrypt SecureString parameters. Defaults to True.
-    :return (dict): A dictionary where keys are parameter names (relative to the path) and values are parameter values.
-    """
-    ssm_client = boto3.client("ssm", region_name=region_name)
-    parameters = {}
-    next_token = None
-
-    while True:
-        # Build the request arguments
-        kwargs = {
-            "Path": path,
-            "Recursive": recursive,
-            "WithDecryption": with_decryption,
-            "MaxResults": 10,  # Can adjust MaxResults as needed, but AWS imposes a limit
-        }
-        if next_token:
-            kwargs["NextToken"] = next_token
-
-        response = ssm_client.get_parameters_by_path(**kwargs)
-
-        # Process the retrieved parameters
-        for parameter in response.get("Parameters", []):
-            name = parameter["Name"]
-            value = parameter["Value"]
-            # Remove the path prefix for cleaner parameter names in the result
-            if name.startswith(path):
-                relative_name = name[len(path) :].lstrip("/")
-                parameters[relative_name] = value
-
-        next_token = response.get("NextToken")
-        if not next_token:
-            break
-
-    if not parameters:
-        raise ValueError(f"No parameters found under path '{path}'.")
-    else:
-        return parameters
-
-
-def verify_ssm_parameters(params, reqd_params):
-    """
-    Verify required parameters were retrieved from SSM Parameter Store.
-
-    :param params (dict) The parameters retrieved from SSM Parameter Store.
-    :param reqd_params (list) The parameters that are needed for this script to execute.
-    :return (None): Default 'None' returned if all required parameters exist.
-    """
-
-    for param in reqd_params:
-        if param not in params.keys():
-            raise ValueError(f"Parameter '{param}' not found.")
+from producer.filters import EXCLUDED
+from producer.filters import NOT_INCLUDED
+from producer.filters import get_object_filter
+from producer.backpressure import BACKPRESSURE_ACTIONS
+from producer.backpressure import DELAY
+from producer.backpressure import FAIL
+from producer.backpressure import SHED
+from producer.backpressure import BackpressureError
+from producer.backpressure import get_depth_sampler
+from producer.backpressure import get_rate_limiter
+from producer.lanes import BULK
+from producer.lanes import PRIORITY
+from producer.lanes import pick_lane
+from producer.lanes import validate_lane_rules
+from producer.packing import pack_messages
+from producer.pipeline import Pipeline
+from producer.pipeline import Stage
+from producer.records import parse_s3_event
+from producer.resilience import Retrier
+from producer.resilience import client_config
+from producer.resilience import publish_circuit_states
+from producer.routing import QueueRouter
+from producer.settings import get_settings
+from producer.settings import parse_list_param
+from producer.sources import S3EventSource
+from producer.sources import check_bucket
+from producer.tracing import CORRELATION_ID_ATTRIBUTE
+from producer.tracing import build_message_attributes
+
+logger = Logger()
+metrics = Metrics(namespace=config["metrics_namespace"])
+
+# load settings during the Lambda init phase so invocations do not wait on them;
+# a failure here is left for the handler to log and raise
+if "AWS_LAMBDA_FUNCTION_NAME" in os.environ:
+    try:
+        get_settings()
+    except Exception:
+        logger.warning("Could not load settings during init.", exc_info=True)
 
 
 def is_valid_event_source(event, bucket_name):
@@ -83,14 +69,7 @@ def is_valid_event_source(event, bucket_name):
     :return (None): Default 'None' returned if event source is correct S3 bucket.
     """
 
-    # As of right now, S3 only sends one record per event so we can hard code
-    # that into the check below.
-    if not (
-        "Records" in event
-        and len(event["Records"]) > 0  # noqa: W503
-        and "s3" in event["Records"][0]  # noqa: W503
-        and event["Records"][0]["s3"]["bucket"]["name"] == bucket_name
-    ):  # noqa: W503
+    if not all(obj.bucket_name == bucket_name for obj in parse_s3_event(event)):
         raise ValueError("invalid S3 source")
 
 
@@ -103,13 +82,7 @@ def is_valid_obj_size(event, max_size):
     :return (None): Default 'None' returned if object size is valid.
     """
 
-    if not (
-        "Records" in event
-        and len(event["Records"]) > 0  # noqa: W503
-        and "s3" in event["Records"][0]  # noqa: W503
-        and "object" in event["Records"][0]["s3"]  # noqa: W503
-        and event["Records"][0]["s3"]["object"]["size"] <= max_size
-    ):  # noqa: W503
+    if not all(obj.size <= max_size for obj in parse_s3_event(event)):
         raise ValueError("S3 object too large")
 
 
@@ -121,27 +94,39 @@ def get_s3_obj_key(event):
     :return (str): Return the S3 object key (i.e. name).
     """
 
-    obj_key = event["Records"][0]["s3"]["object"]["key"]
-    obj_key = unquote_plus(obj_key)  # decode URL-encoded key
-
-    if isinstance(obj_key, str) and obj_key:
-        return obj_key
-    else:
-        raise ValueError("'key' must be non-empty string")
+    # As of right now, S3 only sends one record per event.
+    return parse_s3_event(event)[0].key
 
 
-def read_from_s3(bucket_name, file_name):
+def filter_objects(s3_objects, object_filter):
     """
-    Reads the content of a file from an S3 bucket.
+    Drop the S3 objects an object filter rejects, and publish how many were dropped.
 
-    :param bucket_name (str): The name of the S3 bucket.
-    :param file_name (str): The name of the file to read.
-    :return (dict): The content of the file as a string.
+    :param s3_objects (list): The S3 notification records.
+    :param object_filter (ObjectFilter): The filter.
+    :return (list): The S3 notification records of the objects to send.
     """
 
-    s3 = boto3.client("s3")
-    response = s3.get_object(Bucket=bucket_name, Key=file_name)
-    return response["Body"].read().decode("utf-8")
+    kept = []
+    filtered = {EXCLUDED: 0, NOT_INCLUDED: 0}
+
+    for s3_object in s3_objects:
+        reason = object_filter.reason(s3_object.key, s3_object.size)
+
+        if reason is None:
+            kept.append(s3_object)
+        else:
+            filtered[reason] += 1
+            logger.info(f"Skipping S3 object '{s3_object.key}' ({reason}).")
+
+    metrics.add_metric(
+        name="ObjectsExcluded", unit=MetricUnit.Count, value=filtered[EXCLUDED]
+    )
+    metrics.add_metric(
+        name="ObjectsNotIncluded", unit=MetricUnit.Count, value=filtered[NOT_INCLUDED]
+    )
+
+    return kept
 
 
 def is_valid_json(json_string):
@@ -155,17 +140,35 @@ def is_valid_json(json_string):
     json.loads(json_string)
 
 
-def send_message_to_sqs(message_body, queue_url, message_attributes=None):
+def project_fields(json_obj, fields):
+    """
+    Keep only the given top-level fields of a JSON document.
+
+    :param json_obj (object): The decoded JSON document.
+    :param fields (list): The names of the fields to keep, or None to keep all of them.
+    :return (object): The projected document, or the whole document if it has none of the fields.
+    """
+
+    if fields is None or not isinstance(json_obj, dict):
+        return json_obj
+
+    projected = {field: json_obj[field] for field in fields if field in json_obj}
+
+    return projected or json_obj
+
+
+def send_message_to_sqs(message_body, queue_url, message_attributes=None, client=None):
     """
     Sends a message to the specified SQS queue.
 
     :param message_body (str): The body of the message to send.
     :param queue_url (str): The URL of the SQS queue.
     :param message_attributes (dict): Optional dictionary of message attributes.
+    :param client (SQS.Client, optional): The SQS client to use. Defaults to a new client.
     :return (dict): Response from the SQS send_message API call.
     """
 
-    sqs = boto3.client("sqs")
+    sqs = client or make_client("sqs")
     sqs.send_message(
         QueueUrl=queue_url,
         MessageBody=message_body,
@@ -173,158 +176,590 @@ def send_message_to_sqs(message_body, queue_url, message_attributes=None):
     )
 
 
-def lambda_handler(event, context):
+def validate_object(s3_object, bucket_name, max_obj_size):
     """
-    AWS Lambda handler function to send a message to SQS.
+    Pipeline stage that validates an S3 object before it is read.
 
-    :param event (dict): The event data passed to the Lambda function.
-    :param context (dict): The runtime information of the Lambda function.
+    :param s3_object (S3ObjectRecord): The S3 notification record.
+    :param bucket_name (str): The name of the expected S3 bucket, or None for records from a local source.
+    :param max_obj_size (int): The maximum allowed size of the S3 object in bytes.
+    :return (S3ObjectRecord): The S3 notification record.
     """
 
-    # define some variables
-    logger = Logger()
-    max_obj_size = config["max_obj_size"]
-    ssm_param_path = config["ssm_param_path"]
+    # validate that the event source bucket matches the expected bucket
+    check_bucket(s3_object, bucket_name)
+
+    # Validate S3 object size is not larger than the size limit
+    logger.info("Validating S3 object size is not larger than the size limit.")
+    if s3_object.size > max_obj_size:
+        logger.error(f"S3 Object size exceeds maximum size of {max_obj_size} bytes.")
+        raise ValueError("S3 object too large")
+
+    return s3_object
+
+
+def fetch_object(s3_object, source):
+    """
+    Pipeline stage that reads the content of an S3 object, or of a record from a local source.
+
+    :param s3_object (S3ObjectRecord): The S3 notification record.
+    :param source (object): The source the record came from, e.g. an S3EventSource.
+    :return (S3ObjectRecord): The S3 notification record with the object content.
+    """
+
+    bucket_name = s3_object.bucket_name
+    obj_key = s3_object.key
 
-    # retrieve SSM Parameter Store parameters under project path
     try:
-        ssm_params = get_ssm_params(ssm_param_path)
+        if bucket_name is None:
+            logger.info(f"Reading object '{obj_key}'.")
+        else:
+            logger.info(f"Reading object '{obj_key}' from S3 bucket '{bucket_name}'.")
+        source.fetch(s3_object)
     except ClientError as e:
         if e.response["Error"]["Code"] == "AccessDeniedException":
             logger.exception(
-                f"Lambda function not authorized to get SSM Parameter Store parameters from path '{ssm_param_path}'."
+                f"Lambda function not authorized to write to read from S3 bucket '{bucket_name}'."
+            )
+            raise
+        if e.response["Error"]["Code"] == "NoSuchKey":
+            logger.exception(
+                f"S3 object key '{obj_key}' not found in bucket '{bucket_name}'."
             )
             raise
         else:
             # Handle other ClientErrors
-            logger.exception("Error reading parameters from SSM Parameter Store.")
+            logger.exception("Error reading object from S3 bucket.")
             raise
-    except ValueError:
-        logger.exception(
-            f"No parameters found in SSM Parameter Store under path '{ssm_param_path}'."
-        )
-        raise
     except Exception:
-        logger.exception("Error reading parameters from SSM Parameter Store.")
+        logger.exception(f"Error reading object '{obj_key}'.")
         raise
 
-    # verify required SSM Parameter Store parameters were retrieved
+    return s3_object
+
+
+def decode_object(s3_object):
+    """
+    Pipeline stage that decodes the JSON content of an S3 object.
+
+    :param s3_object (S3ObjectRecord): The S3 notification record.
+    :return (S3ObjectRecord): The S3 notification record with its decoded document.
+    """
+
+    # the documents of a JSON array were decoded as the array was read
+    if s3_object.document is not None:
+        return s3_object
+
     try:
-        verify_ssm_parameters(ssm_params, config["required_ssm_params"])
-        bucket_name = ssm_params["input-bucket-name"]
-        queue_url = ssm_params["queue-url"]
-    except ValueError:
-        logger.exception(
-            f"Required SSM Parameter Store parameter not found under path '{ssm_param_path}'."
-        )
-        raise
+        logger.info("Validating S3 object content is valid JSON.")
+        s3_object.document = json.loads(s3_object.body)
     except Exception:
-        logger.exception(
-            "Error occurred while verifying parameters retrieved from SSM Parameter Store."
-        )
+        logger.exception("Error occurred while validating S3 object content is JSON.")
         raise
 
-    # validate that the event source bucket matches the expected bucket
-    try:
-        logger.info("Validating event source bucket matches expected bucket.")
-        is_valid_event_source(event, bucket_name)
-    except ValueError:
-        logger.exception(
-            f"Expected event source to contain S3 bucket '{bucket_name}', but got event: {event}"
+    return s3_object
+
+
+def transform_object(s3_object, fields, max_obj_size):
+    """
+    Pipeline stage that projects the S3 object document down to the fields consumers need.
+
+    :param s3_object (S3ObjectRecord): The S3 notification record.
+    :param fields (list): The names of the fields to keep, or None to keep all of them.
+    :param max_obj_size (int): The maximum size of an SQS message in bytes.
+    :return (S3ObjectRecord): The S3 notification record with the message body to send.
+    """
+
+    if fields is not None:
+        projected = project_fields(s3_object.document, fields)
+
+        if projected is not s3_object.document:
+            s3_object.body = json.dumps(projected, separators=(",", ":"))
+
+    # the document is not needed once the message body is final
+    s3_object.document = None
+
+    if len(s3_object.body.encode("utf-8")) > max_obj_size:
+        logger.error(
+            f"Message for S3 object '{s3_object.key}' exceeds SQS maximum message size of {max_obj_size} bytes."
         )
-        raise
-    except Exception:
-        logger.exception("Error occurred while validating S3 event source.")
-        raise
+        raise ValueError("SQS message too large")
+
+    return s3_object
+
+
+def route_object(s3_object, rules, routers):
+    """
+    Pipeline stage that picks the lane and queue an S3 object's message is sent to.
+
+    :param s3_object (S3ObjectRecord): The S3 notification record.
+    :param rules (list): The priority lane rules.
+    :param routers (dict): The QueueRouter of each lane that has queues; other lanes fall back to the bulk lane.
+    :return (S3ObjectRecord): The S3 notification record with its lane and queue.
+    """
+
+    lane = pick_lane(s3_object, rules)
+    s3_object.lane = lane if lane in routers else BULK
+    s3_object.queue_url = routers[s3_object.lane].route(s3_object.key)
+
+    return s3_object
+
+
+def admit_object(s3_object, routers, retrier, client=None):
+    """
+    Pipeline stage that applies the rate limit and queue-depth backpressure before a message is sent.
+
+    :param s3_object (S3ObjectRecord): The S3 notification record.
+    :param routers (dict): The QueueRouter of each lane, used to shed messages to the bulk lane.
+    :param retrier (Retrier): Retries GetQueueAttributes if SQS throttles it.
+    :param client (SQS.Client, optional): The SQS client to use. Defaults to a new client.
+    :return (S3ObjectRecord): The S3 notification record.
+    """
+
+    rate_limiter = get_rate_limiter()
+
+    if rate_limiter is not None:
+        waited = rate_limiter.acquire(config["rate_limit"]["max_wait"])
+
+        if waited is None:
+            metrics.add_metric(name="RateLimitRejected", unit=MetricUnit.Count, value=1)
+            logger.error(f"Rate limit exceeded sending S3 object '{s3_object.key}'.")
+            raise BackpressureError("rate limit exceeded")
+
+        if waited:
+            metrics.add_metric(name="RateLimitDelayed", unit=MetricUnit.Count, value=1)
+
+    backpressure = config["backpressure"]
+
+    if not backpressure["enabled"]:
+        return s3_object
+
+    depth, sampled = get_depth_sampler().depth(s3_object.queue_url, client, retrier)
+
+    if sampled:
+        metrics.add_metric(name="QueueDepthSampled", unit=MetricUnit.Count, value=depth)
+
+    if depth < backpressure["threshold"]:
+        return s3_object
+
+    action = backpressure["action"]
+
+    if action == SHED and s3_object.lane != BULK:
+        metrics.add_metric(name="BackpressureShed", unit=MetricUnit.Count, value=1)
+        s3_object.lane = BULK
+        s3_object.queue_url = routers[BULK].route(s3_object.key)
+    elif action == FAIL:
+        metrics.add_metric(name="BackpressureRejected", unit=MetricUnit.Count, value=1)
+        logger.error(
+            f"SQS queue '{s3_object.queue_url}' holds {depth} messages; failing so S3 retries later."
+        )
+        raise BackpressureError("SQS queue backlog over threshold")
+    elif action == DELAY:
+        metrics.add_metric(name="BackpressureDelayed", unit=MetricUnit.Count, value=1)
+        time.sleep(backpressure["delay"])
+    else:
+        # a bulk lane message with the shed action has nowhere to go
+        metrics.add_metric(name="BackpressureAdmitted", unit=MetricUnit.Count, value=1)
+
+    return s3_object
+
+
+def message_size(entry):
+    """
+    Get the size SQS counts against its message size limit for a SendMessageBatch entry.
+
+    :param entry (dict): The entry, with a 'MessageBody' and 'MessageAttributes'.
+    :return (int): The size of the body and attributes in bytes.
+    """
+
+    size = len(entry["MessageBody"].encode("utf-8"))
+
+    for name, attribute in entry.get("MessageAttributes", {}).items():
+        size += len(name) + len(attribute["DataType"])
+        size += len(attribute["StringValue"].encode("utf-8"))
+
+    return size
+
+
+def batch_messages(messages, max_entries=10, max_bytes=262144):
+    """
+    Group messages into SendMessageBatch calls, one queue per call.
+
+    A call holds at most 'max_entries' messages and 'max_bytes' of messages,
+    the limits SQS puts on a batch.  Messages keep their order within a queue.
+
+    :param messages (iterable): (queue URL, SendMessageBatch entry) tuples.
+    :param max_entries (int, optional): The most messages in a call. Defaults to 10.
+    :param max_bytes (int, optional): The most bytes of messages in a call. Defaults to 256 KB.
+    :return (generator): (queue URL, list of entries) tuples.
+    """
+
+    # the batch being filled for each queue, and its size in bytes
+    open_batches = {}
+
+    for queue_url, entry in messages:
+        size = message_size(entry)
+        entries, total = open_batches.get(queue_url, ([], 0))
+
+        if entries and (len(entries) == max_entries or total + size > max_bytes):
+            yield queue_url, entries
+            entries, total = [], 0
+
+        entries.append(entry)
+        open_batches[queue_url] = (entries, total + size)
+
+    for queue_url, (entries, _) in open_batches.items():
+        yield queue_url, entries
+
+
+def send_message_batch_to_sqs(entries, queue_url, client=None):
+    """
+    Sends up to ten messages to the specified SQS queue in one call.
+
+    :param entries (list): The SendMessageBatch entries, each with an 'Id', 'MessageBody' and 'MessageAttributes'.
+    :param queue_url (str): The URL of the SQS queue.
+    :param client (SQS.Client, optional): The SQS client to use. Defaults to a new client.
+    :return (list): The entries SQS did not send, as the failures SendMessageBatch returned.
+    """
+
+    sqs = client or make_client("sqs")
+    response = sqs.send_message_batch(QueueUrl=queue_url, Entries=entries)
+
+    return response.get("Failed", [])
+
+
+def send_message_batch(entries, queue_url, retrier, client=None):
+    """
+    Send a batch of messages to an SQS queue, retrying the messages that fail transiently.
+
+    SendMessageBatch can send some messages of a batch and fail the others.
+    Messages SQS rejects as the sender's fault are not retried; the others
+    are sent again, without the messages already sent, with the retrier's
+    backoff and budget.
+
+    :param entries (list): The SendMessageBatch entries.
+    :param queue_url (str): The URL of the SQS queue.
+    :param retrier (Retrier): Retries the call if SQS throttles it or fails messages transiently.
+    :param client (SQS.Client, optional): The SQS client to use. Defaults to a new client.
+    :return (dict): The exception each message that was not sent failed with, keyed by entry Id.
+    """
+
+    pending = {entry["Id"]: entry for entry in entries}
+    errors = {}
+
+    def send():
+        failures = send_message_batch_to_sqs(list(pending.values()), queue_url, client)
+        failed = {failure["Id"]: failure for failure in failures}
+
+        for entry_id in list(pending):
+            failure = failed.get(entry_id)
+
+            if failure is None or failure.get("SenderFault"):
+                del pending[entry_id]
+
+            if failure is not None and failure.get("SenderFault"):
+                errors[entry_id] = batch_entry_error(failure)
+
+        # the error of a message SQS failed on its side decides if it is retried
+        if pending:
+            raise batch_entry_error(failed[next(iter(pending))])
 
-    # Validate S3 object size is not larger than SQS message size limit
     try:
+        retrier.call("sqs", send)
+    except Exception as e:
+        errors.update((entry_id, e) for entry_id in pending)
+
+    return errors
+
+
+def batch_entry_error(failure):
+    """
+    Build the exception for a message SendMessageBatch did not send.
+
+    :param failure (dict): The failure SendMessageBatch returned for the message.
+    :return (ClientError): The exception, with the failure's error code.
+    """
+
+    return ClientError(
+        {
+            "Error": {
+                "Code": failure.get("Code", "InternalError"),
+                "Message": failure.get("Message", ""),
+            }
+        },
+        "SendMessageBatch",
+    )
+
+
+def sink_objects(s3_objects, retrier, client=None):
+    """
+    Pipeline stage that sends the contents of a batch of S3 objects to their SQS queues.
+
+    Messages are sent with SendMessageBatch, one call per queue for up to ten
+    messages, so a full batch takes a tenth of the calls of sending each
+    message on its own.  With packing, the documents of the batch are first
+    packed into as few messages as fit them.
+
+    :param s3_objects (list): The S3 notification records.
+    :param retrier (Retrier): Retries the sends if SQS throttles them.
+    :param client (SQS.Client, optional): The SQS client to use. Defaults to a new client.
+    :return (list): For each record, the record if its message was sent, or the exception it failed with.
+    """
+
+    messages = []
+
+    for index, s3_object in enumerate(s3_objects):
+        # the correlation ID and ingest time travel with the message to the consumer
+        message_attributes = build_message_attributes(s3_object)
+        correlation_id = message_attributes[CORRELATION_ID_ATTRIBUTE]["StringValue"]
+
         logger.info(
-            "Validating S3 object size is not larger than SQS message size limit."
+            f"Sending message for S3 object '{s3_object.key}' to SQS queue '{s3_object.queue_url}' with correlation ID '{correlation_id}'."
         )
-        is_valid_obj_size(event, max_obj_size)
-    except ValueError:
-        logger.exception(
-            f"S3 Object size exceeds SQS maximum message size of {max_obj_size} bytes."
+        messages.append(
+            (
+                s3_object.queue_url,
+                {
+                    "Id": str(index),
+                    "MessageBody": s3_object.body,
+                    "MessageAttributes": message_attributes,
+                },
+            )
         )
-        raise
-    except KeyError:
-        logger.exception("Could not access S3 object key.")
-    except Exception:
-        logger.exception("Error occurred while validating S3 object size.")
-        raise
 
-    # get S3 object key (i.e. object name) from event
-    try:
-        logger.info("Getting S3 object key (i.e. object name) from event.")
-        obj_key = get_s3_obj_key(event)
-    except ValueError:
-        logger.exception("S3 object key not valid.")
-    except KeyError:
-        logger.exception(
-            f"Malformed S3 notification event. Could not find 'key' in event: {event}"
+    # with packing, a message can carry the documents of many records; the
+    # records each message carries are kept by its entry Id
+    packing = config["packing"]
+
+    if packing["enabled"]:
+        packed = pack_messages(
+            messages, min(packing["target_size"], config["max_obj_size"])
         )
-        raise
-    except Exception:
-        logger.exception(
-            f"Error occurred while getting S3 object key from event: {event}"
+    else:
+        packed = (
+            (queue_url, entry, [index])
+            for index, (queue_url, entry) in enumerate(messages)
         )
-        raise
 
-    # read object from S3 bucket
+    members = []
+    entries = []
+
+    for queue_url, entry, indexes in packed:
+        entry["Id"] = str(len(members))
+        members.append(indexes)
+        entries.append((queue_url, entry))
+
+    results = list(s3_objects)
+
+    for queue_url, batch in batch_messages(entries, max_bytes=config["max_obj_size"]):
+        errors = send_message_batch(batch, queue_url, retrier, client)
+
+        for entry_id, error in errors.items():
+            for index in members[int(entry_id)]:
+                results[index] = error
+
+            if (
+                isinstance(error, ClientError)
+                and error.response["Error"]["Code"] == "AccessDeniedException"
+            ):
+                logger.error(
+                    f"Lambda function not authorized to write to SQS queue '{queue_url}'.",
+                    exc_info=error,
+                )
+            else:
+                logger.error(
+                    f"Error writing to SQS queue '{queue_url}'.", exc_info=error
+                )
+
+    return results
+
+
+def build_pipeline(
+    source,
+    queue_urls,
+    sqs_client=None,
+    retrier=None,
+    priority_queue_urls=None,
+    bucket_name=None,
+):
+    """
+    Build the pipeline that sends the records of a source to the SQS queue.
+
+    Stage concurrency, batch sizes and error policies are taken from the
+    'stages' config.  The sink stage always sends its messages in batches,
+    one message at a time unless a batch size is configured, or the
+    'packing' batch size when packing is enabled.
+
+    :param source (object): Where the records come from, e.g. an S3EventSource.
+    :param queue_urls (list): The URLs of the SQS queues messages are spread over.
+    :param sqs_client (SQS.Client, optional): The SQS client shared by the sink stage.
+    :param retrier (Retrier, optional): Retries throttled SQS calls. Defaults to one built from the config.
+    :param priority_queue_urls (list, optional): The URLs of the priority lane SQS queues. Defaults to none, which sends every message down the bulk lane.
+    :param bucket_name (str, optional): The name of the input S3 bucket every record must come from. Defaults to not checking.
+    :return (Pipeline): The pipeline.
+    """
+
+    retrier = retrier or Retrier.from_config()
+    routers = {
+        lane: QueueRouter(
+            urls, config["queue_routing"], config["queue_routing_key_depth"]
+        )
+        for lane, urls in ((BULK, queue_urls), (PRIORITY, priority_queue_urls))
+        if urls
+    }
+    validate_lane_rules(config["priority_rules"])
+
+    if config["backpressure"]["action"] not in BACKPRESSURE_ACTIONS:
+        raise ValueError(
+            f"Unknown backpressure action '{config['backpressure']['action']}'."
+        )
+    fields = config["projection_fields"]
+
+    # a projected message may fit in SQS even if its source object does not
+    max_source_obj_size = (
+        config["max_source_obj_size"] if fields is not None else config["max_obj_size"]
+    )
+
+    stage_options = {name: dict(options) for name, options in config["stages"].items()}
+    stage_options.setdefault("sink", {}).setdefault("batch_size", 1)
+
+    # documents are only packed with others in the same sink batch
+    if config["packing"]["enabled"]:
+        stage_options["sink"]["batch_size"] = config["packing"]["batch_size"]
+
+    stage_funcs = {
+        "validate": partial(
+            validate_object,
+            bucket_name=bucket_name,
+            max_obj_size=max_source_obj_size,
+        ),
+        "fetch": partial(fetch_object, source=source),
+        "decode": decode_object,
+        "transform": partial(
+            transform_object, fields=fields, max_obj_size=config["max_obj_size"]
+        ),
+        "route": partial(route_object, rules=config["priority_rules"], routers=routers),
+        "admit": partial(
+            admit_object, routers=routers, retrier=retrier, client=sqs_client
+        ),
+        "sink": partial(sink_objects, retrier=retrier, client=sqs_client),
+    }
+
+    return Pipeline(
+        Stage(name, func, **stage_options.get(name, {}))
+        for name, func in stage_funcs.items()
+    )
+
+
+@metrics.log_metrics
+@account_calls
+def lambda_handler(event, context):
+    """
+    AWS Lambda handler function to send a message to SQS.
+
+    :param event (dict): The event data passed to the Lambda function.
+    :param context (dict): The runtime information of the Lambda function.
+    """
+
+    # throttled AWS calls are retried within a budget shared by the invocation
+    retrier = Retrier.from_config(context)
+
+    # get the runtime settings; they are loaded and validated once per container
     try:
-        logger.info(f"Reading object '{obj_key}' from S3 bucket '{bucket_name}'.")
-        obj_value = read_from_s3(bucket_name, obj_key)
-    except KeyError:
-        logger.exception("No S3 object key found in event.")
-        raise
+        settings = get_settings(retrier=retrier)
+        bucket_name = settings["input-bucket-name"]
+        # 'queue-url' lists every queue shard as a comma-separated list
+        queue_urls = parse_list_param(settings["queue-url"])
+        priority_queue_urls = parse_list_param(settings.get("priority-queue-url", ""))
     except ClientError as e:
         if e.response["Error"]["Code"] == "AccessDeniedException":
             logger.exception(
-                f"Lambda function not authorized to write to read from S3 bucket '{bucket_name}'."
-            )
-            raise
-        if e.response["Error"]["Code"] == "NoSuchKey":
-            logger.exception(
-                f"S3 object key '{obj_key}' not found in bucket '{bucket_name}'."
+                f"Lambda function not authorized to get SSM Parameter Store parameters from path '{config['ssm_param_path']}'."
             )
             raise
         else:
             # Handle other ClientErrors
-            logger.exception("Error reading object from S3 bucket.")
+            logger.exception("Error reading parameters from SSM Parameter Store.")
             raise
+    except ValueError:
+        logger.exception("Required parameters not found by the config provider.")
+        raise
     except Exception:
-        logger.exception("Error reading object from S3 bucket.")
+        logger.exception("Error occurred while loading settings.")
         raise
 
-    # the S3 object content must be valid JSON
+    # capture a sample of events for replay; a failed capture is only logged
     try:
-        logger.info("Validating S3 object content is valid JSON.")
-        is_valid_json(obj_value)
+        capture_bucket_name = settings.get("capture-bucket-name")
+        if capture_bucket_name and is_sampled(get_capture_rate()):
+            capture_event(event, context, capture_bucket_name, "producer")
     except Exception:
-        logger.exception("Error occurred while validating S3 object content is JSON.")
+        logger.warning("Could not capture event.", exc_info=True)
+
+    # parse the S3 notification event once; later steps use the parsed records
+    try:
+        logger.info("Parsing S3 notification event.")
+        s3_objects = parse_s3_event(event)
+    except ValueError:
+        logger.exception(f"Malformed S3 notification event: {event}")
+        raise
+    except Exception:
+        logger.exception(f"Error occurred while parsing S3 notification event: {event}")
         raise
 
-    # send a message to the SQS queue
+    # drop objects the filters reject before any S3 or SQS calls are made
     try:
-        logger.info(f"Sending message to SQS queue '{queue_url}'.")
-        send_message_to_sqs(obj_value, queue_url)
-    except ClientError as e:
-        if e.response["Error"]["Code"] == "AccessDeniedException":
-            logger.exception(
-                f"Lambda function not authorized to write to SQS queue '{queue_url}'."
+        s3_objects = filter_objects(s3_objects, get_object_filter())
+    except ValueError:
+        logger.exception("Invalid object filter rules.")
+        raise
+
+    # the S3 and SQS clients are shared by the concurrent stage workers; the
+    # documents of multi-document objects are counted as they are sent, so a
+    # retry of this invocation skips them
+    s3_client = make_client("s3", config=client_config)
+    checkpoints = Checkpoints(retrier, s3_client)
+    source = S3EventSource(
+        s3_objects, retrier, s3_client, checkpoints, bucket_name=bucket_name
+    )
+    pipeline = build_pipeline(
+        source,
+        queue_urls,
+        make_client("sqs", config=client_config),
+        retrier,
+        priority_queue_urls,
+        bucket_name=bucket_name,
+    )
+
+    sent_messages = 0
+
+    try:
+        for s3_object in pipeline.run(source):
+            sent_messages += 1
+            checkpoints.advance(s3_object)
+    finally:
+        checkpoints.flush()
+
+        logger.info("Pipeline stage statistics.", extra={"stages": pipeline.stats()})
+        publish_circuit_states()
+
+    # records that failed in a stage with the 'skip' error policy were not
+    # sent; the invocation fails so S3 retries it, and the checkpoints stop
+    # short of any failed document so the retry sends it
+    if pipeline.failures:
+        for failure in pipeline.failures:
+            logger.error(
+                f"S3 object '{failure.item.key}' failed in the '{failure.stage}' stage.",
+                exc_info=failure.error,
             )
-            raise
-        else:
-            # Handle other ClientErrors
-            logger.exception(f"Error writing to SQS queue '{queue_url}'.")
-            raise
-    except Exception:
-        logger.exception(
-            f"Error occurred while sending message to SQS queue '{queue_url}'."
+        metrics.add_metric(
+            name="FailedRecords", unit=MetricUnit.Count, value=len(pipeline.failures)
+        )
+        raise RuntimeError(
+            f"{len(pipeline.failures)} record(s) failed; {sent_messages} message(s) sent."
         )
-        raise
 
+    logger.info(f"{sent_messages} message(s) sent.")
     logger.info("Done.")
 
     return {
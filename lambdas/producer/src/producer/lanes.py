@@ -0,0 +1,62 @@
+# lanes a message can be sent down; each has its own queues and consumer
+# concurrency and batching settings
+PRIORITY = "priority"
+BULK = "bulk"
+
+# the conditions a lane rule can have; a rule matches an object only if every
+# condition it has matches
+RULE_CONDITIONS = frozenset(("max_size", "key_prefix", "metadata"))
+
+
+def validate_lane_rules(rules):
+    """
+    Validate the priority lane rules from the config.
+
+    :param rules (list): The rules, each a dict of conditions.
+    :return (None): Default 'None' returned if the rules are valid.
+    """
+
+    for rule in rules:
+        if not rule:
+            raise ValueError("A lane rule must have at least one condition.")
+
+        unknown = rule.keys() - RULE_CONDITIONS
+        if unknown:
+            raise ValueError(f"Unknown lane rule condition(s): {sorted(unknown)}.")
+
+
+def matches_rule(s3_object, rule):
+    """
+    Check an S3 object matches every condition of a lane rule.
+
+    :param s3_object (S3ObjectRecord): The S3 notification record.
+    :param rule (dict): The conditions: 'max_size' (bytes), 'key_prefix' and 'metadata' (user metadata values).
+    :return (bool): True if the object matches the rule, False otherwise.
+    """
+
+    if "max_size" in rule and s3_object.size > rule["max_size"]:
+        return False
+
+    if "key_prefix" in rule and not s3_object.key.startswith(rule["key_prefix"]):
+        return False
+
+    metadata = s3_object.metadata or {}
+
+    return all(
+        metadata.get(name) == value for name, value in rule.get("metadata", {}).items()
+    )
+
+
+def pick_lane(s3_object, rules):
+    """
+    Pick the lane for an S3 object: priority if it matches any rule, bulk otherwise.
+
+    :param s3_object (S3ObjectRecord): The S3 notification record.
+    :param rules (list): The priority lane rules.
+    :return (str): The lane.
+    """
+
+    if any(matches_rule(s3_object, rule) for rule in rules):
+        return PRIORITY
+
+    return BULK
@@ -0,0 +1,133 @@
+# Python Standard Library imports
+import json
+import uuid
+
+# local imports
+from producer.tracing import CORRELATION_ID_ATTRIBUTE
+from producer.tracing import INGEST_TIMESTAMP_ATTRIBUTE
+from producer.tracing import LANE_ATTRIBUTE
+
+# SQS message attribute that marks a packed message and holds how many
+# documents it carries
+PACKED_ATTRIBUTE = "PackedDocuments"
+
+# the body of a packed message is {"documents": [...]}, with a
+# {"correlation_id": ..., "ingest_timestamp": ..., "document": ...} entry for
+# each document, so each keeps the correlation ID and ingest time it would have
+# had as a message of its own
+ENVELOPE_HEAD = '{"documents":['
+ENVELOPE_TAIL = "]}"
+
+# room left in a packed message for its attributes
+ATTRIBUTES_ALLOWANCE = 256
+
+
+def envelope_item(entry):
+    """
+    Build the entry a document's message takes in the body of a packed message.
+
+    The message body is valid JSON, checked when its document was decoded,
+    so it is copied in as it is rather than encoded again.
+
+    :param entry (dict): The SendMessageBatch entry of the document's message.
+    :return (str): The JSON text of the entry.
+    """
+
+    attributes = entry["MessageAttributes"]
+    correlation_id = attributes[CORRELATION_ID_ATTRIBUTE]["StringValue"]
+    ingest_ms = attributes[INGEST_TIMESTAMP_ATTRIBUTE]["StringValue"]
+
+    return (
+        f'{{"correlation_id":{json.dumps(correlation_id)},'
+        f'"ingest_timestamp":{ingest_ms},'
+        f'"document":{entry["MessageBody"]}}}'
+    )
+
+
+def packed_entry(entries, items):
+    """
+    Build the SendMessageBatch entry of a packed message.
+
+    The packed message has a correlation ID of its own, the earliest ingest
+    time of its documents, and their lane.
+
+    :param entries (list): The SendMessageBatch entries of the documents' messages.
+    :param items (list): The JSON text of each document's entry in the packed message.
+    :return (dict): The entry, without an 'Id'.
+    """
+
+    attributes = entries[0]["MessageAttributes"]
+    ingest_ms = min(
+        int(entry["MessageAttributes"][INGEST_TIMESTAMP_ATTRIBUTE]["StringValue"])
+        for entry in entries
+    )
+
+    packed_attributes = {
+        CORRELATION_ID_ATTRIBUTE: {
+            "DataType": "String",
+            "StringValue": str(uuid.uuid4()),
+        },
+        INGEST_TIMESTAMP_ATTRIBUTE: {
+            "DataType": "Number",
+            "StringValue": str(ingest_ms),
+        },
+        PACKED_ATTRIBUTE: {"DataType": "Number", "StringValue": str(len(entries))},
+    }
+
+    if LANE_ATTRIBUTE in attributes:
+        packed_attributes[LANE_ATTRIBUTE] = attributes[LANE_ATTRIBUTE]
+
+    return {
+        "MessageBody": ENVELOPE_HEAD + ",".join(items) + ENVELOPE_TAIL,
+        "MessageAttributes": packed_attributes,
+    }
+
+
+def pack_messages(messages, target_size):
+    """
+    Pack the messages of many documents into fewer messages of up to 'target_size' bytes.
+
+    Messages are packed with the others for the same queue and lane, in
+    order.  A message that does not fit with any other is sent as it is, so a
+    packed message always carries at least two documents.
+
+    :param messages (list): (queue URL, SendMessageBatch entry) tuples, one per document.
+    :param target_size (int): The largest size of a packed message in bytes, attributes included.
+    :return (generator): (queue URL, SendMessageBatch entry, positions in 'messages' of the documents it carries) tuples.
+    """
+
+    max_body_size = target_size - ATTRIBUTES_ALLOWANCE
+    overhead = len(ENVELOPE_HEAD) + len(ENVELOPE_TAIL)
+
+    # the documents being packed for each queue and lane, as (position, entry,
+    # item) tuples, and the size of their packed message body in bytes
+    open_packs = {}
+
+    def close(pack):
+        positions = [position for position, _, _ in pack]
+
+        if len(pack) == 1:
+            return pack[0][1], positions
+
+        entries = [entry for _, entry, _ in pack]
+        items = [item for _, _, item in pack]
+
+        return packed_entry(entries, items), positions
+
+    for position, (queue_url, entry) in enumerate(messages):
+        item = envelope_item(entry)
+        # each item after the first is preceded by a comma
+        size = len(item.encode("utf-8")) + 1
+        lane = entry["MessageAttributes"].get(LANE_ATTRIBUTE, {}).get("StringValue")
+
+        pack, total = open_packs.get((queue_url, lane), ([], overhead - 1))
+
+        if pack and total + size > max_body_size:
+            yield (queue_url, *close(pack))
+            pack, total = [], overhead - 1
+
+        pack.append((position, entry, item))
+        open_packs[(queue_url, lane)] = (pack, total + size)
+
+    for (queue_url, _), (pack, _) in open_packs.items():
+        yield (queue_url, *close(pack))
@@ -0,0 +1,96 @@
+# Python Standard Library imports
+from urllib.parse import unquote_plus
+
+
+class S3ObjectRecord:
+    """
+    A validated S3 notification record holding only the fields the producer uses.
+
+    The notification is walked once, up front, so later stages can use
+    attribute access instead of indexing into the raw event again and again.
+    The object key is URL-decoded during parsing.
+    """
+
+    __slots__ = (
+        "bucket_name",
+        "key",
+        "size",
+        "event_time",
+        "etag",
+        "sequencer",
+        "body",
+        "metadata",
+        "document",
+        "position",
+        "lane",
+        "queue_url",
+    )
+
+    def __init__(
+        self, bucket_name, key, size, event_time=None, etag=None, sequencer=None
+    ):
+        self.bucket_name = bucket_name
+        self.key = key
+        self.size = size
+        self.event_time = event_time
+        self.etag = etag
+        self.sequencer = sequencer
+        self.body = None  # the object content, once read from S3
+        self.metadata = None  # the object's user metadata, once read from S3
+        self.document = None  # the decoded JSON document
+        self.position = None  # the document's place in a multi-document object
+        self.lane = None  # the lane the message is sent down
+        self.queue_url = None  # the queue the message is sent to
+
+    def __repr__(self):
+        return f"S3ObjectRecord(bucket_name={self.bucket_name!r}, key={self.key!r})"
+
+
+def parse_s3_record(record):
+    """
+    Validate a raw S3 notification record and convert it to an S3ObjectRecord.
+
+    :param record (dict): The dictionary containing the S3 notification record.
+    :return (S3ObjectRecord): The parsed S3 notification record.
+    """
+
+    try:
+        s3 = record["s3"]
+        bucket_name = s3["bucket"]["name"]
+        obj = s3["object"]
+        key = unquote_plus(obj["key"])  # decode URL-encoded key
+        size = obj["size"]
+    except (KeyError, TypeError):
+        raise ValueError("Malformed S3 notification record.") from None
+
+    if not (isinstance(key, str) and key):
+        raise ValueError("'key' must be non-empty string")
+
+    # the size is checked against the size limits before the object is read
+    if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+        raise ValueError("'size' must be a non-negative integer")
+
+    return S3ObjectRecord(
+        bucket_name,
+        key,
+        size,
+        event_time=record.get("eventTime"),
+        etag=obj.get("eTag"),
+        sequencer=obj.get("sequencer"),
+    )
+
+
+def parse_s3_event(event):
+    """
+    Validate an S3 notification event and convert its records to S3ObjectRecords.
+
+    :param event (dict): The S3 notification event.
+    :return (list): The parsed S3 notification records.
+    """
+
+    records = event.get("Records") if isinstance(event, dict) else None
+
+    if not (isinstance(records, list) and records):
+        raise ValueError("Malformed S3 notification event.")
+
+    return [parse_s3_record(record) for record in records]
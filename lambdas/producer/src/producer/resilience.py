@@ -0,0 +1,338 @@
+# Python Standard Library imports
+import random
+import threading
+import time
+
+from collections import deque
+
+# third-party library imports
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from botocore.exceptions import ConnectionError
+from botocore.exceptions import HTTPClientError
+
+# local imports
+from producer.config import config
+
+metrics = Metrics(namespace=config["metrics_namespace"])
+
+# error codes returned by AWS when a call is throttled or the service is
+# temporarily unavailable; these are worth retrying
+RETRYABLE_ERROR_CODES = frozenset(
+    (
+        "SlowDown",
+        "Throttling",
+        "ThrottlingException",
+        "ThrottledException",
+        "RequestThrottled",
+        "RequestThrottledException",
+        "RequestLimitExceeded",
+        "TooManyRequestsException",
+        "ProvisionedThroughputExceededException",
+        "ServiceUnavailable",
+        "InternalError",
+        "InternalFailure",
+        "RequestTimeout",
+        "RequestTimeoutException",
+    )
+)
+
+# clients used with a Retrier leave retrying to it, so retries stay within the
+# invocation's budget and deadline
+client_config = Config(retries={"mode": "standard", "total_max_attempts": 1})
+
+# circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of making a call while a circuit breaker is open.
+    """
+
+
+def is_retryable(error):
+    """
+    Check if an exception from an AWS call is worth retrying.
+
+    :param error (Exception): The exception raised by the call.
+    :return (bool): True if the call was throttled or failed transiently, False otherwise.
+    """
+
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") in RETRYABLE_ERROR_CODES
+
+    return isinstance(error, (ConnectionError, HTTPClientError))
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a service once too many recent calls to it have failed.
+
+    The outcomes of the last 'window' calls are kept.  Once at least
+    'min_calls' outcomes are known and the failure rate reaches
+    'failure_rate', the circuit opens and calls fail fast for 'reset_timeout'
+    seconds.  After that a single trial call is let through; the circuit closes
+    if it succeeds and opens again if it fails.
+    """
+
+    def __init__(
+        self, name, window=20, min_calls=10, failure_rate=0.5, reset_timeout=30
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Check a call may be made, moving an open circuit to half-open once it has waited long enough.
+
+        :return (None): Default 'None' returned if the call may be made.
+        """
+
+        with self._lock:
+            if self.state == CLOSED:
+                return
+
+            if (
+                self.state == OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                # let a single trial call through
+                self.state = HALF_OPEN
+                return
+
+        raise CircuitOpenError(f"Circuit breaker for '{self.name}' is open.")
+
+    def record_success(self):
+        """
+        Record a successful call.
+
+        :return (None): Default 'None' returned.
+        """
+
+        with self._lock:
+            self._outcomes.append(False)
+
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._outcomes.clear()
+
+    def record_failure(self):
+        """
+        Record a throttled or failed call, opening the circuit if the failure rate is too high.
+
+        :return (None): Default 'None' returned.
+        """
+
+        with self._lock:
+            self._outcomes.append(True)
+            calls = len(self._outcomes)
+
+            if self.state == HALF_OPEN or (
+                calls >= self.min_calls
+                and sum(self._outcomes) / calls >= self.failure_rate
+            ):
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+
+# circuit breakers are kept for the life of the container so that a throttled
+# service is remembered across warm invocations
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name):
+    """
+    Get the circuit breaker for a service, creating it from the config if needed.
+
+    :param name (str): The name of the service (e.g. 's3').
+    :return (CircuitBreaker): The circuit breaker.
+    """
+
+    with _circuit_breakers_lock:
+        if name not in _circuit_breakers:
+            _circuit_breakers[name] = CircuitBreaker(name, **config["circuit_breaker"])
+
+        return _circuit_breakers[name]
+
+
+def publish_circuit_states():
+    """
+    Add a metric per circuit breaker that is 1 while the circuit is open and 0 otherwise.
+
+    :return (None): Default 'None' returned.
+    """
+
+    for name, breaker in list(_circuit_breakers.items()):
+        metrics.add_metric(
+            name=f"{name.upper()}CircuitOpen",
+            unit=MetricUnit.Count,
+            value=int(breaker.state != CLOSED),
+        )
+
+
+class Deadline:
+    """
+    The point, a safety margin short of the invocation's timeout, by which work must stop.
+
+    The margin is capped at half the time the invocation had left when the
+    Deadline was created, so a short timeout still leaves time to work.
+    Without a context, as when run outside Lambda, there is no deadline.
+    """
+
+    __slots__ = ("context", "margin_ms")
+
+    def __init__(self, context=None, margin_ms=0):
+        self.context = context
+        self.margin_ms = margin_ms
+
+        if context is not None:
+            self.margin_ms = min(margin_ms, context.get_remaining_time_in_millis() / 2)
+
+    def remaining(self):
+        """
+        Get the time left before the deadline.
+
+        :return (float): The seconds left, negative once passed, or None if there is no deadline.
+        """
+
+        if self.context is None:
+            return None
+
+        return (self.context.get_remaining_time_in_millis() - self.margin_ms) / 1000
+
+    def expired(self):
+        """
+        Check whether the deadline has passed.
+
+        :return (bool): True if the deadline has passed, False otherwise.
+        """
+
+        remaining = self.remaining()
+
+        return remaining is not None and remaining <= 0
+
+
+class Retrier:
+    """
+    Retries throttled AWS calls with decorrelated-jitter backoff.
+
+    A Retrier is created per invocation.  Its retry budget is shared by every
+    call made during the invocation, and it never sleeps into the last
+    'min_remaining_ms' of the invocation.
+    """
+
+    def __init__(
+        self,
+        context=None,
+        max_attempts=5,
+        base_delay=0.05,
+        max_delay=2.0,
+        budget=50,
+        min_remaining_ms=2000,
+    ):
+        self.context = context
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.min_remaining_ms = min_remaining_ms
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, context=None):
+        """
+        Create a Retrier using the 'retry' config.
+
+        :param context (LambdaContext, optional): The runtime information of the Lambda function.
+        :return (Retrier): The Retrier.
+        """
+
+        return cls(context, **config["retry"])
+
+    def _acquire_retry(self):
+        with self._lock:
+            if self.budget <= 0:
+                return False
+
+            self.budget -= 1
+            return True
+
+    def _has_time_for(self, delay):
+        if self.context is None:
+            return True
+
+        remaining_ms = self.context.get_remaining_time_in_millis()
+
+        return remaining_ms - delay * 1000 >= self.min_remaining_ms
+
+    def call(self, service, func, *args, **kwargs):
+        """
+        Call a function that makes an AWS call, retrying it if it is throttled.
+
+        :param service (str): The name of the service called, used to pick the circuit breaker.
+        :param func (callable): The function to call.
+        :return (object): The value returned by the function.
+        """
+
+        breaker = get_circuit_breaker(service)
+        delay = self.base_delay
+        attempt = 1
+
+        while True:
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                metrics.add_metric(
+                    name="CircuitBreakerRejected", unit=MetricUnit.Count, value=1
+                )
+                raise
+
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    # the service answered, if only to refuse the call, so it
+                    # counts as healthy; this also closes a half-open circuit
+                    breaker.record_success()
+                    raise
+
+                breaker.record_failure()
+
+                # decorrelated jitter: each delay is drawn between the base
+                # delay and three times the previous delay
+                delay = min(
+                    self.max_delay,
+                    random.uniform(self.base_delay, delay * 3),  # nosec B311
+                )
+
+                if attempt >= self.max_attempts or not self._has_time_for(delay):
+                    metrics.add_metric(
+                        name="RetriesExhausted", unit=MetricUnit.Count, value=1
+                    )
+                    raise
+
+                if not self._acquire_retry():
+                    metrics.add_metric(
+                        name="RetryBudgetExhausted", unit=MetricUnit.Count, value=1
+                    )
+                    raise
+
+                metrics.add_metric(name="RetryAttempts", unit=MetricUnit.Count, value=1)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            breaker.record_success()
+            return result
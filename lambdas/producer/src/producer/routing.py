@@ -0,0 +1,77 @@
+# Python Standard Library imports
+import hashlib
+import itertools
+import threading
+
+# queue routing strategies
+HASH = "hash"  # a stable hash of the (prefix of the) S3 object key
+ROUND_ROBIN = "round_robin"  # each queue in turn
+
+ROUTING_STRATEGIES = frozenset((HASH, ROUND_ROBIN))
+
+
+def routing_key(obj_key, depth=None):
+    """
+    Get the part of an S3 object key that is hashed to pick a queue.
+
+    Hashing only the first 'depth' path segments sends every object under a
+    prefix (e.g. one tenant's objects under 'tenant-a/') to the same queue, so a
+    noisy tenant only backs up its own queue.
+
+    :param obj_key (str): The S3 object key.
+    :param depth (int, optional): The number of leading path segments to use. Defaults to the whole key.
+    :return (str): The routing key.
+    """
+
+    if not depth:
+        return obj_key
+
+    return "/".join(obj_key.split("/")[:depth])
+
+
+class QueueRouter:
+    """
+    Spreads messages over one or more SQS queues.
+
+    The hash strategy always sends a key to the same queue, as long as the
+    list of queues does not change.  It uses SHA-256 rather than hash(), whose
+    value changes from one process to the next.
+    """
+
+    def __init__(self, queue_urls, strategy=HASH, key_depth=None):
+        if isinstance(queue_urls, str):
+            queue_urls = [queue_urls]
+
+        if not queue_urls:
+            raise ValueError("At least one queue URL is required.")
+
+        if strategy not in ROUTING_STRATEGIES:
+            raise ValueError(f"Unknown queue routing strategy '{strategy}'.")
+
+        self.queue_urls = list(queue_urls)
+        self.strategy = strategy
+        self.key_depth = key_depth
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def route(self, obj_key):
+        """
+        Pick the queue a message for an S3 object is sent to.
+
+        :param obj_key (str): The S3 object key.
+        :return (str): The URL of the SQS queue.
+        """
+
+        if len(self.queue_urls) == 1:
+            return self.queue_urls[0]
+
+        if self.strategy == ROUND_ROBIN:
+            with self._lock:
+                index = next(self._counter) % len(self.queue_urls)
+        else:
+            digest = hashlib.sha256(
+                routing_key(obj_key, self.key_depth).encode("utf-8")
+            ).digest()
+            index = int.from_bytes(digest[:8], "big") % len(self.queue_urls)
+
+        return self.queue_urls[index]
@@ -0,0 +1,282 @@
+# Python Standard Library imports
+import json
+import os
+
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request
+from urllib.request import urlopen
+
+# local imports
+from producer.clients import make_client
+from producer.config import config
+from producer.resilience import client_config
+
+# the snapshot written at build time by scripts/snapshot-config.py
+SNAPSHOT_FILE = os.path.join(os.path.dirname(__file__), "config_snapshot.json")
+
+
+def get_ssm_params(path, region_name="us-west-2", recursive=True, with_decryption=True):
+    """
+    Retrieves all parameters under a given path from AWS SSM Parameter Store.
+
+
+    :param path (str): The hierarchy for the parameter. Hierarchies start with a forward slash (/).
+    :param region_name (str, optional): The AWS region to connect to. Defaults to 'us-west-2'.
+    :param recursive (bool, optional): Whether to retrieve parameters recursively under the path. Defaults to True.
+    :param with_decryption (bool, optional): Whether to decrypt SecureString parameters. Defaults to True.
+    :return (dict): A dictionary where keys are parameter names (relative to the path) and values are parameter values.
+    """
+    # retries are left to the Retrier the parameters are loaded with
+    ssm_client = make_client("ssm", region_name=region_name, config=client_config)
+    parameters = {}
+    next_token = None
+
+    while True:
+        # Build the request arguments
+        kwargs = {
+            "Path": path,
+            "Recursive": recursive,
+            "WithDecryption": with_decryption,
+            "MaxResults": 10,  # Can adjust MaxResults as needed, but AWS imposes a limit
+        }
+        if next_token:
+            kwargs["NextToken"] = next_token
+
+        response = ssm_client.get_parameters_by_path(**kwargs)
+
+        # Process the retrieved parameters
+        for parameter in response.get("Parameters", []):
+            name = parameter["Name"]
+            value = parameter["Value"]
+            # Remove the path prefix for cleaner parameter names in the result
+            if name.startswith(path):
+                relative_name = name[len(path) :].lstrip("/")
+                parameters[relative_name] = value
+
+        next_token = response.get("NextToken")
+        if not next_token:
+            break
+
+    if not parameters:
+        raise ValueError(f"No parameters found under path '{path}'.")
+    else:
+        return parameters
+
+
+def verify_ssm_parameters(params, reqd_params):
+    """
+    Verify required parameters were retrieved from SSM Parameter Store.
+
+    :param params (dict) The parameters retrieved from SSM Parameter Store.
+    :param reqd_params (list) The parameters that are needed for this script to execute.
+    :return (None): Default 'None' returned if all required parameters exist.
+    """
+
+    for param in reqd_params:
+        if param not in params.keys():
+            raise ValueError(f"Parameter '{param}' not found.")
+
+
+def env_var_name(param):
+    """
+    Get the environment variable that holds a parameter (e.g. 'queue-arn' -> 'QUEUE_ARN').
+
+    :param param (str): The parameter name.
+    :return (str): The environment variable name.
+    """
+
+    return param.upper().replace("-", "_")
+
+
+def parse_list_param(value):
+    """
+    Split a comma-separated parameter, such as an SSM StringList, into its items.
+
+    :param value (str): The parameter value, e.g. 'a,b, c'.
+    :return (list): The non-empty items, stripped of whitespace, in order.
+    """
+
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class SsmProvider:
+    """
+    Reads parameters from SSM Parameter Store with GetParametersByPath.
+    """
+
+    def __init__(self, path, retrier=None):
+        self.path = path
+        self.retrier = retrier
+
+    def load(self, params):
+        """
+        Load every parameter under the path; the required names are not needed.
+
+        :param params (list): The names of the required and optional parameters.
+        :return (dict): The parameters, keyed by name.
+        """
+
+        if self.retrier is None:
+            return get_ssm_params(self.path)
+
+        return self.retrier.call("ssm", get_ssm_params, self.path)
+
+
+class EnvProvider:
+    """
+    Reads parameters from environment variables (e.g. 'queue-arn' from QUEUE_ARN).
+    """
+
+    def load(self, params):
+        """
+        Load the required parameters that are set in the environment.
+
+        :param params (list): The names of the required and optional parameters.
+        :return (dict): The parameters, keyed by name.
+        """
+
+        return {
+            param: os.environ[env_var_name(param)]
+            for param in params
+            if env_var_name(param) in os.environ
+        }
+
+
+class SnapshotProvider:
+    """
+    Reads parameters from a JSON snapshot bundled with the package at build time.
+    """
+
+    def __init__(self, file_path=SNAPSHOT_FILE):
+        self.file_path = file_path
+
+    def load(self, params):
+        """
+        Load every parameter in the snapshot file.
+
+        :param params (list): The names of the required and optional parameters.
+        :return (dict): The parameters, keyed by name.
+        """
+
+        with open(self.file_path, encoding="utf-8") as f:
+            return json.load(f)
+
+
+class ExtensionProvider:
+    """
+    Reads parameters from the AWS Parameters and Secrets Lambda extension.
+
+    The extension caches parameters locally, so reads after the first do not
+    call SSM.
+    """
+
+    def __init__(self, path, port=None, timeout=2):
+        self.path = path
+        self.port = port or os.environ.get(
+            "PARAMETERS_SECRETS_EXTENSION_HTTP_PORT", "2773"
+        )
+        self.timeout = timeout
+
+    def get_param(self, param):
+        """
+        Get a single parameter from the extension.
+
+        :param param (str): The parameter name, relative to the path.
+        :return (str): The parameter value.
+        """
+
+        name = quote(f"{self.path}/{param}", safe="")
+        request = Request(
+            f"http://localhost:{self.port}/systemsmanager/parameters/get?name={name}",
+            headers={
+                "X-Aws-Parameters-Secrets-Token": os.environ.get(
+                    "AWS_SESSION_TOKEN", ""
+                )
+            },
+        )
+
+        # the extension only listens on localhost over HTTP
+        with urlopen(request, timeout=self.timeout) as resp:  # nosec B310
+            return json.load(resp)["Parameter"]["Value"]
+
+    def load(self, params):
+        """
+        Load the parameters one by one from the extension, skipping any that do not exist.
+
+        :param params (list): The names of the required and optional parameters.
+        :return (dict): The parameters, keyed by name.
+        """
+
+        loaded = {}
+
+        for param in params:
+            try:
+                loaded[param] = self.get_param(param)
+            except HTTPError as e:
+                # a missing required parameter is reported by verify_ssm_parameters
+                if e.code not in (400, 404):
+                    raise
+
+        return loaded
+
+
+def build_provider(name, retrier=None):
+    """
+    Build a config provider by name.
+
+    :param name (str): One of 'ssm', 'env', 'snapshot' or 'extension'.
+    :param retrier (Retrier, optional): Retries throttled SSM calls.
+    :return (object): The config provider.
+    """
+
+    path = config["ssm_param_path"]
+    providers = {
+        "ssm": lambda: SsmProvider(path, retrier),
+        "env": EnvProvider,
+        "snapshot": SnapshotProvider,
+        "extension": lambda: ExtensionProvider(path),
+    }
+
+    if name not in providers:
+        raise ValueError(f"Unknown config provider '{name}'.")
+
+    return providers[name]()
+
+
+# settings only change at deploy time, so they are loaded and validated once
+# and kept for the life of the container
+_settings = {}
+
+
+def get_settings(provider_name=None, retrier=None):
+    """
+    Get the runtime settings, loading and validating them on first use.
+
+    :param provider_name (str, optional): The config provider to use. Defaults to the CONFIG_PROVIDER environment variable, then the 'config_provider' config.
+    :param retrier (Retrier, optional): Retries throttled SSM calls.
+    :return (dict): The settings, keyed by parameter name.
+    """
+
+    provider_name = provider_name or os.environ.get(
+        "CONFIG_PROVIDER", config["config_provider"]
+    )
+
+    if provider_name not in _settings:
+        params = build_provider(provider_name, retrier).load(
+            config["required_ssm_params"] + config["optional_ssm_params"]
+        )
+        verify_ssm_parameters(params, config["required_ssm_params"])
+        _settings[provider_name] = params
+
+    return _settings[provider_name]
+
+
+def clear_settings():
+    """
+    Forget the loaded settings so the next get_settings() call loads them again.
+
+    :return (None): Default 'None' returned.
+    """
+
+    _settings.clear()
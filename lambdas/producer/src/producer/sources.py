@@ -0,0 +1,382 @@
+# Python Standard Library imports
+import os
+import sys
+import time
+
+from datetime import datetime
+from functools import partial
+from datetime import timezone
+from pathlib import Path
+
+# third-party library imports
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+
+# local imports
+from producer.clients import make_client
+from producer.config import config
+from producer.documents import get_document_format
+from producer.documents import iter_documents
+from producer.records import S3ObjectRecord
+from producer.resilience import Retrier
+from producer.resilience import client_config
+
+logger = Logger(child=True)
+metrics = Metrics(namespace=config["metrics_namespace"])
+
+
+def read_from_s3(bucket_name, file_name, client=None):
+    """
+    Reads the content of a file from an S3 bucket.
+
+    :param bucket_name (str): The name of the S3 bucket.
+    :param file_name (str): The name of the file to read.
+    :param client (S3.Client, optional): The S3 client to use. Defaults to a new client.
+    :return (dict): The content of the file as a string.
+    """
+
+    return get_s3_obj(bucket_name, file_name, client)[0]
+
+
+def get_s3_obj(bucket_name, file_name, client=None):
+    """
+    Reads the content and user metadata of a file from an S3 bucket.
+
+    :param bucket_name (str): The name of the S3 bucket.
+    :param file_name (str): The name of the file to read.
+    :param client (S3.Client, optional): The S3 client to use. Defaults to a new client.
+    :return (tuple): The content of the file as a string and its user metadata as a dict.
+    """
+
+    s3 = client or make_client("s3")
+    response = s3.get_object(Bucket=bucket_name, Key=file_name)
+    return response["Body"].read().decode("utf-8"), response.get("Metadata", {})
+
+
+def to_event_time(timestamp):
+    """
+    Format a POSIX timestamp the way S3 notification events do.
+
+    :param timestamp (float): The seconds since the epoch.
+    :return (str): The time, e.g. '2019-09-03T19:37:27.192Z'.
+    """
+
+    formatted = datetime.fromtimestamp(timestamp, timezone.utc).isoformat(
+        timespec="milliseconds"
+    )
+
+    return formatted.replace("+00:00", "Z")
+
+
+def max_document_size():
+    """
+    Get the size of the longest document a multi-document object may hold.
+
+    :return (int): The size in bytes.
+    """
+
+    return max(config["max_obj_size"], config["max_source_obj_size"])
+
+
+def iter_document_records(s3_object, chunks, document_format, metadata, skip=0):
+    """
+    Split the content of a multi-document object into one record per document.
+
+    Each record has the object's bucket, key and notification fields, the
+    document's text as its body and its position in the object.  The
+    documents of a JSON array are decoded as they are read.
+
+    :param s3_object (S3ObjectRecord): The record of the object.
+    :param chunks (iterable): The object content, as bytes chunks.
+    :param document_format (str): 'jsonl' or 'array'.
+    :param metadata (dict): The object's user metadata.
+    :param skip (int, optional): The number of documents at the start to skip. Defaults to 0.
+    :return (generator): The S3ObjectRecords of the documents.
+    """
+
+    documents = iter_documents(chunks, document_format, max_document_size())
+
+    for position, text, document in documents:
+        if position < skip:
+            continue
+
+        record = S3ObjectRecord(
+            s3_object.bucket_name,
+            s3_object.key,
+            len(text.encode("utf-8")),
+            event_time=s3_object.event_time,
+            etag=s3_object.etag,
+            sequencer=s3_object.sequencer,
+        )
+        record.body = text
+        record.metadata = metadata
+        record.document = document
+        record.position = position
+
+        yield record
+
+
+def check_bucket(s3_object, bucket_name):
+    """
+    Check an S3 object comes from the expected bucket.
+
+    :param s3_object (S3ObjectRecord): The S3 notification record.
+    :param bucket_name (str): The name of the expected S3 bucket, or None for records from a local source.
+    :return (None): Default 'None' returned if the bucket is the expected one.
+    """
+
+    # local sources have no bucket to check
+    logger.info("Validating event source bucket matches expected bucket.")
+    if bucket_name is not None and s3_object.bucket_name != bucket_name:
+        logger.error(
+            f"Expected event source to contain S3 bucket '{bucket_name}', but got '{s3_object.bucket_name}'."
+        )
+        raise ValueError("invalid S3 source")
+
+
+# Every source is an iterable of S3ObjectRecords, which the pipeline runs
+# through the same validate, fetch, decode, transform, route, admit and sink
+# stages, and has fetch(record), which sets the record's body and metadata.
+# Records from local sources have no bucket name, and their key is the path of
+# the file or the position of the line they came from.  Objects that hold many
+# documents are split into a record per document as they are read, and those
+# records have their body and a position already.
+
+
+class S3EventSource:
+    """
+    The objects of an S3 notification event, read from S3 when they are fetched.
+
+    Objects that hold many documents are streamed from S3 as the pipeline
+    takes their documents.  With checkpoints, the documents an earlier
+    invocation sent are skipped.  With a bucket name, such an object's bucket
+    is checked before its checkpoint or content is read, as the validate
+    stage checks the buckets of other objects.
+    """
+
+    def __init__(
+        self, s3_objects, retrier=None, client=None, checkpoints=None, bucket_name=None
+    ):
+        self.s3_objects = s3_objects
+        self.retrier = retrier or Retrier.from_config()
+        self.client = client or make_client("s3", config=client_config)
+        self.checkpoints = checkpoints
+        self.bucket_name = bucket_name
+
+    def __iter__(self):
+        for s3_object in self.s3_objects:
+            document_format = get_document_format(s3_object.key)
+
+            if document_format is None:
+                yield s3_object
+            else:
+                yield from self.documents(s3_object, document_format)
+
+    def documents(self, s3_object, document_format):
+        """
+        Stream an object from S3 and split it into one record per document.
+
+        :param s3_object (S3ObjectRecord): The S3 notification record.
+        :param document_format (str): 'jsonl' or 'array'.
+        :return (generator): The S3ObjectRecords of the documents not sent yet.
+        """
+
+        check_bucket(s3_object, self.bucket_name)
+
+        skip = self.checkpoints.load(s3_object) if self.checkpoints else 0
+
+        if skip:
+            logger.info(
+                f"Skipping {skip} document(s) of S3 object '{s3_object.key}' sent by an earlier invocation."
+            )
+            metrics.add_metric(
+                name="CheckpointSkippedDocuments", unit=MetricUnit.Count, value=skip
+            )
+
+        response = self.retrier.call(
+            "s3",
+            self.client.get_object,
+            Bucket=s3_object.bucket_name,
+            Key=s3_object.key,
+        )
+
+        yield from iter_document_records(
+            s3_object,
+            response["Body"].iter_chunks(config["fan_out"]["chunk_size"]),
+            document_format,
+            response.get("Metadata", {}),
+            skip,
+        )
+
+    def fetch(self, record):
+        """
+        Read an object's content and user metadata from S3, retrying if S3 throttles the read.
+
+        :param record (S3ObjectRecord): The S3 notification record.
+        :return (S3ObjectRecord): The record with the object content.
+        """
+
+        # documents were read with the object that holds them
+        if record.position is not None:
+            return record
+
+        record.body, record.metadata = self.retrier.call(
+            "s3", get_s3_obj, record.bucket_name, record.key, client=self.client
+        )
+
+        return record
+
+
+class DirectorySource:
+    """
+    The files under a local directory that match a glob pattern, in name order.
+
+    Files that hold many documents are split into one record per document.
+    With 'watch' on, the directory is scanned again every 'poll_interval'
+    seconds, and new and changed files are sent too, until 'idle_timeout'
+    seconds pass without any (or forever, if it is None).  Files the object
+    filter rejects are skipped, so files still being written under a '.tmp' or
+    '.part' name are left alone by the default filter.
+    """
+
+    def __init__(
+        self,
+        directory,
+        pattern="**/*.json",
+        object_filter=None,
+        watch=False,
+        poll_interval=1.0,
+        idle_timeout=None,
+    ):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.object_filter = object_filter
+        self.watch = watch
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+
+    def __iter__(self):
+        # the modification time each file was last sent with
+        seen = {}
+        idle_since = time.monotonic()
+
+        while True:
+            found = False
+
+            for path in sorted(self.directory.glob(self.pattern)):
+                if not path.is_file():
+                    continue
+
+                stat = path.stat()
+                key = path.relative_to(self.directory).as_posix()
+
+                if seen.get(key) == stat.st_mtime_ns:
+                    continue
+
+                seen[key] = stat.st_mtime_ns
+
+                if (
+                    self.object_filter is not None
+                    and self.object_filter.reason(key, stat.st_size) is not None
+                ):
+                    continue
+
+                found = True
+                record = S3ObjectRecord(
+                    None, key, stat.st_size, event_time=to_event_time(stat.st_mtime)
+                )
+                document_format = get_document_format(key)
+
+                if document_format is None:
+                    yield record
+                else:
+                    yield from self.documents(path, record, document_format)
+
+            if not self.watch:
+                return
+
+            if found:
+                idle_since = time.monotonic()
+            elif (
+                self.idle_timeout is not None
+                and time.monotonic() - idle_since >= self.idle_timeout
+            ):
+                return
+
+            time.sleep(self.poll_interval)
+
+    def documents(self, path, record, document_format):
+        """
+        Read a file and split it into one record per document.
+
+        :param path (Path): The file.
+        :param record (S3ObjectRecord): The record of the file.
+        :param document_format (str): 'jsonl' or 'array'.
+        :return (generator): The S3ObjectRecords of the documents.
+        """
+
+        chunk_size = config["fan_out"]["chunk_size"]
+
+        with open(path, "rb") as f:
+            yield from iter_document_records(
+                record, iter(partial(f.read, chunk_size), b""), document_format, {}
+            )
+
+    def fetch(self, record):
+        """
+        Read a file's content.
+
+        :param record (S3ObjectRecord): The record of the file.
+        :return (S3ObjectRecord): The record with the file content.
+        """
+
+        # documents were read with the file that holds them
+        if record.position is not None:
+            return record
+
+        with open(os.path.join(self.directory, record.key), encoding="utf-8") as f:
+            record.body = f.read()
+
+        record.metadata = {}
+
+        return record
+
+
+class JsonLinesSource:
+    """
+    The lines of a stream of JSON documents, one per line, such as standard input.
+
+    Each non-blank line is a message, so the stream is read as it arrives and
+    nothing needs to be fetched.
+    """
+
+    def __init__(self, stream=None, name="stdin"):
+        self.stream = stream
+        self.name = name
+
+    def __iter__(self):
+        stream = self.stream or sys.stdin
+
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+
+            if not line:
+                continue
+
+            record = S3ObjectRecord(None, f"{self.name}:{number}", len(line.encode()))
+            record.body = line
+
+            yield record
+
+    def fetch(self, record):
+        """
+        Nothing to read; the record has the line as its body.
+
+        :param record (S3ObjectRecord): The record of the line.
+        :return (S3ObjectRecord): The record.
+        """
+
+        record.metadata = {}
+
+        return record
@@ -0,0 +1,62 @@
+# Python Standard Library imports
+import time
+import uuid
+
+from datetime import datetime
+
+# SQS message attributes stamped on every message so the consumer can tie its
+# output back to the S3 object and measure latency end to end
+CORRELATION_ID_ATTRIBUTE = "CorrelationId"
+INGEST_TIMESTAMP_ATTRIBUTE = "IngestTimestamp"
+LANE_ATTRIBUTE = "Lane"
+
+
+def to_epoch_ms(event_time):
+    """
+    Convert an S3 notification event time to milliseconds since the epoch.
+
+    :param event_time (str): The event time, e.g. '2019-09-03T19:37:27.192Z'.
+    :return (int): The milliseconds since the epoch, or None if the event time is missing or malformed.
+    """
+
+    try:
+        parsed = datetime.fromisoformat(event_time.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+
+    return int(parsed.timestamp() * 1000)
+
+
+def build_message_attributes(s3_object, correlation_id=None):
+    """
+    Build the SQS message attributes that carry the correlation ID, ingest time and lane of an S3 object.
+
+    The ingest time is when S3 received the object, taken from the
+    notification, or the current time if the notification does not have one.
+
+    :param s3_object (S3ObjectRecord): The S3 notification record.
+    :param correlation_id (str, optional): The correlation ID. Defaults to a new UUID.
+    :return (dict): The SQS message attributes.
+    """
+
+    ingest_ms = to_epoch_ms(s3_object.event_time) or int(time.time() * 1000)
+
+    attributes = {
+        CORRELATION_ID_ATTRIBUTE: {
+            "DataType": "String",
+            "StringValue": correlation_id or str(uuid.uuid4()),
+        },
+        INGEST_TIMESTAMP_ATTRIBUTE: {
+            "DataType": "Number",
+            "StringValue": str(ingest_ms),
+        },
+    }
+
+    # the consumer reports latency per lane
+    if s3_object.lane is not None:
+        attributes[LANE_ATTRIBUTE] = {
+            "DataType": "String",
+            "StringValue": s3_object.lane,
+        }
+
+    return attributes
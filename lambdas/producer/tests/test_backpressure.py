@@ -0,0 +1,145 @@
+# Python Standard Library imports
+import pytest
+
+from unittest.mock import patch
+
+# 3rd party imports
+import boto3
+from moto import mock_aws
+
+# the lambda_function module imports the installed 'producer' package, so its
+# error class, rate limiter and sampler are the ones to use
+from producer.backpressure import BackpressureError
+from producer.backpressure import reset_flow_control
+
+# local imports
+from src.producer import lambda_function
+from src.producer.backpressure import QueueDepthSampler
+from src.producer.backpressure import TokenBucket
+from src.producer.lambda_function import admit_object
+from src.producer.records import S3ObjectRecord
+from src.producer.resilience import Retrier
+from src.producer.routing import QueueRouter
+
+BULK_URL = "https://sqs.us-west-2.amazonaws.com/123456789012/my-queue"
+PRIORITY_URL = "https://sqs.us-west-2.amazonaws.com/123456789012/my-priority-queue"
+
+
+@pytest.fixture(autouse=True)
+def flow_control():
+    """Start each test with a fresh rate limiter and queue depth sampler."""
+
+    reset_flow_control()
+    yield
+    reset_flow_control()
+
+
+@pytest.fixture
+def no_sleep():
+    """Stop backpressure delays from sleeping."""
+
+    with patch("src.producer.lambda_function.time.sleep") as sleep:
+        yield sleep
+
+
+def make_object():
+    s3_object = S3ObjectRecord("my-bucket", "my-key", 100)
+    s3_object.lane = "priority"
+    s3_object.queue_url = PRIORITY_URL
+
+    return s3_object
+
+
+def backpressure(action, depth):
+    """Turn on backpressure with a threshold of 10 and a queue of a given depth."""
+
+    settings = {"enabled": True, "threshold": 10, "action": action, "delay": 1.0}
+    sampler = patch(
+        "producer.backpressure.QueueDepthSampler.depth", return_value=(depth, True)
+    )
+    return patch.dict(lambda_function.config["backpressure"], settings), sampler
+
+
+def test_token_bucket():
+    """Test the project TokenBucket class."""
+
+    bucket = TokenBucket(rate=1000, burst=2)
+
+    # a burst is let through without waiting
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+
+    # an empty bucket waits for the next token, unless that takes too long
+    assert bucket.acquire(max_wait=0) is None
+    assert 0 < bucket.acquire(max_wait=1) <= 0.001
+
+
+@mock_aws
+def test_queue_depth_sampler():
+    """Test the project QueueDepthSampler class."""
+
+    sqs = boto3.client("sqs", region_name="us-west-2")
+    queue_url = sqs.create_queue(QueueName="my-queue")["QueueUrl"]
+    for i in range(3):
+        sqs.send_message(QueueUrl=queue_url, MessageBody=str(i))
+
+    sampler = QueueDepthSampler(ttl=60)
+
+    assert sampler.depth(queue_url, sqs, Retrier()) == (3, True)
+
+    # later calls use the cached sample until it expires
+    sqs.send_message(QueueUrl=queue_url, MessageBody="3")
+    assert sampler.depth(queue_url, sqs) == (3, False)
+
+    assert QueueDepthSampler(ttl=0).depth(queue_url, sqs) == (4, True)
+
+
+@pytest.mark.parametrize("action", ["delay", "shed", "fail"])
+def test_admit_object_under_threshold(action, no_sleep):
+    """Test the project admit_object() function with a queue under the threshold."""
+
+    routers = {"bulk": QueueRouter([BULK_URL])}
+    config_patch, sampler_patch = backpressure(action, 5)
+
+    with config_patch, sampler_patch:
+        s3_object = admit_object(make_object(), routers, Retrier())
+
+    assert s3_object.queue_url == PRIORITY_URL
+    no_sleep.assert_not_called()
+
+
+def test_admit_object_over_threshold(no_sleep):
+    """Test the project admit_object() function with a queue over the threshold."""
+
+    routers = {"bulk": QueueRouter([BULK_URL])}
+
+    # the delay action waits before sending
+    config_patch, sampler_patch = backpressure("delay", 50)
+    with config_patch, sampler_patch:
+        admit_object(make_object(), routers, Retrier())
+    no_sleep.assert_called_once_with(1.0)
+
+    # the shed action moves priority messages to the bulk lane
+    config_patch, sampler_patch = backpressure("shed", 50)
+    with config_patch, sampler_patch:
+        s3_object = admit_object(make_object(), routers, Retrier())
+    assert (s3_object.lane, s3_object.queue_url) == ("bulk", BULK_URL)
+
+    # the fail action fails so S3 retries later
+    config_patch, sampler_patch = backpressure("fail", 50)
+    with config_patch, sampler_patch:
+        with pytest.raises(BackpressureError):
+            admit_object(make_object(), routers, Retrier())
+
+
+def test_admit_object_rate_limit():
+    """Test the project admit_object() function with a rate limit."""
+
+    rate_limit = {"rate": 0.001, "burst": 1, "max_wait": 0}
+
+    with patch.dict(lambda_function.config["rate_limit"], rate_limit):
+        admit_object(make_object(), {}, Retrier())
+
+        # the burst is used up, and the next token is too far away
+        with pytest.raises(BackpressureError):
+            admit_object(make_object(), {}, Retrier())
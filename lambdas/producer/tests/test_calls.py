@@ -0,0 +1,158 @@
+# Python Standard Library imports
+import json
+import os
+import pytest
+
+from unittest.mock import patch
+
+# 3rd party imports
+import boto3
+
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from botocore.exceptions import EndpointConnectionError
+from botocore.exceptions import ReadTimeoutError
+from moto import mock_aws
+
+# local imports
+from src.producer import calls
+from src.producer.calls import account_calls
+from src.producer.calls import get_call_totals
+from src.producer.calls import install_call_accounting
+from src.producer.calls import publish_call_totals
+from src.producer.calls import reset_call_totals
+from src.producer.faults import FaultInjector
+
+
+@pytest.fixture(scope="function")
+def aws_credentials():
+    """Mocked AWS Credentials for moto."""
+
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"  # nosec
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"  # nosec
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"  # nosec
+    os.environ["AWS_SESSION_TOKEN"] = "testing"  # nosec
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_call_accounting():
+    """Test the project CallAccountant class counts calls, errors and bytes per operation."""
+
+    reset_call_totals()
+
+    with mock_aws():
+        s3 = install_call_accounting(boto3.client("s3"), "s3")
+        s3.create_bucket(Bucket="my-bucket")
+        s3.put_object(Bucket="my-bucket", Key="a.txt", Body=b"x" * 100)
+        s3.put_object(Bucket="my-bucket", Key="b.txt", Body="y" * 100)
+        assert s3.get_object(Bucket="my-bucket", Key="a.txt")["Body"].read()
+
+        with pytest.raises(ClientError):
+            s3.head_object(Bucket="my-bucket", Key="missing.txt")
+
+    totals = get_call_totals()
+
+    assert list(totals) == ["s3"]
+    assert totals["s3"]["PutObject"]["calls"] == 2
+    assert totals["s3"]["PutObject"]["bytes_sent"] == 200
+    assert totals["s3"]["PutObject"]["errors"] == 0
+    assert totals["s3"]["GetObject"]["bytes_received"] == 100
+    assert totals["s3"]["HeadObject"]["errors"] == 1
+    assert all(operation["milliseconds"] >= 0 for operation in totals["s3"].values())
+
+    # the totals can be read and reset at once
+    assert get_call_totals(reset=True) == totals
+    assert get_call_totals() == {}
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_call_accounting_faults():
+    """Test the project CallAccountant class counts injected faults as errors."""
+
+    reset_call_totals()
+
+    with mock_aws():
+        sqs = install_call_accounting(boto3.client("sqs"), "sqs")
+        FaultInjector("sqs", throttle_rate=1.0).install(sqs)
+
+        with pytest.raises(ClientError):
+            sqs.list_queues()
+
+    totals = get_call_totals()["sqs"]["ListQueues"]
+    assert (totals["calls"], totals["errors"], totals["bytes_received"]) == (1, 1, 0)
+
+    # an injected timeout is counted as an error, with the time it took
+    reset_call_totals()
+
+    with mock_aws():
+        sqs = install_call_accounting(boto3.client("sqs"), "sqs")
+        FaultInjector("sqs", timeout_rate=1.0, timeout_ms=5).install(sqs)
+
+        with pytest.raises(ReadTimeoutError):
+            sqs.list_queues()
+
+        # the call's context is cleared, so the next call is counted afresh
+        with pytest.raises(ReadTimeoutError):
+            sqs.list_queues()
+
+    totals = get_call_totals()["sqs"]["ListQueues"]
+    assert (totals["calls"], totals["errors"]) == (2, 2)
+    assert totals["milliseconds"] >= 10
+
+    # a call that gets no response at all is an error too
+    reset_call_totals()
+    s3 = install_call_accounting(
+        boto3.client(
+            "s3",
+            endpoint_url="http://127.0.0.1:9",
+            config=Config(retries={"total_max_attempts": 1}, connect_timeout=1),
+        ),
+        "s3",
+    )
+
+    with pytest.raises(EndpointConnectionError):
+        s3.list_buckets()
+
+    assert get_call_totals()["s3"]["ListBuckets"]["errors"] == 1
+
+
+def test_publish_call_totals(capsys):
+    """Test the project publish_call_totals() function."""
+
+    reset_call_totals()
+    calls._add("s3", "PutObject", calls=3, bytes_sent=300, milliseconds=12.5)
+
+    totals = publish_call_totals()
+
+    assert totals["s3"]["PutObject"]["calls"] == 3
+    assert get_call_totals() == {}
+
+    # each operation's totals are a set of metrics with its own dimensions
+    emitted = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert emitted["Service"] == "s3"
+    assert emitted["Operation"] == "PutObject"
+    assert emitted["AwsCalls"] == [3.0]
+    assert emitted["AwsBytesSent"] == [300.0]
+
+    calls._add("s3", "PutObject", calls=1)
+    with patch.dict(calls.config, {"call_accounting": {"publish": False}}):
+        assert publish_call_totals()["s3"]["PutObject"]["calls"] == 1
+    assert "AwsCalls" not in capsys.readouterr().out
+
+
+def test_account_calls():
+    """Test the project account_calls() decorator publishes totals even if the handler fails."""
+
+    @account_calls
+    def handler(event, context):
+        calls._add("ssm", "GetParametersByPath", calls=1)
+        raise RuntimeError("Lambda function failed.")
+
+    reset_call_totals()
+
+    with patch.dict(calls.config, {"call_accounting": {"publish": False}}):
+        with pytest.raises(RuntimeError):
+            handler({}, None)
+
+    assert get_call_totals() == {}
@@ -0,0 +1,38 @@
+# Python Standard Library imports
+import gzip
+import json
+
+# 3rd party imports
+import boto3
+from moto import mock_aws
+
+# local imports
+from src.producer.capture import capture_event
+from src.producer.capture import encode_capture
+from tests.events import events
+
+
+def test_encode_capture():
+    """Test the project encode_capture() function."""
+
+    line = json.loads(
+        gzip.decompress(encode_capture(events["valid_event"], "producer"))
+    )
+
+    # S3 notifications have no message bodies, so they are captured as they are
+    assert line["source"] == "producer"
+    assert line["event"] == events["valid_event"]
+
+
+@mock_aws
+def test_capture_event():
+    """Test the project capture_event() function."""
+
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket="my-capture-bucket")
+
+    key = capture_event(events["valid_event"], None, "my-capture-bucket", "producer")
+    assert key.startswith("captures/producer/") and key.endswith(".jsonl.gz")
+
+    obj = s3.get_object(Bucket="my-capture-bucket", Key=key)
+    assert json.loads(gzip.decompress(obj["Body"].read()))["source"] == "producer"
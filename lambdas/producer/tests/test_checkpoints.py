@@ -0,0 +1,100 @@
+# Python Standard Library imports
+import os
+import pytest
+
+# 3rd party imports
+import boto3
+from moto import mock_aws
+
+# local imports
+from src.producer.checkpoints import Checkpoints
+from src.producer.records import S3ObjectRecord
+
+
+def make_document(position, key="batch.jsonl"):
+    record = S3ObjectRecord("my-bucket", key, 2)
+    record.position = position
+
+    return record
+
+
+@pytest.fixture(scope="function")
+def aws_credentials():
+    """Mocked AWS Credentials for moto."""
+
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"  # nosec
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"  # nosec
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"  # nosec
+    os.environ["AWS_SESSION_TOKEN"] = "testing"  # nosec
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_checkpoints():
+    """Test the project Checkpoints class."""
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="my-bucket")
+        s3.put_object(
+            Bucket="my-bucket", Key="batch.jsonl", Body="", Tagging="owner=team"
+        )
+
+        def tags():
+            response = s3.get_object_tagging(Bucket="my-bucket", Key="batch.jsonl")
+            return {tag["Key"]: tag["Value"] for tag in response["TagSet"]}
+
+        checkpoints = Checkpoints(client=s3, tag="sent", every=3)
+        assert checkpoints.load(S3ObjectRecord("my-bucket", "batch.jsonl", 0)) == 0
+
+        # the count is saved every 3 documents, keeping the object's other tags
+        for position in range(4):
+            checkpoints.advance(make_document(position))
+        assert tags() == {"owner": "team", "sent": "3"}
+
+        # whole objects and objects that were not loaded are not counted
+        checkpoints.advance(S3ObjectRecord("my-bucket", "batch.jsonl", 0))
+        checkpoints.advance(make_document(10, key="other.jsonl"))
+
+        checkpoints.flush()
+        assert tags() == {"owner": "team", "sent": "4"}
+
+        # a retried invocation picks up where the last one stopped
+        checkpoints = Checkpoints(client=s3, tag="sent")
+        assert checkpoints.load(S3ObjectRecord("my-bucket", "batch.jsonl", 0)) == 4
+
+        # documents sent after one that failed are not counted past it
+        checkpoints.advance(make_document(5))
+        checkpoints.advance(make_document(6))
+        checkpoints.flush()
+        assert tags() == {"owner": "team", "sent": "4"}
+
+        # until it is sent too
+        checkpoints.advance(make_document(4))
+        checkpoints.flush()
+        assert tags() == {"owner": "team", "sent": "7"}
+
+        # an invalid count is ignored
+        s3.put_object_tagging(
+            Bucket="my-bucket",
+            Key="batch.jsonl",
+            Tagging={"TagSet": [{"Key": "sent", "Value": "many"}]},
+        )
+        assert checkpoints.load(S3ObjectRecord("my-bucket", "batch.jsonl", 0)) == 0
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_checkpoints_flush_failure():
+    """Test the project Checkpoints class only logs checkpoints it cannot save."""
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="my-bucket")
+        s3.put_object(Bucket="my-bucket", Key="batch.jsonl", Body="")
+
+        checkpoints = Checkpoints(client=s3, tag="sent")
+        checkpoints.load(S3ObjectRecord("my-bucket", "batch.jsonl", 0))
+        checkpoints.advance(make_document(0))
+
+        s3.delete_object(Bucket="my-bucket", Key="batch.jsonl")
+        checkpoints.flush()
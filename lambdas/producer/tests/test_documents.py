@@ -0,0 +1,90 @@
+# Python Standard Library imports
+import json
+import pytest
+
+from unittest.mock import patch
+
+# local imports
+from src.producer import documents
+from src.producer.documents import get_document_format
+from src.producer.documents import iter_documents
+from src.producer.documents import iter_json_array
+from src.producer.documents import iter_json_lines
+
+
+def chunked(content, size):
+    return [content[i : i + size] for i in range(0, len(content), size)]
+
+
+def test_get_document_format():
+    """Test the project get_document_format() function."""
+
+    assert get_document_format("uploads/batch.jsonl") == "jsonl"
+    assert get_document_format("uploads/batch.ndjson") == "jsonl"
+    assert get_document_format("uploads/batch.array.json") == "array"
+    assert get_document_format("uploads/message.json") is None
+
+    fan_out = dict(documents.config["fan_out"], array_suffixes=[".json"])
+    with patch.dict(documents.config, {"fan_out": fan_out}):
+        assert get_document_format("uploads/message.json") == "array"
+
+
+def test_iter_json_lines():
+    """Test the project iter_json_lines() function."""
+
+    content = b'{"a": 1}\n\n  {"b": 2}\r\n{"c": "\xc3\xa9"}'
+
+    # lines may be split across chunks anywhere, even inside a character
+    for size in (1, 2, 5, 100):
+        assert list(iter_json_lines(chunked(content, size))) == [
+            (0, '{"a": 1}'),
+            (1, '{"b": 2}'),
+            (2, '{"c": "é"}'),
+        ]
+
+    with pytest.raises(ValueError):
+        list(iter_json_lines(chunked(b'{"a": "' + b"x" * 100, 10), max_size=50))
+
+
+def test_iter_json_array():
+    """Test the project iter_json_array() function."""
+
+    values = [{"text": "é" * i, "n": [1, 2.5, None, True]} for i in range(50)]
+    values += [12345, "text", [], {}]
+    content = json.dumps(values, indent=2, ensure_ascii=False).encode("utf-8")
+
+    # documents and numbers may be split across chunks anywhere
+    for size in (1, 3, 7, 64, len(content)):
+        parsed = list(iter_json_array(chunked(content, size)))
+
+        assert [position for position, _, _ in parsed] == list(range(len(values)))
+        assert [document for _, _, document in parsed] == values
+        assert [json.loads(text) for _, text, _ in parsed] == values
+
+    assert list(iter_json_array([b" [ ] \n"])) == []
+    assert list(iter_json_array([b"[1", b"2,3", b"4]"])) == [
+        (0, "12", 12),
+        (1, "34", 34),
+    ]
+
+    for content in (b"{}", b"[1,", b"[1 2]", b"[1,]", b"[1] [2]"):
+        with pytest.raises(ValueError):
+            list(iter_json_array(chunked(content, 2)))
+
+    # a document that never ends is not read to the end of the stream
+    unterminated = [b'["'] + [b"x" * 100] * 100
+    with pytest.raises(ValueError, match="longer than 1000"):
+        list(iter_json_array(unterminated, max_size=1000))
+
+
+def test_iter_documents():
+    """Test the project iter_documents() function."""
+
+    assert list(iter_documents([b"{}\n[]\n"], "jsonl")) == [
+        (0, "{}", None),
+        (1, "[]", None),
+    ]
+    assert list(iter_documents([b"[{}]"], "array")) == [(0, "{}", {})]
+
+    with pytest.raises(ValueError):
+        iter_documents([b""], "csv")
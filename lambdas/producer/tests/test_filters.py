@@ -0,0 +1,76 @@
+# Python Standard Library imports
+import pytest
+
+from unittest.mock import patch
+
+# local imports
+from src.producer.filters import EXCLUDED
+from src.producer.filters import NOT_INCLUDED
+from src.producer.filters import FilterRule
+from src.producer.filters import ObjectFilter
+from src.producer.filters import clear_object_filter
+from src.producer.filters import get_object_filter
+from src.producer import filters
+
+
+def test_filter_rule():
+    """Test the project FilterRule class."""
+
+    # every condition of a rule must match
+    rule = FilterRule({"prefix": "incoming/", "suffix": [".json", ".jsonl"]})
+    assert rule.matches("incoming/a.json", 10)
+    assert rule.matches("incoming/a.jsonl", 10)
+    assert not rule.matches("incoming/a.csv", 10)
+    assert not rule.matches("archive/a.json", 10)
+
+    # globs match the whole key, and '*' also matches '/'
+    rule = FilterRule({"glob": "*/_temporary/*"})
+    assert rule.matches("jobs/1/_temporary/part-0", 10)
+    assert not rule.matches("jobs/1/part-0", 10)
+
+    # regular expressions are searched for anywhere in the key
+    rule = FilterRule({"regex": r"\d{4}-\d{2}-\d{2}"})
+    assert rule.matches("daily/2025-07-05.json", 10)
+    assert not rule.matches("daily/latest.json", 10)
+
+    rule = FilterRule({"min_size": 1, "max_size": 100})
+    assert rule.matches("a.json", 100)
+    assert not rule.matches("a.json", 0)
+    assert not rule.matches("a.json", 101)
+
+    with pytest.raises(ValueError):
+        FilterRule({})
+
+    with pytest.raises(ValueError):
+        FilterRule({"contains": "tmp"})
+
+
+def test_object_filter():
+    """Test the project ObjectFilter class."""
+
+    # without rules, every object is sent
+    assert ObjectFilter().reason("a.tmp", 0) is None
+
+    object_filter = ObjectFilter(
+        include=[{"suffix": ".json"}], exclude=[{"prefix": "drafts/"}]
+    )
+
+    assert object_filter.reason("orders/a.json", 10) is None
+    assert object_filter.reason("orders/a.csv", 10) == NOT_INCLUDED
+    assert object_filter.reason("drafts/a.json", 10) == EXCLUDED
+
+
+def test_get_object_filter():
+    """Test the project get_object_filter() function."""
+
+    object_filters = {"include": [], "exclude": [{"suffix": ".tmp"}]}
+
+    with patch.dict(filters.config, {"object_filters": object_filters}):
+        clear_object_filter()
+
+        # the filter is compiled once
+        object_filter = get_object_filter()
+        assert get_object_filter() is object_filter
+        assert object_filter.reason("upload.json.tmp", 10) == EXCLUDED
+
+    clear_object_filter()
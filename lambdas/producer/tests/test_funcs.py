@@ -1,23 +1,39 @@
 # Python Standard Library imports
+import copy
+import json
 import pytest
 import os
 
 from unittest import TestCase
-from io import BytesIO
+from unittest.mock import patch
 
 # 3rd party imports
 import boto3
 from moto import mock_aws
 
+from producer import calls
+from producer.calls import get_call_totals
+from producer.calls import reset_call_totals
+from producer.settings import clear_settings
+
 # local imports
-from src.producer.lambda_function import get_ssm_params
-from src.producer.lambda_function import verify_ssm_parameters
+from src.producer.settings import get_ssm_params
+from src.producer.settings import verify_ssm_parameters
 from src.producer.lambda_function import is_valid_event_source
 from src.producer.lambda_function import is_valid_obj_size
 from src.producer.lambda_function import get_s3_obj_key
-from src.producer.lambda_function import read_from_s3
 from src.producer.lambda_function import is_valid_json
+from src.producer.lambda_function import project_fields
+from src.producer.lambda_function import transform_object
 from src.producer.lambda_function import send_message_to_sqs
+from src.producer.lambda_function import batch_messages
+from src.producer.lambda_function import send_message_batch
+from src.producer.lambda_function import sink_objects
+from src.producer.lambda_function import lambda_handler
+from src.producer import lambda_function
+from src.producer.records import S3ObjectRecord
+from src.producer.resilience import Retrier
+from src.producer.routing import QueueRouter
 from tests.events import events
 from src.producer.config import config
 
@@ -125,33 +141,6 @@ def test_get_s3_obj_key():
         test_get_s3_obj_key(events["invalid_event"])
 
 
-@mock_aws
-@pytest.mark.usefixtures("aws_credentials")
-class TestReadFromS3(TestCase):
-    """Test the project read_from_s3() function."""
-
-    def setUp(self):
-        """Set up before testing the project read_from_s3() function."""
-
-        self.bucket_name = "my-test-bucket"
-        self.bucket_obj_name = "my-json-msg"
-        self.json_str = '{"text": "veni vidi vici", "timestamp": "2025-07-05T21:25:07.407022+00:00"}'
-
-        # create S3 bucket and object
-        s3 = boto3.client("s3")
-        s3.create_bucket(Bucket=self.bucket_name)
-        bytes_file_obj = bytes(self.json_str, encoding="utf-8")
-        file_obj = BytesIO(bytes_file_obj)
-        s3.upload_fileobj(file_obj, self.bucket_name, self.bucket_obj_name)
-
-    def test_read_from_s3(self):
-        """Test the project read_from_s3() function."""
-
-        # test a valid response
-        resp = read_from_s3(self.bucket_name, self.bucket_obj_name)
-        assert resp == self.json_str
-
-
 def test_is_valid_json():
     """Test the project is_valid_json() function."""
 
@@ -168,7 +157,38 @@ def test_is_valid_json():
         is_valid_json(non_json_str)
 
 
+def test_project_fields():
+    """Test the project project_fields() function."""
+
+    json_obj = {"text": "veni vidi vici", "author": "Caesar", "year": -47}
+
+    assert project_fields(json_obj, ["text"]) == {"text": "veni vidi vici"}
+    assert project_fields(json_obj, ["text", "missing"]) == {"text": "veni vidi vici"}
+
+    # no projection, or a document without any of the fields, passes through
+    assert project_fields(json_obj, None) is json_obj
+    assert project_fields(json_obj, ["missing"]) is json_obj
+    assert project_fields(["not", "a", "dict"], ["text"]) == ["not", "a", "dict"]
+
+
+def test_transform_object():
+    """Test the project transform_object() function."""
+
+    s3_object = S3ObjectRecord("my-bucket", "my-key", 100)
+    s3_object.body = '{"text": "veni vidi vici", "padding": "' + "x" * 50 + '"}'
+    s3_object.document = json.loads(s3_object.body)
+
+    transform_object(s3_object, ["text"], config["max_obj_size"])
+    assert s3_object.body == '{"text":"veni vidi vici"}'
+
+    # a message that is still too large after projection is rejected
+    s3_object.document = json.loads(s3_object.body)
+    with pytest.raises(ValueError):
+        transform_object(s3_object, ["text"], 10)
+
+
 @mock_aws
+@pytest.mark.usefixtures("aws_credentials")
 class TestSendMessageToSqs(TestCase):
     """Test the project send_message_to_sqs() function."""
 
@@ -194,3 +214,385 @@ class TestSendMessageToSqs(TestCase):
         resp = send_message_to_sqs(self.message_body, self.queue_url)
 
         assert resp is None
+
+
+def make_entry(entry_id, body="{}"):
+    return {"Id": entry_id, "MessageBody": body, "MessageAttributes": {}}
+
+
+class FakeSqs:
+    """An SQS client whose SendMessageBatch fails the entries the test scripts."""
+
+    def __init__(self, *failures):
+        self.failures = list(failures)
+        self.calls = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.calls.append([entry["Id"] for entry in Entries])
+        failed = self.failures.pop(0) if self.failures else []
+
+        return {
+            "Failed": [failure for failure in failed if failure["Id"] in self.calls[-1]]
+        }
+
+
+def test_batch_messages():
+    """Test the project batch_messages() function."""
+
+    messages = [("queue-a", make_entry(str(i))) for i in range(12)]
+    messages.insert(1, ("queue-b", make_entry("b")))
+
+    batches = [
+        (queue_url, [entry["Id"] for entry in entries])
+        for queue_url, entries in batch_messages(messages)
+    ]
+
+    # each call holds one queue's messages, at most ten of them
+    assert batches == [
+        ("queue-a", [str(i) for i in range(10)]),
+        ("queue-a", ["10", "11"]),
+        ("queue-b", ["b"]),
+    ]
+
+    # a call holds at most max_bytes of messages
+    messages = [("queue-a", make_entry(str(i), "x" * 100)) for i in range(3)]
+    assert [len(entries) for _, entries in batch_messages(messages, 10, 250)] == [
+        2,
+        1,
+    ]
+
+
+def test_send_message_batch(monkeypatch):
+    """Test the project send_message_batch() function retries failed messages."""
+
+    monkeypatch.setattr("src.producer.resilience.time.sleep", lambda seconds: None)
+
+    # message 1 fails on SQS's side and is resent on its own; message 2 is
+    # rejected as the sender's fault and is not
+    sqs = FakeSqs(
+        [
+            {"Id": "1", "Code": "InternalError", "SenderFault": False},
+            {"Id": "2", "Code": "InvalidMessageContents", "SenderFault": True},
+        ]
+    )
+    entries = [make_entry(str(i)) for i in range(3)]
+
+    errors = send_message_batch(entries, "queue-a", Retrier(max_attempts=3), sqs)
+
+    assert sqs.calls == [["0", "1", "2"], ["1"]]
+    assert list(errors) == ["2"]
+    assert errors["2"].response["Error"]["Code"] == "InvalidMessageContents"
+
+
+def test_sink_objects(monkeypatch):
+    """Test the project sink_objects() function."""
+
+    monkeypatch.setattr("src.producer.resilience.time.sleep", lambda seconds: None)
+
+    s3_objects = []
+    for i, queue_url in enumerate(("queue-a", "queue-b", "queue-a")):
+        s3_object = S3ObjectRecord("my-bucket", f"key-{i}", 10)
+        s3_object.body = "{}"
+        s3_object.queue_url = queue_url
+        s3_objects.append(s3_object)
+
+    sqs = FakeSqs([{"Id": "2", "Code": "InvalidMessageContents", "SenderFault": True}])
+    results = sink_objects(s3_objects, Retrier(max_attempts=3), sqs)
+
+    # one call per queue, and each message's outcome in its record's place
+    assert sqs.calls == [["0", "2"], ["1"]]
+    assert results[:2] == s3_objects[:2]
+    assert isinstance(results[2], Exception)
+
+
+def test_sink_objects_packed(monkeypatch):
+    """Test the project sink_objects() function packs documents into messages."""
+
+    monkeypatch.setattr("src.producer.resilience.time.sleep", lambda seconds: None)
+
+    s3_objects = []
+    for i, queue_url in enumerate(("queue-a", "queue-b", "queue-a", "queue-a")):
+        s3_object = S3ObjectRecord("my-bucket", f"key-{i}", 10)
+        s3_object.body = "{}"
+        s3_object.queue_url = queue_url
+        s3_objects.append(s3_object)
+
+    # the packed message of queue-a is rejected
+    sqs = FakeSqs([{"Id": "0", "Code": "InvalidMessageContents", "SenderFault": True}])
+    packing = dict(lambda_function.config["packing"], enabled=True)
+
+    with patch.dict(lambda_function.config, {"packing": packing}):
+        results = sink_objects(s3_objects, Retrier(max_attempts=3), sqs)
+
+    # one message per queue, and a failed message fails each of its documents
+    assert sqs.calls == [["0"], ["1"]]
+    assert results[1] is s3_objects[1]
+    assert all(isinstance(results[i], Exception) for i in (0, 2, 3))
+
+
+@mock_aws
+@pytest.mark.usefixtures("aws_credentials")
+class TestLambdaHandler(TestCase):
+    """Test the project lambda_handler() function."""
+
+    def setUp(self):
+        """Set up before testing the project lambda_handler() function."""
+
+        # the handler imports the installed 'producer' package, so its
+        # settings cache is the one to clear
+        clear_settings()
+
+        self.event = events["valid_event"]
+        self.bucket_name = self.event["Records"][0]["s3"]["bucket"]["name"]
+        self.obj_key = self.event["Records"][0]["s3"]["object"]["key"]
+        self.json_str = '{"text": "veni vidi vici", "timestamp": "2025-07-05T21:25:07.407022+00:00"}'
+
+        # create the input S3 bucket and object, the SQS queue and SSM parameters
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=self.bucket_name)
+        s3.put_object(Bucket=self.bucket_name, Key=self.obj_key, Body=self.json_str)
+
+        self.sqs = boto3.client("sqs")
+        self.queue_url = self.sqs.create_queue(QueueName="my-test-queue")["QueueUrl"]
+
+        ssm = boto3.client("ssm", region_name="us-west-2")
+        for name, value in (
+            ("input-bucket-name", self.bucket_name),
+            ("queue-url", self.queue_url),
+        ):
+            ssm.put_parameter(
+                Name=f"{config['ssm_param_path']}/{name}", Value=value, Type="String"
+            )
+
+    def test_lambda_handler(self):
+        """Test the project lambda_handler() function."""
+
+        resp = lambda_handler(self.event, None)
+        assert resp["statusCode"] == 200
+
+        # the content of the S3 object is sent to the SQS queue
+        messages = self.sqs.receive_message(
+            QueueUrl=self.queue_url, MessageAttributeNames=["All"]
+        )["Messages"]
+        assert messages[0]["Body"] == self.json_str
+
+        # the message carries a correlation ID and the time S3 received the object
+        attributes = messages[0]["MessageAttributes"]
+        assert attributes["CorrelationId"]["StringValue"]
+        assert attributes["IngestTimestamp"]["StringValue"] == "1567539447192"
+
+        # objects larger than the SQS message size limit are rejected
+        with pytest.raises(ValueError):
+            lambda_handler(events["obj_too_large_event"], None)
+
+    def test_lambda_handler_fan_out(self):
+        """Test the project lambda_handler() function sends each document of a JSON lines object."""
+
+        s3 = boto3.client("s3")
+        lines = "".join(json.dumps({"text": f"line {i}"}) + "\n" for i in range(25))
+        s3.put_object(Bucket=self.bucket_name, Key="batch.jsonl", Body=lines)
+
+        # the object is larger than one message may be, but each line fits
+        event = copy.deepcopy(self.event)
+        event["Records"][0]["s3"]["object"]["key"] = "batch.jsonl"
+        event["Records"][0]["s3"]["object"]["size"] = 10 * config["max_obj_size"]
+
+        # the invocation fails with the sink halfway through the object
+        sink_objects = lambda_function.sink_objects
+
+        def failing_sink_objects(s3_objects, *args, **kwargs):
+            if any(s3_object.position >= 15 for s3_object in s3_objects):
+                raise RuntimeError("Lambda function timed out.")
+            return sink_objects(s3_objects, *args, **kwargs)
+
+        with patch.object(lambda_function, "sink_objects", failing_sink_objects):
+            with pytest.raises(RuntimeError):
+                lambda_handler(event, None)
+
+        # the documents sent so far are saved as a checkpoint on the object
+        tags = s3.get_object_tagging(Bucket=self.bucket_name, Key="batch.jsonl")
+        assert tags["TagSet"] == [
+            {"Key": config["fan_out"]["checkpoint_tag"], "Value": "10"}
+        ]
+
+        # the retried invocation sends only the rest, so each line is sent once
+        resp = lambda_handler(event, None)
+        assert resp["statusCode"] == 200
+
+        bodies = []
+        while True:
+            messages = self.sqs.receive_message(
+                QueueUrl=self.queue_url, MaxNumberOfMessages=10
+            ).get("Messages", [])
+            if not messages:
+                break
+            bodies.extend(message["Body"] for message in messages)
+
+        assert sorted(bodies) == sorted(lines.splitlines())
+
+    def test_lambda_handler_skipped_failure(self):
+        """Test the project lambda_handler() function fails if a document failed in a 'skip' stage."""
+
+        s3 = boto3.client("s3")
+        lines = [json.dumps({"text": f"line {i}"}) for i in range(25)]
+        lines[12] = "not json"
+        s3.put_object(Bucket=self.bucket_name, Key="batch.jsonl", Body="\n".join(lines))
+
+        event = copy.deepcopy(self.event)
+        event["Records"][0]["s3"]["object"]["key"] = "batch.jsonl"
+
+        stages = dict(lambda_function.config["stages"], decode={"on_error": "skip"})
+        with patch.dict(lambda_function.config, {"stages": stages}):
+            with pytest.raises(RuntimeError):
+                lambda_handler(event, None)
+
+        # the documents after the failed one were sent, but the checkpoint
+        # stops short of it, so a retry sends it
+        tags = s3.get_object_tagging(Bucket=self.bucket_name, Key="batch.jsonl")
+        assert tags["TagSet"] == [
+            {"Key": config["fan_out"]["checkpoint_tag"], "Value": "12"}
+        ]
+
+    def test_lambda_handler_packed(self):
+        """Test the project lambda_handler() function packs the documents of an object."""
+
+        s3 = boto3.client("s3")
+        lines = "".join(json.dumps({"text": f"line {i}"}) + "\n" for i in range(25))
+        s3.put_object(Bucket=self.bucket_name, Key="batch.jsonl", Body=lines)
+
+        event = copy.deepcopy(self.event)
+        event["Records"][0]["s3"]["object"]["key"] = "batch.jsonl"
+
+        packing = dict(lambda_function.config["packing"], enabled=True)
+        with patch.dict(lambda_function.config, {"packing": packing}):
+            resp = lambda_handler(event, None)
+        assert resp["statusCode"] == 200
+
+        # every line is sent, in order, in one message
+        messages = self.sqs.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=10,
+            MessageAttributeNames=["All"],
+        )["Messages"]
+        assert len(messages) == 1
+        assert messages[0]["MessageAttributes"]["PackedDocuments"]["StringValue"] == (
+            "25"
+        )
+
+        documents = json.loads(messages[0]["Body"])["documents"]
+        assert [entry["document"] for entry in documents] == [
+            json.loads(line) for line in lines.splitlines()
+        ]
+        assert len({entry["correlation_id"] for entry in documents}) == 25
+
+    def test_lambda_handler_call_budget(self):
+        """Test the project lambda_handler() function stays within its AWS call budget."""
+
+        s3 = boto3.client("s3")
+        lines = "".join(json.dumps({"text": f"line {i}"}) + "\n" for i in range(25))
+        s3.put_object(Bucket=self.bucket_name, Key="batch.jsonl", Body=lines)
+
+        # an event for the JSON object and one for the JSON lines object
+        event = copy.deepcopy(self.event)
+        record = copy.deepcopy(event["Records"][0])
+        record["s3"]["object"]["key"] = "batch.jsonl"
+        event["Records"].append(record)
+
+        published = []
+        reset_call_totals()
+
+        def publish_call_totals():
+            published.append(get_call_totals(reset=True))
+
+        with patch.object(calls, "publish_call_totals", publish_call_totals):
+            lambda_handler(copy.deepcopy(event), None)
+            lambda_handler(copy.deepcopy(event), None)
+
+        cold, warm = published
+
+        # the settings are loaded with one call, on the first invocation only
+        assert cold["ssm"]["GetParametersByPath"]["calls"] == 1
+        assert "ssm" not in warm
+
+        for totals in published:
+            # each object is read once
+            assert totals["s3"]["GetObject"]["calls"] == 2
+
+            # the 26 documents are sent 10 to a batch
+            assert totals["sqs"]["SendMessageBatch"]["calls"] <= 3
+            assert totals["sqs"]["SendMessageBatch"]["errors"] == 0
+
+    def test_lambda_handler_filters(self):
+        """Test the project lambda_handler() function drops filtered objects."""
+
+        # a temp file that is gone and too large: it is dropped before it is
+        # read or its size checked
+        event = copy.deepcopy(events["obj_too_large_event"])
+        event["Records"][0]["s3"]["object"]["key"] = "upload.json.tmp"
+
+        resp = lambda_handler(event, None)
+        assert resp["statusCode"] == 200
+
+        messages = self.sqs.receive_message(QueueUrl=self.queue_url)
+        assert "Messages" not in messages
+
+    def test_lambda_handler_projection(self):
+        """Test the project lambda_handler() function with field projection."""
+
+        with patch.dict(lambda_function.config, {"projection_fields": ["text"]}):
+            resp = lambda_handler(self.event, None)
+        assert resp["statusCode"] == 200
+
+        # only the projected fields are sent to the SQS queue
+        messages = self.sqs.receive_message(QueueUrl=self.queue_url)["Messages"]
+        assert json.loads(messages[0]["Body"]) == {"text": "veni vidi vici"}
+
+    def test_lambda_handler_queue_shards(self):
+        """Test the project lambda_handler() function with several queue shards."""
+
+        queue_urls = [
+            self.queue_url,
+            self.sqs.create_queue(QueueName="my-test-queue-1")["QueueUrl"],
+        ]
+        ssm = boto3.client("ssm", region_name="us-west-2")
+        ssm.put_parameter(
+            Name=f"{config['ssm_param_path']}/queue-url",
+            Value=",".join(queue_urls),
+            Type="String",
+            Overwrite=True,
+        )
+
+        resp = lambda_handler(self.event, None)
+        assert resp["statusCode"] == 200
+
+        # the message is sent to the queue its key hashes to, and only that one
+        expected = QueueRouter(queue_urls).route(self.obj_key)
+        for queue_url in queue_urls:
+            messages = self.sqs.receive_message(QueueUrl=queue_url).get("Messages", [])
+            assert len(messages) == (1 if queue_url == expected else 0)
+
+    def test_lambda_handler_priority_lane(self):
+        """Test the project lambda_handler() function with a priority lane."""
+
+        priority_queue_url = self.sqs.create_queue(QueueName="my-priority-queue")[
+            "QueueUrl"
+        ]
+        ssm = boto3.client("ssm", region_name="us-west-2")
+        ssm.put_parameter(
+            Name=f"{config['ssm_param_path']}/priority-queue-url",
+            Value=priority_queue_url,
+            Type="String",
+        )
+
+        # small objects go down the priority lane
+        rules = [{"max_size": 8192}]
+        with patch.dict(lambda_function.config, {"priority_rules": rules}):
+            resp = lambda_handler(self.event, None)
+        assert resp["statusCode"] == 200
+
+        assert "Messages" not in self.sqs.receive_message(QueueUrl=self.queue_url)
+
+        messages = self.sqs.receive_message(
+            QueueUrl=priority_queue_url, MessageAttributeNames=["All"]
+        )["Messages"]
+        assert messages[0]["MessageAttributes"]["Lane"]["StringValue"] == "priority"
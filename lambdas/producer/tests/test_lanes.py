@@ -0,0 +1,56 @@
+# Python Standard Library imports
+import pytest
+
+# local imports
+from src.producer.lanes import matches_rule
+from src.producer.lanes import pick_lane
+from src.producer.lanes import validate_lane_rules
+from src.producer.records import S3ObjectRecord
+
+RULES = [
+    {"max_size": 1024},
+    {"key_prefix": "urgent/"},
+    {"metadata": {"priority": "high"}},
+]
+
+
+def make_object(key="bulk/file.json", size=4096, metadata=None):
+    s3_object = S3ObjectRecord("my-bucket", key, size)
+    s3_object.metadata = metadata
+
+    return s3_object
+
+
+def test_validate_lane_rules():
+    """Test the project validate_lane_rules() function."""
+
+    assert validate_lane_rules(RULES) is None
+
+    with pytest.raises(ValueError):
+        validate_lane_rules([{}])
+
+    with pytest.raises(ValueError):
+        validate_lane_rules([{"min_size": 1024}])
+
+
+def test_matches_rule():
+    """Test the project matches_rule() function."""
+
+    # every condition of a rule must match
+    rule = {"max_size": 1024, "key_prefix": "urgent/"}
+
+    assert matches_rule(make_object("urgent/file.json", 100), rule)
+    assert not matches_rule(make_object("urgent/file.json", 4096), rule)
+    assert not matches_rule(make_object("bulk/file.json", 100), rule)
+
+
+def test_pick_lane():
+    """Test the project pick_lane() function."""
+
+    assert pick_lane(make_object(size=100), RULES) == "priority"
+    assert pick_lane(make_object("urgent/file.json"), RULES) == "priority"
+    assert pick_lane(make_object(metadata={"priority": "high"}), RULES) == "priority"
+
+    assert pick_lane(make_object(), RULES) == "bulk"
+    assert pick_lane(make_object(metadata={"priority": "low"}), RULES) == "bulk"
+    assert pick_lane(make_object(size=100), []) == "bulk"
@@ -0,0 +1,84 @@
+# Python Standard Library imports
+import json
+
+# local imports
+from src.producer.packing import pack_messages
+from src.producer.records import S3ObjectRecord
+from src.producer.tracing import build_message_attributes
+
+
+def make_message(queue_url, body, lane=None, event_time=None):
+    s3_object = S3ObjectRecord("my-bucket", "batch.jsonl", 0, event_time=event_time)
+    s3_object.lane = lane
+
+    return (
+        queue_url,
+        {"MessageBody": body, "MessageAttributes": build_message_attributes(s3_object)},
+    )
+
+
+def test_pack_messages():
+    """Test the project pack_messages() function."""
+
+    messages = [
+        make_message("queue-a", '{"n": 0}', event_time="2019-09-03T19:37:27.192Z"),
+        make_message("queue-b", '{"n": 1}'),
+        make_message("queue-a", '{"n": 2}', event_time="2019-09-03T19:37:28.192Z"),
+        make_message("queue-a", '{"n": 3}', lane="priority"),
+    ]
+
+    packed = list(pack_messages(messages, 65536))
+
+    # documents are packed per queue and lane; a lone document is sent as it is
+    assert [(queue_url, positions) for queue_url, _, positions in packed] == [
+        ("queue-a", [0, 2]),
+        ("queue-b", [1]),
+        ("queue-a", [3]),
+    ]
+    assert packed[1][1] is messages[1][1]
+
+    _, entry, _ = packed[0]
+    attributes = entry["MessageAttributes"]
+    assert attributes["PackedDocuments"] == {"DataType": "Number", "StringValue": "2"}
+    assert attributes["IngestTimestamp"]["StringValue"] == "1567539447192"
+
+    # each document keeps its correlation ID and ingest time
+    assert json.loads(entry["MessageBody"]) == {
+        "documents": [
+            {
+                "correlation_id": messages[position][1]["MessageAttributes"][
+                    "CorrelationId"
+                ]["StringValue"],
+                "ingest_timestamp": int(
+                    messages[position][1]["MessageAttributes"]["IngestTimestamp"][
+                        "StringValue"
+                    ]
+                ),
+                "document": {"n": position},
+            }
+            for position in (0, 2)
+        ]
+    }
+
+
+def test_pack_messages_target_size():
+    """Test the project pack_messages() function keeps packed messages under the target size."""
+
+    messages = [
+        make_message("queue-a", json.dumps({"text": "x" * 200})) for _ in range(50)
+    ]
+
+    packed = list(pack_messages(messages, 2048))
+
+    assert sorted(
+        position for _, _, positions in packed for position in positions
+    ) == list(range(50))
+
+    for _, entry, positions in packed:
+        size = len(entry["MessageBody"].encode("utf-8"))
+        size += sum(
+            len(name) + len(attribute["DataType"]) + len(attribute["StringValue"])
+            for name, attribute in entry["MessageAttributes"].items()
+        )
+        assert size <= 2048
+        assert len(positions) > 1
@@ -0,0 +1,67 @@
+# Python Standard Library imports
+import pytest
+
+# local imports
+from src.producer.records import parse_s3_record
+from src.producer.records import parse_s3_event
+from tests.events import events
+
+
+def test_parse_s3_record():
+    """Test the project parse_s3_record() function."""
+
+    raw_record = events["valid_event"]["Records"][0]
+    record = parse_s3_record(raw_record)
+
+    assert record.bucket_name == "my-valid-test-bucket"
+    assert record.key == "b21b84d653bb07b05b1e6b33684dc11b"
+    assert record.size == 5144
+
+    # records use slots, so no per-instance dictionary is allocated
+    assert not hasattr(record, "__dict__")
+
+    # URL-encoded keys are decoded during parsing
+    encoded_record = {
+        "s3": {
+            "bucket": {"name": "blah"},
+            "object": {"key": "my+file%3A1.json", "size": 0},
+        }
+    }
+    assert parse_s3_record(encoded_record).key == "my file:1.json"
+
+    with pytest.raises(ValueError):
+        parse_s3_record({"s3": {"bucket": {"name": "blah"}}})
+
+    with pytest.raises(ValueError):
+        parse_s3_record(
+            {"s3": {"bucket": {"name": "blah"}, "object": {"key": "", "size": 0}}}
+        )
+
+    # a record without a valid size could not be checked against the size limit
+    for size in (None, "5144", -1):
+        with pytest.raises(ValueError):
+            parse_s3_record(
+                {
+                    "s3": {
+                        "bucket": {"name": "blah"},
+                        "object": {"key": "k", "size": size},
+                    }
+                }
+            )
+
+    with pytest.raises(ValueError):
+        parse_s3_record({"s3": {"bucket": {"name": "blah"}, "object": {"key": "k"}}})
+
+
+def test_parse_s3_event():
+    """Test the project parse_s3_event() function."""
+
+    records = parse_s3_event(events["valid_event"])
+
+    assert len(records) == 1
+
+    with pytest.raises(ValueError):
+        parse_s3_event(events["invalid_event"])
+
+    with pytest.raises(ValueError):
+        parse_s3_event({"Records": []})
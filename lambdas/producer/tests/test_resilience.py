@@ -0,0 +1,185 @@
+# Python Standard Library imports
+import pytest
+
+# 3rd party imports
+from botocore.exceptions import ClientError
+
+# local imports
+from src.producer.resilience import CircuitBreaker
+from src.producer.resilience import CircuitOpenError
+from src.producer.resilience import Deadline
+from src.producer.resilience import Retrier
+from src.producer.resilience import get_circuit_breaker
+from src.producer.resilience import is_retryable
+
+
+def client_error(code):
+    """Build a botocore ClientError with the given error code."""
+
+    return ClientError({"Error": {"Code": code, "Message": code}}, "PutObject")
+
+
+class FlakyCall:
+    """A callable that raises the given exceptions before it succeeds."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+
+        if self.errors:
+            raise self.errors.pop(0)
+
+        return "ok"
+
+
+class FakeContext:
+    """A Lambda context with a fixed amount of remaining time."""
+
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    """Skip backoff sleeps."""
+
+    monkeypatch.setattr("src.producer.resilience.time.sleep", lambda seconds: None)
+
+
+def test_is_retryable():
+    """Test the project is_retryable() function."""
+
+    assert is_retryable(client_error("SlowDown"))
+    assert is_retryable(client_error("ThrottlingException"))
+    assert not is_retryable(client_error("AccessDenied"))
+    assert not is_retryable(ValueError("blah"))
+
+
+def test_circuit_breaker(monkeypatch):
+    """Test the project CircuitBreaker class."""
+
+    breaker = CircuitBreaker("test", window=4, min_calls=4, failure_rate=0.5)
+
+    # the circuit stays closed until enough calls have been seen
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # once the reset timeout has passed a single trial call is let through
+    breaker.reset_timeout = 0
+    breaker.before_call()
+    assert breaker.state == "half_open"
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_retrier_call():
+    """Test the project Retrier.call() method."""
+
+    retrier = Retrier(base_delay=0.001, max_delay=0.01)
+    func = FlakyCall(client_error("SlowDown"), client_error("SlowDown"))
+
+    assert retrier.call("test-retry", func) == "ok"
+    assert func.calls == 3
+    assert retrier.budget == 48
+
+    # errors that are not throttling are raised without a retry
+    func = FlakyCall(client_error("AccessDenied"))
+    with pytest.raises(ClientError):
+        retrier.call("test-retry", func)
+    assert func.calls == 1
+
+
+def test_retrier_limits():
+    """Test the project Retrier attempt, budget and deadline limits."""
+
+    # attempts are limited per call
+    retrier = Retrier(max_attempts=2, base_delay=0.001)
+    func = FlakyCall(*[client_error("SlowDown")] * 3)
+    with pytest.raises(ClientError):
+        retrier.call("test-limits", func)
+    assert func.calls == 2
+
+    # retries are limited per invocation
+    retrier = Retrier(budget=1, base_delay=0.001)
+    func = FlakyCall(*[client_error("SlowDown")] * 3)
+    with pytest.raises(ClientError):
+        retrier.call("test-limits", func)
+    assert func.calls == 2
+
+    # no retry is made when the invocation is about to time out
+    retrier = Retrier(context=FakeContext(1000), min_remaining_ms=2000)
+    func = FlakyCall(client_error("SlowDown"))
+    with pytest.raises(ClientError):
+        retrier.call("test-limits", func)
+    assert func.calls == 1
+
+
+def test_retrier_circuit_breaker():
+    """Test the project Retrier fails fast once a circuit is open."""
+
+    breaker = get_circuit_breaker("test-breaker")
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+
+    func = FlakyCall()
+    with pytest.raises(CircuitOpenError):
+        Retrier().call("test-breaker", func)
+    assert func.calls == 0
+
+
+def test_retrier_circuit_breaker_half_open():
+    """Test the project Retrier closes a half-open circuit on an error that is not retryable."""
+
+    breaker = get_circuit_breaker("test-half-open")
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+    breaker.reset_timeout = 0
+
+    # the trial call reaches the service, which refuses it
+    with pytest.raises(ClientError):
+        Retrier().call("test-half-open", FlakyCall(client_error("NoSuchKey")))
+    assert breaker.state == "closed"
+
+    # so the calls after it are let through
+    func = FlakyCall()
+    for _ in range(3):
+        assert Retrier().call("test-half-open", func) == "ok"
+    assert func.calls == 3
+
+
+def test_deadline():
+    """Test the project Deadline class."""
+
+    context = FakeContext(60000)
+    deadline = Deadline(context, margin_ms=5000)
+
+    assert deadline.remaining() == 55.0
+    assert not deadline.expired()
+
+    context.remaining_ms = 5000
+    assert deadline.expired()
+
+    # the margin is capped at half of the invocation's time
+    assert Deadline(FakeContext(3000), margin_ms=5000).remaining() == 1.5
+
+    # outside Lambda there is no deadline
+    assert Deadline().remaining() is None
+    assert not Deadline().expired()
@@ -0,0 +1,55 @@
+# Python Standard Library imports
+import pytest
+
+# local imports
+from src.producer.routing import QueueRouter
+from src.producer.routing import routing_key
+
+QUEUE_URLS = [
+    f"https://sqs.us-west-2.amazonaws.com/123456789012/queue-{i}" for i in range(4)
+]
+
+
+def test_routing_key():
+    """Test the project routing_key() function."""
+
+    assert (
+        routing_key("tenant-a/2025/07/05/file.json") == "tenant-a/2025/07/05/file.json"
+    )
+    assert routing_key("tenant-a/2025/07/05/file.json", 1) == "tenant-a"
+    assert routing_key("file.json", 2) == "file.json"
+
+
+def test_queue_router_hash():
+    """Test the project QueueRouter class with hash routing."""
+
+    router = QueueRouter(QUEUE_URLS)
+    keys = [f"file-{i}.json" for i in range(100)]
+
+    # a key always goes to the same queue, and keys are spread over every queue
+    assert [router.route(key) for key in keys] == [router.route(key) for key in keys]
+    assert {router.route(key) for key in keys} == set(QUEUE_URLS)
+
+    # with a key depth, every object under a prefix goes to the same queue
+    router = QueueRouter(QUEUE_URLS, key_depth=1)
+    assert len({router.route(f"tenant-a/file-{i}.json") for i in range(100)}) == 1
+
+
+def test_queue_router_round_robin():
+    """Test the project QueueRouter class with round-robin routing."""
+
+    router = QueueRouter(QUEUE_URLS, "round_robin")
+
+    assert [router.route("file.json") for _ in range(8)] == QUEUE_URLS * 2
+
+
+def test_queue_router_single_queue():
+    """Test the project QueueRouter class with a single queue."""
+
+    assert QueueRouter(QUEUE_URLS[0]).route("file.json") == QUEUE_URLS[0]
+
+    with pytest.raises(ValueError):
+        QueueRouter([])
+
+    with pytest.raises(ValueError):
+        QueueRouter(QUEUE_URLS, "random")
@@ -0,0 +1,243 @@
+# Python Standard Library imports
+import io
+import os
+import pytest
+
+from unittest import TestCase
+from io import BytesIO
+
+# 3rd party imports
+import boto3
+from moto import mock_aws
+
+# local imports
+from src.producer.checkpoints import Checkpoints
+from src.producer.filters import ObjectFilter
+from src.producer.lambda_function import build_pipeline
+from src.producer.records import S3ObjectRecord
+from src.producer.sources import DirectorySource
+from src.producer.sources import JsonLinesSource
+from src.producer.sources import S3EventSource
+from src.producer.sources import read_from_s3
+from src.producer.sources import to_event_time
+
+
+@pytest.fixture(scope="function")
+def aws_credentials():
+    """Mocked AWS Credentials for moto."""
+
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"  # nosec
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"  # nosec
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"  # nosec
+    os.environ["AWS_SESSION_TOKEN"] = "testing"  # nosec
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+
+
+@mock_aws
+@pytest.mark.usefixtures("aws_credentials")
+class TestReadFromS3(TestCase):
+    """Test the project read_from_s3() function."""
+
+    def setUp(self):
+        """Set up before testing the project read_from_s3() function."""
+
+        self.bucket_name = "my-test-bucket"
+        self.bucket_obj_name = "my-json-msg"
+        self.json_str = '{"text": "veni vidi vici", "timestamp": "2025-07-05T21:25:07.407022+00:00"}'
+
+        # create S3 bucket and object
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=self.bucket_name)
+        bytes_file_obj = bytes(self.json_str, encoding="utf-8")
+        file_obj = BytesIO(bytes_file_obj)
+        s3.upload_fileobj(file_obj, self.bucket_name, self.bucket_obj_name)
+
+    def test_read_from_s3(self):
+        """Test the project read_from_s3() function."""
+
+        # test a valid response
+        resp = read_from_s3(self.bucket_name, self.bucket_obj_name)
+        assert resp == self.json_str
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_s3_event_source():
+    """Test the project S3EventSource class."""
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="my-bucket")
+        s3.put_object(
+            Bucket="my-bucket", Key="my-key", Body="{}", Metadata={"lane": "x"}
+        )
+
+        s3_objects = [S3ObjectRecord("my-bucket", "my-key", 2)]
+        source = S3EventSource(s3_objects, client=s3)
+
+        assert list(source) == s3_objects
+
+        record = source.fetch(s3_objects[0])
+        assert record.body == "{}"
+        assert record.metadata == {"lane": "x"}
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_s3_event_source_documents():
+    """Test the project S3EventSource class splits multi-document objects."""
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="my-bucket")
+        lines = "".join(f'{{"i": {i}}}\n' for i in range(5))
+        s3.put_object(
+            Bucket="my-bucket", Key="batch.jsonl", Body=lines, Metadata={"lane": "x"}
+        )
+        s3.put_object(Bucket="my-bucket", Key="batch.array.json", Body='[{"i": 0}, 1]')
+
+        s3_objects = [
+            S3ObjectRecord("my-bucket", "single.json", 2, etag="e1"),
+            S3ObjectRecord("my-bucket", "batch.jsonl", len(lines), etag="e2"),
+            S3ObjectRecord("my-bucket", "batch.array.json", 13),
+        ]
+        records = list(S3EventSource(s3_objects, client=s3))
+
+        # a single-document object is left to be fetched; the others are
+        # read and split into a record per document
+        assert records[0] is s3_objects[0]
+        assert [(record.key, record.position) for record in records[1:]] == [
+            *(("batch.jsonl", i) for i in range(5)),
+            ("batch.array.json", 0),
+            ("batch.array.json", 1),
+        ]
+
+        document = records[2]
+        assert document.body == '{"i": 1}'
+        assert document.size == 8
+        assert document.etag == "e2"
+        assert document.metadata == {"lane": "x"}
+        # JSON lines are decoded later, array documents as the array is read
+        assert document.document is None
+        assert records[-2].document == {"i": 0}
+
+        # documents are not fetched again
+        assert S3EventSource([], client=s3).fetch(document).body == '{"i": 1}'
+
+        # documents already sent by an earlier invocation are skipped
+        s3.put_object_tagging(
+            Bucket="my-bucket",
+            Key="batch.jsonl",
+            Tagging={"TagSet": [{"Key": "sent", "Value": "3"}]},
+        )
+        checkpoints = Checkpoints(client=s3, tag="sent")
+        source = S3EventSource(s3_objects[1:2], client=s3, checkpoints=checkpoints)
+        assert [record.position for record in source] == [3, 4]
+
+        # an object from an unexpected bucket is rejected before it, or its
+        # checkpoint, is read
+        source = S3EventSource(
+            [S3ObjectRecord("other-bucket", "batch.jsonl", 10)],
+            client=s3,
+            checkpoints=checkpoints,
+            bucket_name="my-bucket",
+        )
+        with pytest.raises(ValueError, match="invalid S3 source"):
+            list(source)
+
+
+def test_directory_source(tmp_path):
+    """Test the project DirectorySource class."""
+
+    (tmp_path / "b.json").write_text('{"b": 1}')
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "a.json").write_text('{"a": 1}')
+    (tmp_path / "c.json.part").write_text("{")
+    (tmp_path / "notes.txt").write_text("notes")
+
+    object_filter = ObjectFilter(exclude=[{"suffix": ".part"}])
+    source = DirectorySource(tmp_path, "**/*", object_filter)
+    records = list(source)
+
+    # files are listed in name order, without filtered files
+    assert [record.key for record in records] == [
+        "b.json",
+        "nested/a.json",
+        "notes.txt",
+    ]
+    assert records[0].size == 8
+    assert records[0].bucket_name is None
+    assert records[0].event_time.endswith("Z")
+
+    assert source.fetch(records[1]).body == '{"a": 1}'
+    assert records[1].metadata == {}
+
+
+def test_directory_source_documents(tmp_path):
+    """Test the project DirectorySource class splits multi-document files."""
+
+    (tmp_path / "a.json").write_text('{"a": 1}')
+    (tmp_path / "b.ndjson").write_text('{"b": 1}\n{"b": 2}\n')
+
+    records = list(DirectorySource(tmp_path, "*"))
+
+    assert [(record.key, record.position) for record in records] == [
+        ("a.json", None),
+        ("b.ndjson", 0),
+        ("b.ndjson", 1),
+    ]
+    assert records[2].body == '{"b": 2}'
+
+
+def test_directory_source_watch(tmp_path):
+    """Test the project DirectorySource class watches for new files."""
+
+    (tmp_path / "a.json").write_text("{}")
+    source = DirectorySource(tmp_path, watch=True, poll_interval=0.01, idle_timeout=0.1)
+    keys = []
+
+    for record in source:
+        keys.append(record.key)
+
+        # a file written while the source is watching is sent too
+        if record.key == "a.json":
+            (tmp_path / "b.json").write_text("{}")
+
+    assert keys == ["a.json", "b.json"]
+
+
+def test_json_lines_source():
+    """Test the project JsonLinesSource class."""
+
+    stream = io.StringIO('{"a": 1}\n\n{"b": "\u00e9"}\n')
+    records = list(JsonLinesSource(stream))
+
+    # blank lines are skipped, and each record already has its line
+    assert [record.key for record in records] == ["stdin:1", "stdin:3"]
+    assert [record.body for record in records] == ['{"a": 1}', '{"b": "\u00e9"}']
+    assert records[1].size == len('{"b": "\u00e9"}'.encode())
+
+
+def test_to_event_time():
+    """Test the project to_event_time() function."""
+
+    assert to_event_time(1567539447.192) == "2019-09-03T19:37:27.192Z"
+
+
+@pytest.mark.usefixtures("aws_credentials")
+def test_pipeline_local_source():
+    """Test the producer pipeline sends the records of a local source."""
+
+    with mock_aws():
+        sqs = boto3.client("sqs")
+        queue_url = sqs.create_queue(QueueName="my-test-queue")["QueueUrl"]
+
+        source = JsonLinesSource(
+            io.StringIO("".join(f'{{"i": {i}}}\n' for i in range(25)))
+        )
+        pipeline = build_pipeline(source, [queue_url], sqs)
+
+        assert sum(1 for _ in pipeline.run(source)) == 25
+
+        attributes = sqs.get_queue_attributes(
+            QueueUrl=queue_url, AttributeNames=["ApproximateNumberOfMessages"]
+        )
+        assert attributes["Attributes"]["ApproximateNumberOfMessages"] == "25"
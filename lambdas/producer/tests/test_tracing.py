@@ -0,0 +1,45 @@
+# local imports
+from src.producer.records import S3ObjectRecord
+from src.producer.tracing import CORRELATION_ID_ATTRIBUTE
+from src.producer.tracing import INGEST_TIMESTAMP_ATTRIBUTE
+from src.producer.tracing import build_message_attributes
+from src.producer.tracing import to_epoch_ms
+
+
+def test_to_epoch_ms():
+    """Test the project to_epoch_ms() function."""
+
+    assert to_epoch_ms("2019-09-03T19:37:27.192Z") == 1567539447192
+    assert to_epoch_ms(None) is None
+    assert to_epoch_ms("not a time") is None
+
+
+def test_build_message_attributes():
+    """Test the project build_message_attributes() function."""
+
+    s3_object = S3ObjectRecord(
+        "my-bucket", "my-key", 100, event_time="2019-09-03T19:37:27.192Z"
+    )
+
+    attributes = build_message_attributes(s3_object, "my-correlation-id")
+
+    assert attributes[CORRELATION_ID_ATTRIBUTE] == {
+        "DataType": "String",
+        "StringValue": "my-correlation-id",
+    }
+    assert attributes[INGEST_TIMESTAMP_ATTRIBUTE] == {
+        "DataType": "Number",
+        "StringValue": "1567539447192",
+    }
+
+    # each message gets its own correlation ID by default, and the ingest time
+    # falls back to the current time
+    s3_object = S3ObjectRecord("my-bucket", "my-key", 100)
+    first = build_message_attributes(s3_object)
+    second = build_message_attributes(s3_object)
+
+    assert (
+        first[CORRELATION_ID_ATTRIBUTE]["StringValue"]
+        != second[CORRELATION_ID_ATTRIBUTE]["StringValue"]
+    )
+    assert int(first[INGEST_TIMESTAMP_ATTRIBUTE]["StringValue"]) > 1567539447192
@@ -0,0 +1,441 @@
+# Python Standard Library imports
+import argparse
+import compileall
+import os
+import shutil
+import statistics
+import subprocess  # nosec B404
+import sys
+import tempfile
+import tomllib
+import zipfile
+
+from pathlib import Path
+
+# third-party library imports
+from packaging.requirements import Requirement
+
+# the Lambda runtime's Python version and the distributions its image already
+# provides; boto3 and its dependencies are kept up to date by AWS
+TARGET_PYTHON = "3.13"
+RUNTIME_PROVIDED = frozenset(
+    ("boto3", "botocore", "s3transfer", "jmespath", "python-dateutil", "six", "urllib3")
+)
+
+# Lambda architectures and the wheel platforms built for them
+PLATFORMS = {
+    "x86_64": "manylinux2014_x86_64",
+    "arm64": "manylinux2014_aarch64",
+}
+
+# files and directories in dependencies that are never needed at runtime
+STRIP_DIRS = frozenset(("tests", "test", "testing", "__pycache__"))
+STRIP_SUFFIXES = (".pyi", ".pyx", ".pxd", ".c", ".h", ".md", ".rst")
+KEEP_METADATA = frozenset(("METADATA", "entry_points.txt"))
+
+# a fixed timestamp for every archive entry, so the same sources give the same zip
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def normalize(name):
+    """
+    Normalize a distribution name, as PEP 503 does.
+
+    :param name (str): The distribution name.
+    :return (str): The normalized name.
+    """
+
+    return name.lower().replace("_", "-").replace(".", "-")
+
+
+def read_project(lambda_dir):
+    """
+    Read a Lambda function's package and dependencies from its pyproject.toml.
+
+    :param lambda_dir (Path): The Lambda function's directory.
+    :return (tuple): The package directory and the list of dependency specifiers.
+    """
+
+    with open(lambda_dir / "pyproject.toml", "rb") as f:
+        pyproject = tomllib.load(f)
+
+    package = pyproject["tool"]["poetry"]["packages"][0]
+    package_dir = lambda_dir / package.get("from", ".") / package["include"]
+
+    return package_dir, pyproject["project"].get("dependencies", [])
+
+
+def select_dependencies(dependencies, python_version, prune):
+    """
+    Select the dependencies to install for the Lambda runtime.
+
+    pip evaluates the environment markers of the requirements it is given
+    against the Python running it, not the one passed as --python-version,
+    so the markers are evaluated here and dropped.
+
+    :param dependencies (list): The dependency specifiers from pyproject.toml.
+    :param python_version (str): The Python version of the Lambda runtime.
+    :param prune (set): The normalized names of the distributions to leave out.
+    :return (list): The dependency specifiers to install.
+    """
+
+    environment = {
+        "python_version": python_version,
+        "python_full_version": f"{python_version}.0",
+        "platform_system": "Linux",
+        "sys_platform": "linux",
+    }
+    selected = []
+
+    for dependency in dependencies:
+        requirement = Requirement(dependency)
+
+        if normalize(requirement.name) in prune:
+            continue
+
+        if requirement.marker and not requirement.marker.evaluate(environment):
+            continue
+
+        requirement.marker = None
+        selected.append(str(requirement))
+
+    return selected
+
+
+def install_dependencies(dependencies, target, platform, python_version):
+    """
+    Install dependencies as wheels built for the Lambda platform.
+
+    :param dependencies (list): The dependency specifiers.
+    :param target (Path): The directory to install into.
+    :param platform (str): The wheel platform tag.
+    :param python_version (str): The Python version the wheels are for.
+    :return (None): Default 'None' returned.
+    """
+
+    if not dependencies:
+        return
+
+    subprocess.run(  # nosec B603
+        [
+            sys.executable,
+            "-m",
+            "pip",
+            "install",
+            "--quiet",
+            "--target",
+            str(target),
+            "--platform",
+            platform,
+            "--implementation",
+            "cp",
+            "--python-version",
+            python_version,
+            "--only-binary=:all:",
+            "--upgrade",
+            *dependencies,
+        ],
+        check=True,
+    )
+
+
+def prune_distributions(target, names):
+    """
+    Remove installed distributions and every file they installed.
+
+    :param target (Path): The directory the distributions are installed in.
+    :param names (set): The normalized names of the distributions to remove.
+    :return (list): The names of the distributions removed.
+    """
+
+    removed = []
+
+    for dist_info in sorted(target.glob("*.dist-info")):
+        name = normalize(dist_info.name[: -len(".dist-info")].rsplit("-", 1)[0])
+
+        if name not in names:
+            continue
+
+        record = dist_info / "RECORD"
+        for line in record.read_text(encoding="utf-8").splitlines():
+            path = target / line.split(",")[0]
+            if path.is_file():
+                path.unlink()
+
+        shutil.rmtree(dist_info, ignore_errors=True)
+        removed.append(name)
+
+    # drop the package directories the removed files leave empty
+    for path in sorted(target.rglob("*"), key=lambda p: len(p.parts), reverse=True):
+        if path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+
+    return removed
+
+
+def strip_files(target):
+    """
+    Remove tests, caches, type stubs, sources of compiled extensions and unused metadata.
+
+    Only each distribution's METADATA and entry points are kept, so
+    importlib.metadata still finds its version.
+
+    :param target (Path): The directory the dependencies are installed in.
+    :return (int): The number of files removed.
+    """
+
+    removed = 0
+
+    for path in sorted(target.rglob("*"), key=lambda p: len(p.parts), reverse=True):
+        if not path.exists():
+            continue
+
+        if path.is_dir() and path.name in STRIP_DIRS:
+            removed += sum(1 for p in path.rglob("*") if p.is_file())
+            shutil.rmtree(path)
+        elif path.is_file() and (
+            path.suffix in STRIP_SUFFIXES
+            or (path.parent.suffix == ".dist-info" and path.name not in KEEP_METADATA)
+        ):
+            path.unlink()
+            removed += 1
+
+    # the bin directory holds console scripts, which cannot run in Lambda
+    if (target / "bin").is_dir():
+        shutil.rmtree(target / "bin")
+
+    return removed
+
+
+def compile_bytecode(target, strip_sources=False):
+    """
+    Precompile every module so imports do not compile them at cold start.
+
+    Lambda's /var/task is read-only, so without precompiled bytecode every
+    cold start compiles every module it imports.  Unchecked hash-based .pyc
+    files are used because zip archives do not keep exact source timestamps.
+
+    :param target (Path): The directory to compile.
+    :param strip_sources (bool, optional): Whether to replace each .py with its .pyc. Defaults to False.
+    :return (None): Default 'None' returned.
+    """
+
+    compileall.compile_dir(
+        target,
+        quiet=1,
+        legacy=strip_sources,
+        invalidation_mode=compileall.py_compile.PycInvalidationMode.UNCHECKED_HASH,
+    )
+
+    if strip_sources:
+        for path in target.rglob("*.py"):
+            if path.with_suffix(".pyc").exists():
+                path.unlink()
+
+
+def write_zip(source, output):
+    """
+    Write a directory to a zip archive, in a fixed order and with fixed timestamps.
+
+    :param source (Path): The directory.
+    :param output (Path): The zip archive.
+    :return (None): Default 'None' returned.
+    """
+
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for path in sorted(source.rglob("*")):
+            if path.is_file():
+                info = zipfile.ZipInfo(
+                    path.relative_to(source).as_posix(), date_time=ZIP_DATE_TIME
+                )
+                info.external_attr = 0o644 << 16
+                info.compress_type = zipfile.ZIP_DEFLATED
+                zf.writestr(info, path.read_bytes(), compresslevel=9)
+
+
+def measure(zip_path, module, runs):
+    """
+    Measure a package's size and the time a fresh interpreter takes to import its handler.
+
+    Each import runs with bytecode writes turned off, as on Lambda's read-only
+    file system, and any distribution not in the package (such as a pruned
+    boto3) comes from this interpreter's environment, as it would from the
+    Lambda runtime.
+
+    :param zip_path (Path): The zip archive.
+    :param module (str): The handler module, e.g. 'consumer.lambda_function'.
+    :param runs (int): The number of imports to time.
+    :return (dict): The zip size, unzipped size, file count and median import time.
+    """
+
+    with zipfile.ZipFile(zip_path) as zf:
+        infos = zf.infolist()
+
+        with tempfile.TemporaryDirectory() as extract_dir:
+            zf.extractall(extract_dir)  # nosec B202
+
+            code = (
+                "import time; start = time.perf_counter(); "
+                f"import {module}; print(time.perf_counter() - start)"
+            )
+            env = {
+                **os.environ,
+                "PYTHONPATH": extract_dir,
+                "PYTHONDONTWRITEBYTECODE": "1",
+            }
+            env.pop("AWS_LAMBDA_FUNCTION_NAME", None)
+            times = []
+
+            for _ in range(runs):
+                result = subprocess.run(  # nosec B603
+                    [sys.executable, "-c", code],
+                    env=env,
+                    cwd=extract_dir,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                times.append(float(result.stdout.strip()))
+
+    return {
+        "zip_bytes": zip_path.stat().st_size,
+        "unzipped_bytes": sum(info.file_size for info in infos),
+        "files": len(infos),
+        "import_ms": statistics.median(times) * 1000,
+    }
+
+
+def print_report(results):
+    """
+    Print the size and import time of each package variant.
+
+    :param results (dict): The measurements of each variant, keyed by zip path.
+    :return (None): Default 'None' returned.
+    """
+
+    print(
+        f"{'package':<30} {'zip KB':>9} {'unzipped KB':>12} {'files':>7} {'import ms':>10}"
+    )
+
+    for name, result in results.items():
+        print(
+            f"{name:<30} {result['zip_bytes'] / 1024:>9.1f} "
+            f"{result['unzipped_bytes'] / 1024:>12.1f} {result['files']:>7} "
+            f"{result['import_ms']:>10.1f}"
+        )
+
+
+def main():
+    """
+    Main function to build a slim Lambda package and report on it.
+    """
+
+    # parse the command line arguments
+    parser = argparse.ArgumentParser(
+        description="Build a slim Lambda package: runtime-provided and unused "
+        "distributions pruned, tests and metadata stripped, bytecode precompiled."
+    )
+    parser.add_argument(
+        "--lambda-dir",
+        type=Path,
+        default=Path.cwd(),
+        help="The Lambda function's directory; defaults to the current directory",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("package.zip"),
+        help="The zip archive to write, relative to the Lambda function's directory",
+    )
+    parser.add_argument(
+        "--arch", choices=sorted(PLATFORMS), default="x86_64", help="The architecture"
+    )
+    parser.add_argument(
+        "--python-version",
+        default=TARGET_PYTHON,
+        help="The Python version of the Lambda runtime",
+    )
+    parser.add_argument(
+        "--prune",
+        nargs="*",
+        default=[],
+        help="More distributions to leave out, e.g. ones only used by tests",
+    )
+    parser.add_argument(
+        "--keep-provided",
+        action="store_true",
+        help="Bundle boto3 and the other runtime-provided distributions, to pin their versions",
+    )
+    parser.add_argument(
+        "--strip-sources",
+        action="store_true",
+        help="Ship only bytecode; smaller, but tracebacks lose their source lines",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        nargs="*",
+        default=[],
+        help="Other packages of the same function to include in the report",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="The number of cold imports to time"
+    )
+    args = parser.parse_args()
+
+    lambda_dir = args.lambda_dir.resolve()
+    output = lambda_dir / args.output
+    package_dir, dependencies = read_project(lambda_dir)
+
+    prune = {normalize(name) for name in args.prune}
+    if not args.keep_provided:
+        prune |= RUNTIME_PROVIDED
+
+    # runtime-provided distributions are not installed at all when they are
+    # direct dependencies, and removed when something else pulls them in
+    dependencies = select_dependencies(dependencies, args.python_version, prune)
+
+    with tempfile.TemporaryDirectory() as build_dir:
+        build_dir = Path(build_dir)
+
+        install_dependencies(
+            dependencies, build_dir, PLATFORMS[args.arch], args.python_version
+        )
+        pruned = prune_distributions(build_dir, prune)
+        stripped = strip_files(build_dir)
+
+        shutil.copytree(
+            package_dir,
+            build_dir / package_dir.name,
+            ignore=shutil.ignore_patterns("__pycache__", "*.pyc"),
+        )
+
+        # bytecode is specific to a Python version, so it is only worth
+        # shipping when it is compiled by the runtime's version
+        running = f"{sys.version_info.major}.{sys.version_info.minor}"
+        if running == args.python_version:
+            compile_bytecode(build_dir, args.strip_sources)
+        else:
+            print(
+                f"Warning: not precompiling bytecode; Python {running} is running "
+                f"but the runtime is Python {args.python_version}.",
+                file=sys.stderr,
+            )
+
+        output.unlink(missing_ok=True)
+        write_zip(build_dir, output)
+
+    print(f"Wrote '{output}'.")
+    print(f"Pruned: {', '.join(pruned) or 'nothing'}; stripped {stripped} file(s).")
+    print()
+
+    module = f"{package_dir.name}.lambda_function"
+    results = {
+        str(path): measure(lambda_dir / path, module, args.runs)
+        for path in (*args.compare, args.output)
+    }
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
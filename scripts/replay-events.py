@@ -0,0 +1,364 @@
+# Python Standard Library imports
+import argparse
+import contextlib
+import gzip
+import importlib
+import json
+import os
+import sys
+import time
+
+from pathlib import Path
+from urllib.parse import unquote_plus
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SOURCES = ("producer", "consumer")
+REGION = "us-west-2"
+
+
+def read_corpus(paths):
+    """
+    Read captured events from corpus files.
+
+    :param paths (list): Files (.jsonl or .jsonl.gz) or directories searched for them.
+    :return (generator): The captured lines, each a dict with 'source', 'captured_at' and 'event'.
+    """
+
+    for path in map(Path, paths):
+        files = sorted(path.rglob("*.jsonl*")) if path.is_dir() else [path]
+
+        for file in files:
+            opener = gzip.open if file.suffix == ".gz" else open
+
+            with opener(file, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+def percentile(values, pct):
+    """
+    Get a percentile of some values using the nearest-rank method.
+
+    :param values (list): The values, sorted in ascending order.
+    :param pct (float): The percentile, between 0 and 100.
+    :return (float): The percentile value, or None if there are no values.
+    """
+
+    if not values:
+        return None
+
+    rank = max(1, -(-len(values) * pct // 100))  # ceiling division
+
+    return values[int(rank) - 1]
+
+
+def setup_consumer_backend(events):
+    """
+    Create the stand-in output bucket and dead-letter queue and point the consumer's settings at them.
+
+    :param events (list): The captured consumer events.
+    :return (None): Default 'None' returned.
+    """
+
+    import boto3
+
+    queue_arns = {
+        record.get("eventSourceARN")
+        for event in events
+        for record in event.get("Records", [])
+        if isinstance(record, dict) and record.get("eventSourceARN")
+    }
+
+    boto3.client("s3", region_name=REGION).create_bucket(
+        Bucket="replay-output",
+        CreateBucketConfiguration={"LocationConstraint": REGION},
+    )
+
+    # poison messages are quarantined to one stand-in dead-letter queue
+    dlq_url = boto3.client("sqs", region_name=REGION).create_queue(
+        QueueName="replay-dlq"
+    )["QueueUrl"]
+
+    os.environ["OUTPUT_BUCKET_NAME"] = "replay-output"
+    os.environ["QUEUE_ARN"] = ",".join(sorted(queue_arns)) or "replay-queue"
+    os.environ["DLQ_URL"] = ",".join([dlq_url] * max(len(queue_arns), 1))
+
+
+def stand_in_content(key, size):
+    """
+    Build the content of a stand-in input object of about the size given in its notification.
+
+    An object the producer splits into many documents, going by its key, is
+    filled with documents of about 1 KB; any other object is one document.
+
+    :param key (str): The object key.
+    :param size (int): The object size.
+    :return (str): The content.
+    """
+
+    from producer.documents import JSON_LINES
+    from producer.documents import get_document_format
+
+    document_format = get_document_format(key)
+
+    if document_format is None:
+        padding = "x" * max(0, size - len('{"text": ""}'))
+        return json.dumps({"text": padding})
+
+    document = json.dumps({"text": "x" * 1000})
+    documents = [document] * max(1, size // (len(document) + 1))
+
+    if document_format == JSON_LINES:
+        return "\n".join(documents) + "\n"
+
+    return "[" + ",".join(documents) + "]"
+
+
+def setup_producer_backend(events):
+    """
+    Create the stand-in input objects and queue and point the producer's settings at them.
+
+    Object contents are not captured, so each object is filled with JSON
+    documents of the size given in its notification.  The producer's handler
+    must be loaded first.
+
+    :param events (list): The captured producer events.
+    :return (None): Default 'None' returned.
+    """
+
+    import boto3
+
+    s3 = boto3.client("s3", region_name=REGION)
+    sqs = boto3.client("sqs", region_name=REGION)
+    buckets = set()
+
+    for event in events:
+        for record in event.get("Records", []):
+            try:
+                bucket_name = record["s3"]["bucket"]["name"]
+                key = unquote_plus(record["s3"]["object"]["key"])
+                size = record["s3"]["object"].get("size", 0)
+            except (KeyError, TypeError):
+                continue
+
+            if bucket_name not in buckets:
+                s3.create_bucket(
+                    Bucket=bucket_name,
+                    CreateBucketConfiguration={"LocationConstraint": REGION},
+                )
+                buckets.add(bucket_name)
+
+            s3.put_object(Bucket=bucket_name, Key=key, Body=stand_in_content(key, size))
+
+    os.environ["INPUT_BUCKET_NAME"] = sorted(buckets)[0] if buckets else "replay-input"
+    os.environ["QUEUE_URL"] = sqs.create_queue(QueueName="replay-queue")["QueueUrl"]
+
+
+def load_handler(source):
+    """
+    Import a Lambda function's handler from its source directory.
+
+    :param source (str): 'producer' or 'consumer'.
+    :return (callable): The handler.
+    """
+
+    sys.path.insert(0, str(REPO_ROOT / "lambdas" / source / "src"))
+
+    return importlib.import_module(f"{source}.lambda_function").lambda_handler
+
+
+def replay(handler, lines, timing="fast", speed=1.0, repeat=1, quiet=True):
+    """
+    Feed captured events to a handler and time each invocation.
+
+    :param handler (callable): The Lambda handler.
+    :param lines (list): The captured lines, in the order they were captured.
+    :param timing (str, optional): 'fast' to replay back to back, or 'recorded' to keep the captured spacing. Defaults to 'fast'.
+    :param speed (float, optional): How much faster than recorded to replay with 'recorded' timing. Defaults to 1.
+    :param repeat (int, optional): How many times to replay the corpus. Defaults to 1.
+    :param quiet (bool, optional): Whether to discard the handler's logs and metrics. Defaults to True.
+    :return (dict): The invocation latencies in seconds, record, error and failed record counts, and elapsed time.
+    """
+
+    # events are copied for each invocation, since the consumer drains them
+    encoded = [json.dumps(line["event"]) for line in lines]
+    first_captured_at = lines[0].get("captured_at", 0)
+
+    latencies = []
+    records = 0
+    errors = 0
+    failed_records = 0
+    devnull = open(os.devnull, "w")
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        pass_start = time.perf_counter()
+
+        for line, event_json in zip(lines, encoded):
+            if timing == "recorded":
+                due = (line.get("captured_at", 0) - first_captured_at) / speed
+                delay = due - (time.perf_counter() - pass_start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            event = json.loads(event_json)
+            records += len(event.get("Records", []))
+            invoked = time.perf_counter()
+
+            try:
+                with contextlib.redirect_stdout(devnull if quiet else sys.stdout):
+                    result = handler(event, None)
+            except Exception:
+                errors += 1
+            else:
+                # the consumer reports records it could not process in its
+                # response rather than by raising
+                if isinstance(result, dict):
+                    failed_records += len(result.get("batchItemFailures", []))
+
+            latencies.append(time.perf_counter() - invoked)
+
+    devnull.close()
+
+    return {
+        "latencies": latencies,
+        "records": records,
+        "errors": errors,
+        "failed_records": failed_records,
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+def print_report(source, result):
+    """
+    Print the throughput and latency of a replay.
+
+    :param source (str): 'producer' or 'consumer'.
+    :param result (dict): The result of replay().
+    :return (None): Default 'None' returned.
+    """
+
+    latencies = sorted(result["latencies"])
+    elapsed = result["elapsed"]
+
+    print(f"source:      {source}")
+    print(f"invocations: {len(latencies)} ({result['errors']} failed)")
+    print(f"records:     {result['records']} ({result['failed_records']} failed)")
+    print(f"elapsed:     {elapsed:.3f} s")
+    print(f"throughput:  {len(latencies) / elapsed:.1f} invocations/s")
+    print(f"             {result['records'] / elapsed:.1f} records/s")
+
+    for pct in (50, 90, 99, 100):
+        label = "max" if pct == 100 else f"p{pct}"
+        print(f"latency {label:<4} {percentile(latencies, pct) * 1000:.2f} ms")
+
+
+def main():
+    """
+    Main function to replay captured events against local handlers.
+    """
+
+    # parse the command line arguments
+    parser = argparse.ArgumentParser(
+        description="Replay captured Lambda events against a handler and a stand-in AWS backend."
+    )
+    parser.add_argument(
+        "corpus",
+        nargs="+",
+        help="Capture files (.jsonl or .jsonl.gz), or directories containing them",
+    )
+    parser.add_argument(
+        "--source",
+        choices=SOURCES,
+        help="The handler to replay; defaults to the source of the first captured event",
+    )
+    parser.add_argument(
+        "--timing",
+        choices=("fast", "recorded"),
+        default="fast",
+        help="Replay back to back, or with the spacing the events were captured with",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="How much faster than recorded to replay with --timing recorded",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="How many times to replay the corpus"
+    )
+    parser.add_argument(
+        "--faults",
+        nargs="?",
+        const="config",
+        help="Inject latency, throttling and timeouts into the handler's AWS calls, "
+        "using the settings in the function's config or those in a JSON file",
+    )
+    parser.add_argument(
+        "--sink",
+        choices=("s3", "local", "stdout", "null"),
+        help="Where the consumer writes its outputs; 'null' measures processing "
+        "without I/O.  Defaults to the sink in the consumer's config",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show the handlers' logs and metrics"
+    )
+    args = parser.parse_args()
+
+    lines = list(read_corpus(args.corpus))
+
+    if not lines:
+        raise SystemExit("No captured events found.")
+
+    source = args.source or lines[0]["source"]
+    lines = sorted(
+        (line for line in lines if line["source"] == source),
+        key=lambda line: line.get("captured_at", 0),
+    )
+
+    # the stand-in backend needs no AWS account, and settings come from the
+    # environment instead of SSM
+    os.environ.update(
+        {
+            "AWS_ACCESS_KEY_ID": "testing",
+            "AWS_SECRET_ACCESS_KEY": "testing",  # nosec B105
+            "AWS_SESSION_TOKEN": "testing",
+            "AWS_DEFAULT_REGION": REGION,
+            "CONFIG_PROVIDER": "env",
+            "CAPTURE_SAMPLE_RATE": "0",
+        }
+    )
+    if args.faults == "config":
+        os.environ["FAULT_INJECTION"] = "1"
+    elif args.faults:
+        os.environ["FAULT_INJECTION"] = Path(args.faults).read_text()
+    if args.sink:
+        os.environ["OUTPUT_SINK"] = args.sink
+    if not args.verbose:
+        os.environ["POWERTOOLS_LOG_LEVEL"] = "CRITICAL"
+
+    from moto import mock_aws
+
+    with mock_aws():
+        handler = load_handler(source)
+
+        events = [line["event"] for line in lines]
+        if source == "consumer":
+            setup_consumer_backend(events)
+        else:
+            setup_producer_backend(events)
+        result = replay(
+            handler,
+            lines,
+            args.timing,
+            args.speed,
+            args.repeat,
+            quiet=not args.verbose,
+        )
+
+    print_report(source, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# Python Standard Library imports
+import argparse
+import json
+import os
+import sys
+import time
+
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def main():
+    """
+    Main function to send local files or JSON lines to SQS through the producer's pipeline.
+    """
+
+    # parse the command line arguments
+    parser = argparse.ArgumentParser(
+        description="Send local JSON files, or JSON lines from standard input, "
+        "to SQS through the producer's validate, route and enqueue pipeline."
+    )
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument(
+        "--directory", type=Path, help="Send the files under this directory"
+    )
+    source_group.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Send each line of standard input as a message",
+    )
+    parser.add_argument(
+        "--pattern",
+        default="**/*.json",
+        help="The glob pattern of the files to send from --directory",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep sending new and changed files under --directory",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between scans of the directory with --watch",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        help="Stop watching after this many seconds without new files",
+    )
+    parser.add_argument(
+        "--queue-url",
+        nargs="+",
+        help="The SQS queues to spread messages over; defaults to the 'queue-url' setting",
+    )
+    parser.add_argument(
+        "--priority-queue-url",
+        nargs="+",
+        help="The priority lane SQS queues; defaults to the 'priority-queue-url' setting",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show the pipeline's per-message logs"
+    )
+    args = parser.parse_args()
+
+    if not args.verbose:
+        os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+
+    # the producer is imported from its source directory, as the handler would be
+    sys.path.insert(0, str(REPO_ROOT / "lambdas" / "producer" / "src"))
+
+    from producer.clients import make_client
+    from producer.filters import get_object_filter
+    from producer.lambda_function import build_pipeline
+    from producer.resilience import client_config
+    from producer.settings import get_settings
+    from producer.settings import parse_list_param
+    from producer.sources import DirectorySource
+    from producer.sources import JsonLinesSource
+
+    queue_urls = args.queue_url
+    priority_queue_urls = args.priority_queue_url
+
+    if queue_urls is None:
+        settings = get_settings()
+        queue_urls = parse_list_param(settings["queue-url"])
+
+        if priority_queue_urls is None:
+            priority_queue_urls = parse_list_param(
+                settings.get("priority-queue-url", "")
+            )
+
+    if args.stdin:
+        source = JsonLinesSource()
+    else:
+        source = DirectorySource(
+            args.directory,
+            args.pattern,
+            get_object_filter(),
+            watch=args.watch,
+            poll_interval=args.poll_interval,
+            idle_timeout=args.idle_timeout,
+        )
+
+    pipeline = build_pipeline(
+        source,
+        queue_urls,
+        make_client("sqs", config=client_config),
+        priority_queue_urls=priority_queue_urls,
+    )
+
+    start = time.perf_counter()
+    sent = 0
+
+    try:
+        for _ in pipeline.run(source):
+            sent += 1
+    except KeyboardInterrupt:
+        pass
+
+    elapsed = time.perf_counter() - start
+
+    print(f"Sent {sent} message(s) in {elapsed:.2f}s ({sent / elapsed:.1f}/s).")
+    print(json.dumps(pipeline.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
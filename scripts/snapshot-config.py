@@ -0,0 +1,63 @@
+# Python Standard Library imports
+import argparse
+import json
+
+# Third-party library imports
+import boto3
+
+
+def get_ssm_params(path, region_name):
+    """
+    Retrieves all parameters under a given path from AWS SSM Parameter Store.
+
+    :param path (str): The hierarchy for the parameters. Hierarchies start with a forward slash (/).
+    :param region_name (str): The AWS region to connect to.
+    :return (dict): The parameter values keyed by name, relative to the path.
+    """
+
+    client = boto3.client("ssm", region_name=region_name)
+    paginator = client.get_paginator("get_parameters_by_path")
+    parameters = {}
+
+    for page in paginator.paginate(Path=path, Recursive=True, WithDecryption=True):
+        for parameter in page["Parameters"]:
+            parameters[parameter["Name"][len(path) :].lstrip("/")] = parameter["Value"]
+
+    return parameters
+
+
+def main():
+    """
+    Main function to write a snapshot of SSM parameters for a Lambda package.
+    """
+
+    # parse the command line arguments
+    parser = argparse.ArgumentParser(
+        description="Write SSM Parameter Store parameters to a JSON snapshot file."
+    )
+    parser.add_argument(
+        "output_file",
+        type=str,
+        help="The snapshot file, e.g. lambdas/consumer/src/consumer/config_snapshot.json",
+    )
+    parser.add_argument(
+        "--path", type=str, default="/sqs-simple-example", help="The SSM path"
+    )
+    parser.add_argument(
+        "--region", type=str, default="us-west-2", help="The AWS region of the SSM path"
+    )
+    args = parser.parse_args()
+
+    parameters = get_ssm_params(args.path, args.region)
+
+    if not parameters:
+        raise SystemExit(f"No parameters found under path '{args.path}'.")
+
+    with open(args.output_file, "w", encoding="utf-8") as f:
+        json.dump(parameters, f, indent=2, sort_keys=True)
+
+    print(f"Wrote {len(parameters)} parameter(s) to '{args.output_file}'.")
+
+
+if __name__ == "__main__":
+    main()
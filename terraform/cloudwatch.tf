@@ -1,5 +1,7 @@
 resource "aws_cloudwatch_metric_alarm" "dlq_new_message" {
-  alarm_name          = "${var.project_name}-dlq-new-message"
+  for_each = toset(local.all_queue_names)
+
+  alarm_name          = "${each.key}-dlq-new-message"
   alarm_description   = "Alarm when there are new messages in the DLQ"
   comparison_operator = "GreaterThanThreshold"
   evaluation_periods  = "1"
@@ -10,7 +12,7 @@ resource "aws_cloudwatch_metric_alarm" "dlq_new_message" {
   threshold           = "0"
 
   dimensions = {
-    QueueName = module.sqs.dead_letter_queue_name
+    QueueName = module.sqs[each.key].dead_letter_queue_name
   }
 
   alarm_actions             = [aws_sns_topic.alerts.arn]
@@ -19,7 +21,9 @@ resource "aws_cloudwatch_metric_alarm" "dlq_new_message" {
 }
 
 resource "aws_cloudwatch_metric_alarm" "queue_old_message" {
-  alarm_name          = "${var.project_name}-queue-old-message"
+  for_each = toset(local.all_queue_names)
+
+  alarm_name          = "${each.key}-queue-old-message"
   alarm_description   = "Alarm when there are old messages in the queue"
   comparison_operator = "GreaterThanThreshold"
   evaluation_periods  = "1"
@@ -30,7 +34,7 @@ resource "aws_cloudwatch_metric_alarm" "queue_old_message" {
   threshold           = "3600" # 1 hour in seconds
 
   dimensions = {
-    QueueName = module.sqs.queue_name
+    QueueName = module.sqs[each.key].queue_name
   }
 
   alarm_actions             = [aws_sns_topic.alerts.arn]
@@ -38,6 +42,16 @@ resource "aws_cloudwatch_metric_alarm" "queue_old_message" {
   insufficient_data_actions = []
 }
 
+moved {
+  from = aws_cloudwatch_metric_alarm.dlq_new_message
+  to   = aws_cloudwatch_metric_alarm.dlq_new_message["sqs-simple-example"]
+}
+
+moved {
+  from = aws_cloudwatch_metric_alarm.queue_old_message
+  to   = aws_cloudwatch_metric_alarm.queue_old_message["sqs-simple-example"]
+}
+
 resource "aws_cloudwatch_metric_alarm" "lambda_throttle" {
   for_each = toset([
     module.lambda_sqs_producer.lambda_function_name,
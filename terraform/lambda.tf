@@ -7,6 +7,7 @@ module "lambda_sqs_producer" {
   handler       = "producer/lambda_function.lambda_handler"
   runtime       = "python3.13"
   memory_size   = var.lambda_memory
+  timeout       = var.lambda_timeout
 
   create_package         = false
   local_existing_package = "../lambdas/producer/package.zip"
@@ -29,9 +30,12 @@ module "lambda_sqs_producer" {
       ]
     }
 
+    # object tags hold the fan-out checkpoints of multi-document objects
     s3_access = {
       actions = [
         "s3:GetObject",
+        "s3:GetObjectTagging",
+        "s3:PutObjectTagging",
         "s3:ListBucket"
       ]
 
@@ -43,11 +47,20 @@ module "lambda_sqs_producer" {
 
     sqs_access = {
       actions = [
-        "sqs:SendMessage"
+        "sqs:SendMessage",
+        "sqs:GetQueueAttributes"
+      ]
+
+      resources = [for queue in module.sqs : queue.queue_arn]
+    }
+
+    capture_access = {
+      actions = [
+        "s3:PutObject"
       ]
 
       resources = [
-        module.sqs.queue_arn
+        "${module.s3_bucket["capture"].s3_bucket_arn}/captures/producer/*"
       ]
     }
   }
@@ -76,6 +89,7 @@ module "lambda_sqs_consumer" {
   handler       = "consumer/lambda_function.lambda_handler"
   runtime       = "python3.13"
   memory_size   = var.lambda_memory
+  timeout       = var.lambda_timeout
 
   create_package         = false
   local_existing_package = "../lambdas/consumer/package.zip"
@@ -105,14 +119,23 @@ module "lambda_sqs_consumer" {
         "sqs:ReceiveMessage"
       ]
 
-      resources = [
-        module.sqs.queue_arn
+      resources = [for queue in module.sqs : queue.queue_arn]
+    }
+
+    # poison messages are quarantined to the dead-letter queues directly
+    dlq_access = {
+      actions = [
+        "sqs:SendMessage"
       ]
+
+      resources = [for queue in module.sqs : queue.dead_letter_queue_arn]
     }
 
     s3_access = {
       actions = [
         "s3:PutObject",
+        "s3:AbortMultipartUpload",
+        "s3:GetObject",
         "s3:ListBucket"
       ]
 
@@ -121,24 +144,57 @@ module "lambda_sqs_consumer" {
         "${module.s3_bucket["output"].s3_bucket_arn}/*"
       ]
     }
+
+    capture_access = {
+      actions = [
+        "s3:PutObject"
+      ]
+
+      resources = [
+        "${module.s3_bucket["capture"].s3_bucket_arn}/captures/consumer/*"
+      ]
+    }
   }
 
   attach_policy_statements = true
 
-  event_source_mapping = {
-    sqs = {
-      event_source_arn        = module.sqs.queue_arn
-      function_response_types = ["ReportBatchItemFailures"]
-
-      scaling_config = {
-        maximum_concurrency = var.sqs_max_lambda_invocations
+  # one mapping per queue; the first bulk shard keeps the 'sqs' key it had
+  # before there were shards.  Each lane has its own batching settings and
+  # concurrency, so bulk batches cannot use up the priority lane's consumers
+  event_source_mapping = merge(
+    {
+      for name in local.queue_names : (name == var.project_name ? "sqs" : name) => {
+        event_source_arn                   = module.sqs[name].queue_arn
+        function_response_types            = ["ReportBatchItemFailures"]
+        batch_size                         = var.bulk_lane.batch_size
+        maximum_batching_window_in_seconds = var.bulk_lane.maximum_batching_window
+
+        scaling_config = {
+          maximum_concurrency = var.sqs_max_lambda_invocations
+        }
+
+        metrics_config = {
+          metrics = ["EventCount"]
+        }
       }
-
-      metrics_config = {
-        metrics = ["EventCount"]
+    },
+    {
+      for name in local.priority_queue_names : "priority" => {
+        event_source_arn                   = module.sqs[name].queue_arn
+        function_response_types            = ["ReportBatchItemFailures"]
+        batch_size                         = var.priority_lane.batch_size
+        maximum_batching_window_in_seconds = var.priority_lane.maximum_batching_window
+
+        scaling_config = {
+          maximum_concurrency = var.priority_lane.maximum_concurrency
+        }
+
+        metrics_config = {
+          metrics = ["EventCount"]
+        }
       }
     }
-  }
+  )
 
   cloudwatch_logs_retention_in_days = var.lambda_logs_retention_days
 
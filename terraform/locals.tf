@@ -1,5 +1,16 @@
 locals {
-  buckets = toset(["input", "output"])
+  # the capture bucket holds sampled events for scripts/replay-events.py
+  buckets = toset(["input", "output", "capture"])
+
+  # the first queue keeps the project name so adding shards leaves it in place;
+  # the order of this list is the order the producer hashes keys over
+  queue_names = [
+    for i in range(var.queue_shards) : i == 0 ? var.project_name : "${var.project_name}-${i}"
+  ]
+
+  # the priority lane has a single queue of its own
+  priority_queue_names = var.priority_lane.enabled ? ["${var.project_name}-priority"] : []
+  all_queue_names      = concat(local.queue_names, local.priority_queue_names)
 
   # With merge(), if the same key is defined in both dictionaries, then the one
   # that is later in the argument sequence takes precedence.  Since the Project
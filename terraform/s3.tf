@@ -1,4 +1,4 @@
-# create "input" and an "output" buckets
+# create the "input", "output" and "capture" buckets
 module "s3_bucket" {
   for_each = local.buckets
 
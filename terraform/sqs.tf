@@ -2,7 +2,9 @@ module "sqs" {
   source  = "terraform-aws-modules/sqs/aws"
   version = "4.3.1"
 
-  name                       = var.project_name
+  for_each = toset(local.all_queue_names)
+
+  name                       = each.key
   kms_master_key_id          = "alias/aws/sqs"
   visibility_timeout_seconds = var.visibility_timeout
 
@@ -15,3 +17,10 @@ module "sqs" {
 
   tags = local.tags
 }
+
+# keep the queue deployed before there were shards as the first shard; moved
+# blocks need a literal key, which is the default project_name
+moved {
+  from = module.sqs
+  to   = module.sqs["sqs-simple-example"]
+}
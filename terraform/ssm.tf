@@ -1,9 +1,9 @@
 resource "aws_ssm_parameter" "queue_url" {
   #checkov:skip=CKV2_AWS_34:parameter not sensitive, no need to encrypt
   name        = "/${var.project_name}/queue-url"
-  description = "The URL of the SQS queue"
+  description = "The URLs of the SQS queues, comma-separated"
   type        = "String"
-  value       = module.sqs.queue_url
+  value       = join(",", [for name in local.queue_names : module.sqs[name].queue_url])
 
   tags = local.tags
 }
@@ -11,9 +11,31 @@ resource "aws_ssm_parameter" "queue_url" {
 resource "aws_ssm_parameter" "queue_arn" {
   #checkov:skip=CKV2_AWS_34:parameter not sensitive, no need to encrypt
   name        = "/${var.project_name}/queue-arn"
-  description = "The ARN of the SQS queue"
+  description = "The ARNs of the SQS queues of every lane, comma-separated"
   type        = "String"
-  value       = module.sqs.queue_arn
+  value       = join(",", [for name in local.all_queue_names : module.sqs[name].queue_arn])
+
+  tags = local.tags
+}
+
+resource "aws_ssm_parameter" "dlq_url" {
+  #checkov:skip=CKV2_AWS_34:parameter not sensitive, no need to encrypt
+  name        = "/${var.project_name}/dlq-url"
+  description = "The URLs of the dead-letter queues, in the order of queue-arn, comma-separated"
+  type        = "String"
+  value       = join(",", [for name in local.all_queue_names : module.sqs[name].dead_letter_queue_url])
+
+  tags = local.tags
+}
+
+resource "aws_ssm_parameter" "priority_queue_url" {
+  #checkov:skip=CKV2_AWS_34:parameter not sensitive, no need to encrypt
+  count = var.priority_lane.enabled ? 1 : 0
+
+  name        = "/${var.project_name}/priority-queue-url"
+  description = "The URL of the priority lane SQS queue"
+  type        = "String"
+  value       = module.sqs[local.priority_queue_names[0]].queue_url
 
   tags = local.tags
 }
@@ -25,8 +25,14 @@ variable "lambda_memory" {
   default     = 256
 }
 
+variable "lambda_timeout" {
+  description = "The timeout of the Lambda functions in seconds; the consumer stops taking on records a few seconds before it"
+  type        = number
+  default     = 30
+}
+
 variable "sqs_max_lambda_invocations" {
-  description = "Limits number of concurrent Lambda executions that SQS event source can invoke."
+  description = "Limits number of concurrent Lambda executions that each bulk lane SQS event source can invoke."
   type        = number
   default     = 20
 }
@@ -37,6 +43,47 @@ variable "lambda_logs_retention_days" {
   default     = 1 # Not keeping logs since this is just an example
 }
 
+variable "queue_shards" {
+  description = "The number of SQS queues messages are spread over; each queue has its own DLQ and event source mapping"
+  type        = number
+  default     = 1
+
+  validation {
+    condition     = var.queue_shards >= 1
+    error_message = "At least one queue shard is required."
+  }
+}
+
+variable "bulk_lane" {
+  description = "Batching settings of the consumer's event source mappings for the bulk lane queues"
+  type = object({
+    batch_size              = number
+    maximum_batching_window = number # seconds
+  })
+
+  default = {
+    batch_size              = 10
+    maximum_batching_window = 0
+  }
+}
+
+variable "priority_lane" {
+  description = "Whether to deploy a priority lane queue for small or urgent objects, and the batching and concurrency settings of its consumer event source mapping"
+  type = object({
+    enabled                 = bool
+    batch_size              = number
+    maximum_batching_window = number # seconds
+    maximum_concurrency     = number
+  })
+
+  default = {
+    enabled                 = false
+    batch_size              = 1
+    maximum_batching_window = 0
+    maximum_concurrency     = 10
+  }
+}
+
 variable "visibility_timeout" {
   description = "The visibility timeout for the SQS queue in seconds"
   type        = number